@@ -0,0 +1,374 @@
+"""Synthetic benchmarks for discovery, probing and the report writers.
+
+Builds (or reuses) a directory tree of empty files, then measures each hot
+path stage in its own spawned process so peak RSS is per stage:
+
+  walk     iter_video_files over the whole tree
+  probe    ProbeExecutor + probe_video against a stub ffprobe (see
+           fake_ffprobe.py) with configurable latency and failure rates
+  csv      CsvResultsWriter, one row per discovered file
+  script   ScriptWriter, one command per discovered file
+
+Each stage reports files/s, peak RSS and p50/p95/p99/max per-item latency.
+Results are written as JSON; pass --baseline to compare against an earlier
+run and exit non-zero on a throughput or tail-latency regression.
+
+  python -m benchmarks.bench --files 100000 --depth 3 --fanout 10 \\
+      --probe-files 2000 --latency-ms 20 --dist lognormal -o bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.csv_writer import CsvResultsWriter
+from video_codec_checker.histogram import LatencyHistogram, StageTimings
+from video_codec_checker.models import CsvRow, ProbeSettings
+from video_codec_checker.script_writer import ScriptWriter, TrashConfig
+from video_codec_checker.video_processor import iter_video_files, probe_video
+
+STUB_SOURCE = Path(__file__).with_name("fake_ffprobe.py")
+TREE_MARKER = ".vcc-bench-tree.json"
+
+VIDEO_EXTS = (".mkv", ".mp4", ".avi", ".wmv", ".mov")
+OTHER_EXTS = (".srt", ".nfo", ".jpg")
+
+Result = dict[str, Any]
+
+
+# ---- synthetic inputs ----
+
+
+def make_tree(
+    root: Path, files: int, depth: int, fanout: int, other_ratio: float = 0.1
+) -> Path:
+    """Create `files` empty files spread over fanout**depth leaf directories.
+
+    About `other_ratio` of them get non-video extensions so the walk's
+    extension filter is exercised. A marker records the parameters and a
+    matching tree is reused instead of rebuilt.
+    """
+    params = {
+        "files": files,
+        "depth": depth,
+        "fanout": fanout,
+        "other_ratio": other_ratio,
+    }
+    marker = root / TREE_MARKER
+    try:
+        if json.loads(marker.read_text()) == params:
+            return root
+    except (OSError, ValueError):
+        pass
+    leaves = [root]
+    for _ in range(depth):
+        leaves = [d / f"d{i:03d}" for d in leaves for i in range(fanout)]
+    for leaf in leaves:
+        leaf.mkdir(parents=True, exist_ok=True)
+    every_other = round(1 / other_ratio) if other_ratio > 0 else 0
+    for i in range(files):
+        if every_other and i % every_other == every_other - 1:
+            ext = OTHER_EXTS[i % len(OTHER_EXTS)]
+        else:
+            ext = VIDEO_EXTS[i % len(VIDEO_EXTS)]
+        fd = os.open(leaves[i % len(leaves)] / f"f{i:07d}{ext}", os.O_CREAT, 0o644)
+        os.close(fd)
+    marker.write_text(json.dumps(params))
+    return root
+
+
+def install_stub(bin_dir: Path) -> Path:
+    """Write an executable `ffprobe` into bin_dir that runs fake_ffprobe.py."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    stub = bin_dir / "ffprobe"
+    # -S skips site imports: the stub's start-up dominates at low latency
+    stub.write_text(f"#!{sys.executable} -S\n" + STUB_SOURCE.read_text())
+    stub.chmod(0o755)
+    return stub
+
+
+# ---- stages (each runs in a fresh process) ----
+
+
+def _peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _summary(count: int, seconds: float, hist: LatencyHistogram) -> Result:
+    return {
+        "items": count,
+        "seconds": round(seconds, 4),
+        "files_per_s": round(count / seconds, 1) if seconds > 0 else 0.0,
+        "latency": hist.to_dict(),
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def stage_walk(root: str) -> Result:
+    timings = StageTimings()
+    t0 = time.perf_counter()
+    count = sum(1 for _ in timings.timed("walk", iter_video_files(root)))
+    return _summary(count, time.perf_counter() - t0, timings.overall["walk"])
+
+
+def stage_probe(
+    root: str, files: int, jobs: int, fast: bool, stub_env: dict[str, str]
+) -> Result:
+    os.environ.update(stub_env)
+    args = ProbeSettings(fast_probe=fast).args
+    executor = ProbeExecutor(jobs=jobs, ffprobe_args=args, probe_func=probe_video)
+    hist = LatencyHistogram()
+    failed = 0
+    t0 = time.perf_counter()
+    last = t0
+    # Inter-completion gaps: what a consumer of the result stream observes
+    for result in executor.run(islice(iter_video_files(root), files)):
+        now = time.perf_counter()
+        hist.record(now - last)
+        last = now
+        failed += result.codec is None
+    out = _summary(executor.stats.probed, time.perf_counter() - t0, hist)
+    out["failed"] = failed
+    out["jobs"] = executor.max_workers
+    out["fast_fallbacks"] = executor.stats.fast_fallbacks
+    out["per_probe"] = {
+        stage: data["all"] for stage, data in executor.stats.timings.to_dict().items()
+    }
+    return out
+
+
+def _rows(count: int) -> Any:
+    for i in range(count):
+        path = f"/srv/media/show{i % 97:02d}/season{i % 7}/episode{i:07d}.avi"
+        cmd = (
+            f"ffmpeg -y -i '{path}' -map_metadata -1 -map 0:v:0 -c:v libsvtav1 "
+            f"-preset 3 -crf 32 -map 0:a:0? -c:a libopus -b:a 128k "
+            f"'{path[:-4]}_av1.mkv'"
+        )
+        yield path, CsvRow(path, "mpeg4", 2, 0.0712, cmd, 123456789, 987654321, 1234.5)
+
+
+def _timed_writes(count: int, write: Callable[[str, CsvRow], None]) -> Result:
+    hist = LatencyHistogram()
+    clock = time.perf_counter
+    t0 = clock()
+    for path, row in _rows(count):
+        t = clock()
+        write(path, row)
+        hist.record(clock() - t)
+    return _summary(count, clock() - t0, hist)
+
+
+def stage_csv(out_dir: str, count: int) -> Result:
+    writer = CsvResultsWriter(Path(out_dir) / "bench.csv")
+    writer.open()
+    try:
+        return _timed_writes(count, lambda _p, row: writer.write_row_dc(row))
+    finally:
+        writer.close()
+
+
+def stage_script(out_dir: str, count: int) -> Result:
+    writer = ScriptWriter(
+        Path(out_dir) / "bench.sh",
+        delete_original=True,
+        trash_config=TrashConfig(False),
+    )
+    writer.open()
+    try:
+        return _timed_writes(
+            count,
+            lambda p, row: writer.write_command(
+                row.command, Path(p), Path(p[:-4] + "_av1.mkv")
+            ),
+        )
+    finally:
+        writer.close()
+
+
+def _isolated(fn: Callable[..., Result], *args: Any) -> Result:
+    """Run one stage in a freshly spawned interpreter (clean peak RSS)."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+# ---- baselines ----
+
+
+def compare(current: Result, baseline: Result, tolerance: float) -> list[str]:
+    """Return human-readable regressions of current vs baseline."""
+    problems = []
+    for stage, base in baseline.get("stages", {}).items():
+        cur = current["stages"].get(stage)
+        if cur is None:
+            continue
+        if cur["files_per_s"] < base["files_per_s"] * (1 - tolerance):
+            problems.append(
+                f"{stage}: files/s {cur['files_per_s']} < baseline "
+                f"{base['files_per_s']} (-{tolerance:.0%} allowed)"
+            )
+        cur_p99, base_p99 = cur["latency"]["p99"], base["latency"]["p99"]
+        if base_p99 > 0 and cur_p99 > base_p99 * (1 + tolerance):
+            problems.append(
+                f"{stage}: p99 {cur_p99 * 1e3:.3f}ms > baseline "
+                f"{base_p99 * 1e3:.3f}ms (+{tolerance:.0%} allowed)"
+            )
+    return problems
+
+
+def print_table(result: Result) -> None:
+    print(
+        f"{'stage':<8} {'items':>9} {'files/s':>11} {'p50':>10} {'p95':>10} "
+        f"{'p99':>10} {'max':>10} {'peak RSS':>10}"
+    )
+    for stage, r in result["stages"].items():
+        lat = r["latency"]
+        cells = " ".join(
+            f"{lat[k] * 1e3:>8.3f}ms" for k in ("p50", "p95", "p99", "max")
+        )
+        print(
+            f"{stage:<8} {r['items']:>9} {r['files_per_s']:>11.1f} {cells} "
+            f"{r['peak_rss_kb'] / 1024:>8.1f}MB"
+        )
+
+
+# ---- CLI ----
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="python -m benchmarks.bench",
+        description="Benchmark discovery, probing and writers on a synthetic tree",
+    )
+    p.add_argument("--files", type=int, default=10_000, help="Files in the tree")
+    p.add_argument("--depth", type=int, default=3, help="Directory depth")
+    p.add_argument("--fanout", type=int, default=10, help="Subdirectories per level")
+    p.add_argument(
+        "--tree-dir",
+        type=Path,
+        default=None,
+        help="Where to build (and reuse) the tree (default: a temporary dir)",
+    )
+    p.add_argument(
+        "--stages",
+        default="walk,probe,csv,script",
+        help="Comma-separated stages to run (default: all)",
+    )
+    p.add_argument(
+        "--probe-files",
+        type=int,
+        default=1000,
+        help="Files to probe (every probe spawns the stub; default: 1000)",
+    )
+    p.add_argument("--jobs", type=int, default=None, help="Probe workers")
+    p.add_argument("--no-fast-probe", dest="fast", action="store_false")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Mean stub delay")
+    p.add_argument("--dist", choices=["fixed", "exp", "lognormal"], default="fixed")
+    p.add_argument("--sigma", type=float, default=1.0, help="Lognormal tail shape")
+    p.add_argument("--fail-rate", type=float, default=0.0, help="Files that fail")
+    p.add_argument(
+        "--fast-fail-rate",
+        type=float,
+        default=0.0,
+        help="Fast probes that fail and fall back to a full probe",
+    )
+    p.add_argument("--seed", default="0")
+    p.add_argument("-o", "--output", type=Path, help="Write results JSON here")
+    p.add_argument("--baseline", type=Path, help="Compare against this results JSON")
+    p.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression vs --baseline (default: 0.2)",
+    )
+    return p
+
+
+def _stub_env(args: argparse.Namespace, bin_dir: Path) -> dict[str, str]:
+    return {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "VCC_STUB_LATENCY_MS": str(args.latency_ms),
+        "VCC_STUB_DIST": args.dist,
+        "VCC_STUB_SIGMA": str(args.sigma),
+        "VCC_STUB_FAIL": str(args.fail_rate),
+        "VCC_STUB_FAST_FAIL": str(args.fast_fail_rate),
+        "VCC_STUB_SEED": str(args.seed),
+    }
+
+
+def run(args: argparse.Namespace, work: Path) -> Result:
+    tree = args.tree_dir or work / "tree"
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    t0 = time.perf_counter()
+    make_tree(tree, args.files, args.depth, args.fanout)
+    print(f"Tree ready in {time.perf_counter() - t0:.1f}s: {tree}", file=sys.stderr)
+
+    result: Result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: str(v) for k, v in vars(args).items()},
+        },
+        "stages": {},
+    }
+    walked = args.files
+    for stage in stages:
+        print(f"Running {stage}...", file=sys.stderr)
+        if stage == "walk":
+            r = _isolated(stage_walk, str(tree))
+            walked = r["items"]
+        elif stage == "probe":
+            env = _stub_env(args, install_stub(work / "bin").parent)
+            r = _isolated(
+                stage_probe, str(tree), args.probe_files, args.jobs, args.fast, env
+            )
+        elif stage == "csv":
+            r = _isolated(stage_csv, str(work), walked)
+        elif stage == "script":
+            r = _isolated(stage_script, str(work), walked)
+        else:
+            raise SystemExit(f"unknown stage: {stage}")
+        if r.get("failed") and r["failed"] == r["items"]:
+            print("Warning: every probe failed; is the stub runnable?", file=sys.stderr)
+        result["stages"][stage] = r
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parser().parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="vcc-bench-") as tmp:
+        result = run(args, Path(tmp))
+    print_table(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Results written to: {args.output}", file=sys.stderr)
+    if args.baseline:
+        problems = compare(
+            result, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for line in problems:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"No regressions vs {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
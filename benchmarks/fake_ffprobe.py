@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Stand-in for ffprobe used by the benchmark harness.
+
+Answers any probe with a fixed JSON document after a simulated delay, so the
+scheduler, subprocess and parsing overhead can be measured without media.
+Behaviour comes from environment variables set by the harness:
+
+VCC_STUB_LATENCY_MS  mean delay per call in ms (default 0)
+VCC_STUB_DIST        fixed | exp | lognormal (default fixed)
+VCC_STUB_SIGMA       lognormal shape; larger means a longer tail (default 1.0)
+VCC_STUB_FAIL        fraction of files that fail every probe (default 0)
+VCC_STUB_FAST_FAIL   fraction of fast (-probesize) probes that fail (default 0)
+VCC_STUB_SEED        seed mixed with the file path for repeatable draws
+
+Only the standard library is imported, to keep start-up cheap.
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+_OUTPUT = (
+    '{"streams":[{"codec_type":"video","codec_name":"%s","width":1280,'
+    '"height":720,"avg_frame_rate":"25/1","bit_rate":"2500000"},'
+    '{"codec_type":"audio","channels":2}],'
+    '"format":{"bit_rate":"2700000","duration":"1320.5"}}'
+)
+_CODECS = ("mpeg4", "h264", "hevc", "msmpeg4v3", "wmv3", "av1")
+
+
+def _env(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _delay(rng: random.Random) -> float:
+    mean = _env("VCC_STUB_LATENCY_MS", 0.0) / 1000.0
+    if mean <= 0:
+        return 0.0
+    dist = os.environ.get("VCC_STUB_DIST", "fixed")
+    if dist == "exp":
+        return rng.expovariate(1.0 / mean)
+    if dist == "lognormal":
+        sigma = _env("VCC_STUB_SIGMA", 1.0)
+        # Choose mu so the distribution's mean equals `mean`
+        return rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+    return mean
+
+
+def main(argv: list[str]) -> int:
+    path = argv[-1] if len(argv) > 1 else ""
+    fast = "-probesize" in argv
+    seed = os.environ.get("VCC_STUB_SEED", "0")
+    # Per-file draws are stable across runs; fast and full calls differ
+    file_rng = random.Random(f"{seed}:{path}")
+    call_rng = random.Random(f"{seed}:{path}:{fast}")
+    time.sleep(_delay(call_rng))
+    if file_rng.random() < _env("VCC_STUB_FAIL", 0.0):
+        return 1
+    if fast and call_rng.random() < _env("VCC_STUB_FAST_FAIL", 0.0):
+        return 1
+    sys.stdout.write(_OUTPUT % file_rng.choice(_CODECS) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
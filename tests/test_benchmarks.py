@@ -0,0 +1,48 @@
+"""Tests for the synthetic benchmark harness."""
+
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from benchmarks import bench, fake_ffprobe
+from video_codec_checker.video_processor import get_video_files
+
+
+class TestTree(unittest.TestCase):
+    def test_tree_shape_and_reuse(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            bench.make_tree(root, files=200, depth=2, fanout=3)
+            self.assertEqual(len(list(root.glob("d*/d*"))), 9)
+            self.assertEqual(len(get_video_files(tmpdir)), 180)
+
+            with mock.patch("os.open") as opened:
+                bench.make_tree(root, files=200, depth=2, fanout=3)
+            opened.assert_not_called()
+
+
+class TestStub(unittest.TestCase):
+    def test_fast_failures_only_hit_fast_probes(self):
+        env = {"VCC_STUB_FAST_FAIL": "1.0"}
+        with mock.patch.dict("os.environ", env), redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(fake_ffprobe.main(["ffprobe", "-probesize", "1", "a"]), 1)
+            self.assertEqual(fake_ffprobe.main(["ffprobe", "a"]), 0)
+        self.assertIn('"codec_type":"video"', out.getvalue())
+
+
+class TestCompare(unittest.TestCase):
+    def _result(self, rate, p99):
+        return {"stages": {"walk": {"files_per_s": rate, "latency": {"p99": p99}}}}
+
+    def test_flags_throughput_and_tail_regressions(self):
+        base = self._result(1000.0, 0.010)
+        self.assertEqual(bench.compare(self._result(900.0, 0.011), base, 0.2), [])
+        problems = bench.compare(self._result(700.0, 0.020), base, 0.2)
+        self.assertEqual(len(problems), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for the encoder throughput calibration and the host profile."""
+
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.calibrate import (
+    Calibrator,
+    Run,
+    calibrate_main,
+    host_recommendation,
+    powers_of_two,
+    preset_factors,
+    saturation,
+)
+from video_codec_checker.converter import _default_slots_threads
+from video_codec_checker.planner import PresetTable
+
+# Writes the clip for lavfi inputs; encodes output 1000 + 100 * preset bytes
+_FAKE_FFMPEG = """#!{python}
+import sys
+argv = sys.argv
+size = 4
+if "-preset" in argv:
+    size = 1000 + 100 * int(argv[argv.index("-preset") + 1])
+with open(argv[-1], "wb") as fh:
+    fh.write(b"x" * size)
+"""
+
+
+def _run(preset, threads=1, jobs=1, fps=10.0, cpu=10.0, size=1000, res="1920x1080"):
+    return Run(res, preset, threads, jobs, fps, 1.0, cpu, size)
+
+
+class TestSweep(unittest.TestCase):
+    def test_powers_of_two(self):
+        self.assertEqual(powers_of_two(1), [1])
+        self.assertEqual(powers_of_two(6), [1, 2, 4, 6])
+        self.assertEqual(powers_of_two(8), [1, 2, 4, 8])
+
+    def test_plan_includes_baseline_and_caps_oversubscription(self):
+        calibrator = Calibrator(
+            Path("."), [8], [1, 4], [1, 2, 4], ["640x360", "1920x1080"]
+        )
+        calibrator.cpus = 4
+        runs = calibrator.plan()
+        self.assertEqual(calibrator.presets, [3, 8])
+        self.assertEqual(len([r for r in runs if r[3] == 1]), 2 * 2 * 2)
+        parallel = sorted({(r[2], r[3]) for r in runs if r[3] > 1})
+        self.assertEqual(parallel, [(1, 2), (1, 4), (4, 2)])
+        self.assertTrue(all(r[0] == "1920x1080" for r in runs if r[3] > 1))
+
+    def test_factors_relative_to_default_preset(self):
+        runs = [
+            _run(3, cpu=100.0, size=1000),
+            _run(3, threads=4, cpu=120.0, size=1000),
+            _run(8, cpu=20.0, size=1200, fps=40.0),
+            _run(8, threads=4, cpu=30.0, size=1200, fps=90.0),
+            _run(8, jobs=2, cpu=99.0, size=1, fps=150.0),  # not a single encode
+        ]
+        presets = preset_factors(runs)
+        self.assertEqual(presets["3"]["cpu_factor"], 1.0)
+        self.assertAlmostEqual(presets["8"]["cpu_factor"], (0.2 + 0.25) / 2)
+        self.assertEqual(presets["8"]["size_factor"], 1.2)
+        self.assertEqual(presets["8"]["fps"], {"1920x1080": 90.0})
+
+    def test_saturation_prefers_fewest_encodes(self):
+        runs = [
+            _run(3, threads=8, jobs=1, fps=10.0),
+            _run(3, threads=2, jobs=4, fps=30.0),
+            _run(3, threads=1, jobs=8, fps=31.0),
+            _run(3, threads=8, jobs=1, fps=50.0, res="640x360"),
+        ]
+        rec = saturation(runs, 3)
+        self.assertEqual((rec["jobs"], rec["threads"]), (4, 2))
+        self.assertIsNone(saturation(runs, 8))
+
+
+class TestCalibrateCommand(unittest.TestCase):
+    def test_writes_profile_read_by_planner_and_convert(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ffmpeg = root / "ffmpeg"
+            ffmpeg.write_text(_FAKE_FFMPEG.format(python=sys.executable))
+            ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IXUSR)
+            path = os.pathsep.join([tmp, os.environ.get("PATH", "")])
+            profile = root / "host.json"
+            argv = ["-o", str(profile), "--presets", "8", "--threads", "1"]
+            argv += ["--concurrency", "1,2", "--resolutions", "64x64", "--seconds", "1"]
+            with mock.patch.dict(os.environ, {"PATH": path}):
+                self.assertEqual(calibrate_main(argv), 0)
+            data = json.loads(profile.read_text())
+            table = PresetTable.load(profile)
+            recommended = host_recommendation(profile)
+            slots = _default_slots_threads(None, None, profile)
+
+        self.assertEqual(len(data["runs"]), 2 + 2)
+        self.assertEqual(data["presets"]["8"]["size_factor"], round(1800 / 1300, 4))
+        self.assertEqual(table.scaling[8][1], round(1800 / 1300, 4))
+        self.assertEqual(recommended, (data["recommended"]["jobs"], 1))
+        self.assertEqual(slots, recommended)
+
+    def test_missing_ffmpeg_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {"PATH": tmp}):
+                code = calibrate_main(["-o", str(Path(tmp) / "p.json")])
+        self.assertEqual(code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for the concurrent probe executor."""
+
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.concurrency import (
+    AsyncProbeExecutor,
+    ProbeExecutor,
+    prefetch,
+)
+from video_codec_checker.models import FileProbeResult
+
+
+def _probe(path, args=None, stats=None):
+    return FileProbeResult(path=path, codec="mpeg4", channels=2)
+
+
+class TestPrefetch(unittest.TestCase):
+    """Bounded background iteration."""
+
+    def test_producer_runs_ahead_up_to_bound(self):
+        produced = []
+        ahead = threading.Event()
+
+        def items():
+            for i in range(10):
+                produced.append(i)
+                if i == 3:
+                    ahead.set()
+                yield i
+
+        it = prefetch(items(), maxsize=2)
+        self.assertEqual(next(it), 0)
+        # The walk keeps going while the consumer is idle, bounded by maxsize
+        self.assertTrue(ahead.wait(timeout=5))
+        self.assertEqual(list(it), list(range(1, 10)))
+
+    def test_producer_errors_reach_consumer(self):
+        def items():
+            yield 1
+            raise OSError("walk failed")
+
+        with self.assertRaises(OSError):
+            list(prefetch(items()))
+
+
+class TestProbeExecutor(unittest.TestCase):
+    """Executor output and streaming input."""
+
+    def test_streams_lazy_input(self):
+        files = (Path(f"{i}.avi") for i in range(50))
+        executor = ProbeExecutor(jobs=4, probe_func=_probe)
+
+        results = list(executor.run(files))
+
+        self.assertCountEqual(
+            [r.path for r in results], [Path(f"{i}.avi") for i in range(50)]
+        )
+
+    def test_in_flight_is_bounded_by_window(self):
+        executor = ProbeExecutor(jobs=2, probe_func=_probe, window_per_worker=3)
+        consumed = 0
+        for _ in executor.run([Path(f"{i}.avi") for i in range(200)]):
+            consumed += 1
+
+        self.assertEqual(consumed, 200)
+        self.assertEqual(executor.stats.window_size, 6)
+        self.assertLessEqual(executor.stats.peak_in_flight, 6)
+
+
+class TestAsyncProbeExecutor(unittest.TestCase):
+    """asyncio backend concurrency and stats."""
+
+    def test_semaphore_limits_concurrent_probes(self):
+        running = 0
+        peak = 0
+
+        async def probe(path, args, stats):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            stats["full_probes"] += 1
+            return FileProbeResult(path=path, codec="mpeg4", channels=2)
+
+        executor = AsyncProbeExecutor(jobs=5, probe_func=probe)
+        results = list(executor.run([Path(f"{i}.avi") for i in range(60)]))
+
+        self.assertEqual(len(results), 60)
+        self.assertLessEqual(peak, 5)
+        self.assertGreater(peak, 1)
+        self.assertEqual(executor.stats.full_probes, 60)
+
+    def test_tiers_run_off_the_event_loop(self):
+        threads = set()
+
+        async def probe(path, args, stats):
+            return FileProbeResult(path=path, codec="mpeg4", channels=2)
+
+        def parse(path):
+            threads.add(threading.current_thread().name)
+            return None
+
+        executor = AsyncProbeExecutor(jobs=2, probe_func=probe, native_probe=True)
+        with mock.patch(
+            "video_codec_checker.concurrency.parse_container_header", parse
+        ):
+            results = list(executor.run([Path(f"{i}.avi") for i in range(5)]))
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(threads)
+        self.assertNotIn("probe-loop", threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
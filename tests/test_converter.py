@@ -0,0 +1,133 @@
+"""Tests for the parallel conversion scheduler."""
+
+import json
+import os
+import stat
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from video_codec_checker.converter import (
+    ORDER_SAVINGS,
+    ConvertScheduler,
+    Job,
+    convert_main,
+    plan,
+)
+from video_codec_checker.csv_writer import CsvResultsWriter
+from video_codec_checker.models import CsvRow
+
+# Stand-in for ffmpeg: copies the -i input to the last argument; on "bad"
+# inputs it writes a partial output and fails
+FAKE_FFMPEG = """#!/bin/sh
+for last; do :; done
+while [ $# -gt 0 ]; do
+  if [ "$1" = "-i" ]; then src="$2"; fi
+  shift
+done
+case "$src" in *bad*) echo "partial" > "$last"; echo "boom" >&2; exit 3;; esac
+cp "$src" "$last"
+"""
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmp.name)
+        self.ffmpeg = self.tmpdir / "ffmpeg"
+        self.ffmpeg.write_text(FAKE_FFMPEG)
+        self.ffmpeg.chmod(self.ffmpeg.stat().st_mode | stat.S_IEXEC)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _job(self, name, size):
+        src = self.tmpdir / name
+        src.write_bytes(b"x" * size)
+        dst = self.tmpdir / f"{src.stem}_av1.mkv"
+        return Job.from_command(f"{self.ffmpeg} -y -i '{src}' -c:v libsvtav1 '{dst}'")
+
+    def test_plan_orders_longest_first_and_drops_missing(self):
+        jobs = [self._job("s.avi", 10), self._job("l.avi", 1000)]
+        jobs.append(Job.from_command(f"ffmpeg -i '{self.tmpdir}/gone.avi' o.mkv"))
+        self.assertEqual([j.src.name for j in plan(jobs)], ["l.avi", "s.avi"])
+
+    def test_savings_order_and_cpu_budget(self):
+        jobs = []
+        # (name, est bytes saved, est CPU-seconds)
+        for name, saved, cpu in (("a", 100, 100), ("b", 900, 300), ("c", 50, 10)):
+            job = self._job(f"{name}.avi", 10)
+            job.meta.update(est_bytes_saved=saved, est_cpu_seconds=cpu)
+            jobs.append(job)
+        jobs.append(self._job("unknown.avi", 10))
+
+        ranked = plan(list(jobs), order=ORDER_SAVINGS)
+        self.assertEqual([j.src.stem for j in ranked[:3]], ["c", "b", "a"])
+        # 320 CPU-seconds: c (10) and b (300) fit, a does not
+        capped = plan(list(jobs), order=ORDER_SAVINGS, cpu_budget=320)
+        self.assertEqual([j.src.stem for j in capped], ["c", "b"])
+
+    def test_run_records_ledger_and_cleans_up_successes(self):
+        jobs = plan([self._job(f"{n}.avi", 100) for n in ("a", "b", "bad", "c")])
+        ledger = self.tmpdir / "ledger.jsonl"
+        scheduler = ConvertScheduler(
+            slots=2,
+            threads=1,
+            log_dir=self.tmpdir / "logs",
+            ledger=ledger,
+            delete_original=True,
+        )
+
+        self.assertEqual(scheduler.run(jobs), 1)
+
+        entries = {
+            Path(e["src"]).name: e
+            for e in map(json.loads, ledger.read_text().splitlines())
+        }
+        self.assertEqual(set(entries), {"a.avi", "b.avi", "bad.avi", "c.avi"})
+        self.assertEqual(entries["bad.avi"]["exit_code"], 3)
+        self.assertEqual(entries["a.avi"]["cleanup"], "delete")
+        self.assertEqual(entries["a.avi"]["output_bytes"], 100)
+        self.assertIn("boom", Path(entries["bad.avi"]["log"]).read_text())
+        # Failed conversions keep their source and lose their partial output
+        self.assertTrue((self.tmpdir / "bad.avi").exists())
+        self.assertFalse((self.tmpdir / "bad_av1.mkv").exists())
+        self.assertFalse((self.tmpdir / "a.avi").exists())
+
+    def test_run_leaves_other_children_alone(self):
+        other = subprocess.Popen(["sh", "-c", "exit 7"])
+        scheduler = ConvertScheduler(
+            slots=1,
+            threads=1,
+            log_dir=self.tmpdir / "logs",
+            ledger=self.tmpdir / "ledger.jsonl",
+        )
+        self.assertEqual(scheduler.run(plan([self._job("a.avi", 10)])), 0)
+        # Its exit status was not swallowed by the scheduler
+        self.assertEqual(other.wait(), 7)
+
+    def test_convert_main_reads_report_and_skips_h264(self):
+        jobs = [self._job("a.avi", 10), self._job("h.mp4", 10)]
+        report = self.tmpdir / "report.csv"
+        writer = CsvResultsWriter(report)
+        writer.open()
+        for job, codec in zip(jobs, ("mpeg4", "h264"), strict=True):
+            cmd = " ".join(f"'{a}'" for a in job.argv)
+            writer.write_row_dc(CsvRow(str(job.src), codec, 2, 0.1, cmd))
+        writer.close()
+        ledger = self.tmpdir / "ledger.jsonl"
+
+        status = convert_main(
+            [str(report), "-j", "2", "--threads", "1", "--ledger", str(ledger)]
+            + ["--log-dir", str(self.tmpdir / "logs")]
+        )
+
+        self.assertEqual(status, 0)
+        self.assertEqual(len(ledger.read_text().splitlines()), 1)
+        self.assertTrue(os.path.exists(self.tmpdir / "a_av1.mkv"))
+        self.assertFalse(os.path.exists(self.tmpdir / "h_av1.mkv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
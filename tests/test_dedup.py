@@ -0,0 +1,158 @@
+"""Tests for hardlink and duplicate-content detection."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.dedup import SAMPLE_BYTES, Deduplicator, fingerprint
+from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import CsvRow, FileProbeResult, JournalSettings
+from video_codec_checker.sinks import read_rows
+
+
+class TestDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.a = self.tmp / "a.avi"
+        self.a.write_bytes(os.urandom(1000))
+        self.link = self.tmp / "link.avi"
+        os.link(self.a, self.link)
+        self.copy = self.tmp / "copy.avi"
+        self.copy.write_bytes(self.a.read_bytes())
+        self.other = self.tmp / "other.avi"
+        self.other.write_bytes(os.urandom(1000))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_hardlinks_only_by_default(self):
+        dedup = Deduplicator()
+        files = [self.a, self.link, self.copy, self.other]
+        self.assertEqual(list(dedup.select(files)), [self.a, self.copy, self.other])
+        self.assertEqual((dedup.hardlinks, dedup.copies), (1, 0))
+
+    def test_duplicates_get_primary_result(self):
+        dedup = Deduplicator(fingerprints=True)
+        selected = dedup.select([self.a, self.link, self.copy, self.other])
+        self.assertEqual(next(selected), self.a)
+        # Discovery has already seen the hardlink when the result comes in
+        self.assertEqual(next(selected), self.other)
+        result = FileProbeResult(self.a, "mpeg4", 2)
+        dups = dedup.resolve(result)
+        self.assertEqual(
+            [(r.path, r.codec, p) for r, p in dups],
+            [(self.link, "mpeg4", self.a), (self.copy, "mpeg4", self.a)],
+        )
+        self.assertEqual(dedup.resolve(FileProbeResult(self.other, "vp8", 2)), [])
+        # Found after its primary was reported
+        late = self.tmp / "late.avi"
+        late.write_bytes(self.a.read_bytes())
+        self.assertEqual(list(dedup.select([late])), [])
+        self.assertEqual([r.path for r, _ in dedup.drain()], [late])
+        self.assertEqual((dedup.hardlinks, dedup.copies), (1, 2))
+
+    def test_tracks_only_unseen_links(self):
+        dedup = Deduplicator()
+        self.assertEqual(
+            list(dedup.select([self.copy, self.other])), [self.copy, self.other]
+        )
+        # Files with a single link are not remembered at all
+        self.assertEqual((dedup._groups, dedup._pending), ({}, {}))
+        list(dedup.select([self.a, self.link]))
+        # Both links of a.avi seen: only its result is still awaited
+        self.assertEqual(dedup._groups, {})
+        self.assertEqual(dedup.unresolved(), [self.a])
+        dedup.resolve(FileProbeResult(self.a, "mpeg4", 2))
+        self.assertEqual((dedup._pending, dedup.unresolved()), ({}, []))
+
+    def test_done_duplicates_are_dropped(self):
+        dedup = Deduplicator(done={str(self.link)})
+        self.assertEqual(list(dedup.select([self.a, self.link])), [self.a])
+        self.assertEqual(dedup.resolve(FileProbeResult(self.a, "mpeg4", 2)), [])
+
+    def test_fingerprint_samples_large_files(self):
+        big = self.tmp / "big.bin"
+        data = bytearray(os.urandom(8 * SAMPLE_BYTES))
+        big.write_bytes(data)
+        before = fingerprint(big, len(data))
+        data[SAMPLE_BYTES + 10] ^= 0xFF  # outside the sampled blocks
+        big.write_bytes(data)
+        self.assertEqual(fingerprint(big, len(data)), before)
+        data[-1] ^= 0xFF
+        big.write_bytes(data)
+        self.assertNotEqual(fingerprint(big, len(data)), before)
+
+
+class TestDuplicateReport(unittest.TestCase):
+    """Duplicates are reported with Duplicate_Of and kept out of the script."""
+
+    def test_scan_reports_hardlinks_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "a").mkdir()
+            (root / "a" / "v.avi").write_bytes(b"x")
+            (root / "b.avi").hardlink_to(root / "a" / "v.avi")
+            out, script = root / "r.csv", root / "s.sh"
+            probe = mock.Mock(
+                side_effect=lambda p, a, s: FileProbeResult(p, "mpeg4", 2)
+            )
+            checker = VideoCodecChecker(str(out))
+            with mock.patch("video_codec_checker.main.probe_video", probe):
+                queued = checker.process_files(
+                    str(root), jobs=1, script_file=str(script), sort_files=True
+                )
+            rows: list[CsvRow] = list(read_rows(out))
+            commands = script.read_text().count("ffmpeg ")
+
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(queued, 1)
+        self.assertEqual(commands, 1)
+        self.assertEqual(len(rows), 2)
+        primary, dup = sorted(rows, key=lambda r: r.duplicate_of)
+        self.assertEqual(dup.duplicate_of, primary.file)
+        self.assertEqual(dup.codec, "mpeg4")
+        self.assertIsNone(dup.est_cpu_seconds)
+
+    def test_resume_reports_hardlink_of_done_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in ("a.avi", "b.avi", "c.avi"):
+                (root / name).write_bytes(name.encode())
+            out, script = root / "r.csv", root / "s.sh"
+
+            def probe(path, args, stats):
+                if path.name == "c.avi" and interrupt:
+                    raise KeyboardInterrupt
+                return FileProbeResult(path, "mpeg4", 2)
+
+            def scan(resume):
+                checker = VideoCodecChecker(str(out))
+                with mock.patch("video_codec_checker.main.probe_video", probe):
+                    return checker.process_files(
+                        str(root),
+                        jobs=1,
+                        script_file=str(script),
+                        sort_files=True,
+                        journal=JournalSettings(resume=resume),
+                    )
+
+            interrupt = True
+            with self.assertRaises(KeyboardInterrupt):
+                scan(resume=False)
+            # A hardlink of a file the interrupted scan had already reported
+            (root / "z.avi").hardlink_to(root / "a.avi")
+            interrupt = False
+            scan(resume=True)
+            rows = {r.file: r for r in read_rows(out)}
+            commands = script.read_text().count("ffmpeg ")
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[str(root / "z.avi")].duplicate_of, str(root / "a.avi"))
+        self.assertEqual(commands, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
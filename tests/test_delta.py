@@ -0,0 +1,239 @@
+"""Tests for incremental scans against a previous report."""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from video_codec_checker.csv_writer import CsvResultsWriter, read_results
+from video_codec_checker.delta import (
+    CLOCK_SKEW_NS,
+    DeltaScan,
+    read_scan_start,
+    record_scan_start,
+)
+from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import (
+    CsvRow,
+    DeltaSettings,
+    FileProbeResult,
+    ProbeSettings,
+    ShardSpec,
+)
+from video_codec_checker.video_processor import ERROR_NOT_A_VIDEO
+
+
+def _write_previous(path, rows):
+    writer = CsvResultsWriter(path)
+    writer.open()
+    for row in rows:
+        writer.write_row_dc(row)
+    writer.close()
+    # Every file created before this predates the previous scan's start
+    record_scan_start(path, time.time_ns() + 2 * CLOCK_SKEW_NS)
+
+
+def _touch_after_report(*paths):
+    later = time.time() + 3 * CLOCK_SKEW_NS / 1e9
+    for fp in paths:
+        os.utime(fp, (later, later))
+
+
+def _read_delta(path):
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()[1:]
+    return sorted((line.split(",")[0], Path(line.split(",")[1]).name) for line in lines)
+
+
+class TestDeltaScan(unittest.TestCase):
+    """--since probes only new/changed files and reports the differences."""
+
+    def test_carries_unchanged_rows_and_writes_delta(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            files = {name: root / name for name in ("a.avi", "b.avi", "c.avi", "d.avi")}
+            for fp in files.values():
+                fp.write_bytes(b"x")
+
+            previous = root / "previous.csv"
+            writer = CsvResultsWriter(previous)
+            writer.open()
+            for name in ("b.avi", "c.avi", "gone.avi"):
+                writer.write_row_dc(
+                    CsvRow(str(root / name), "mpeg4", 2, 0.05, f"ffmpeg {name}")
+                )
+            writer.close()
+            # The previous scan started after a/b; c and d were modified later
+            record_scan_start(previous, time.time_ns() + 2 * CLOCK_SKEW_NS)
+            _touch_after_report(files["c.avi"], files["d.avi"])
+
+            probed = []
+
+            def probe(path, args=None, stats=None):
+                probed.append(path.name)
+                codec = "hevc" if path.name == "c.avi" else "mpeg4"
+                return FileProbeResult(path=path, codec=codec, channels=2)
+
+            out = root / "out.csv"
+            with (
+                patch(
+                    "video_codec_checker.main.iter_video_files",
+                    return_value=list(files.values()),
+                ),
+                patch("video_codec_checker.main.probe_video", side_effect=probe),
+                patch(
+                    "video_codec_checker.main.generate_ffmpeg_command",
+                    return_value="ffmpeg d.avi",
+                ),
+            ):
+                VideoCodecChecker(str(out)).process_files(
+                    directory=tmpdir, jobs=1, delta=DeltaSettings(previous)
+                )
+
+            self.assertCountEqual(probed, ["c.avi", "d.avi"])
+            rows = {Path(r.file).name: r for r in read_results(out)}
+            self.assertEqual(set(rows), {"b.avi", "d.avi"})
+            self.assertEqual(rows["b.avi"].command, "ffmpeg b.avi")
+
+            with open(root / "out.delta.csv", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0].split(",")[0], "Change")
+            changes = sorted(
+                (line.split(",")[0], Path(line.split(",")[1]).name)
+                for line in lines[1:]
+            )
+            self.assertEqual(
+                changes,
+                [("added", "d.avi"), ("changed", "c.avi"), ("removed", "gone.avi")],
+            )
+
+    def test_file_created_during_previous_scan_is_probed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            previous = root / "previous.csv"
+            writer = CsvResultsWriter(previous)
+            writer.open()
+            record_scan_start(previous, time.time_ns() - 3 * CLOCK_SKEW_NS)
+            # Lands after the walk passed its directory, before the last row
+            late = root / "late.avi"
+            late.write_bytes(b"x")
+            writer.write_row_dc(CsvRow(str(root / "a.avi"), "mpeg4", 2, 0.0, "ff"))
+            writer.close()
+
+            delta = DeltaScan(previous)
+            self.assertEqual(list(delta.select([late])), [late])
+            self.assertEqual(delta.unchanged, 0)
+
+    def test_report_without_recorded_start_probes_everything(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            old = root / "old.avi"
+            old.write_bytes(b"x")
+            os.utime(old, (1_000_000, 1_000_000))
+            previous = root / "previous.csv"
+            _write_previous(previous, [])
+            os.unlink(f"{previous}.started")
+
+            self.assertEqual(list(DeltaScan(previous).select([old])), [old])
+
+    def test_scan_records_its_start(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out = Path(tmpdir) / "out.csv"
+            before = time.time_ns()
+            with patch("video_codec_checker.main.iter_video_files", return_value=[]):
+                VideoCodecChecker(str(out)).process_files(directory=tmpdir, jobs=1)
+            started = read_scan_start(out)
+            self.assertIsNotNone(started)
+            self.assertLessEqual(before, started)
+            self.assertLessEqual(started, os.stat(out).st_mtime_ns)
+
+
+class TestDeltaChanges(unittest.TestCase):
+    """How re-probed files with a previous row show up in the delta."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.previous = self.root / "previous.csv"
+        self.out = self.root / "out.csv"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _files(self, *names):
+        files = [self.root / name for name in names]
+        for fp in files:
+            fp.write_bytes(b"x")
+        return files
+
+    def _scan(self, files, probe, **kwargs):
+        with (
+            patch("video_codec_checker.main.iter_video_files", return_value=files),
+            patch("video_codec_checker.main.probe_video", side_effect=probe),
+        ):
+            VideoCodecChecker(str(self.out)).process_files(
+                directory=str(self.root),
+                jobs=1,
+                delta=DeltaSettings(self.previous),
+                probe=ProbeSettings(sniff=False),
+                **kwargs,
+            )
+        return _read_delta(self.root / "out.delta.csv")
+
+    def _row(self, name, codec="mpeg4"):
+        path = self.root / name
+        return CsvRow(str(path), codec, 2, 0.0, f"ffmpeg {name}")
+
+    def test_changed_rows(self):
+        files = self._files("recoded.avi", "converted.avi", "same.avi")
+        _write_previous(self.previous, [self._row(fp.name) for fp in files])
+        _touch_after_report(*files)
+        codecs = {"recoded.avi": "msmpeg4v3", "converted.avi": "hevc"}
+
+        def probe(path, args=None, stats=None):
+            return FileProbeResult(path, codecs.get(path.name, "mpeg4"), 2)
+
+        with patch(
+            "video_codec_checker.main.generate_ffmpeg_command",
+            side_effect=lambda p, c, *a: f"ffmpeg {p.name}",
+        ):
+            changes = self._scan(files, probe)
+
+        # A file now in a good codec still exists: changed, not removed
+        self.assertEqual(
+            changes, [("changed", "converted.avi"), ("changed", "recoded.avi")]
+        )
+        with open(self.root / "out.delta.csv", encoding="utf-8") as f:
+            self.assertIn(",hevc,", f.read())
+
+    def test_failure_rows(self):
+        (broken,) = self._files("broken.avi")
+        _write_previous(self.previous, [self._row("broken.avi")])
+        _touch_after_report(broken)
+
+        def probe(path, args=None, stats=None):
+            return FileProbeResult(path, None, 0, error=ERROR_NOT_A_VIDEO)
+
+        self.assertEqual(self._scan([broken], probe), [("changed", "broken.avi")])
+        rows = list(read_results(self.out))
+        self.assertEqual(rows[0].status, "not_a_video")
+
+    def test_shard_only_reports_its_own_rows(self):
+        files = self._files(*(f"f{i}.avi" for i in range(12)))
+        _write_previous(self.previous, [self._row(fp.name) for fp in files])
+        for fp in files:
+            fp.unlink()
+        shard = ShardSpec(1, 3)
+        mine = {fp.name for fp in files if shard.includes(fp, self.root)}
+        self.assertTrue(0 < len(mine) < len(files))
+
+        changes = self._scan([], lambda *a: None, shard=shard)
+
+        # Rows of other shards' files are not this scan's to call removed
+        self.assertEqual(changes, sorted(("removed", name) for name in mine))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Tests for per-device probe limits and round-robin scheduling."""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from pathlib import Path
+
+from video_codec_checker.cli import parse_args
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.devices import (
+    CLASS_HDD,
+    CLASS_OTHER,
+    CLASS_SSD,
+    HDD_LIMIT,
+    UNLIMITED,
+    DeviceLimits,
+    DeviceQueues,
+    device_class,
+)
+from video_codec_checker.models import FileProbeResult
+
+
+class _FakeLimits(DeviceLimits):
+    """Devices keyed by the first path component: /<dev>/name."""
+
+    def device(self, path: Path) -> int:
+        return int(path.parts[1])
+
+
+class TestDeviceClass(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.sys = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _disk(self, name: str, rotational: str) -> Path:
+        queue = self.sys / name / "queue"
+        queue.mkdir(parents=True)
+        (queue / "rotational").write_text(rotational + "\n")
+        return self.sys / name
+
+    def test_rotational_flag_and_partition_fallback(self):
+        self._disk("8:0", "1")
+        self._disk("259:0", "0")
+        # A partition: its parent disk holds the queue flags
+        (self.sys / "8:0" / "8:1").mkdir()
+        (self.sys / "8:1").symlink_to(self.sys / "8:0" / "8:1")
+        self.assertEqual(device_class(os.makedev(8, 0), self.sys), CLASS_HDD)
+        self.assertEqual(device_class(os.makedev(8, 1), self.sys), CLASS_HDD)
+        self.assertEqual(device_class(os.makedev(259, 0), self.sys), CLASS_SSD)
+        # Anonymous (network/FUSE) and unknown block devices
+        self.assertEqual(device_class(os.makedev(0, 52), self.sys), CLASS_OTHER)
+        self.assertEqual(device_class(os.makedev(9, 9), self.sys), CLASS_OTHER)
+
+
+class TestDeviceLimits(unittest.TestCase):
+    def test_overrides_by_device_then_class(self):
+        hdd, ssd, nfs = os.makedev(8, 0), os.makedev(259, 0), os.makedev(0, 52)
+        limits = DeviceLimits({hdd: 6, CLASS_SSD: 8})
+        limits._classes = {hdd: CLASS_HDD, ssd: CLASS_SSD, nfs: CLASS_OTHER}
+        self.assertEqual(limits.limit(hdd), 6)
+        self.assertEqual(limits.limit(ssd), 8)
+        self.assertEqual(limits.limit(nfs), UNLIMITED)
+        self.assertEqual(limits.largest_override(), 8)
+        auto = DeviceLimits()
+        auto._classes = {hdd: CLASS_HDD}
+        self.assertEqual(auto.limit(hdd), HDD_LIMIT)
+        off = DeviceLimits({hdd: 1}, enabled=False)
+        self.assertEqual(off.limit(off.device(Path("/x/a.avi"))), UNLIMITED)
+        self.assertEqual(off.summary(), [])
+
+    def test_path_keys_resolve_to_devices(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            limits = DeviceLimits.from_settings(((tmp, 3), ("hdd", 1)), True)
+            dev = os.stat(tmp).st_dev
+            self.assertEqual(limits.overrides, {dev: 3, CLASS_HDD: 1})
+            self.assertEqual(limits.device(Path(tmp) / "a.avi"), dev)
+            self.assertEqual(limits.limit(dev), 3)
+
+
+class TestDeviceQueues(unittest.TestCase):
+    def test_round_robin_within_limits(self):
+        waiting = DeviceQueues(_FakeLimits({1: 1, 2: 2}))
+        for name in ("/1/a", "/1/b", "/1/c", "/2/d", "/2/e", "/2/f"):
+            waiting.push(Path(name))
+        taken = []
+        while (path := waiting.pop_ready()) is not None:
+            taken.append(str(path))
+        self.assertEqual(taken, ["/1/a", "/2/d", "/2/e"])
+        self.assertEqual(len(waiting), 3)
+        waiting.done(Path("/1/a"))
+        self.assertEqual(waiting.pop_ready(), Path("/1/b"))
+        self.assertIsNone(waiting.pop_ready())
+        self.assertEqual(waiting.limits.files, Counter({1: 2, 2: 2}))
+
+
+class TestDeviceScheduling(unittest.TestCase):
+    """The executor never exceeds a device's limit and interleaves devices."""
+
+    def test_executor_respects_device_limits(self):
+        lock = threading.Lock()
+        running: Counter[int] = Counter()
+        peak: Counter[int] = Counter()
+        order = []
+
+        def probe(path, args, stats):
+            dev = int(path.parts[1])
+            with lock:
+                order.append(dev)
+                running[dev] += 1
+                peak[dev] = max(peak[dev], running[dev])
+            time.sleep(0.01)
+            with lock:
+                running[dev] -= 1
+            return FileProbeResult(path, "mpeg4", 2)
+
+        # All of device 1's files come first, as a directory walk would give
+        files = [Path(f"/1/{i}.avi") for i in range(6)]
+        files += [Path(f"/2/{i}.avi") for i in range(6)]
+        limits = _FakeLimits({1: 1, 2: 2})
+        executor = ProbeExecutor(jobs=4, probe_func=probe, devices=limits)
+        results = list(executor.run(files))
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(peak, Counter({1: 1, 2: 2}))
+        self.assertIn(2, order[:3])  # device 2 starts before device 1 drains
+        self.assertEqual(limits.files, Counter({1: 6, 2: 6}))
+
+
+class TestDeviceArguments(unittest.TestCase):
+    def test_parse_device_limits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = parse_args(["--device-limit", f"{tmp}=4", "--device-limit=hdd=1"])
+        self.assertTrue(cfg.devices.enabled)
+        self.assertEqual(cfg.devices.limits, ((tmp, 4), ("hdd", 1)))
+        cfg = parse_args(["--no-device-scheduling"])
+        self.assertFalse(cfg.devices.enabled)
+        with self.assertRaises(SystemExit):
+            parse_args(["--device-limit", "ssd=0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for conversion size/cost estimates and their calibration."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from video_codec_checker.estimator import PRESET_SCALING, EncodeEstimator
+from video_codec_checker.models import CsvRow, FileProbeResult
+
+
+def _probe(bit_rate=8_000_000, channels=2):
+    return FileProbeResult(
+        path=Path("a.avi"),
+        codec="mpeg4",
+        channels=channels,
+        width=1920,
+        height=1080,
+        fps=25.0,
+        bit_rate=bit_rate,
+        duration=100.0,
+    )
+
+
+class TestEstimate(unittest.TestCase):
+    def test_video_and_audio_bits(self):
+        est = EncodeEstimator(out_bpp=0.04, cpu_per_mpx=0.5).estimate(
+            _probe(), input_bytes=200_000_000
+        )
+        assert est is not None
+        pixels = 1920 * 1080 * 25 * 100
+        self.assertEqual(est.output_bytes, int((0.04 * pixels + 128_000 * 100) / 8))
+        self.assertEqual(est.bytes_saved, 200_000_000 - est.output_bytes)
+        self.assertAlmostEqual(est.cpu_seconds, round(0.5 * pixels / 1e6, 1))
+        self.assertGreater(est.saved_per_cpu_hour, 0)
+
+    def test_output_bpp_capped_at_source(self):
+        # A starved source does not get bigger when re-encoded
+        low = _probe(bit_rate=500_000, channels=0)
+        est = EncodeEstimator(out_bpp=0.5).estimate(low, input_bytes=6_250_000)
+        assert est is not None
+        self.assertLessEqual(est.output_bytes, 6_250_000)
+
+    def test_unknown_geometry_gives_none(self):
+        probed = FileProbeResult(path=Path("a.avi"), codec="mpeg4", channels=2)
+        self.assertIsNone(EncodeEstimator().estimate(probed, 1000))
+
+
+class TestCalibration(unittest.TestCase):
+    def test_fits_medians_from_successful_entries(self):
+        pixels = 1920 * 1080 * 25 * 100
+        entries = [
+            {
+                "exit_code": 0,
+                "output_bytes": int(bpp * pixels / 8),
+                "cpu_user_seconds": cpu,
+                "cpu_system_seconds": 0.0,
+                "duration": 100.0,
+                "width": 1920,
+                "height": 1080,
+                "fps": 25.0,
+                "channels": 0,
+            }
+            for bpp, cpu in ((0.02, 1000.0), (0.03, 2000.0), (0.05, 3000.0))
+        ]
+        entries.append({"exit_code": 1, "output_bytes": None})
+        entries.append({"exit_code": 0, "output_bytes": 10})  # no geometry
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger = Path(tmpdir) / "ledger.jsonl"
+            ledger.write_text("".join(json.dumps(e) + "\n" for e in entries))
+            model = EncodeEstimator.from_ledger(ledger)
+
+        self.assertEqual(model.samples, 3)
+        self.assertAlmostEqual(model.out_bpp, 0.03, places=4)
+        self.assertAlmostEqual(model.cpu_per_mpx, 2000.0 * 1e6 / pixels)
+
+    def test_other_presets_scaled_to_default(self):
+        for preset in range(2, 13):
+            with self.subTest(preset=preset):
+                self._check_scaled(preset)
+
+    def _check_scaled(self, preset):
+        pixels = 1920 * 1080 * 25 * 100
+        cpu_factor, size_factor = PRESET_SCALING[preset]
+        entry = {
+            "exit_code": 0,
+            "command": (
+                f"ffmpeg -i a.avi -c:v libsvtav1 -preset {preset} -crf 32 -an a.mkv"
+            ),
+            "output_bytes": int(0.03 * size_factor * pixels / 8),
+            "cpu_user_seconds": 1000.0 * cpu_factor,
+            "cpu_system_seconds": 0.0,
+            "duration": 100.0,
+            "width": 1920,
+            "height": 1080,
+            "fps": 25.0,
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger = Path(tmpdir) / "ledger.jsonl"
+            ledger.write_text((json.dumps(entry) + "\n") * 3)
+            model = EncodeEstimator.from_ledger(ledger)
+
+        self.assertAlmostEqual(model.out_bpp, 0.03, places=4)
+        self.assertAlmostEqual(model.cpu_per_mpx, 1000.0 * 1e6 / pixels)
+
+    def test_too_few_samples_keeps_defaults(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ledger = Path(tmpdir) / "ledger.jsonl"
+            ledger.write_text("")
+            self.assertEqual(EncodeEstimator.from_ledger(ledger), EncodeEstimator())
+
+
+class TestCsvRowEstimates(unittest.TestCase):
+    def test_round_trip_and_legacy_rows(self):
+        row = CsvRow("a.avi", "mpeg4", 2, 0.1, "ffmpeg", 10, 90, 3.5)
+        data = {k: str(v) for k, v in row.as_dict().items()}
+        self.assertEqual(CsvRow.from_dict(data), row)
+        legacy = {k: v for k, v in data.items() if not k.startswith("Est_")}
+        self.assertIsNone(CsvRow.from_dict(legacy).est_cpu_seconds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@ from pathlib import Path
 from video_codec_checker.ffmpeg_generator import (
     generate_ffmpeg_command,
     get_audio_bitrate,
+    limit_threads,
 )
 
 
@@ -66,6 +67,26 @@ class TestFFmpegGenerator(unittest.TestCase):
         )
         self.assertEqual(generate_ffmpeg_command(input_file, channels), expected)
 
+    def test_generate_ffmpeg_command_preset(self):
+        """A planned preset replaces the default; CRF is unchanged."""
+        command = generate_ffmpeg_command(Path("/path/to/video.mp4"), 2, preset=7)
+        self.assertIn(" -preset 7 -crf 32 ", command)
+
+
+class TestLimitThreads(unittest.TestCase):
+    def test_injects_thread_caps_before_output(self):
+        argv = ["ffmpeg", "-y", "-i", "in.avi", "-c:v", "libsvtav1", "out.mkv"]
+        out = limit_threads(argv, 4)
+        self.assertEqual(out[:2], ["ffmpeg", "-nostdin"])
+        self.assertEqual(out[-1], "out.mkv")
+        self.assertEqual(out[out.index("-threads") + 1], "4")
+        self.assertEqual(out[out.index("-svtav1-params") + 1], "lp=4")
+
+    def test_extends_existing_svt_params(self):
+        argv = ["ffmpeg", "-i", "a", "-c:v", "libsvtav1", "-svtav1-params", "tune=0"]
+        out = limit_threads([*argv, "b.mkv"], 2)
+        self.assertEqual(out[out.index("-svtav1-params") + 1], "tune=0:lp=2")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for discovery filters and subtree pruning."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from video_codec_checker.cli import parse_args
+from video_codec_checker.filters import FileFilter, parse_size, parse_time
+from video_codec_checker.models import FilterSettings
+from video_codec_checker.video_processor import iter_video_files
+
+
+class TestFilteredWalk(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for rel, size in (
+            ("movies/a.avi", 2000),
+            ("movies/b.avi", 2000),
+            ("movies/b_av1.mkv", 1000),
+            ("movies/tiny.avi", 10),
+            ("clean/deep/c.avi", 2000),
+            ("mixed/trailers/t.avi", 2000),
+            ("mixed/sample-d.avi", 2000),
+            ("mixed/d.avi", 2000),
+            ("archive/e.wmv", 2000),
+        ):
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"x" * size)
+        (self.root / "clean" / ".vccignore").write_text("")
+        ignore = "# local\nsample-*\ntrailers/\n"
+        (self.root / "mixed" / ".vccignore").write_text(ignore)
+        (self.root / "archive" / ".done").write_text("")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _walk(self, **settings):
+        file_filter = FileFilter(FilterSettings(**settings), self.root)
+        found = iter_video_files(str(self.root), file_filter=file_filter)
+        names = sorted(p.relative_to(self.root).as_posix() for p in found)
+        return names, dict(file_filter.counts)
+
+    def test_defaults_skip_ignored(self):
+        names, counts = self._walk()
+        self.assertEqual(
+            names,
+            [
+                "archive/e.wmv",
+                "mixed/d.avi",
+                "movies/a.avi",
+                "movies/b.avi",
+                "movies/b_av1.mkv",
+                "movies/tiny.avi",
+            ],
+        )
+        self.assertEqual(counts, {"ignored": 1, "pruned_dirs": 2})
+
+    def test_skip_converted(self):
+        names, counts = self._walk(skip_converted=True)
+        self.assertNotIn("movies/b.avi", names)
+        self.assertNotIn("movies/b_av1.mkv", names)
+        self.assertEqual(counts["converted"], 2)
+
+    def test_globs_size_and_markers(self):
+        names, counts = self._walk(
+            include=("*.avi",),
+            exclude=("movies/a.*",),
+            min_size=100,
+            markers=(".done",),
+            ignore_files=False,
+        )
+        self.assertEqual(
+            names,
+            [
+                "clean/deep/c.avi",
+                "mixed/d.avi",
+                "mixed/sample-d.avi",
+                "mixed/trailers/t.avi",
+                "movies/b.avi",
+            ],
+        )
+        self.assertEqual(
+            counts, {"excluded": 1, "not_included": 1, "size": 1, "pruned_dirs": 1}
+        )
+
+    def test_age_bounds(self):
+        old = self.root / "movies" / "a.avi"
+        os.utime(old, (1_000_000, 1_000_000))
+        names, counts = self._walk(newer_than=2_000_000.0, include=("movies/*",))
+        self.assertNotIn("movies/a.avi", names)
+        self.assertEqual(counts["age"], 1)
+        names, _ = self._walk(older_than=2_000_000.0)
+        self.assertEqual(names, ["movies/a.avi"])
+
+
+class TestFilterArguments(unittest.TestCase):
+    def test_parse_units(self):
+        self.assertEqual(parse_size("100M"), 100 * 1024**2)
+        self.assertEqual(parse_size("1.5GiB"), int(1.5 * 1024**3))
+        self.assertEqual(parse_time("2d", now=200_000.0), 200_000.0 - 2 * 86400)
+        self.assertGreater(parse_time("2024-01-31"), 1.7e9)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_cli_builds_settings(self):
+        cfg = parse_args(
+            ["--exclude", "*/Samples/*", "--min-size", "50M", "--skip-converted"]
+        )
+        self.assertEqual(cfg.filters.exclude, ("*/Samples/*",))
+        self.assertEqual(cfg.filters.min_size, 50 * 1024**2)
+        self.assertTrue(cfg.filters.skip_converted)
+        self.assertFalse(parse_args([]).filters.skip_converted)
+        self.assertTrue(cfg.filters.ignore_files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+"""Tests for native container header parsing."""
+
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.header_parser import parse_container_header
+from video_codec_checker.models import FileProbeResult
+
+# ---- MP4 ----
+
+
+def _box(btype, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), btype) + payload
+
+
+def _full_header(timescale, duration):
+    # mvhd/mdhd v0: version/flags, creation, modification, timescale, duration
+    return b"\0" * 12 + struct.pack(">II", timescale, duration) + b"\0" * 80
+
+
+def _hdlr(handler):
+    return _box(b"hdlr", b"\0" * 8 + handler + b"\0" * 12)
+
+
+def _trak(handler, stsd_entry, extra=b""):
+    stsd = _box(b"stsd", b"\0" * 4 + struct.pack(">I", 1) + stsd_entry)
+    stbl = _box(b"stbl", stsd + extra)
+    mdia = _box(
+        b"mdia",
+        _box(b"mdhd", _full_header(25, 250)) + _hdlr(handler) + _box(b"minf", stbl),
+    )
+    return _box(b"trak", mdia)
+
+
+def _aac_esds(channel_config):
+    # AudioSpecificConfig: AAC-LC (2), 48 kHz (index 3), channel configuration
+    asc = ((2 << 11) | (3 << 7) | (channel_config << 3)).to_bytes(2, "big")
+    dec_specific = b"\x05" + bytes([len(asc)]) + asc
+    dec_config = b"\x40\x15" + b"\0" * 11 + dec_specific
+    es = b"\0\x01\0" + b"\x04" + bytes([len(dec_config)]) + dec_config
+    return _box(b"esds", b"\0" * 4 + b"\x03" + bytes([len(es)]) + es)
+
+
+def build_mp4():
+    """10 s, 640x360 h264 at 25 fps (1000-byte samples) and 5.1 AAC.
+
+    The AAC sample entry's channelcount says 2, as muxers commonly write; the
+    real layout is only in the AudioSpecificConfig. moov follows mdat.
+    """
+    avc1 = _box(b"avc1", b"\0" * 24 + struct.pack(">HH", 640, 360) + b"\0" * 50)
+    stsz = _box(
+        b"stsz", b"\0" * 4 + struct.pack(">II", 0, 250) + struct.pack(">I", 1000) * 250
+    )
+    sound = b"\0" * 8 + struct.pack(">HHIHHHHI", 0, 0, 0, 2, 16, 0, 0, 48000 << 16)
+    mp4a = _box(b"mp4a", sound + _aac_esds(6))
+    moov = _box(
+        b"moov",
+        _box(b"mvhd", _full_header(1000, 10000))
+        + _trak(b"vide", avc1, stsz)
+        + _trak(b"soun", mp4a),
+    )
+    return _box(b"ftyp", b"isom\0\0\0\0") + _box(b"mdat", b"\0" * 2048) + moov
+
+
+# ---- Matroska ----
+
+
+def _el(eid, payload):
+    return (
+        eid.to_bytes((eid.bit_length() + 7) // 8, "big") + _vint(len(payload)) + payload
+    )
+
+
+def _vint(n):
+    return b"\x01" + n.to_bytes(7, "big")
+
+
+def _uint(eid, value):
+    return _el(eid, value.to_bytes(8, "big"))
+
+
+def build_mkv():
+    """10 s, 640x360 MPEG-4 ASP at 25 fps and 6-channel AC-3.
+
+    The Segment has unknown size and Info/Tracks follow the first Cluster, so
+    they are only reachable through the SeekHead.
+    """
+    info = _el(
+        0x1549A966, _uint(0x2AD7B1, 1_000_000) + _el(0x4489, struct.pack(">d", 10000.0))
+    )
+    video = _el(
+        0xAE,
+        _uint(0x83, 1)
+        + _el(0x86, b"V_MPEG4/ISO/ASP")
+        + _uint(0x23E383, 40_000_000)
+        + _el(0xE0, _uint(0xB0, 640) + _uint(0xBA, 360)),
+    )
+    audio = _el(0xAE, _uint(0x83, 2) + _el(0x86, b"A_AC3") + _el(0xE1, _uint(0x9F, 6)))
+    tracks = _el(0x1654AE6B, video + audio)
+    cluster = _el(0x1F43B675, _uint(0xE7, 0) + b"\0" * 64)
+
+    def seek_head(info_pos, tracks_pos):
+        seeks = b"".join(
+            _el(0x4DBB, _el(0x53AB, eid.to_bytes(4, "big")) + _uint(0x53AC, pos))
+            for eid, pos in ((0x1549A966, info_pos), (0x1654AE6B, tracks_pos))
+        )
+        return _el(0x114D9B74, seeks)
+
+    head_len = len(seek_head(0, 0))
+    info_pos = head_len + len(cluster)
+    body = seek_head(info_pos, info_pos + len(info)) + cluster + info + tracks
+    ebml = _el(0x1A45DFA3, _el(0x4282, b"matroska"))
+    segment = (0x18538067).to_bytes(4, "big") + b"\x01" + b"\xff" * 7
+    return ebml + segment + body
+
+
+# ---- AVI ----
+
+
+def _chunk(cid, data):
+    return cid + struct.pack("<I", len(data)) + data + b"\0" * (len(data) & 1)
+
+
+def _list(ltype, data):
+    return _chunk(b"LIST", ltype + data)
+
+
+def build_avi(fourcc=b"XVID"):
+    """1 s of 640x360 video at 25 fps (25 x 100-byte frames) and stereo audio."""
+    vstrh = struct.pack("<4s4sIHHIIIII", b"vids", fourcc, 0, 0, 0, 0, 1, 25, 0, 25)
+    vstrf = struct.pack("<IiiHH4sIiiII", 40, 640, 360, 1, 24, fourcc, 0, 0, 0, 0, 0)
+    astrh = struct.pack("<4s4sIHHIIIII", b"auds", b"\0" * 4, 0, 0, 0, 0, 1, 1, 0, 0)
+    astrf = struct.pack("<HHIIHH", 0x55, 2, 44100, 16000, 1, 0)
+    hdrl = _list(
+        b"hdrl",
+        _chunk(b"avih", b"\0" * 56)
+        + _list(b"strl", _chunk(b"strh", vstrh + b"\0" * 16) + _chunk(b"strf", vstrf))
+        + _list(b"strl", _chunk(b"strh", astrh + b"\0" * 16) + _chunk(b"strf", astrf)),
+    )
+    movi = _list(
+        b"movi", _chunk(b"00dc", b"\0" * 100) * 25 + _chunk(b"01wb", b"\0" * 8)
+    )
+    idx1 = _chunk(
+        b"idx1",
+        b"".join(
+            struct.pack("<4sIII", b"00dc", 0x10, 4 + i * 108, 100) for i in range(25)
+        )
+        + struct.pack("<4sIII", b"01wb", 0, 4 + 25 * 108, 8),
+    )
+    body = b"AVI " + hdrl + movi + idx1
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+class TestParseContainerHeader(unittest.TestCase):
+    """Codec, channels and bpp inputs come straight from container headers."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, data):
+        path = self.tmpdir / name
+        path.write_bytes(data)
+        return path
+
+    def test_mp4_with_moov_at_end(self):
+        result = parse_container_header(self._write("a.mp4", build_mp4()))
+
+        self.assertIsNotNone(result)
+        self.assertEqual((result.codec, result.channels), ("h264", 6))
+        self.assertEqual((result.width, result.height), (640, 360))
+        self.assertAlmostEqual(result.fps, 25.0)
+        self.assertAlmostEqual(result.duration, 10.0)
+        self.assertEqual(result.bit_rate, 200_000)
+
+    def test_mkv_tracks_found_through_seek_head(self):
+        data = build_mkv()
+        result = parse_container_header(self._write("a.mkv", data))
+
+        self.assertIsNotNone(result)
+        self.assertEqual((result.codec, result.channels), ("mpeg4", 6))
+        self.assertEqual((result.width, result.height), (640, 360))
+        self.assertAlmostEqual(result.fps, 25.0)
+        self.assertAlmostEqual(result.duration, 10.0)
+        # No per-stream rate in Matroska: container rate, as ffprobe reports
+        self.assertEqual(result.bit_rate, int(len(data) * 8 / 10.0))
+
+    def test_avi_bitrate_from_index(self):
+        result = parse_container_header(self._write("a.avi", build_avi()))
+
+        self.assertIsNotNone(result)
+        self.assertEqual((result.codec, result.channels), ("mpeg4", 2))
+        self.assertEqual((result.width, result.height), (640, 360))
+        self.assertAlmostEqual(result.duration, 1.0)
+        self.assertEqual(result.bit_rate, 25 * 100 * 8)
+
+    def test_ambiguous_or_unknown_input_returns_none(self):
+        for name, data in (
+            ("b.avi", build_avi(fourcc=b"ZZZZ")),
+            ("c.mkv", b"not a video file at all"),
+            ("d.mp4", build_mp4()[:200]),
+        ):
+            with self.subTest(name=name):
+                self.assertIsNone(parse_container_header(self._write(name, data)))
+
+    def test_executor_falls_back_to_ffprobe(self):
+        good = self._write("a.mp4", build_mp4())
+        bad = self._write("b.avi", build_avi(fourcc=b"ZZZZ"))
+        probe = MagicMock(
+            return_value=FileProbeResult(path=bad, codec="mpeg4", channels=2)
+        )
+
+        executor = ProbeExecutor(jobs=1, probe_func=probe, native_probe=True)
+        results = {r.path: r for r in executor.run([good, bad])}
+
+        probe.assert_called_once()
+        self.assertEqual(probe.call_args.args[0], bad)
+        self.assertEqual(results[good].codec, "h264")
+        self.assertEqual(executor.stats.native_attempted, 2)
+        self.assertEqual(executor.stats.native_hits, 1)
+        self.assertEqual(executor.stats.native_fallbacks, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for fixed-bucket latency histograms."""
+
+import io
+import json
+import random
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.histogram import LatencyHistogram, StageTimings
+from video_codec_checker.stats import ProbeStats
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_quantiles_within_one_bucket(self):
+        rng = random.Random(7)
+        samples = [rng.lognormvariate(-4, 1.5) for _ in range(10_000)]
+        hist = LatencyHistogram()
+        for s in samples:
+            hist.record(s)
+        samples.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = samples[int(q * len(samples)) - 1]
+            self.assertLessEqual(exact, hist.quantile(q) * 1.0001)
+            self.assertLess(hist.quantile(q), exact * 1.2)
+        self.assertEqual(hist.quantile(1.0), samples[-1])
+        self.assertEqual(hist.count, len(samples))
+
+    def test_extremes_are_clamped(self):
+        hist = LatencyHistogram()
+        hist.record(0.0)
+        hist.record(1e6)
+        self.assertEqual(hist.counts[0], 1)
+        self.assertEqual(hist.counts[-1], 1)
+        self.assertEqual(hist.quantile(1.0), 1e6)
+
+
+class TestStageTimings(unittest.TestCase):
+    def test_breakdown_by_extension_and_mount(self):
+        timings = StageTimings()
+        files = [Path("/x/a.mkv"), Path("/x/b.AVI"), Path("/x/c.mkv")]
+        self.assertEqual(list(timings.timed("walk", files)), files)
+        timings.record("csv_write", 0.001)
+
+        self.assertEqual(timings.overall["walk"].count, 3)
+        self.assertEqual(timings.by_ext["walk"][".mkv"].count, 2)
+        self.assertEqual(timings.by_ext["walk"][".avi"].count, 1)
+        self.assertEqual(sum(h.count for h in timings.by_mount["walk"].values()), 3)
+        self.assertNotIn("csv_write", timings.by_ext)
+
+        out = io.StringIO()
+        timings.print_table(out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("Latency"))
+        self.assertTrue(lines[1].startswith("walk"))
+
+    def test_mount_table_read_on_first_path(self):
+        mounts = mock.Mock(return_value=[("/", "ext4")])
+        with mock.patch("video_codec_checker.histogram.read_mounts", mounts):
+            timings = ProbeStats().timings
+            timings.record("walk", 0.1)
+            self.assertEqual(mounts.call_count, 0)
+            timings.record("walk", 0.1, Path("/a/b.mkv"))
+            timings.record("walk", 0.1, Path("/c/d.mkv"))
+        self.assertEqual(mounts.call_count, 1)
+        self.assertEqual(set(timings.by_mount["walk"]), {"/"})
+
+    def test_probe_stats_records_per_file_latency_and_dumps_json(self):
+        stats = ProbeStats()
+        local = stats.new_local()
+        local.update(fast_attempted=1, fast_time=0.05, full_probes=1, full_time=0.4)
+        stats.add(local, Path("/x/a.wmv"))
+
+        data = json.loads(json.dumps(stats.to_dict()))
+        self.assertEqual(data["fast_attempted"], 1)
+        self.assertEqual(set(data["latency"]), {"fast_probe", "full_probe"})
+        full = data["latency"]["full_probe"]
+        self.assertEqual(full["by_extension"][".wmv"]["count"], 1)
+        self.assertAlmostEqual(full["all"]["max"], 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
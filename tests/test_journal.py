@@ -0,0 +1,135 @@
+"""Tests for the scan journal and fast shutdown of in-flight probes."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.journal import ScanJournal, default_journal_path
+from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import FileProbeResult, JournalSettings
+from video_codec_checker.video_processor import _run, probes_cancelled
+
+
+class TestScanJournal(unittest.TestCase):
+    """Only checkpointed entries survive; outputs are cut back to match."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.report = self.tmp / "r.csv"
+        self.path = default_journal_path(self.report)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resume_sees_committed_entries_only(self):
+        journal = ScanJournal(self.path, self.report, every_files=2)
+        journal.open()
+        self.report.write_text("header\nrow-a\n")
+        journal.record("/v/a.avi", True)
+        self.assertFalse(journal.due())
+        journal.record("/v/b.mkv", False)
+        self.assertTrue(journal.due())
+        journal.commit([self.report])
+        # Written after the checkpoint, then killed
+        journal.record("/v/c.avi", True)
+        with self.report.open("a") as fh:
+            fh.write("row-c\n")
+        journal.close()
+        with self.path.open("a") as fh:
+            fh.write('{"f": "/v/d.av')  # torn write
+
+        resumed = ScanJournal(self.path, self.report)
+        resumed.load()
+        self.assertEqual(resumed.done, {"/v/a.avi", "/v/b.mkv"})
+        self.assertEqual(resumed.processed, 1)
+        script = self.tmp / "s.sh"
+        script.write_text("created after the checkpoint\n")
+        resumed.restore([self.report, script])
+        self.assertEqual(self.report.read_text(), "header\nrow-a\n")
+        self.assertFalse(script.exists())
+        files = [Path("/v/a.avi"), Path("/v/c.avi")]
+        self.assertEqual(list(resumed.select(files)), [Path("/v/c.avi")])
+        self.assertEqual(resumed.skipped, 1)
+
+    def test_rejects_other_report_and_lost_rows(self):
+        journal = ScanJournal(self.path, self.report)
+        journal.open()
+        self.report.write_text("header\nrow-a\n")
+        journal.commit([self.report])
+        journal.close()
+        with self.assertRaises(ValueError):
+            ScanJournal(self.path, self.tmp / "other.csv").load()
+        self.report.write_text("he")
+        resumed = ScanJournal(self.path, self.report)
+        resumed.load()
+        with self.assertRaises(ValueError):
+            resumed.restore([self.report])
+
+
+class TestResumeScan(unittest.TestCase):
+    """An interrupted scan resumes to the same report as a full one."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        for i in range(6):
+            (self.tmp / f"v{i}.avi").write_bytes(b"x")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _scan(self, output, probe, resume=False):
+        checker = VideoCodecChecker(str(output))
+        with mock.patch("video_codec_checker.main.probe_video", probe):
+            return checker.process_files(
+                str(self.tmp / "."),
+                jobs=1,
+                sort_files=True,
+                journal=JournalSettings(resume=resume),
+            )
+
+    def test_interrupt_then_resume(self):
+        probed = []
+
+        def probe(path, args, stats):
+            probed.append(path.name)
+            return FileProbeResult(path=path, codec="mpeg4", channels=2)
+
+        def flaky(path, args, stats):
+            if len(probed) == 3:
+                raise KeyboardInterrupt
+            return probe(path, args, stats)
+
+        out = self.tmp / "r.csv"
+        with self.assertRaises(KeyboardInterrupt):
+            self._scan(out, flaky)
+        self.assertTrue(default_journal_path(out).is_file())
+        done = len(probed)
+        probed.clear()
+        self.assertEqual(self._scan(out, probe, resume=True), 6)
+        self.assertEqual(len(probed), 6 - done)
+        self.assertFalse(default_journal_path(out).exists())
+        rows = out.read_text().splitlines()[1:]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len({r.split(",")[0] for r in rows}), 6)
+
+
+class TestProbesCancelled(unittest.TestCase):
+    def test_running_probe_is_killed(self):
+        results = []
+        worker = threading.Thread(target=lambda: results.append(_run(["sleep", "30"])))
+        t0 = time.monotonic()
+        worker.start()
+        time.sleep(0.2)
+        with probes_cancelled():
+            worker.join(5)
+        self.assertLess(time.monotonic() - t0, 5)
+        self.assertNotEqual(results[0].returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
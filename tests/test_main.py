@@ -1,12 +1,34 @@
 """Tests for CLI-level behavior in main module."""
 
 import os
+import shutil
+import subprocess
 import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
 from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.script_writer import ScriptWriter, TrashConfig
+
+
+def _probe_stub(results):
+    """Return a probe_video stand-in mapping file name -> (codec, channels)."""
+
+    def probe(path, args=None, stats=None):
+        codec, channels = results[path.name]
+        return FileProbeResult(
+            path=path,
+            codec=codec,
+            channels=channels,
+            width=640,
+            height=360,
+            fps=25.0,
+            bit_rate=288000,
+        )
+
+    return probe
 
 
 class TestMainScriptOutput(unittest.TestCase):
@@ -20,12 +42,14 @@ class TestMainScriptOutput(unittest.TestCase):
             # Patch file discovery and metadata probing
             with (
                 patch(
-                    "video_codec_checker.main.get_video_files",
+                    "video_codec_checker.main.iter_video_files",
                     return_value=[Path("a.avi"), Path("b.mkv")],
                 ),
                 patch(
-                    "video_codec_checker.main.probe_video_metadata",
-                    side_effect=[("mpeg4", 2), ("h264", 2)],
+                    "video_codec_checker.main.probe_video",
+                    side_effect=_probe_stub(
+                        {"a.avi": ("mpeg4", 2), "b.mkv": ("h264", 2)}
+                    ),
                 ),
                 patch(
                     "video_codec_checker.main.generate_ffmpeg_command",
@@ -54,12 +78,12 @@ class TestMainScriptOutput(unittest.TestCase):
 
             with (
                 patch(
-                    "video_codec_checker.main.get_video_files",
+                    "video_codec_checker.main.iter_video_files",
                     return_value=[Path("a.avi")],
                 ),
                 patch(
-                    "video_codec_checker.main.probe_video_metadata",
-                    return_value=("mpeg4", 2),
+                    "video_codec_checker.main.probe_video",
+                    side_effect=_probe_stub({"a.avi": ("mpeg4", 2)}),
                 ),
                 patch(
                     "video_codec_checker.main.generate_ffmpeg_command",
@@ -88,12 +112,12 @@ class TestMainScriptOutput(unittest.TestCase):
 
             with (
                 patch(
-                    "video_codec_checker.main.get_video_files",
+                    "video_codec_checker.main.iter_video_files",
                     return_value=[Path("a.avi")],
                 ),
                 patch(
-                    "video_codec_checker.main.probe_video_metadata",
-                    return_value=("mpeg4", 2),
+                    "video_codec_checker.main.probe_video",
+                    side_effect=_probe_stub({"a.avi": ("mpeg4", 2)}),
                 ),
                 patch(
                     "video_codec_checker.main.generate_ffmpeg_command",
@@ -105,9 +129,9 @@ class TestMainScriptOutput(unittest.TestCase):
                 ),
                 patch(
                     "video_codec_checker.script_writer.which",
-                    side_effect=lambda name: "/usr/bin/trash"
-                    if name == "trash"
-                    else None,
+                    side_effect=lambda name: (
+                        "/usr/bin/trash" if name == "trash" else None
+                    ),
                 ),
             ):
                 checker = VideoCodecChecker(csv_path)
@@ -129,12 +153,12 @@ class TestMainScriptOutput(unittest.TestCase):
 
             with (
                 patch(
-                    "video_codec_checker.main.get_video_files",
+                    "video_codec_checker.main.iter_video_files",
                     return_value=[Path("a.avi")],
                 ),
                 patch(
-                    "video_codec_checker.main.probe_video_metadata",
-                    return_value=("mpeg4", 2),
+                    "video_codec_checker.main.probe_video",
+                    side_effect=_probe_stub({"a.avi": ("mpeg4", 2)}),
                 ),
                 patch(
                     "video_codec_checker.main.generate_ffmpeg_command",
@@ -152,6 +176,9 @@ class TestMainScriptOutput(unittest.TestCase):
             # Value is 2 for our stub
             idx = header.index("Audio_Channels")
             self.assertEqual(row[idx], "2")
+            # bpp comes from the same probe: 288000 / (25 * 640 * 360)
+            idx = header.index("Bits_Per_Pixel")
+            self.assertAlmostEqual(float(row[idx]), 0.05)
 
     def test_does_not_create_script_when_only_h264(self):
         """Ensure no script file is created when no conversions are needed."""
@@ -161,16 +188,12 @@ class TestMainScriptOutput(unittest.TestCase):
 
             with (
                 patch(
-                    "video_codec_checker.main.get_video_files",
+                    "video_codec_checker.main.iter_video_files",
                     return_value=[Path("a.mp4")],
                 ),
                 patch(
-                    "video_codec_checker.main.probe_video_metadata",
-                    return_value=("h264", 2),
-                ),
-                patch(
-                    "video_codec_checker.main.compute_bpp",
-                    return_value=0.05,
+                    "video_codec_checker.main.probe_video",
+                    side_effect=_probe_stub({"a.mp4": ("h264", 2)}),
                 ),
                 patch(
                     "video_codec_checker.main.generate_ffmpeg_command",
@@ -194,5 +217,38 @@ class TestMainScriptOutput(unittest.TestCase):
             self.assertIn("ffmpeg H264", lines[1])
 
 
+class TestScriptFailures(unittest.TestCase):
+    """A failed encode in the generated script leaves no partial output."""
+
+    def _run(self, tmp: Path, delete_original: bool) -> tuple[int, bool, bool]:
+        src, dst = tmp / "a.avi", tmp / "a_av1.mkv"
+        src.write_bytes(b"x")
+        script = tmp / "convert.sh"
+        writer = ScriptWriter(
+            script, delete_original=delete_original, trash_config=TrashConfig(False)
+        )
+        writer.open()
+        cmd = f"echo partial > {dst}; false"
+        if delete_original:
+            writer.write_command(cmd, src, dst)
+        else:
+            writer.write_command_no_cleanup(cmd, dst)
+        writer.close()
+        rc = subprocess.run(["bash", str(script)], capture_output=True).returncode
+        return rc, src.exists(), dst.exists()
+
+    @unittest.skipUnless(shutil.which("bash"), "bash not installed")
+    def test_failed_encode_removes_output(self):
+        for delete_original in (False, True):
+            with (
+                self.subTest(delete_original=delete_original),
+                tempfile.TemporaryDirectory() as tmp,
+            ):
+                rc, src_kept, dst_kept = self._run(Path(tmp), delete_original)
+                self.assertNotEqual(rc, 0)
+                self.assertTrue(src_kept)
+                self.assertFalse(dst_kept)
+
+
 if __name__ == "__main__":
     unittest.main()
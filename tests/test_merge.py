@@ -0,0 +1,101 @@
+"""Tests for sharded scans and merging shard outputs."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from video_codec_checker.csv_writer import CsvResultsWriter, read_results
+from video_codec_checker.merge import merge_main, merge_scripts
+from video_codec_checker.models import CsvRow, ShardSpec
+from video_codec_checker.script_writer import ScriptWriter, TrashConfig
+
+
+class TestShardSpec(unittest.TestCase):
+    """Shards partition files by relative path, independent of mount point."""
+
+    def test_partition_is_disjoint_complete_and_stable(self):
+        rels = [f"show/s{i // 10}/e{i}.avi" for i in range(200)]
+        shards = [ShardSpec(k, 3) for k in (1, 2, 3)]
+        owners = [
+            [s for s in shards if s.includes(Path("/mnt/a", rel), "/mnt/a")]
+            for rel in rels
+        ]
+        self.assertTrue(all(len(o) == 1 for o in owners))
+        self.assertTrue(all(any(o == [s] for o in owners) for s in shards))
+        # Another host mounting the share elsewhere agrees on every file
+        for rel, owner in zip(rels, owners, strict=True):
+            self.assertTrue(owner[0].includes(Path("/srv/b", rel), "/srv/b"))
+
+    def test_parse(self):
+        self.assertEqual(ShardSpec.parse("2/8"), ShardSpec(2, 8))
+        for bad in ("0/4", "5/4", "3", "a/b"):
+            with self.subTest(spec=bad), self.assertRaises(ValueError):
+                ShardSpec.parse(bad)
+
+
+class TestMerge(unittest.TestCase):
+    """Per-shard CSVs and scripts combine into one sorted output."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _report(self, name, files):
+        path = self.tmpdir / name
+        writer = CsvResultsWriter(path)
+        writer.open()
+        for f in files:
+            writer.write_row_dc(CsvRow(f, "mpeg4", 2, 0.1, f"ffmpeg -i '{f}'"))
+        writer.close()
+        return path
+
+    def _script(self, name, files, delete=False):
+        path = self.tmpdir / name
+        writer = ScriptWriter(
+            path, delete_original=delete, trash_config=TrashConfig(False)
+        )
+        writer.open()
+        for f in files:
+            if delete:
+                writer.write_command(f"ffmpeg -i '{f}'", Path(f), Path(f + ".mkv"))
+            else:
+                writer.write_command_no_cleanup(f"ffmpeg -i '{f}'", Path(f + ".mkv"))
+        writer.close()
+        return path
+
+    def test_merge_sorts_reports_and_scripts(self):
+        r1 = self._report("s1.csv", ["c.avi", "a.avi"])
+        r2 = self._report("s2.csv", ["b.avi", "a.avi"])
+        s1 = self._script("s1.sh", ["c.avi", "a.avi"])
+        s2 = self._script("s2.sh", ["b.avi"])
+        out, script = self.tmpdir / "all.csv", self.tmpdir / "all.sh"
+
+        status = merge_main(
+            [str(r1), str(r2), "-o", str(out), "--scripts", str(s1), str(s2)]
+            + ["-s", str(script)]
+        )
+
+        self.assertEqual(status, 0)
+        self.assertEqual(
+            [r.file for r in read_results(out)], ["a.avi", "b.avi", "c.avi"]
+        )
+        lines = script.read_text().splitlines()
+        self.assertEqual(lines[0], "#!/usr/bin/env bash")
+        self.assertEqual(
+            [ln.split(" || ")[0] for ln in lines if ln.startswith("ffmpeg")],
+            ["ffmpeg -i 'a.avi'", "ffmpeg -i 'b.avi'", "ffmpeg -i 'c.avi'"],
+        )
+
+    def test_scripts_with_different_cleanup_are_rejected(self):
+        s1 = self._script("s1.sh", ["a.avi"])
+        s2 = self._script("s2.sh", ["b.avi"], delete=True)
+
+        with self.assertRaises(ValueError):
+            merge_scripts([s1, s2], self.tmpdir / "all.sh")
+
+
+if __name__ == "__main__":
+    unittest.main()
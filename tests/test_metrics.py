@@ -0,0 +1,68 @@
+"""Tests for the live metrics exporter."""
+
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from video_codec_checker.metrics import (
+    PREFIX,
+    Metric,
+    MetricsExporter,
+    render,
+    scan_metrics,
+)
+from video_codec_checker.models import MetricsSettings
+from video_codec_checker.stats import ProbeStats
+
+
+def _values(text):
+    return {
+        line.split()[0][len(PREFIX) :]: float(line.split()[1])
+        for line in text.splitlines()
+        if not line.startswith("#")
+    }
+
+
+class TestRender(unittest.TestCase):
+    def test_exposition_format(self):
+        text = render(
+            [
+                Metric("a_total", "counter", "A things.", 3),
+                Metric("ratio", "gauge", "A ratio.", 0.25),
+                Metric("unknown", "gauge", "Skipped.", float("nan")),
+            ]
+        )
+        self.assertIn(f"# TYPE {PREFIX}a_total counter\n{PREFIX}a_total 3\n", text)
+        self.assertIn(f"{PREFIX}ratio 0.25\n", text)
+        self.assertNotIn("unknown", text)
+
+    def test_scan_eta_only_once_discovery_is_done(self):
+        stats = ProbeStats(discovered=10, submitted=6, probed=5, in_flight=1)
+        values = _values(render(scan_metrics(stats)))
+        self.assertEqual(values["files_queued"], 4)
+        self.assertNotIn("eta_seconds", values)
+
+        stats.discovery_done = True
+        self.assertGreater(_values(render(scan_metrics(stats)))["eta_seconds"], 0)
+
+
+class TestExporter(unittest.TestCase):
+    def test_http_and_textfile(self):
+        stats = ProbeStats(discovered=2, probed=1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            textfile = Path(tmpdir) / "vcc.prom"
+            settings = MetricsSettings(textfile=textfile, port=0, interval=60)
+            with MetricsExporter(settings, lambda: scan_metrics(stats)) as exp:
+                url = f"http://127.0.0.1:{exp.port}/metrics"
+                with urllib.request.urlopen(url, timeout=5) as resp:
+                    body = resp.read().decode()
+                stats.probed = 2
+            self.assertEqual(_values(body)["files_probed_total"], 1)
+            # The final rewrite on stop carries the last values
+            self.assertEqual(_values(textfile.read_text())["files_probed_total"], 2)
+            self.assertFalse(Path(f"{textfile}.tmp").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""Tests for per-file preset planning under a CPU budget."""
+
+import io
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.cli import parse_args
+from video_codec_checker.estimator import PRESET_SCALING, Estimate
+from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import (
+    FileProbeResult,
+    JournalSettings,
+    PlanSettings,
+    ProbeSettings,
+    WatchSettings,
+)
+from video_codec_checker.planner import (
+    Choice,
+    PresetTable,
+    frontier,
+    parse_deadline,
+    plan_presets,
+    preset_table,
+)
+from video_codec_checker.sinks import read_rows
+
+_TABLE = PresetTable({3: (1.0, 1.0), 6: (0.25, 1.1), 8: (0.1, 1.3), 9: (0.2, 1.5)})
+
+
+def _est(cpu, output, input_bytes):
+    return Estimate(output, max(0, input_bytes - output), cpu)
+
+
+class TestPlanner(unittest.TestCase):
+    def test_frontier_drops_dominated_presets(self):
+        choices = _TABLE.choices(_est(1000.0, 100, 1000), 1000)
+        # Preset 9 is slower than 8 and saves less
+        self.assertEqual([c.preset for c in frontier(choices)], [8, 6, 3])
+        self.assertEqual(frontier([Choice(3, _est(10.0, 2000, 1000))])[0].preset, 3)
+
+    def test_budget_bounds(self):
+        items = [(_est(1000.0, 100, 1000), 1000), (_est(500.0, 400, 1000), 1000)]
+        rich = plan_presets(items, 10_000, _TABLE)
+        self.assertEqual([c.preset for c in rich.choices], [3, 3])
+        poor = plan_presets(items, 10, _TABLE)
+        self.assertEqual([c.preset for c in poor.choices], [8, 8])
+        self.assertEqual(poor.shortfall, 150.0)
+
+    def test_spends_budget_on_best_savings_per_cpu(self):
+        # The first file gains far more per CPU-second from a slower preset
+        items = [(_est(1000.0, 5000, 10_000), 10_000), (_est(1000.0, 100, 1000), 1000)]
+        plan = plan_presets(items, 1300, _TABLE)
+        self.assertLessEqual(plan.cpu_seconds, 1300)
+        self.assertEqual([c.preset for c in plan.choices], [3, 6])
+        self.assertEqual(plan.shortfall, 0.0)
+
+    def test_measured_speeds_override_defaults(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "speeds.json"
+            path.write_text(
+                json.dumps({"presets": {"6": {"cpu_factor": 0.3}, "x": {}}})
+            )
+            table = PresetTable.load(path)
+        self.assertEqual(table.scaling[6], (0.3, 1.06))
+        self.assertEqual(table.scaling[3], (1.0, 1.0))
+
+    def test_host_profile_sizes_need_explicit_speeds(self):
+        profile = {"presets": {"8": {"cpu_factor": 0.2, "size_factor": 1.5}}}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "video-codec-checker" / "host-profile.json"
+            path.parent.mkdir()
+            path.write_text(json.dumps(profile))
+            with mock.patch.dict("os.environ", {"XDG_CACHE_HOME": tmp}):
+                implicit = preset_table(None)
+            explicit = preset_table(path)
+        self.assertEqual(implicit.scaling[8], (0.2, PRESET_SCALING[8][1]))
+        self.assertEqual(explicit.scaling[8], (0.2, 1.5))
+
+    def test_deadline(self):
+        self.assertEqual(parse_deadline("8h"), 8 * 3600)
+        now = datetime(2029, 12, 31, 23, 0).timestamp()
+        self.assertEqual(parse_deadline("2030-01-01T00:00", now=now), 3600)
+        with self.assertRaises(ValueError):
+            parse_deadline("2001-01-01")
+        cfg = parse_args(["--plan-deadline", "2h", "--plan-cores", "4"])
+        self.assertEqual(cfg.plan.cpu_budget, 8 * 3600)
+
+    def test_errors_name_the_option_used(self):
+        for argv, option in (
+            (["--plan-cpu-hours", "0"], "--plan-cpu-hours"),
+            (["--plan-deadline", "2h", "--plan-cores", "0"], "--plan-cores"),
+            (["--plan-deadline", "0h"], "--plan-deadline"),
+        ):
+            with (
+                self.subTest(argv=argv),
+                mock.patch("sys.stderr", new_callable=io.StringIO) as err,
+                self.assertRaises(SystemExit),
+            ):
+                parse_args(argv)
+            self.assertIn(f"{option} must", err.getvalue())
+
+
+class TestPlannedScan(unittest.TestCase):
+    def test_script_and_report_use_planned_presets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            with open(root / "a.avi", "wb") as fh:
+                fh.truncate(400_000_000)  # sparse
+            out, script = root / "r.csv", root / "s.sh"
+            probe = mock.Mock(
+                side_effect=lambda p, a, s: FileProbeResult(
+                    p, "mpeg4", 2, 1280, 720, 25.0, 4_000_000, 600.0
+                )
+            )
+            checker = VideoCodecChecker(str(out))
+            with mock.patch("video_codec_checker.main.probe_video", probe):
+                checker.process_files(
+                    str(root),
+                    jobs=1,
+                    script_file=str(script),
+                    sort_files=True,
+                    probe=ProbeSettings(sniff=False),  # the sparse file is all zeros
+                    plan=PlanSettings(cpu_budget=600.0),
+                )
+            (row,) = read_rows(out)
+            commands = script.read_text()
+
+        self.assertNotEqual(row.preset, 3)
+        self.assertIn(f"-preset {row.preset} ", row.command)
+        self.assertIn(f"-preset {row.preset} ", commands)
+        self.assertLessEqual(row.est_cpu_seconds, 600.0)
+
+    def test_files_without_estimates_get_the_fastest_preset(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in ("a.avi", "b.avi"):
+                with open(root / name, "wb") as fh:
+                    fh.truncate(400_000_000)  # sparse
+            out, script = root / "r.csv", root / "s.sh"
+            speeds = root / "speeds.json"
+            speeds.write_text('{"presets": {}}')  # the typical figures
+            fastest = PresetTable().fastest()
+
+            def probe(path, args, stats):
+                if path.name == "b.avi":  # no duration: cannot be estimated
+                    return FileProbeResult(path, "mpeg4", 2)
+                return FileProbeResult(
+                    path, "mpeg4", 2, 1280, 720, 25.0, 4_000_000, 600.0
+                )
+
+            with (
+                mock.patch("video_codec_checker.main.probe_video", probe),
+                mock.patch("sys.stderr", new_callable=io.StringIO) as err,
+            ):
+                VideoCodecChecker(str(out)).process_files(
+                    str(root),
+                    jobs=1,
+                    script_file=str(script),
+                    sort_files=True,
+                    probe=ProbeSettings(sniff=False),
+                    plan=PlanSettings(cpu_budget=600.0, preset_speeds=speeds),
+                )
+            rows = {Path(r.file).name: r for r in read_rows(out)}
+            commands = script.read_text()
+
+        self.assertEqual(rows["b.avi"].preset, fastest)
+        self.assertIsNone(rows["b.avi"].est_cpu_seconds)
+        self.assertIn(f"-preset {fastest} ", rows["b.avi"].command)
+        self.assertEqual(commands.count("-preset "), 2)
+        self.assertIn("Preset plan: 1 files", err.getvalue())
+        self.assertIn(f"1 files without estimates at preset {fastest}", err.getvalue())
+
+    def test_rejects_watch_and_resume(self):
+        checker = VideoCodecChecker("r.csv")
+        plan = PlanSettings(cpu_budget=600.0)
+        for options in (
+            {"watch": WatchSettings()},
+            {"journal": JournalSettings(resume=True)},
+        ):
+            with self.subTest(options=options), self.assertRaises(ValueError):
+                checker.process_files(".", plan=plan, **options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests for the persistent probe cache."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.probe_cache import ProbeCache
+
+
+class TestProbeCache(unittest.TestCase):
+    """Cache validation, eviction and executor integration."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self._tmp.name)
+        self.video = self.tmpdir / "media" / "a.avi"
+        self.video.parent.mkdir()
+        self.video.write_bytes(b"x" * 10)
+        self.cache = ProbeCache(self.tmpdir / "cache.sqlite3")
+        self.cache.open()
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_hit_until_file_changes(self):
+        sig = self.cache.signature(self.video)
+        self.cache.put(self.video, sig, {"codec": "mpeg4", "channels": 2})
+        self.assertEqual(
+            self.cache.get(self.video, self.cache.signature(self.video)),
+            {"codec": "mpeg4", "channels": 2},
+        )
+
+        self.video.write_bytes(b"y" * 20)
+        self.assertIsNone(self.cache.get(self.video, self.cache.signature(self.video)))
+
+    def test_entry_follows_renamed_file(self):
+        self.cache.put(self.video, self.cache.signature(self.video), {"codec": "vp8"})
+        moved = self.tmpdir / "media" / "renamed.avi"
+        os.rename(self.video, moved)
+        sig = self.cache.signature(moved)
+        self.assertEqual(self.cache.get(moved, sig), {"codec": "vp8"})
+        # A different file (other inode) does not match
+        self.video.write_bytes(b"x" * 10)
+        self.assertIsNone(self.cache.get(self.video, self.cache.signature(self.video)))
+
+    def test_moved_entry_must_be_on_same_device(self):
+        self.cache.put(self.video, self.cache.signature(self.video), {"codec": "vp8"})
+        sig = self.cache.signature(self.video)
+        other = replace(sig, device=sig.device + 1)
+        # Same inode, size and mtime on another filesystem is another file
+        self.assertIsNone(self.cache.get(self.tmpdir / "elsewhere.avi", other))
+        self.assertEqual(
+            self.cache.get(self.tmpdir / "elsewhere.avi", sig), {"codec": "vp8"}
+        )
+
+    def test_read_only_lookup_leaves_the_cache_alone(self):
+        self.cache.put(self.video, self.cache.signature(self.video), {"codec": "vp8"})
+        self.cache.close()
+        path = self.tmpdir / "cache.sqlite3"
+        conn = sqlite3.connect(path)
+        before = conn.execute("SELECT * FROM probes").fetchall()
+
+        reader = ProbeCache(path, read_only=True)
+        reader.open()
+        moved = self.tmpdir / "media" / "renamed.avi"
+        os.rename(self.video, moved)
+        try:
+            self.assertEqual(
+                reader.lookup(moved, reader.signature(moved)), {"codec": "vp8"}
+            )
+        finally:
+            reader.close()
+        self.assertEqual(conn.execute("SELECT * FROM probes").fetchall(), before)
+        conn.close()
+        self.cache.open()
+
+    def test_read_only_skips_other_schema_versions(self):
+        self.cache.put(self.video, self.cache.signature(self.video), {"codec": "vp8"})
+        self.cache.close()
+        path = self.tmpdir / "cache.sqlite3"
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA user_version=1")
+        conn.close()
+
+        with self.assertRaises(sqlite3.DatabaseError):
+            ProbeCache(path, read_only=True).open()
+        conn = sqlite3.connect(path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM probes").fetchone(), (1,))
+        conn.close()
+        self.cache.open()
+
+    def test_prune_removes_only_missing_files(self):
+        other = self.video.with_name("b.avi")
+        other.write_bytes(b"z")
+        for fp in (self.video, other):
+            self.cache.put(fp, self.cache.signature(fp), {"codec": "mpeg4"})
+        self.cache.close()
+
+        # A later run that sees neither file, after one of them was deleted
+        self.cache = ProbeCache(self.tmpdir / "cache.sqlite3")
+        self.cache.open()
+        os.remove(other)
+        self.assertEqual(self.cache.prune(self.tmpdir / "media"), 1)
+        self.assertIsNotNone(
+            self.cache.get(self.video, self.cache.signature(self.video))
+        )
+
+    def test_executor_skips_probe_on_warm_cache(self):
+        probe = MagicMock(
+            return_value=FileProbeResult(
+                path=self.video, codec="mpeg4", channels=6, width=720, height=576
+            )
+        )
+        for _ in range(2):
+            executor = ProbeExecutor(jobs=1, probe_func=probe, cache=self.cache)
+            results = list(executor.run([self.video]))
+
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(results[0].codec, "mpeg4")
+        self.assertEqual(results[0].channels, 6)
+        self.assertEqual((results[0].width, results[0].height), (720, 576))
+        self.assertEqual(executor.stats.cache_hits, 1)
+        self.assertEqual(executor.stats.cache_misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for adaptive probe timeouts, retries and the quarantine pass."""
+
+import subprocess
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.probe_policy import MIN_SAMPLES, ProbePolicy
+from video_codec_checker.video_processor import (
+    ERROR_IO,
+    ERROR_TIMEOUT,
+    ERROR_UNREADABLE,
+    PROBE_TIMEOUT,
+    _timeout,
+    probe_video,
+)
+
+
+class TestProbePolicy(unittest.TestCase):
+    def test_timeout_follows_latency_and_size(self):
+        policy = ProbePolicy(max_timeout=100.0)
+        # Too few samples: the fixed default, plus the size allowance
+        self.assertEqual(policy.timeout(0), PROBE_TIMEOUT)
+        self.assertAlmostEqual(policy.timeout(10 * 1024**3), PROBE_TIMEOUT + 20)
+        for _ in range(MIN_SAMPLES):
+            policy.observe(0.1)
+        self.assertEqual(policy.timeout(0), policy.min_timeout)
+        for _ in range(MIN_SAMPLES):
+            policy.observe(3.0)
+        self.assertAlmostEqual(policy.timeout(0), 4 * 3.0)  # 4 x p99
+        # Retries double the limit; nothing exceeds the maximum
+        self.assertEqual(policy.timeout(0, attempt=1), 2 * policy.timeout(0))
+        self.assertEqual(policy.timeout(0, attempt=5), 100.0)
+        self.assertEqual(policy.timeout(0, final=True), 100.0)
+
+    def test_only_transient_errors_are_retried(self):
+        policy = ProbePolicy(retries=2)
+        self.assertTrue(policy.should_retry(ERROR_TIMEOUT, 0))
+        self.assertTrue(policy.should_retry(ERROR_IO, 1))
+        self.assertFalse(policy.should_retry(ERROR_IO, 2))
+        self.assertFalse(policy.should_retry(ERROR_UNREADABLE, 0))
+        self.assertFalse(policy.should_retry(None, 0))
+
+
+class TestRetryAndQuarantine(unittest.TestCase):
+    """Failed files are retried, then probed again after everything else."""
+
+    def test_transient_then_quarantine(self):
+        calls: dict[str, list[float]] = {}
+
+        def probe(path, args, stats):
+            seen = calls.setdefault(path.name, [])
+            seen.append(_timeout.get())
+            if path.name == "flaky.avi" and len(seen) < 2:
+                return FileProbeResult(path, None, 0, error=ERROR_TIMEOUT)
+            if path.name == "bad.avi":
+                return FileProbeResult(path, None, 0, error=ERROR_UNREADABLE)
+            if path.name == "late.avi" and len(seen) < 4:
+                return FileProbeResult(path, None, 0, error=ERROR_IO)
+            return FileProbeResult(path, "mpeg4", 2)
+
+        policy = ProbePolicy(retries=2, backoff=0.0, max_timeout=99.0)
+        executor = ProbeExecutor(jobs=2, probe_func=probe, policy=policy)
+        names = ["bad.avi", "flaky.avi", "ok.avi", "late.avi"]
+        results = list(executor.run([Path(n) for n in names]))
+
+        order = [r.path.name for r in results]
+        self.assertEqual(set(order[2:]), {"bad.avi", "late.avi"})
+        errors = {r.path.name: r.error for r in results}
+        self.assertEqual(errors["bad.avi"], ERROR_UNREADABLE)
+        self.assertIsNone(errors["late.avi"])  # recovered in the final pass
+        self.assertIsNone(errors["flaky.avi"])
+        self.assertEqual(len(calls["bad.avi"]), 2)  # not retried, re-run once
+        self.assertEqual(calls["late.avi"][-1], 99.0)
+        self.assertEqual(calls["flaky.avi"][1], 2 * calls["flaky.avi"][0])
+        stats = executor.stats
+        self.assertEqual((stats.retries, stats.timeouts), (3, 1))
+        self.assertEqual((stats.quarantined, stats.probe_errors), (2, 1))
+        self.assertEqual(stats.probed, 4)
+
+
+class TestFailureKinds(unittest.TestCase):
+    @patch("video_codec_checker.video_processor._run")
+    def test_classifies_failures(self, mock_run):
+        path = Path("/nfs/a.avi")
+        mock_run.return_value = subprocess.CompletedProcess(
+            [], 1, "", "/nfs/a.avi: Input/output error\n"
+        )
+        self.assertEqual(probe_video(path).error, ERROR_IO)
+        mock_run.return_value = subprocess.CompletedProcess(
+            [], 1, "", "Invalid data found when processing input\n"
+        )
+        self.assertEqual(probe_video(path).error, ERROR_UNREADABLE)
+        mock_run.side_effect = subprocess.TimeoutExpired([], 1.0)
+        self.assertEqual(probe_video(path).error, ERROR_TIMEOUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests for per-extension fast-probe tuning."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.probe_tuner import (
+    EXPLORE_EVERY,
+    MAX_LEVEL,
+    MIN_SAMPLES,
+    ProbeTuner,
+)
+
+BASE_ARGS = ["-probesize", "5M", "-analyzeduration", "10M"]
+FALLBACK = {"fast_attempted": 1, "fast_fallbacks": 1, "full_probes": 1}
+FAST_OK = {"fast_attempted": 1, "fast_succeeded": 1}
+
+
+class TestProbeTuner(unittest.TestCase):
+    """Levels escalate per extension and persist across runs."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.profile = Path(self._tmp.name) / "profile.json"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _feed(self, tuner, name, stats, count=MIN_SAMPLES):
+        for _ in range(count):
+            tuner.args_for(Path(name))
+            tuner.record(Path(name), stats)
+
+    def test_escalates_only_failing_extension(self):
+        tuner = ProbeTuner(BASE_ARGS)
+        self._feed(tuner, "a.mpg", FALLBACK)
+        self._feed(tuner, "a.mkv", FAST_OK)
+
+        self.assertEqual(
+            tuner.args_for(Path("b.mpg")),
+            ["-probesize", "20000000", "-analyzeduration", "40000000"],
+        )
+        self.assertEqual(tuner.args_for(Path("b.MKV")), BASE_ARGS)
+
+    def test_skips_fast_probe_when_top_level_still_fails(self):
+        tuner = ProbeTuner(BASE_ARGS)
+        self._feed(tuner, "a.ts", FALLBACK, MIN_SAMPLES * (MAX_LEVEL + 1))
+
+        self.assertTrue(tuner.profile(".ts").skip_fast)
+        # Mostly full probes, with an occasional exploratory fast probe
+        args = [tuner.args_for(Path("b.ts")) for _ in range(EXPLORE_EVERY)]
+        self.assertEqual(sum(a is not None for a in args), 1)
+
+    def test_profile_round_trip_and_stale_base(self):
+        tuner = ProbeTuner(BASE_ARGS, self.profile)
+        self._feed(tuner, "a.mpg", FALLBACK)
+        tuner.save()
+
+        reloaded = ProbeTuner(BASE_ARGS, self.profile)
+        reloaded.load()
+        self.assertEqual(reloaded.profile(".mpg").level, 1)
+
+        # Learned from different base arguments: start over
+        other = ProbeTuner(["-probesize", "1M"], self.profile)
+        other.load()
+        self.assertEqual(other.args_for(Path("a.mpg")), ["-probesize", "1M"])
+
+    def test_executor_passes_tuned_args(self):
+        seen = []
+
+        def probe(path, args, stats):
+            seen.append(args)
+            stats.update(FALLBACK)
+            return FileProbeResult(path=path, codec="mpeg2video", channels=2)
+
+        tuner = ProbeTuner(BASE_ARGS)
+        files = [Path(f"{i}.mpg") for i in range(MIN_SAMPLES + 1)]
+        executor = ProbeExecutor(
+            jobs=1, ffprobe_args=BASE_ARGS, probe_func=probe, tuner=tuner
+        )
+        list(executor.run(files))
+
+        self.assertEqual(seen[0], BASE_ARGS)
+        self.assertEqual(seen[-1][1], "20000000")
+
+
+if __name__ == "__main__":
+    unittest.main()
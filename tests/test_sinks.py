@@ -0,0 +1,132 @@
+"""Tests for the pluggable result sinks."""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.models import CsvRow, OutputFormat
+from video_codec_checker.sinks import (
+    RECORD_FIELDS,
+    JsonlSink,
+    format_for_path,
+    make_sink,
+    parquet_available,
+    read_rows,
+)
+
+
+def _row(i: int) -> CsvRow:
+    return CsvRow(
+        file=f"/v/{i}.avi",
+        codec="mpeg4" if i % 2 else "h264",
+        channels=2,
+        bpp=0.1,
+        command=f"ffmpeg -i /v/{i}.avi",
+        est_output_bytes=1000 + i,
+        est_bytes_saved=None,
+        est_cpu_seconds=1.5,
+        width=640,
+        height=480,
+        fps=25.0,
+        duration=60.0,
+        bit_rate=1_000_000,
+    )
+
+
+class TestSinks(unittest.TestCase):
+    """Every format round-trips the full record."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _round_trip(self, name: str) -> list[CsvRow]:
+        path = self.tmp / name
+        rows = [_row(i) for i in range(5)]
+        sink = make_sink(format_for_path(path), path, batch_rows=2)
+        sink.open()
+        for row in rows:
+            sink.write_row_dc(row)
+        sink.close()
+        return list(read_rows(path))
+
+    def test_record_fields_match_schema(self):
+        self.assertEqual(list(_row(0).as_record()), RECORD_FIELDS)
+        self.assertEqual(CsvRow.from_record(_row(3).as_record()), _row(3))
+
+    def test_jsonl_and_sqlite_round_trip(self):
+        for name in ("r.jsonl", "r.sqlite"):
+            with self.subTest(name=name):
+                self.assertEqual(self._round_trip(name), [_row(i) for i in range(5)])
+
+    def test_csv_keeps_report_columns(self):
+        back = self._round_trip("r.csv")
+        self.assertEqual([r.file for r in back], [f"/v/{i}.avi" for i in range(5)])
+        self.assertEqual(back[0].width, 0)  # probe details are not CSV columns
+        header = (self.tmp / "r.csv").read_text().splitlines()[0].split(",")
+        # The original columns keep their positions; new ones are appended
+        self.assertEqual(
+            header[:5],
+            ["File", "Codec", "Audio_Channels", "Bits_Per_Pixel", "FFmpeg_Command"],
+        )
+
+    def test_sqlite_appends_to_older_table(self):
+        path = self.tmp / "old.sqlite"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE results (file TEXT PRIMARY KEY, codec TEXT, "
+            "audio_channels INTEGER, bits_per_pixel REAL, ffmpeg_command TEXT)"
+        )
+        conn.execute("INSERT INTO results VALUES ('/v/old.avi', 'xvid', 2, 0.2, '')")
+        conn.commit()
+        conn.close()
+
+        sink = make_sink(OutputFormat.SQLITE, path)
+        sink.open(append=True)
+        sink.write_row_dc(_row(1))
+        sink.close()
+
+        rows = {r.file: r for r in read_rows(path)}
+        self.assertEqual(rows["/v/1.avi"], _row(1))
+        self.assertEqual(rows["/v/old.avi"].codec, "xvid")
+
+    def test_sqlite_indexes_codec(self):
+        self._round_trip("r.sqlite")
+        with sqlite3.connect(self.tmp / "r.sqlite") as conn:
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(results)")}
+            count = conn.execute(
+                "SELECT COUNT(*) FROM results WHERE codec = 'mpeg4'"
+            ).fetchone()[0]
+        self.assertIn("results_codec", indexes)
+        self.assertEqual(count, 2)
+
+    def test_batches_on_size_and_time(self):
+        sink = JsonlSink(self.tmp / "b.jsonl", batch_rows=3, batch_seconds=60)
+        sink.open()
+        with mock.patch.object(sink, "_write_batch", wraps=sink._write_batch) as wb:
+            for i in range(7):
+                sink.write_row_dc(_row(i))
+            self.assertEqual([len(c.args[0]) for c in wb.call_args_list], [3, 3])
+            sink.batch_seconds = 0
+            sink.write_row_dc(_row(7))
+            self.assertEqual(wb.call_count, 3)
+            sink.close()
+        self.assertEqual(len(list(read_rows(self.tmp / "b.jsonl"))), 8)
+
+    @unittest.skipUnless(parquet_available(), "pyarrow not installed")
+    def test_parquet_round_trip(self):
+        self.assertEqual(self._round_trip("r.parquet"), [_row(i) for i in range(5)])
+
+    def test_format_for_path(self):
+        self.assertIs(format_for_path("a.db"), OutputFormat.SQLITE)
+        self.assertIs(format_for_path("a.JSONL"), OutputFormat.JSONL)
+        self.assertIs(format_for_path("a.txt"), OutputFormat.CSV)
+
+
+if __name__ == "__main__":
+    unittest.main()
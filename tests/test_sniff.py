@@ -0,0 +1,95 @@
+"""Tests for content sniffing ahead of ffprobe."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.probe_tuner import ProbeTuner
+from video_codec_checker.sniff import Sniffed, container_of, not_video_reason, sniff
+from video_codec_checker.video_processor import ERROR_NOT_A_VIDEO
+
+
+class TestSignatures(unittest.TestCase):
+    def test_containers(self):
+        ts = bytearray(600)
+        ts[0] = ts[188] = ts[376] = 0x47
+        m2ts = bytearray(600)
+        m2ts[4] = m2ts[196] = m2ts[388] = 0x47
+        cases = {
+            b"\x1a\x45\xdf\xa3\x01\x00": ".mkv",
+            b"\x00\x00\x00\x20ftypisom": ".mp4",
+            b"\x00\x00\x00\x14ftypqt  ": ".mov",
+            b"\x00\x00\x00\x14ftyp3gp5": ".3gp",
+            b"\x00\x00\x00\x08wide\x00\x00": ".mov",
+            b"RIFF\x00\x10\x00\x00AVI LIST": ".avi",
+            b"\x00\x00\x01\xba\x44\x00": ".mpg",
+            bytes(ts): ".ts",
+            bytes(m2ts): ".ts",
+            bytes.fromhex("3026b2758e66cf11a6d900aa0062ce6c") + b"\x00": ".wmv",
+            b"FLV\x01\x05": ".flv",
+            b"OggS\x00\x02": ".ogv",
+        }
+        for head, expected in cases.items():
+            self.assertEqual(container_of(head), expected, head[:12])
+        self.assertIsNone(container_of(b"\x00\x00\x00\x01\x67"))  # raw H.264
+
+    def test_not_video(self):
+        self.assertEqual(not_video_reason(b""), "empty")
+        self.assertEqual(not_video_reason(b"\n  <!DOCTYPE html><html>"), "markup")
+        self.assertEqual(not_video_reason(b'<?xml version="1.0"?>'), "markup")
+        self.assertEqual(not_video_reason(b"PK\x03\x04\x14\x00"), "zip")
+        self.assertIsNone(not_video_reason(b"\x00\x00\x00\x01\x67"))
+        # Odd but possibly playable heads are left to ffprobe
+        for head in (
+            bytes(1024),  # null padding before an MPEG-PS/TS capture
+            b"ID3\x03\x00\x00\x00\x00\x00\x00\x00\x00\x01\xba",
+            b"[Script Info]",
+            b'{"error": "not found"}',
+            b"<\x00\x12binary",
+        ):
+            self.assertIsNone(not_video_reason(head), head[:16])
+        # A recognised container is never rejected
+        self.assertIsNone(sniff(b"\x1a\x45\xdf\xa3").not_video)
+
+    def test_mismatch(self):
+        self.assertTrue(Sniffed(".mkv").mismatch(Path("a.avi")))
+        self.assertFalse(Sniffed(".mkv").mismatch(Path("a.WEBM")))
+        self.assertFalse(Sniffed(".mp4").mismatch(Path("a.m4v")))
+        self.assertFalse(Sniffed().mismatch(Path("a.avi")))
+
+
+class TestSniffStage(unittest.TestCase):
+    """Rejected files skip ffprobe and quarantine; misnamed ones are retuned."""
+
+    def test_executor(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            page = root / "page.mp4"
+            page.write_bytes(b"<html><body>404</body></html>")
+            misnamed = root / "real_mkv.avi"
+            misnamed.write_bytes(b"\x1a\x45\xdf\xa3" + bytes(60))
+            plain = root / "plain.avi"
+            plain.write_bytes(b"RIFF\x00\x00\x00\x00AVI " + bytes(60))
+
+            probe = mock.Mock(side_effect=lambda p, a, s: FileProbeResult(p, "vp8", 2))
+            tuner = ProbeTuner(["-probesize", "5M"])
+            executor = ProbeExecutor(jobs=1, probe_func=probe, tuner=tuner, sniff=True)
+            with mock.patch.object(tuner, "args_for", wraps=tuner.args_for) as args:
+                results = {r.path: r for r in executor.run([page, misnamed, plain])}
+
+        self.assertEqual(results[page].error, ERROR_NOT_A_VIDEO)
+        self.assertEqual(probe.call_count, 2)
+        self.assertEqual(
+            sorted(c.args for c in args.call_args_list),
+            sorted([(misnamed, ".mkv"), (plain, None)]),
+        )
+        stats = executor.stats
+        self.assertEqual((stats.not_a_video, stats.sniff_mismatches), (1, 1))
+        self.assertEqual((stats.quarantined, stats.probed), (0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
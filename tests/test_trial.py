@@ -0,0 +1,148 @@
+"""Tests for sampled trial encodes."""
+
+import os
+import shlex
+import signal
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.cli import parse_args
+from video_codec_checker.ffmpeg_generator import generate_ffmpeg_command
+from video_codec_checker.models import FileProbeResult
+from video_codec_checker.trial import (
+    TrialCache,
+    TrialEncoder,
+    segment_bounds,
+    settings_key,
+    trial_argv,
+)
+
+# Writes 1000 bytes per second of -t to the output (the last argument)
+_FAKE_FFMPEG = """#!{python}
+import sys
+argv = sys.argv
+seconds = float(argv[argv.index("-t") + 1])
+with open(argv[-1], "wb") as fh:
+    fh.write(b"x" * int(seconds * 1000))
+"""
+
+# Never finishes, like an encode stuck on a broken index
+_HUNG_FFMPEG = """#!{python}
+import time
+time.sleep(60)
+"""
+
+
+class TestSegments(unittest.TestCase):
+    def test_bounds(self):
+        self.assertEqual(segment_bounds(12.0, 3, 5.0), [(0.0, 12.0)])
+        self.assertEqual(
+            segment_bounds(600.0, 3, 5.0),
+            [(97.5, 5.0), (297.5, 5.0), (497.5, 5.0)],
+        )
+
+    def test_argv_keeps_generated_settings(self):
+        command = generate_ffmpeg_command(Path("/v/a b.avi"), 2)
+        argv = trial_argv(command, 97.5, 5.0, Path("/tmp/seg.mkv"))
+        i = argv.index("-i")
+        self.assertEqual(
+            argv[i - 4 : i + 2], ["-ss", "97.500", "-t", "5.000", "-i", "/v/a b.avi"]
+        )
+        self.assertEqual(argv[-1], "/tmp/seg.mkv")
+        self.assertEqual(shlex.join(argv[i + 2 : -1]), settings_key(command))
+        self.assertIn("libsvtav1", settings_key(command))
+
+
+class TestTrialEncoder(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        bin_dir = self.tmp / "bin"
+        bin_dir.mkdir()
+        self.ffmpeg = bin_dir / "ffmpeg"
+        self.ffmpeg.write_text(_FAKE_FFMPEG.format(python=sys.executable))
+        self.ffmpeg.chmod(self.ffmpeg.stat().st_mode | stat.S_IXUSR)
+        path = os.pathsep.join([str(bin_dir), os.environ.get("PATH", "")])
+        patcher = mock.patch.dict(os.environ, {"PATH": path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.video = self.tmp / "a.avi"
+        self.video.write_bytes(os.urandom(2_000_000))
+        self.result = FileProbeResult(self.video, "mpeg4", 2, duration=600.0)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_extrapolates_and_caches(self):
+        cache = TrialCache(self.tmp / "trials.sqlite3")
+        cache.open()
+        try:
+            encoder = TrialEncoder(cache, segments=3, seconds=5.0)
+            est = encoder.estimate(self.result, 2_000_000)
+            self.assertEqual(est.output_bytes, 600_000)
+            self.assertEqual(est.bytes_saved, 1_400_000)
+            self.assertGreaterEqual(est.cpu_seconds, 0.0)
+            self.assertEqual((encoder.encoded, encoder.cached), (3, 0))
+
+            # A renamed copy hits the cache: same content, same settings
+            copy = self.tmp / "renamed.avi"
+            self.video.rename(copy)
+            again = TrialEncoder(cache, segments=3, seconds=5.0)
+            moved = FileProbeResult(copy, "mpeg4", 2, duration=600.0)
+            self.assertEqual(again.estimate(moved, 2_000_000), est)
+            self.assertEqual((again.encoded, again.cached), (0, 3))
+        finally:
+            cache.close()
+
+    def test_failure_returns_none(self):
+        encoder = TrialEncoder()
+        with mock.patch.dict(os.environ, {"PATH": str(self.tmp)}):
+            self.assertIsNone(encoder.estimate(self.result, 2_000_000))
+        self.assertEqual(encoder.failed, 1)
+        # ffmpeg missing disables further trials without spawning anything
+        self.assertIsNone(encoder.estimate(self.result, 2_000_000))
+        self.assertEqual(encoder.failed, 1)
+
+    def test_hung_segment_is_killed(self):
+        self.ffmpeg.write_text(_HUNG_FFMPEG.format(python=sys.executable))
+        encoder = TrialEncoder(segments=3, seconds=5.0)
+        t0 = time.monotonic()
+        with (
+            mock.patch("video_codec_checker.trial.MIN_SEGMENT_TIMEOUT", 0.5),
+            mock.patch("video_codec_checker.trial.SEGMENT_TIMEOUT_FACTOR", 0.0),
+            mock.patch("sys.stderr"),
+        ):
+            self.assertIsNone(encoder.estimate(self.result, 2_000_000))
+        self.assertLess(time.monotonic() - t0, 10)
+        self.assertEqual(encoder.failed, 1)
+
+    def test_interrupt_kills_running_segments(self):
+        self.ffmpeg.write_text(_HUNG_FFMPEG.format(python=sys.executable))
+        encoder = TrialEncoder(segments=3, seconds=5.0)
+        timer = threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGINT))
+        t0 = time.monotonic()
+        timer.start()
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                encoder.estimate(self.result, 2_000_000)
+        finally:
+            timer.cancel()
+        self.assertLess(time.monotonic() - t0, 10)
+
+
+class TestTrialArguments(unittest.TestCase):
+    def test_cli(self):
+        self.assertIsNone(parse_args([]).trial)
+        cfg = parse_args(["--trial-encode", "--trial-segments", "4", "--no-cache"])
+        self.assertEqual((cfg.trial.segments, cfg.trial.seconds), (4, 5.0))
+        self.assertFalse(cfg.trial.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for ffprobe invocation and output parsing."""
+
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from video_codec_checker.video_processor import (
+    get_video_files,
+    iter_video_files,
+    probe_video,
+    probe_video_async,
+)
+
+PROBE_JSON = json.dumps(
+    {
+        "streams": [
+            {
+                "index": 0,
+                "codec_type": "video",
+                "codec_name": "mpeg4",
+                "width": 640,
+                "height": 360,
+                "avg_frame_rate": "25/1",
+                "r_frame_rate": "25/1",
+            },
+            {"index": 1, "codec_type": "audio", "codec_name": "mp3", "channels": 2},
+        ],
+        "format": {"bit_rate": "288000", "duration": "60.5"},
+    }
+)
+
+
+def _completed(returncode, stdout):
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout)
+
+
+class TestProbeVideo(unittest.TestCase):
+    """probe_video returns codec, channels and bpp inputs from one call."""
+
+    @patch("video_codec_checker.video_processor._run")
+    def test_single_call_yields_full_record(self, mock_run):
+        mock_run.return_value = _completed(0, PROBE_JSON)
+
+        result = probe_video(Path("a.avi"))
+
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(result.codec, "mpeg4")
+        self.assertEqual(result.channels, 2)
+        self.assertEqual((result.width, result.height), (640, 360))
+        self.assertEqual(result.duration, 60.5)
+        # Stream bit_rate is missing, so format bit_rate is used
+        self.assertAlmostEqual(result.bpp, 288000 / (25 * 640 * 360))
+
+    @patch("video_codec_checker.video_processor._run")
+    def test_fast_probe_falls_back_to_full(self, mock_run):
+        mock_run.side_effect = [_completed(1, ""), _completed(0, PROBE_JSON)]
+        stats: dict = {}
+
+        result = probe_video(Path("a.avi"), ["-probesize", "5M"], stats)
+
+        self.assertEqual(result.codec, "mpeg4")
+        self.assertEqual(stats["fast_fallbacks"], 1)
+        self.assertEqual(stats["full_probes"], 1)
+        self.assertIn("-probesize", mock_run.call_args_list[0].args[0])
+        self.assertNotIn("-probesize", mock_run.call_args_list[1].args[0])
+
+    @patch("video_codec_checker.video_processor._run_async")
+    def test_async_probe_has_same_fallback_semantics(self, mock_run):
+        mock_run.side_effect = [_completed(1, ""), _completed(0, PROBE_JSON)]
+        stats: dict = {}
+
+        result = asyncio.run(
+            probe_video_async(Path("a.avi"), ["-probesize", "5M"], stats)
+        )
+
+        self.assertEqual((result.codec, result.channels), ("mpeg4", 2))
+        self.assertEqual(stats["fast_attempted"], 1)
+        self.assertEqual(stats["fast_fallbacks"], 1)
+        self.assertEqual(stats["full_probes"], 1)
+
+
+class TestDiscovery(unittest.TestCase):
+    """Directory walking and suffix filtering."""
+
+    def test_iter_matches_sorted_listing(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "sub" / "deeper").mkdir(parents=True)
+            for rel in ("a.AVI", "sub/b.mkv", "sub/deeper/c.mp4", "sub/notes.txt"):
+                (root / rel).write_bytes(b"")
+            (root / "sub" / "dir.mkv").mkdir()
+            # A symlinked directory loop must not be followed
+            os.symlink(root, root / "sub" / "loop")
+
+            found = list(iter_video_files(tmpdir))
+
+            expected = [root / "a.AVI", root / "sub/b.mkv", root / "sub/deeper/c.mp4"]
+            self.assertCountEqual(found, expected)
+            self.assertEqual(get_video_files(tmpdir), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
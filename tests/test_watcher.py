@@ -0,0 +1,183 @@
+"""Tests for watch mode file detection."""
+
+import os
+import tempfile
+import time
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+from video_codec_checker.concurrency import ProbeExecutor
+from video_codec_checker.main import VideoCodecChecker
+from video_codec_checker.models import FileProbeResult, ProbeSettings, WatchSettings
+from video_codec_checker.watcher import (
+    Debouncer,
+    InotifySource,
+    PollingSource,
+    Watcher,
+)
+
+
+class TestDebouncer(unittest.TestCase):
+    """Files are released only once they stop changing."""
+
+    def test_waits_for_stable_size(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fp = Path(tmpdir) / "a.mkv"
+            fp.write_bytes(b"x")
+            deb = Debouncer(settle=5.0)
+            deb.add(fp, now=0.0)
+
+            self.assertEqual(deb.ready(now=4.0), [])
+            # Still being written: the settle period restarts
+            fp.write_bytes(b"xx")
+            self.assertEqual(deb.ready(now=6.0), [])
+            self.assertEqual(deb.ready(now=10.0), [])
+            self.assertEqual(deb.ready(now=11.0), [fp])
+            self.assertEqual(len(deb), 0)
+
+
+class TestSources(unittest.TestCase):
+    """New files, including ones in new subdirectories, are detected."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "old.avi").write_bytes(b"x")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _land_files(self):
+        (self.root / "sub").mkdir()
+        (self.root / "sub" / "new.mkv").write_bytes(b"x")
+        (self.root / "top.mp4").write_bytes(b"x")
+        (self.root / "notes.txt").write_bytes(b"x")
+        return {self.root / "sub" / "new.mkv", self.root / "top.mp4"}
+
+    def test_polling_lists_only_changed_directories(self):
+        source = PollingSource(self.root, interval=0.0)
+        expected = self._land_files()
+        # Make the root's mtime change visible even on coarse-grained clocks
+        os.utime(self.root, ns=(0, 0))
+
+        self.assertEqual(set(source.wait(timeout=1.0)), expected)
+        self.assertEqual(source.wait(timeout=1.0), [])
+
+    def test_polling_sees_files_rewritten_in_place(self):
+        old = self.root / "old.avi"
+        source = PollingSource(self.root, interval=0.0)
+        mtime = os.stat(self.root).st_mtime_ns
+        with open(old, "ab") as fh:
+            fh.write(b"more")
+        # Rewriting a file leaves its directory's mtime alone
+        self.assertEqual(os.stat(self.root).st_mtime_ns, mtime)
+
+        self.assertEqual(source.wait(timeout=1.0), [old])
+        self.assertEqual(source.wait(timeout=1.0), [])
+
+    def test_initial_walk_reports_files_changed_since_start(self):
+        old = self.root / "old.avi"
+        os.utime(old, ns=(0, 0))
+        since = time.time_ns()
+        (self.root / "landed.mkv").write_bytes(b"x")
+        os.utime(self.root / "landed.mkv", ns=(since + 1, since + 1))
+
+        source = PollingSource(self.root, interval=60.0, since_ns=since)
+        # old.avi's ctime is recent too (utime sets it), so only check landed
+        self.assertIn(self.root / "landed.mkv", source.wait(timeout=0.0))
+        self.assertEqual(PollingSource(self.root, 60.0)._backlog, [])
+
+    def test_inotify_follows_new_directories(self):
+        try:
+            source = InotifySource(self.root)
+        except (OSError, AttributeError) as e:
+            self.skipTest(f"inotify unavailable: {e}")
+        try:
+            expected = self._land_files()
+            seen: set[Path] = set()
+            for _ in range(10):
+                seen.update(source.wait(timeout=0.2))
+                if seen >= expected:
+                    break
+            self.assertEqual(seen, expected)
+        finally:
+            source.close()
+
+
+class TestExecutorSession(unittest.TestCase):
+    """A session keeps one pool alive across several run() calls."""
+
+    def test_pool_is_reused(self):
+        entered = []
+        executor = ProbeExecutor(
+            jobs=1,
+            probe_func=lambda p, a, s: FileProbeResult(
+                path=p, codec="h264", channels=2
+            ),
+        )
+        submitter = executor._submitter
+
+        @contextmanager
+        def counting():
+            entered.append(1)
+            with submitter() as submit:
+                yield submit
+
+        executor._submitter = counting
+        with executor.session():
+            for name in ("a.avi", "b.avi"):
+                self.assertEqual(len(list(executor.run([Path(name)]))), 1)
+        self.assertEqual(len(entered), 1)
+
+
+class TestWatchReporting(unittest.TestCase):
+    """Files found by both the scan and the watcher are reported once."""
+
+    def test_scan_and_watch_overlap(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "a.avi").write_bytes(b"x")
+            (root / "b.avi").write_bytes(b"x")
+            os.link(root / "b.avi", root / "link.avi")
+            probed = []
+
+            def probe(path, args=None, stats=None):
+                probed.append(path.name)
+                return FileProbeResult(path=path, codec="mpeg4", channels=2)
+
+            batches = []
+            real = Watcher.batches
+
+            def one_batch(watcher):
+                for batch in real(watcher):
+                    batches.append(batch)
+                    watcher.stop()
+                    yield batch
+
+            out, script = root / "out.csv", root / "convert.sh"
+            settings = WatchSettings(settle=0.0, poll_interval=0.0, force_poll=True)
+            with (
+                mock.patch("video_codec_checker.main.probe_video", side_effect=probe),
+                mock.patch.object(Watcher, "batches", one_batch),
+            ):
+                VideoCodecChecker(str(out)).process_files(
+                    directory=tmpdir,
+                    jobs=1,
+                    script_file=str(script),
+                    probe=ProbeSettings(sniff=False),
+                    watch=settings,
+                )
+            rows = out.read_text().splitlines()[1:]
+            commands = [ln for ln in script.read_text().splitlines() if "ffmpeg" in ln]
+
+        # The watcher's startup walk saw the new files as well
+        self.assertTrue(batches and set(batches[0]) >= {root / "a.avi"})
+        self.assertEqual(sorted(probed), ["a.avi", "b.avi"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(len(commands), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
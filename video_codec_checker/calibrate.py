@@ -0,0 +1,404 @@
+"""Encoder throughput calibration for this host (`calibrate` subcommand).
+
+`check-video-codecs calibrate` measures how fast libsvtav1 runs here. It
+needs no network or real media. Short lossless test clips are generated
+with ffmpeg's lavfi sources (testsrc2 plus temporal noise, so the encoder
+has detail to work on) at a few resolutions. Each clip is encoded with the
+command generate_ffmpeg_command produces, sweeping presets and `lp` thread
+counts. At the largest resolution, every preset and thread count is also
+run with several encodes in parallel. Frames/s, CPU time (from wait4's
+rusage) and output size are recorded for every run.
+
+The results go to a host profile JSON (default: host-profile.json next to
+the probe cache) with:
+
+- "runs": every measurement.
+- "presets": CPU time and output size relative to DEFAULT_PRESET, in the
+  format PresetTable.load reads. The preset planner costs presets with this
+  host's CPU factors; the size factors, measured on synthetic clips, are
+  used only when the profile is given as --preset-speeds. Also the best
+  single-encode frames/s per resolution.
+- "recommended": the concurrency and thread count that saturate the
+  machine (the fewest parallel encodes within 5% of the best aggregate
+  frames/s). `convert` uses these when -j/--threads are not given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from video_codec_checker.ffmpeg_generator import (
+    DEFAULT_PRESET,
+    generate_ffmpeg_command,
+    limit_threads,
+)
+from video_codec_checker.probe_cache import default_cache_path
+
+DEFAULT_PRESETS = (3, 5, 8, 10, 12)
+DEFAULT_RESOLUTIONS = ("640x360", "1280x720", "1920x1080")
+DEFAULT_SECONDS = 2.0
+CLIP_RATE = 25
+
+# Parallel encodes within this fraction of the best aggregate frames/s count
+# as saturating the machine
+_SATURATION = 0.95
+
+PROFILE_VERSION = 1
+
+
+def default_host_profile_path() -> Path:
+    """Where the host profile is written, next to the probe cache."""
+    return default_cache_path().with_name("host-profile.json")
+
+
+def host_recommendation(path: str | Path) -> tuple[int, int] | None:
+    """(parallel encodes, threads each) recommended by a host profile."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as fh:
+            rec = json.load(fh).get("recommended") or {}
+        return max(1, int(rec["jobs"])), max(1, int(rec["threads"]))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def powers_of_two(limit: int) -> list[int]:
+    """1, 2, 4, ... up to and including `limit` (which need not be a power)."""
+    values = []
+    n = 1
+    while n < limit:
+        values.append(n)
+        n *= 2
+    values.append(max(1, limit))
+    return values
+
+
+@dataclass(frozen=True)
+class Run:
+    """One measurement: `jobs` identical encodes started together."""
+
+    resolution: str
+    preset: int
+    threads: int
+    jobs: int
+    # Frames encoded per wall-clock second, summed over the parallel encodes
+    fps: float
+    wall_seconds: float
+    # Per encode (mean over the parallel encodes)
+    cpu_seconds: float
+    output_bytes: int
+
+
+class Calibrator:
+    """Generate clips, run the sweep and derive the host profile."""
+
+    def __init__(
+        self,
+        workdir: Path,
+        presets: list[int],
+        threads: list[int],
+        concurrency: list[int],
+        resolutions: list[str],
+        seconds: float = DEFAULT_SECONDS,
+    ) -> None:
+        self.workdir = workdir
+        # The default preset is the baseline the factors are relative to
+        self.presets = sorted(set(presets) | {DEFAULT_PRESET})
+        self.threads = sorted(set(threads))
+        self.concurrency = sorted(set(concurrency) | {1})
+        self.resolutions = resolutions
+        self.seconds = seconds
+        self.frames = round(seconds * CLIP_RATE)
+        self.cpus = os.cpu_count() or 1
+
+    def plan(self) -> list[tuple[str, int, int, int]]:
+        """(resolution, preset, threads, jobs) of every run, in order."""
+        largest = self.resolutions[-1]
+        runs = []
+        for resolution in self.resolutions:
+            for preset in self.presets:
+                for threads in self.threads:
+                    runs.append((resolution, preset, threads, 1))
+        for preset in self.presets:
+            for threads in self.threads:
+                for jobs in self.concurrency:
+                    # Beyond 2x oversubscription nothing more is learned
+                    if jobs > 1 and jobs * threads <= 2 * self.cpus:
+                        runs.append((largest, preset, threads, jobs))
+        return runs
+
+    def run(self) -> list[Run]:
+        clips = {res: self.make_clip(res) for res in self.resolutions}
+        runs = []
+        planned = self.plan()
+        for i, (resolution, preset, threads, jobs) in enumerate(planned, 1):
+            result = self.measure(clips[resolution], resolution, preset, threads, jobs)
+            label = f"[{i}/{len(planned)}] {resolution} preset {preset}"
+            label += f" lp={threads} x{jobs}"
+            if result is None:
+                print(f"{label}: failed", file=sys.stderr)
+                continue
+            print(f"{label}: {result.fps:.1f} fps", file=sys.stderr)
+            runs.append(result)
+        return runs
+
+    def make_clip(self, resolution: str) -> Path:
+        """A lossless FFV1 test clip of `seconds` at `resolution`."""
+        clip = self.workdir / f"clip_{resolution}.mkv"
+        source = f"testsrc2=size={resolution}:rate={CLIP_RATE}:duration={self.seconds}"
+        argv = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-f", "lavfi", "-i"]
+        argv += [source, "-vf", "noise=alls=12:allf=t", "-c:v", "ffv1", str(clip)]
+        subprocess.run(argv, check=True, stdin=subprocess.DEVNULL)
+        return clip
+
+    def measure(
+        self, clip: Path, resolution: str, preset: int, threads: int, jobs: int
+    ) -> Run | None:
+        """Start `jobs` encodes of `clip` together and wait for all of them."""
+        command = shlex.split(generate_ffmpeg_command(clip, 0, preset))
+        procs = []
+        outputs = []
+        start = time.monotonic()
+        for n in range(jobs):
+            out = self.workdir / f"out_{n}.mkv"
+            argv = limit_threads(command[:-1] + [str(out)], threads)
+            procs.append(
+                subprocess.Popen(
+                    argv,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            )
+            outputs.append(out)
+        cpu = 0.0
+        ok = True
+        for proc in procs:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            ok = ok and proc.returncode == 0
+            cpu += usage.ru_utime + usage.ru_stime
+        wall = time.monotonic() - start
+        sizes = [out.stat().st_size for out in outputs if out.is_file()]
+        for out in outputs:
+            out.unlink(missing_ok=True)
+        if not ok or len(sizes) < jobs or wall <= 0:
+            return None
+        return Run(
+            resolution=resolution,
+            preset=preset,
+            threads=threads,
+            jobs=jobs,
+            fps=round(self.frames * jobs / wall, 2),
+            wall_seconds=round(wall, 3),
+            cpu_seconds=round(cpu / jobs, 3),
+            output_bytes=sum(sizes) // jobs,
+        )
+
+
+def preset_factors(runs: list[Run]) -> dict[str, dict[str, object]]:
+    """Per-preset CPU and size factors relative to DEFAULT_PRESET.
+
+    Each single-encode run is compared with the default-preset run at the
+    same resolution and thread count; the factor is the median ratio.
+    """
+    single = [r for r in runs if r.jobs == 1]
+    base = {(r.resolution, r.threads): r for r in single if r.preset == DEFAULT_PRESET}
+    presets: dict[str, dict[str, object]] = {}
+    for preset in sorted({r.preset for r in single}):
+        mine = [r for r in single if r.preset == preset]
+        pairs = [
+            (r, b)
+            for r in mine
+            if (b := base.get((r.resolution, r.threads)))
+            and b.cpu_seconds > 0
+            and b.output_bytes
+        ]
+        if not pairs:
+            continue
+        fps: dict[str, float] = {}
+        for r in mine:
+            fps[r.resolution] = max(fps.get(r.resolution, 0.0), r.fps)
+        presets[str(preset)] = {
+            "cpu_factor": round(
+                statistics.median(r.cpu_seconds / b.cpu_seconds for r, b in pairs), 4
+            ),
+            "size_factor": round(
+                statistics.median(r.output_bytes / b.output_bytes for r, b in pairs),
+                4,
+            ),
+            "fps": fps,
+        }
+    return presets
+
+
+def saturation(runs: list[Run], preset: int) -> dict[str, object] | None:
+    """Fewest parallel encodes (and their threads) near the best throughput."""
+    largest = max((r for r in runs if r.preset == preset), key=_pixels, default=None)
+    if largest is None:
+        return None
+    mine = [r for r in runs if r.preset == preset and _pixels(r) == _pixels(largest)]
+    best = max(r.fps for r in mine)
+    good = [r for r in mine if r.fps >= _SATURATION * best]
+    pick = min(good, key=lambda r: (r.jobs, r.threads))
+    return {
+        "preset": preset,
+        "resolution": pick.resolution,
+        "jobs": pick.jobs,
+        "threads": pick.threads,
+        "fps": pick.fps,
+    }
+
+
+def build_profile(runs: list[Run], calibrator: Calibrator) -> dict[str, object]:
+    presets = sorted({r.preset for r in runs})
+    recommended = saturation(runs, DEFAULT_PRESET)
+    return {
+        "version": PROFILE_VERSION,
+        "host": platform.node(),
+        "cpus": calibrator.cpus,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "clip_seconds": calibrator.seconds,
+        "baseline_preset": DEFAULT_PRESET,
+        "presets": preset_factors(runs),
+        "saturation": [s for p in presets if (s := saturation(runs, p))],
+        "recommended": recommended,
+        "runs": [asdict(r) for r in runs],
+    }
+
+
+def _pixels(run: Run) -> int:
+    width, _, height = run.resolution.partition("x")
+    return int(width) * int(height)
+
+
+def _int_list(value: str) -> list[int]:
+    try:
+        values = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a list of integers: {value}") from None
+    if not values or min(values) < 0:
+        raise argparse.ArgumentTypeError(f"not a list of integers: {value}")
+    return values
+
+
+def _resolutions(value: str) -> list[str]:
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    for item in items:
+        width, sep, height = item.partition("x")
+        if not (sep and width.isdigit() and height.isdigit()):
+            raise argparse.ArgumentTypeError(f"not WIDTHxHEIGHT: {item}")
+    return sorted(items, key=lambda r: int(r.split("x")[0]) * int(r.split("x")[1]))
+
+
+def calibrate_main(argv: list[str]) -> int:
+    """Entry point for the 'calibrate' subcommand; returns the exit status."""
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(
+        prog="check-video-codecs calibrate",
+        description=(
+            "Measure libsvtav1 throughput on this host across presets, thread "
+            "counts and parallel encodes, and write a host profile"
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=default_host_profile_path(),
+        help=f"Host profile to write (default: {default_host_profile_path()})",
+    )
+    parser.add_argument(
+        "--presets",
+        type=_int_list,
+        default=list(DEFAULT_PRESETS),
+        metavar="P,P,...",
+        help=(
+            "SVT-AV1 presets to measure; preset "
+            f"{DEFAULT_PRESET} is always included as the baseline "
+            f"(default: {','.join(map(str, DEFAULT_PRESETS))})"
+        ),
+    )
+    parser.add_argument(
+        "--threads",
+        type=_int_list,
+        default=powers_of_two(cpus),
+        metavar="N,N,...",
+        help="lp thread counts per encode (default: powers of two up to CPUs)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=_int_list,
+        default=powers_of_two(cpus),
+        metavar="N,N,...",
+        help=(
+            "Parallel encodes to try at the largest resolution "
+            "(default: powers of two up to CPUs)"
+        ),
+    )
+    parser.add_argument(
+        "--resolutions",
+        type=_resolutions,
+        default=list(DEFAULT_RESOLUTIONS),
+        metavar="WxH,...",
+        help=f"Test clip sizes (default: {','.join(DEFAULT_RESOLUTIONS)})",
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=DEFAULT_SECONDS,
+        help=f"Test clip length at {CLIP_RATE} fps (default: {DEFAULT_SECONDS:g})",
+    )
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="Print the sweep and exit"
+    )
+    args = parser.parse_args(argv)
+    if 0 in args.threads or 0 in args.concurrency:
+        parser.error("--threads and --concurrency must be at least 1")
+    if args.seconds <= 0:
+        parser.error("--seconds must be positive")
+
+    with tempfile.TemporaryDirectory(prefix="vcc-calibrate-") as tmp:
+        calibrator = Calibrator(
+            Path(tmp),
+            presets=args.presets,
+            threads=args.threads,
+            concurrency=args.concurrency,
+            resolutions=args.resolutions,
+            seconds=args.seconds,
+        )
+        if args.dry_run:
+            for resolution, preset, threads, jobs in calibrator.plan():
+                print(f"{resolution} preset {preset} lp={threads} x{jobs}")
+            return 0
+        try:
+            runs = calibrator.run()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: could not generate test clips: {e}", file=sys.stderr)
+            return 1
+    if not any(r.preset == DEFAULT_PRESET and r.jobs == 1 for r in runs):
+        print("Error: no baseline encode succeeded", file=sys.stderr)
+        return 1
+    profile = build_profile(runs, calibrator)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(profile, indent=2) + "\n", encoding="utf-8")
+    rec = profile["recommended"]
+    if isinstance(rec, dict):
+        print(
+            f"Recommended: {rec['jobs']} parallel encodes with {rec['threads']} "
+            f"threads each ({rec['fps']} fps at preset {rec['preset']})",
+            file=sys.stderr,
+        )
+    print(f"Host profile written to: {args.output}", file=sys.stderr)
+    return 0
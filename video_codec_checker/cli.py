@@ -6,16 +6,345 @@ Builds an AppConfig with normalized settings.
 from __future__ import annotations
 
 import argparse
+import os
 from datetime import datetime
 from pathlib import Path
 
 from video_codec_checker.config import load_env_config, load_yaml_config
+from video_codec_checker.devices import DEVICE_CLASSES, HDD_LIMIT
+from video_codec_checker.filters import IGNORE_FILE, parse_size, parse_time
+from video_codec_checker.journal import default_journal_path
 from video_codec_checker.models import (
     AppConfig,
     CleanupMode,
     CleanupPolicy,
+    DedupSettings,
+    DeltaSettings,
+    DeviceSettings,
+    FilterSettings,
+    JournalSettings,
+    MetricsSettings,
+    OutputFormat,
+    PlanSettings,
+    ProbeBackend,
     ProbeSettings,
+    ShardSpec,
+    TrialSettings,
+    WatchSettings,
 )
+from video_codec_checker.planner import parse_deadline
+from video_codec_checker.probe_cache import default_cache_path
+from video_codec_checker.probe_policy import DEFAULT_MAX_TIMEOUT, DEFAULT_RETRIES
+from video_codec_checker.probe_tuner import default_profile_path
+from video_codec_checker.sinks import SUFFIXES, format_for_path, parquet_available
+
+
+def _shard_arg(value: str) -> ShardSpec:
+    try:
+        return ShardSpec.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _device_limit_arg(value: str) -> tuple[str, int]:
+    key, sep, limit = value.rpartition("=")
+    if not sep or not key or not limit.isdigit() or int(limit) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected KEY=N with N >= 1 (KEY: a path, hdd, ssd or other): {value!r}"
+        )
+    return key, int(limit)
+
+
+def _size_arg(value: str) -> int:
+    try:
+        return parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _time_arg(value: str) -> float:
+    try:
+        return parse_time(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the discovery filter options."""
+    group = parser.add_argument_group(
+        "discovery filters", "Skip files and directories before they are probed"
+    )
+    group.add_argument(
+        "--include",
+        action="append",
+        metavar="GLOB",
+        help=(
+            "Only probe files matching GLOB (repeatable); a GLOB containing '/' "
+            "matches the path relative to the scan directory, otherwise the name"
+        ),
+    )
+    group.add_argument(
+        "--exclude",
+        action="append",
+        metavar="GLOB",
+        help="Skip files and directories matching GLOB (repeatable)",
+    )
+    group.add_argument(
+        "--min-size",
+        type=_size_arg,
+        metavar="SIZE",
+        help="Skip files smaller than SIZE (e.g. 50M)",
+    )
+    group.add_argument(
+        "--max-size",
+        type=_size_arg,
+        metavar="SIZE",
+        help="Skip files larger than SIZE (e.g. 20G)",
+    )
+    group.add_argument(
+        "--newer-than",
+        type=_time_arg,
+        metavar="AGE|DATE",
+        help="Only files modified after this (e.g. 30d, 12h, 2024-01-31)",
+    )
+    group.add_argument(
+        "--older-than",
+        type=_time_arg,
+        metavar="AGE|DATE",
+        help="Only files modified before this",
+    )
+    group.add_argument(
+        "--skip-converted",
+        action="store_true",
+        help=(
+            "Skip *_av1.mkv outputs and files whose _av1.mkv output already "
+            "exists next to them (an interrupted encode's partial output "
+            "counts too)"
+        ),
+    )
+    group.add_argument(
+        "--vccignore",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            f"Honour per-directory {IGNORE_FILE} files: empty prunes the "
+            "directory, otherwise one glob per line (default: on)"
+        ),
+    )
+    group.add_argument(
+        "--prune-marker",
+        action="append",
+        metavar="NAME",
+        help="Do not descend into directories containing a file NAME (repeatable)",
+    )
+
+
+def _filter_settings(args: argparse.Namespace) -> FilterSettings:
+    return FilterSettings(
+        include=tuple(args.include or ()),
+        exclude=tuple(args.exclude or ()),
+        min_size=args.min_size,
+        max_size=args.max_size,
+        newer_than=args.newer_than,
+        older_than=args.older_than,
+        skip_converted=bool(args.skip_converted),
+        ignore_files=bool(args.vccignore),
+        markers=tuple(args.prune_marker or ()),
+    )
+
+
+def _device_settings(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> DeviceSettings:
+    limits = tuple(args.device_limit or ())
+    for key, _ in limits:
+        if key not in DEVICE_CLASSES and not Path(key).exists():
+            parser.error(f"--device-limit: no such path: {key}")
+    return DeviceSettings(enabled=bool(args.device_scheduling), limits=limits)
+
+
+def _add_trial_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = TrialSettings()
+    group = parser.add_argument_group("trial encodes")
+    group.add_argument(
+        "--trial-encode",
+        action="store_true",
+        help=(
+            "Predict Est_* for files queued for conversion by encoding short "
+            "segments with the generated command (slow; results are cached)"
+        ),
+    )
+    group.add_argument(
+        "--trial-segments",
+        type=int,
+        default=defaults.segments,
+        metavar="N",
+        help=f"Segments encoded per file, in parallel (default: {defaults.segments})",
+    )
+    group.add_argument(
+        "--trial-seconds",
+        type=float,
+        default=defaults.seconds,
+        metavar="SECONDS",
+        help=f"Length of each segment (default: {defaults.seconds:g})",
+    )
+    group.add_argument(
+        "--trial-cache",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Trial segment cache database (default: trial-cache.sqlite3 next to "
+            "the probe cache; --no-cache disables it)"
+        ),
+    )
+
+
+def _deadline_arg(value: str) -> float:
+    try:
+        return parse_deadline(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _add_plan_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("preset planning")
+    budget = group.add_mutually_exclusive_group()
+    budget.add_argument(
+        "--plan-cpu-hours",
+        type=float,
+        metavar="HOURS",
+        help=(
+            "Pick an SVT-AV1 preset per queued file so the whole batch fits "
+            "this many CPU-hours while saving the most bytes"
+        ),
+    )
+    budget.add_argument(
+        "--plan-deadline",
+        type=_deadline_arg,
+        metavar="DURATION|TIME",
+        help=(
+            "Like --plan-cpu-hours, with the budget being the time until this "
+            "deadline (e.g. 8h, 2d, 2025-06-01T06:00) on --plan-cores cores"
+        ),
+    )
+    group.add_argument(
+        "--plan-cores",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="Cores available for encoding until --plan-deadline (default: all)",
+    )
+    group.add_argument(
+        "--preset-speeds",
+        metavar="JSON",
+        help=(
+            "Measured per-preset CPU and size factors to plan with (default: "
+            "CPU factors from the 'calibrate' host profile if present, else "
+            "typical figures)"
+        ),
+    )
+
+
+def _plan_settings(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> PlanSettings | None:
+    if args.plan_cpu_hours is not None:
+        budget = args.plan_cpu_hours * 3600
+        if budget <= 0:
+            parser.error("--plan-cpu-hours must be positive")
+    elif args.plan_deadline is not None:
+        if args.plan_cores <= 0:
+            parser.error("--plan-cores must be positive")
+        budget = args.plan_deadline * args.plan_cores
+        if budget <= 0:
+            parser.error("--plan-deadline must be in the future")
+    else:
+        return None
+    if args.watch or args.resume:
+        parser.error("preset planning cannot be combined with --watch or --resume")
+    speeds = Path(args.preset_speeds) if args.preset_speeds else None
+    if speeds is not None and not speeds.is_file():
+        parser.error(f"--preset-speeds: file not found: {speeds}")
+    return PlanSettings(cpu_budget=budget, preset_speeds=speeds)
+
+
+def _trial_settings(args: argparse.Namespace) -> TrialSettings | None:
+    if not args.trial_encode:
+        return None
+    return TrialSettings(
+        segments=max(1, args.trial_segments),
+        seconds=max(1.0, args.trial_seconds),
+        cache=bool(args.cache),
+        cache_path=Path(args.trial_cache) if args.trial_cache else None,
+    )
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser, what: str) -> None:
+    """Add the --metrics-* options (shared by the scan and 'convert')."""
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="PATH",
+        default=None,
+        help=(
+            f"Rewrite live {what} metrics (Prometheus text format) to this file "
+            "every --metrics-interval seconds, e.g. for node_exporter"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help=f"Serve live {what} metrics on http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        help="Seconds between --metrics-textfile rewrites (default: 15)",
+    )
+
+
+def metrics_settings(args: argparse.Namespace) -> MetricsSettings | None:
+    """MetricsSettings from --metrics-* options, or None when not requested."""
+    if args.metrics_textfile is None and args.metrics_port is None:
+        return None
+    return MetricsSettings(
+        textfile=Path(args.metrics_textfile) if args.metrics_textfile else None,
+        port=args.metrics_port,
+        interval=max(1.0, args.metrics_interval),
+    )
+
+
+def _output_format(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, output: str | None
+) -> OutputFormat:
+    if args.output_format:
+        fmt = OutputFormat(args.output_format)
+    else:
+        fmt = format_for_path(output) if output else OutputFormat.CSV
+    if fmt is OutputFormat.PARQUET and not parquet_available():
+        parser.error(
+            "--format parquet requires pyarrow "
+            "(pip install 'video-codec-checker[parquet]')"
+        )
+    return fmt
+
+
+def _check_resume(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    output: str | None,
+    fmt: OutputFormat,
+) -> None:
+    if not output:
+        parser.error("--resume requires --output (the report to continue)")
+    if args.since:
+        parser.error("--resume cannot be combined with --since")
+    if fmt is OutputFormat.PARQUET:
+        parser.error("--resume does not support --format parquet")
+    journal = Path(args.journal) if args.journal else default_journal_path(output)
+    if not journal.is_file():
+        parser.error(f"--resume: no scan journal at {journal}")
 
 
 def parse_args(argv: list[str] | None = None) -> AppConfig:
@@ -27,12 +356,30 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
             "Find video files using codecs less than state-of-the-art "
             "(AV1, HEVC, H.264)"
         ),
+        epilog=(
+            "To combine per-shard outputs into one report, run "
+            "'check-video-codecs merge --help'. To run the conversions in "
+            "parallel, run 'check-video-codecs convert --help'. To measure "
+            "encoder speed on this host, run 'check-video-codecs calibrate "
+            "--help'."
+        ),
     )
     parser.add_argument(
         "-o",
         "--output",
         default=env_config.get("output_file"),
-        help="Specify output CSV filename",
+        help="Specify output report filename",
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=[f.value for f in OutputFormat],
+        default=None,
+        help=(
+            "Report format: csv, or batched jsonl/sqlite/parquet with the full "
+            "probe record (default: from the --output suffix, else csv; "
+            "parquet needs pyarrow)"
+        ),
     )
     parser.add_argument("--config", help="Specify config file path")
     parser.add_argument(
@@ -41,7 +388,26 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
         type=int,
         default=None,
         help=(
-            "Number of worker threads to use for ffprobe (default: CPU count, up to 32)"
+            "Number of concurrent ffprobe processes (default: CPU count, up to 32; "
+            "64 with --probe-backend=async)"
+        ),
+    )
+    parser.add_argument(
+        "--probe-backend",
+        choices=[b.value for b in ProbeBackend],
+        default=ProbeBackend.THREAD.value,
+        help=(
+            "Run ffprobe from a thread pool ('thread') or from asyncio "
+            "subprocesses with no thread per probe ('async')"
+        ),
+    )
+    parser.add_argument(
+        "--probe-window",
+        type=int,
+        default=None,
+        help=(
+            "Maximum probes in flight per worker; bounds memory on very large "
+            "scans (default: 4)"
         ),
     )
     parser.add_argument(
@@ -65,6 +431,117 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
             "Use --no-fast-probe to disable."
         ),
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue an interrupted scan from its journal: skip files already "
+            "done and append to the report and script (requires --output)"
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        metavar="PATH",
+        default=None,
+        help="Scan journal used by --resume (default: <output>.journal)",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="PREVIOUS_CSV",
+        default=None,
+        help=(
+            "Probe only files new or modified since this earlier report; carry "
+            "its rows forward for unchanged files and write a delta CSV"
+        ),
+    )
+    parser.add_argument(
+        "--delta-output",
+        default=None,
+        help="Delta CSV path for --since (default: <output>.delta.csv)",
+    )
+    add_metrics_arguments(parser, "scan")
+    parser.add_argument(
+        "--stats-json",
+        metavar="PATH",
+        default=None,
+        help=(
+            "Write probe counters and p50/p95/p99/max latency per stage, "
+            "extension and mount to this JSON file"
+        ),
+    )
+    parser.add_argument(
+        "--encode-ledger",
+        metavar="LEDGER",
+        default=None,
+        help=(
+            "Calibrate the Est_* size/CPU columns from a 'check-video-codecs "
+            "convert' results ledger (JSONL)"
+        ),
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        default=None,
+        metavar="K/N",
+        help=(
+            "Process only slice K of N (1-based), chosen by a stable hash of each "
+            "file's path relative to the scan directory; combine the per-shard "
+            "outputs with 'check-video-codecs merge'"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "After the scan, keep watching the directory (inotify, or polling on "
+            "network mounts) and append rows/commands for new files as they land"
+        ),
+    )
+    parser.add_argument(
+        "--watch-settle",
+        type=float,
+        default=5.0,
+        help="Seconds a new file must stop growing before it is probed (default: 5)",
+    )
+    parser.add_argument(
+        "--watch-poll",
+        action="store_true",
+        help="With --watch, poll directory mtimes instead of using inotify",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between directory polls in polling mode (default: 10)",
+    )
+    parser.add_argument(
+        "--adaptive-probe",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Learn -probesize/-analyzeduration per file extension from fast-probe "
+            "fallbacks and keep the profile for later runs (used only with "
+            "--fast-probe)"
+        ),
+    )
+    parser.add_argument(
+        "--probe-profile",
+        default=None,
+        help=(
+            "Path to the learned probe profile "
+            "(default: ~/.cache/video-codec-checker/probe-profile.json)"
+        ),
+    )
+    parser.add_argument(
+        "--native-probe",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Read codec and channels from MKV/MP4/AVI headers directly, running "
+            "ffprobe only when the headers are ambiguous. "
+            "Use --no-native-probe to always run ffprobe."
+        ),
+    )
     parser.add_argument(
         "--probe-size",
         default=env_config.get("ffprobe_probesize") or "5M",
@@ -81,6 +558,97 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
             "accepts microseconds; supports suffixes like 10M"
         ),
     )
+    parser.add_argument(
+        "--probe-retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=(
+            "Retries (with backoff) of probes that time out or hit I/O errors; "
+            "files still failing are retried once more at the end of the scan "
+            f"(default: {DEFAULT_RETRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--device-limit",
+        type=_device_limit_arg,
+        action="append",
+        metavar="KEY=N",
+        help=(
+            "Concurrent probes allowed on one storage device; KEY is a path on "
+            "the device or a device class (hdd, ssd, other). Repeatable. "
+            f"Default: {HDD_LIMIT} per rotational disk, otherwise unlimited"
+        ),
+    )
+    parser.add_argument(
+        "--device-scheduling",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Group files by storage device, limit concurrent probes per device "
+            "and interleave devices (default: on)"
+        ),
+    )
+    parser.add_argument(
+        "--sniff",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Check each file's first bytes before ffprobe: report empty files, "
+            "HTML/XML pages, documents, archives and images as not_a_video, "
+            "and tune probing for the real container (default: on)"
+        ),
+    )
+    parser.add_argument(
+        "--dedup",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Probe hardlinked files (same device and inode) once and report "
+            "the others as duplicates, left out of the script (default: on)"
+        ),
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help=(
+            "Also treat files with the same size and sampled content (head, "
+            "middle and tail blocks) as duplicates; reads 192 KiB per file"
+        ),
+    )
+    parser.add_argument(
+        "--probe-timeout-max",
+        type=float,
+        default=DEFAULT_MAX_TIMEOUT,
+        metavar="SECONDS",
+        help=(
+            "Upper bound for the adaptive per-probe timeout, which follows "
+            "observed probe latency and file size "
+            f"(default: {DEFAULT_MAX_TIMEOUT:g})"
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Reuse probe results for unchanged files from an on-disk cache. "
+            "Use --no-cache to always run ffprobe."
+        ),
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=None,
+        help=f"Probe cache database path (default: {default_cache_path()})",
+    )
+    parser.add_argument(
+        "--sorted",
+        dest="sort_files",
+        action="store_true",
+        help=(
+            "Collect and sort the full file list before probing "
+            "(default: probe files as the walk discovers them)"
+        ),
+    )
     parser.add_argument(
         "-r",
         "--delete-original",
@@ -98,6 +666,9 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
             "(uses macOS Finder/gio/trash when available)"
         ),
     )
+    _add_filter_arguments(parser)
+    _add_trial_arguments(parser)
+    _add_plan_arguments(parser)
     parser.add_argument(
         "directory",
         nargs="?",
@@ -122,19 +693,82 @@ def parse_args(argv: list[str] | None = None) -> AppConfig:
     )
     cleanup = CleanupPolicy(mode=mode)
 
+    cache_path: Path | None = None
+    if args.cache:
+        cache_path = Path(args.cache_path) if args.cache_path else default_cache_path()
+    probe_profile: Path | None = None
+    if args.adaptive_probe and args.fast_probe:
+        probe_profile = (
+            Path(args.probe_profile) if args.probe_profile else default_profile_path()
+        )
     probe = ProbeSettings(
         fast_probe=bool(args.fast_probe),
         probe_size=str(args.probe_size),
         analyze_duration=str(args.analyze_duration),
+        retries=max(0, args.probe_retries),
+        max_timeout=max(1.0, args.probe_timeout_max),
+        backend=ProbeBackend(args.probe_backend),
+        window=args.probe_window,
+        native=bool(args.native_probe),
+        sniff=bool(args.sniff),
+        profile=probe_profile,
+        cache_path=cache_path,
     )
 
+    if args.since and not Path(args.since).is_file():
+        parser.error(f"--since: report not found: {args.since}")
+    if args.delta_output and not args.since:
+        parser.error("--delta-output requires --since")
+    if args.encode_ledger and not Path(args.encode_ledger).is_file():
+        parser.error(f"--encode-ledger: ledger not found: {args.encode_ledger}")
+
+    output_format = _output_format(parser, args, output)
+
+    if args.resume:
+        _check_resume(parser, args, output, output_format)
+
+    watch: WatchSettings | None = None
+    if args.watch:
+        watch = WatchSettings(
+            settle=max(0.0, args.watch_settle),
+            poll_interval=max(1.0, args.poll_interval),
+            force_poll=bool(args.watch_poll),
+        )
+
     return AppConfig(
         directory=Path(directory),
         output=Path(output)
         if output
-        else Path(f"video_codec_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"),
+        else Path(
+            f"video_codec_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"{SUFFIXES[output_format]}"
+        ),
         jobs=args.jobs,
         script_file=Path(args.script) if args.script else None,
         cleanup=cleanup,
         probe=probe,
+        sort_files=bool(args.sort_files),
+        delta=DeltaSettings(
+            previous=Path(args.since),
+            output=Path(args.delta_output) if args.delta_output else None,
+        )
+        if args.since
+        else None,
+        watch=watch,
+        shard=args.shard,
+        encode_ledger=Path(args.encode_ledger) if args.encode_ledger else None,
+        stats_json=Path(args.stats_json) if args.stats_json else None,
+        metrics=metrics_settings(args),
+        output_format=output_format,
+        journal=JournalSettings(
+            path=Path(args.journal) if args.journal else None,
+            resume=bool(args.resume),
+        ),
+        devices=_device_settings(parser, args),
+        dedup=DedupSettings(
+            enabled=bool(args.dedup), fingerprint=bool(args.fingerprint)
+        ),
+        filters=_filter_settings(args),
+        trial=_trial_settings(args),
+        plan=_plan_settings(parser, args),
     )
@@ -1,18 +1,103 @@
 """Concurrent probing utilities.
 
-Provides a small executor wrapper for probing video metadata in parallel.
+Provides a small executor wrapper for probing video metadata in parallel, with
+a thread-pool backend and an asyncio subprocess backend.
 """
 
 from __future__ import annotations
 
+import asyncio
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Callable, Iterable, Iterator, Tuple
+from typing import Callable, Iterable, Iterator, Sequence, Tuple, TypeVar
 
-from video_codec_checker.models import FileProbeResult
+from video_codec_checker.devices import DeviceLimits, DeviceQueues
+from video_codec_checker.header_parser import parse_container_header
+from video_codec_checker.models import AsyncProber, FileProbeResult, Prober
+from video_codec_checker.probe_cache import FileSignature, ProbeCache
+from video_codec_checker.probe_policy import ProbePolicy
+from video_codec_checker.probe_tuner import ProbeTuner
+from video_codec_checker.sniff import sniff_file
 from video_codec_checker.stats import ProbeStats
-from video_codec_checker.video_processor import probe_video_metadata
+from video_codec_checker.video_processor import (
+    ERROR_NOT_A_VIDEO,
+    ERROR_TIMEOUT,
+    probe_timeout,
+    probe_video,
+    probe_video_async,
+    probes_cancelled,
+)
+
+T = TypeVar("T")
+
+TaskResult = Tuple[FileProbeResult, dict]
+# submit(path, final) schedules one probe; final marks the quarantine pass
+Submit = Callable[[Path, bool], "Future[TaskResult]"]
+
+# Paths buffered between a background discovery walk and the probe pool.
+DISCOVERY_QUEUE_SIZE = 1024
+
+# Default cap on submitted-but-unconsumed probes, per worker thread.
+DEFAULT_WINDOW_PER_WORKER = 4
+
+# Default concurrent probes for the asyncio backend (no threads per probe).
+DEFAULT_ASYNC_JOBS = 64
+
+# Quarantined files are retried at this fraction of the normal concurrency.
+QUARANTINE_SHARE = 4
+
+_DONE = object()
+
+
+def _put_until_stopped(
+    buf: queue.Queue[object], item: object, stop: threading.Event
+) -> bool:
+    """Put into a bounded queue, giving up once `stop` is set."""
+    while not stop.is_set():
+        try:
+            buf.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(items: Iterable[T], maxsize: int = DISCOVERY_QUEUE_SIZE) -> Iterator[T]:
+    """Iterate `items` on a background thread through a bounded queue.
+
+    Lets a slow producer (e.g. a directory walk) run ahead of the consumer by
+    at most `maxsize` items. Producer exceptions are re-raised in the consumer.
+    """
+    buf: queue.Queue[object] = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not _put_until_stopped(buf, item, stop):
+                    return
+            _put_until_stopped(buf, _DONE, stop)
+        except BaseException as exc:  # surfaced in the consumer
+            _put_until_stopped(buf, exc, stop)
+
+    worker = threading.Thread(target=produce, name="discovery", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buf.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item  # type: ignore[misc]
+    finally:
+        stop.set()
 
 
 class ProbeExecutor:
@@ -22,14 +107,33 @@ class ProbeExecutor:
         self,
         jobs: int | None = None,
         ffprobe_args: list[str] | None = None,
-        probe_func: Callable[
-            [Path, list[str] | None, dict | None], tuple[str | None, int]
-        ] = probe_video_metadata,
+        probe_func: Prober = probe_video,
+        cache: ProbeCache | None = None,
+        queue_size: int = DISCOVERY_QUEUE_SIZE,
+        window_per_worker: int | None = None,
+        native_probe: bool = False,
+        tuner: ProbeTuner | None = None,
+        policy: ProbePolicy | None = None,
+        devices: DeviceLimits | None = None,
+        sniff: bool = False,
     ) -> None:
         self.max_workers = self._resolve_workers(jobs)
+        if devices is not None and not jobs:
+            # A configured per-device limit may exceed the default pool size
+            self.max_workers = max(self.max_workers, devices.largest_override())
+        self.devices = devices or DeviceLimits(enabled=False)
         self.ffprobe_args = ffprobe_args
-        self.stats = ProbeStats()
+        per_worker = window_per_worker or DEFAULT_WINDOW_PER_WORKER
+        self.window = self.max_workers * max(1, per_worker)
+        self.stats = ProbeStats(window_size=self.window)
+        self.cache = cache
+        self.queue_size = queue_size
+        self.native_probe = native_probe
+        self.sniff = sniff
+        self.tuner = tuner
+        self.policy = policy or ProbePolicy()
         self._probe = probe_func
+        self._session: Submit | None = None
 
     def _resolve_workers(self, jobs: int | None) -> int:
         if jobs and jobs > 0:
@@ -37,16 +141,380 @@ class ProbeExecutor:
         cpu_workers = os.cpu_count() or 1
         return min(32, cpu_workers)
 
-    def _task(self, fp: Path) -> Tuple[FileProbeResult, dict]:
+    def _from_cache(
+        self, fp: Path, local_stats: dict
+    ) -> tuple[FileSignature | None, FileProbeResult | None]:
+        """Return (signature, cached result or None) and count the lookup."""
+        cache = self.cache
+        if cache is None:
+            return None, None
+        sig = cache.signature(fp)
+        cached = cache.get(fp, sig)
+        if cached is not None and cached.get("codec"):
+            local_stats["cache_hits"] += 1
+            return sig, FileProbeResult.from_dict(fp, cached)
+        local_stats["cache_misses"] += 1
+        return sig, None
+
+    def _to_cache(
+        self, fp: Path, sig: FileSignature | None, result: FileProbeResult
+    ) -> None:
+        # Failed probes are not cached so transient errors are retried next run
+        if self.cache is not None and result.codec:
+            self.cache.put(fp, sig, result.to_dict())
+
+    def _sniff(
+        self, fp: Path, local_stats: dict
+    ) -> tuple[FileProbeResult | None, str | None]:
+        """Reject non-video content; return the tuner key if misnamed."""
+        sniffed = sniff_file(fp)
+        if sniffed.not_video is not None:
+            local_stats["not_a_video"] += 1
+            return FileProbeResult(fp, None, 0, error=ERROR_NOT_A_VIDEO), None
+        if sniffed.mismatch(fp):
+            local_stats["sniff_mismatches"] += 1
+            return None, sniffed.container
+        return None, None
+
+    def _from_tiers(
+        self, fp: Path, local_stats: dict
+    ) -> tuple[FileSignature | None, FileProbeResult | None, str | None]:
+        """Try the cache, the sniffer and the native header parser first.
+
+        Also returns the container to tune ffprobe for when the file's
+        extension does not match its content.
+        """
+        sig, result = self._from_cache(fp, local_stats)
+        key = None
+        if result is None and self.sniff:
+            result, key = self._sniff(fp, local_stats)
+        if result is None and self.native_probe:
+            local_stats["native_attempted"] += 1
+            t0 = time.perf_counter()
+            result = parse_container_header(fp)
+            local_stats["native_time"] += time.perf_counter() - t0
+            if result is None:
+                local_stats["native_fallbacks"] += 1
+            else:
+                local_stats["native_hits"] += 1
+                self._to_cache(fp, sig, result)
+        return sig, result, key
+
+    def _args_for(self, fp: Path, key: str | None = None) -> list[str] | None:
+        if self.tuner is not None:
+            return self.tuner.args_for(fp, key)
+        return self.ffprobe_args
+
+    def _learn(self, fp: Path, local_stats: dict, key: str | None = None) -> None:
+        if self.tuner is not None:
+            self.tuner.record(fp, local_stats, key)
+
+    def _size(self, fp: Path, sig: FileSignature | None) -> int:
+        if sig is not None:
+            return sig.size
+        try:
+            return os.stat(fp).st_size
+        except OSError:
+            return 0
+
+    def _attempted(
+        self, result: FileProbeResult, seconds: float, local_stats: dict
+    ) -> None:
+        """Account for one probe attempt."""
+        if result.error is None:
+            self.policy.observe(seconds)
+        elif result.error == ERROR_TIMEOUT:
+            local_stats["timeouts"] += 1
+
+    def _task(self, fp: Path, final: bool = False) -> TaskResult:
         local_stats = self.stats.new_local()
-        codec, channels = self._probe(fp, self.ffprobe_args, local_stats)
-        return FileProbeResult(path=fp, codec=codec, channels=channels), local_stats
+        sig, cached, key = self._from_tiers(fp, local_stats)
+        if cached is not None:
+            return cached, local_stats
+        size = self._size(fp, sig)
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            with probe_timeout(self.policy.timeout(size, attempt, final)):
+                result = self._probe(fp, self._args_for(fp, key), local_stats)
+            self._attempted(result, time.perf_counter() - t0, local_stats)
+            if not self.policy.should_retry(result.error, attempt):
+                break
+            local_stats["retries"] += 1
+            time.sleep(self.policy.delay(attempt))
+            attempt += 1
+        self._learn(fp, local_stats, key)
+        self._to_cache(fp, sig, result)
+        return result, local_stats
+
+    @contextmanager
+    def _submitter(self) -> Iterator[Submit]:
+        """Provide a function that schedules one probe and returns its Future.
+
+        If the caller bails out (Ctrl-C, an error, an abandoned run), queued
+        probes are cancelled and running ffprobe children are killed rather
+        than waited for.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            yield lambda fp, final: executor.submit(self._task, fp, final)
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            with probes_cancelled():
+                executor.shutdown(wait=True)
+            raise
+        executor.shutdown(wait=True)
+
+    @contextmanager
+    def session(self) -> Iterator[None]:
+        """Keep the worker pool (or event loop) alive across run() calls.
+
+        Used by watch mode so each batch of new files is probed without
+        starting a new pool.
+        """
+        with self._submitter() as submit:
+            self._session = submit
+            try:
+                yield
+            finally:
+                self._session = None
+
+    @contextmanager
+    def _pool(self) -> Iterator[Submit]:
+        if self._session is not None:
+            yield self._session
+        else:
+            with self._submitter() as submit:
+                yield submit
 
     def run(self, files: Iterable[Path]) -> Iterator[FileProbeResult]:
-        """Yield FileProbeResult items as they complete."""
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(self._task, fp) for fp in files]
-            for fut in as_completed(futures):
-                result, local_stats = fut.result()
-                self.stats.add(local_stats)
+        """Yield FileProbeResult items as they complete.
+
+        A lazy iterable (e.g. iter_video_files) is consumed on a background
+        thread through a bounded queue, so probing overlaps discovery and
+        results stream out while the walk is still running. At most
+        `self.window` probes are in flight; the window is refilled as results
+        are consumed, keeping memory flat regardless of library size.
+
+        Files whose probe still fails after the policy's retries are held
+        back and probed once more after everything else, a few at a time and
+        with the longest timeout; their final result (possibly with `error`
+        set) is yielded then.
+        """
+        stats = self.stats
+        source: Iterable[Path]
+        if isinstance(files, Sequence):
+            stats.discovered += len(files)
+            stats.discovery_done = True
+            source = files
+        else:
+            stats.discovery_done = False
+            source = prefetch(self._discover(files), self.queue_size)
+        quarantine: list[Path] = []
+        with self._pool() as submit:
+            for result in self._stream(source, submit, self.window, final=False):
+                if result.error not in (None, ERROR_NOT_A_VIDEO):
+                    quarantine.append(result.path)
+                    stats.quarantined += 1
+                    continue
+                stats.probed += 1
                 yield result
+            window = max(1, self.max_workers // QUARANTINE_SHARE)
+            for result in self._stream(quarantine, submit, window, final=True):
+                stats.probed += 1
+                if result.error is not None:
+                    stats.probe_errors += 1
+                yield result
+
+    def _stream(
+        self, source: Iterable[Path], submit: Submit, window: int, final: bool
+    ) -> Iterator[FileProbeResult]:
+        """Probe `source` with at most `window` probes in flight.
+
+        Files wait in per-device queues and are submitted round-robin within
+        each device's limit. Reading from `source` pauses once `queue_size`
+        files are waiting, so a slow device cannot grow the backlog.
+        """
+        stats = self.stats
+        waiting = DeviceQueues(self.devices)
+        completed: queue.SimpleQueue[Future[TaskResult]] = queue.SimpleQueue()
+
+        def collect(done: Future[TaskResult]) -> FileProbeResult:
+            result = self._collect(done)
+            waiting.done(result.path)
+            self._dispatch(waiting, submit, window, final, completed)
+            return result
+
+        for fp in source:
+            waiting.push(fp)
+            self._dispatch(waiting, submit, window, final, completed)
+            while stats.in_flight:
+                # Block only when nothing more can be taken on
+                full = stats.in_flight >= window or len(waiting) >= self.queue_size
+                try:
+                    done = completed.get(block=full)
+                except queue.Empty:
+                    break
+                yield collect(done)
+        while stats.in_flight:
+            yield collect(completed.get())
+
+    def _dispatch(
+        self,
+        waiting: DeviceQueues,
+        submit: Submit,
+        window: int,
+        final: bool,
+        completed: queue.SimpleQueue[Future[TaskResult]],
+    ) -> None:
+        """Submit waiting files while the window and their devices allow."""
+        stats = self.stats
+        while stats.in_flight < window:
+            fp = waiting.pop_ready()
+            if fp is None:
+                return
+            fut = submit(fp, final)
+            fut.add_done_callback(completed.put)
+            if not final:
+                stats.submitted += 1
+            stats.in_flight += 1
+            if stats.in_flight > stats.peak_in_flight:
+                stats.peak_in_flight = stats.in_flight
+
+    def _discover(self, files: Iterable[Path]) -> Iterator[Path]:
+        """Time and count the walk; runs on the prefetch thread."""
+        for fp in self.stats.timings.timed("walk", files):
+            self.stats.discovered += 1
+            yield fp
+        self.stats.discovery_done = True
+
+    def _collect(self, fut: Future[TaskResult]) -> FileProbeResult:
+        result, local_stats = fut.result()
+        self.stats.in_flight -= 1
+        self.stats.add(local_stats, result.path)
+        return result
+
+
+@contextmanager
+def _pidfd_child_watcher(loop: asyncio.AbstractEventLoop) -> Iterator[None]:
+    """Reap children via pidfd instead of one waiter thread per process.
+
+    Python 3.12+ does this by default; earlier versions default to
+    ThreadedChildWatcher, which would spawn a thread per running ffprobe. The
+    default watcher is restored on exit.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        yield
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        yield  # kernel without pidfd support
+        return
+    policy = asyncio.get_event_loop_policy()
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    policy.set_child_watcher(watcher)
+    try:
+        yield
+    finally:
+        policy.set_child_watcher(asyncio.ThreadedChildWatcher())
+
+
+async def _cancel_pending() -> None:
+    current = asyncio.current_task()
+    tasks = [t for t in asyncio.all_tasks() if t is not current]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncProbeExecutor(ProbeExecutor):
+    """Probe with asyncio subprocesses on a single event-loop thread.
+
+    Concurrency is limited by a semaphore of `jobs` slots rather than by
+    threads, so hundreds of latency-bound probes cost no extra OS threads.
+    The blocking tiers before a probe (cache, sniffer, header parser) run in
+    the loop's default thread pool. Windowing, caching and stats behave
+    exactly as in ProbeExecutor.
+    """
+
+    def __init__(
+        self,
+        jobs: int | None = None,
+        ffprobe_args: list[str] | None = None,
+        probe_func: AsyncProber = probe_video_async,
+        cache: ProbeCache | None = None,
+        queue_size: int = DISCOVERY_QUEUE_SIZE,
+        window_per_worker: int | None = None,
+        native_probe: bool = False,
+        tuner: ProbeTuner | None = None,
+        policy: ProbePolicy | None = None,
+        devices: DeviceLimits | None = None,
+        sniff: bool = False,
+    ) -> None:
+        super().__init__(
+            jobs=jobs,
+            ffprobe_args=ffprobe_args,
+            cache=cache,
+            queue_size=queue_size,
+            window_per_worker=window_per_worker,
+            native_probe=native_probe,
+            tuner=tuner,
+            policy=policy,
+            devices=devices,
+            sniff=sniff,
+        )
+        self._aprobe = probe_func
+
+    def _resolve_workers(self, jobs: int | None) -> int:
+        if jobs and jobs > 0:
+            return jobs
+        return DEFAULT_ASYNC_JOBS
+
+    async def _atask(
+        self, fp: Path, sem: asyncio.Semaphore, final: bool = False
+    ) -> TaskResult:
+        local_stats = self.stats.new_local()
+        # Cache lookups, sniffing and header parsing block on disk; keep them
+        # off the loop so they do not stall the running probes
+        sig, cached, key = await asyncio.to_thread(self._from_tiers, fp, local_stats)
+        if cached is not None:
+            return cached, local_stats
+        size = await asyncio.to_thread(self._size, fp, sig)
+        attempt = 0
+        while True:
+            async with sem:
+                t0 = time.perf_counter()
+                with probe_timeout(self.policy.timeout(size, attempt, final)):
+                    args = self._args_for(fp, key)
+                    result = await self._aprobe(fp, args, local_stats)
+            self._attempted(result, time.perf_counter() - t0, local_stats)
+            if not self.policy.should_retry(result.error, attempt):
+                break
+            local_stats["retries"] += 1
+            await asyncio.sleep(self.policy.delay(attempt))
+            attempt += 1
+        self._learn(fp, local_stats, key)
+        await asyncio.to_thread(self._to_cache, fp, sig, result)
+        return result, local_stats
+
+    @contextmanager
+    def _submitter(self) -> Iterator[Submit]:
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="probe-loop")
+        sem = asyncio.Semaphore(self.max_workers)
+        with _pidfd_child_watcher(loop):
+            thread.start()
+            try:
+                yield lambda fp, final: asyncio.run_coroutine_threadsafe(
+                    self._atask(fp, sem, final), loop
+                )
+            finally:
+                asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result()
+                asyncio.run_coroutine_threadsafe(
+                    loop.shutdown_default_executor(), loop
+                ).result()
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
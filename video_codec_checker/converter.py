@@ -0,0 +1,593 @@
+"""Parallel conversion scheduler for the `convert` subcommand.
+
+Runs the FFmpeg commands from a report CSV (or a JSON job manifest) as K
+concurrent encodes, each limited to N threads, instead of one at a time as
+the generated shell script does. Jobs start longest-first by predicted cost,
+which keeps the makespan close to optimal for a fixed number of slots. Each
+job writes its own log, and exit code, wall time and CPU time (from
+wait4's rusage) are appended to a JSONL results ledger.
+
+With the report's Est_* columns, jobs can instead be ranked by estimated
+bytes saved per CPU-hour and capped to a CPU budget, so a fixed encode window
+goes to the biggest wins first. Source geometry from the probe cache is
+recorded in the ledger so the estimator can be calibrated from it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shlex
+import sqlite3
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from video_codec_checker.calibrate import default_host_profile_path, host_recommendation
+from video_codec_checker.cli import add_metrics_arguments, metrics_settings
+from video_codec_checker.ffmpeg_generator import limit_threads
+from video_codec_checker.metrics import Metric, MetricsExporter
+from video_codec_checker.models import GOOD_CODECS, STATUS_OK, FileProbeResult
+from video_codec_checker.probe_cache import ProbeCache, default_cache_path
+from video_codec_checker.script_writer import TrashConfig, resolve_trash_config
+from video_codec_checker.sinks import read_rows
+
+DEFAULT_THREADS_PER_JOB = 8
+
+# Seconds between checks on running encodes
+_POLL_INTERVAL = 0.2
+
+ORDER_LONGEST = "longest"
+ORDER_SAVINGS = "savings"
+
+JobMeta = dict[str, str | int | float | None]
+
+
+@dataclass
+class Job:
+    """One encode: argv plus the source/destination it converts."""
+
+    argv: list[str]
+    src: Path
+    dst: Path
+    # Predicted cost used only for ordering (CPU-seconds or a proxy)
+    weight: float = 0.0
+    meta: JobMeta = field(default_factory=dict)
+
+    @property
+    def saved_per_cpu_hour(self) -> float | None:
+        """Estimated bytes saved per CPU-hour, or None without estimates."""
+        saved = self.meta.get("est_bytes_saved")
+        cpu = self.meta.get("est_cpu_seconds")
+        if saved is None or not cpu:
+            return None
+        return float(saved) * 3600.0 / float(cpu)
+
+    @classmethod
+    def from_command(cls, command: str, meta: JobMeta | None = None) -> Job:
+        """Build a job from a generated FFmpeg command line."""
+        argv = shlex.split(command)
+        if not argv or "-i" not in argv[:-1]:
+            raise ValueError(f"not an ffmpeg command: {command!r}")
+        src = Path(argv[argv.index("-i") + 1])
+        return cls(argv=argv, src=src, dst=Path(argv[-1]), meta=dict(meta or {}))
+
+
+def _file_size(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def jobs_from_report(path: Path) -> list[Job]:
+    """Jobs for legacy-codec rows of a report (h264 rows and duplicates skipped).
+
+    The estimated encode CPU time, when the report has it, is the job weight.
+    """
+    jobs = []
+    for row in read_rows(path):
+        if not row.command or row.codec in GOOD_CODECS or row.status != STATUS_OK:
+            continue
+        if row.duplicate_of:
+            continue  # converted through the file it duplicates
+        meta: JobMeta = {
+            "codec": row.codec,
+            "bpp": row.bpp,
+            "est_output_bytes": row.est_output_bytes,
+            "est_bytes_saved": row.est_bytes_saved,
+            "est_cpu_seconds": row.est_cpu_seconds,
+        }
+        job = Job.from_command(row.command, meta)
+        job.weight = row.est_cpu_seconds or 0.0
+        jobs.append(job)
+    return jobs
+
+
+def jobs_from_manifest(path: Path) -> list[Job]:
+    """Jobs from a JSON list (or {"jobs": [...]}) of objects.
+
+    Each object needs "command"; an optional "weight" overrides the size-based
+    ordering and any other keys are copied into the ledger.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    items = data.get("jobs", []) if isinstance(data, dict) else data
+    jobs = []
+    for item in items:
+        meta = {k: v for k, v in item.items() if k not in ("command", "weight")}
+        job = Job.from_command(item["command"], meta)
+        job.weight = float(item.get("weight") or 0.0)
+        jobs.append(job)
+    return jobs
+
+
+def attach_features(jobs: Iterable[Job], cache: ProbeCache) -> None:
+    """Copy cached source geometry/duration into each job's ledger metadata."""
+    for job in jobs:
+        payload = cache.lookup(job.src, cache.signature(job.src))
+        if payload is None:
+            continue
+        probed = FileProbeResult.from_dict(job.src, payload)
+        job.meta.update(
+            duration=probed.duration,
+            width=probed.width,
+            height=probed.height,
+            fps=probed.fps,
+            channels=probed.channels,
+        )
+
+
+def _within_budget(jobs: list[Job], cpu_seconds: float) -> list[Job]:
+    """Greedily keep the best savings-per-CPU-hour jobs that fit the budget."""
+    ranked = sorted(
+        (j for j in jobs if j.saved_per_cpu_hour is not None),
+        key=lambda j: j.saved_per_cpu_hour or 0.0,
+        reverse=True,
+    )
+    if len(ranked) < len(jobs):
+        print(
+            f"Skipping {len(jobs) - len(ranked)} jobs without estimates "
+            "(cannot be costed against --cpu-hours)",
+            file=sys.stderr,
+        )
+    kept = []
+    spent = 0.0
+    for job in ranked:
+        cost = float(job.meta.get("est_cpu_seconds") or 0.0)
+        if spent + cost <= cpu_seconds:
+            kept.append(job)
+            spent += cost
+    return kept
+
+
+def plan(
+    jobs: Iterable[Job],
+    skip_existing: bool = False,
+    order: str = ORDER_LONGEST,
+    cpu_budget: float | None = None,
+) -> list[Job]:
+    """Drop jobs that cannot or need not run, then order them.
+
+    ORDER_LONGEST runs the heaviest jobs first (shortest makespan);
+    ORDER_SAVINGS runs the most bytes saved per CPU-hour first. With
+    cpu_budget (CPU-seconds), only the best-value jobs that fit are kept.
+    """
+    planned = _runnable(jobs, skip_existing)
+    if cpu_budget is not None:
+        planned = _within_budget(planned, cpu_budget)
+    if order == ORDER_SAVINGS:
+        planned.sort(key=lambda j: j.saved_per_cpu_hour or 0.0, reverse=True)
+    else:
+        planned.sort(key=lambda j: j.weight, reverse=True)
+    return planned
+
+
+def _runnable(jobs: Iterable[Job], skip_existing: bool) -> list[Job]:
+    planned = []
+    for job in jobs:
+        size = _file_size(job.src)
+        if size is None:
+            print(f"Skipping (source missing): {job.src}", file=sys.stderr)
+            continue
+        if skip_existing and job.dst.exists():
+            print(f"Skipping (output exists): {job.dst}", file=sys.stderr)
+            continue
+        job.meta.setdefault("input_bytes", size)
+        if job.weight <= 0:
+            # Input size is a serviceable proxy for encode time
+            job.weight = float(size)
+        planned.append(job)
+    return planned
+
+
+@dataclass
+class _Running:
+    job: Job
+    proc: subprocess.Popen[bytes]
+    log: Path
+    started: float
+    started_at: str
+    dst_existed: bool
+
+
+class ConvertScheduler:
+    """Run jobs K at a time and record results in a JSONL ledger."""
+
+    def __init__(
+        self,
+        slots: int,
+        threads: int,
+        log_dir: Path,
+        ledger: Path,
+        delete_original: bool = False,
+        trash_config: TrashConfig | None = None,
+    ) -> None:
+        self.slots = max(1, slots)
+        self.threads = max(1, threads)
+        self.log_dir = log_dir
+        self.ledger = ledger
+        self.delete_original = delete_original
+        self.trash_config = trash_config or TrashConfig(use_trash=False)
+        self.failed = 0
+        self.succeeded = 0
+        self.total = 0
+        self.cpu_seconds = 0.0
+        self._running: dict[int, _Running] = {}
+
+    def run(self, jobs: list[Job]) -> int:
+        """Run all jobs; return the number that failed."""
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.total += len(jobs)
+        pending = list(reversed(jobs))  # pop() takes the longest first
+        try:
+            while pending or self._running:
+                while pending and len(self._running) < self.slots:
+                    self._start(pending.pop(), len(jobs) - len(pending))
+                self._reap()
+        except KeyboardInterrupt:
+            self._abort()
+            raise
+        return self.failed
+
+    def _start(self, job: Job, seq: int) -> None:
+        argv = limit_threads(job.argv, self.threads)
+        log = self.log_dir / f"{seq:05d}_{job.src.stem}.log"
+        dst_existed = job.dst.exists()
+        with log.open("wb") as fh:
+            fh.write((shlex.join(argv) + "\n\n").encode())
+            fh.flush()
+            proc = subprocess.Popen(
+                argv,
+                stdin=subprocess.DEVNULL,
+                stdout=fh,
+                stderr=subprocess.STDOUT,
+            )
+        self._running[proc.pid] = _Running(
+            job, proc, log, time.monotonic(), datetime.now().isoformat(), dst_existed
+        )
+        print(f"[START] {job.src}", file=sys.stderr)
+
+    def _reap(self) -> None:
+        """Wait for one of the running encodes to exit and record it."""
+        pid, status, usage = self._wait_any()
+        run = self._running.pop(pid)
+        code = os.waitstatus_to_exitcode(status)
+        run.proc.returncode = code  # already reaped; keep Popen consistent
+        wall = time.monotonic() - run.started
+        ok = code == 0 and run.job.dst.is_file()
+        cleanup = self._cleanup(run.job.src) if ok else "none"
+        if ok:
+            self.succeeded += 1
+            print(f"[DONE] {run.job.src} ({wall:.0f}s)", file=sys.stderr)
+        else:
+            self.failed += 1
+            _remove_partial(run)
+            print(f"[FAIL] {run.job.src} (exit {code}, see {run.log})", file=sys.stderr)
+        self.cpu_seconds += usage.ru_utime + usage.ru_stime
+        self._record(run, code, wall, usage.ru_utime, usage.ru_stime, cleanup)
+
+    def _wait_any(self) -> tuple[int, int, resource.struct_rusage]:
+        """wait4 on our own encodes only, so no other child gets reaped."""
+        while True:
+            for pid in self._running:
+                done, status, usage = os.wait4(pid, os.WNOHANG)
+                if done:
+                    return done, status, usage
+            time.sleep(_POLL_INTERVAL)
+
+    def metrics(self) -> list[Metric]:
+        """Progress samples for the metrics exporter."""
+        done = self.succeeded + self.failed
+        return [
+            Metric("convert_jobs", "gauge", "Jobs planned.", self.total),
+            Metric(
+                "convert_jobs_running", "gauge", "Encodes running.", len(self._running)
+            ),
+            Metric(
+                "convert_jobs_succeeded_total",
+                "counter",
+                "Encodes that succeeded.",
+                self.succeeded,
+            ),
+            Metric(
+                "convert_jobs_failed_total",
+                "counter",
+                "Encodes that failed.",
+                self.failed,
+            ),
+            Metric(
+                "convert_jobs_pending",
+                "gauge",
+                "Jobs not started yet.",
+                self.total - done - len(self._running),
+            ),
+            Metric(
+                "convert_cpu_seconds_total",
+                "counter",
+                "CPU time of finished encodes.",
+                self.cpu_seconds,
+            ),
+            Metric(
+                "last_update_timestamp_seconds",
+                "gauge",
+                "Unix time these metrics were rendered (alert when stale).",
+                round(time.time(), 3),
+            ),
+        ]
+
+    def _cleanup(self, src: Path) -> str:
+        """Delete or trash the source, mirroring the script's cleanup_source."""
+        tc = self.trash_config
+        if tc.use_trash:
+            cmd = [tc.bin, tc.arg, str(src)] if tc.arg else [tc.bin, str(src)]
+            subprocess.run(cmd, check=False)
+            return "trash"
+        if self.delete_original:
+            try:
+                os.remove(src)
+            except OSError:
+                return "failed"
+            return "delete"
+        return "none"
+
+    def _record(
+        self,
+        run: _Running,
+        code: int,
+        wall: float,
+        user: float,
+        system: float,
+        cleanup: str,
+    ) -> None:
+        entry = {
+            "src": str(run.job.src),
+            "dst": str(run.job.dst),
+            "command": shlex.join(run.job.argv),
+            "threads": self.threads,
+            "exit_code": code,
+            "started": run.started_at,
+            "wall_seconds": round(wall, 3),
+            "cpu_user_seconds": round(user, 3),
+            "cpu_system_seconds": round(system, 3),
+            "output_bytes": _file_size(run.job.dst) if code == 0 else None,
+            "cleanup": cleanup,
+            "log": str(run.log),
+            **run.job.meta,
+        }
+        with self.ledger.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def _abort(self) -> None:
+        """Stop running encodes and remove their partial outputs."""
+        for run in self._running.values():
+            run.proc.terminate()
+        for run in self._running.values():
+            try:
+                run.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                run.proc.kill()
+                run.proc.wait()
+            _remove_partial(run)
+            print(f"[ABORT] {run.job.src}", file=sys.stderr)
+        self._running.clear()
+
+
+def _remove_partial(run: _Running) -> None:
+    """Remove the output of an encode that did not finish.
+
+    A truncated output would otherwise pass for a finished conversion
+    (e.g. with --skip-existing). An output that existed before the job
+    started was not written by it and is left alone.
+    """
+    if run.dst_existed:
+        return
+    try:
+        os.remove(run.job.dst)
+    except OSError:
+        pass
+
+
+def _default_slots_threads(
+    jobs: int | None, threads: int | None, profile: Path | None = None
+) -> tuple[int, int]:
+    """-j/--threads as given; otherwise the host profile's, otherwise derived."""
+    cpus = os.cpu_count() or 1
+    if jobs is None and threads is None and profile is not None:
+        recommended = host_recommendation(profile)
+        if recommended is not None:
+            print(f"Using slots and threads from {profile}", file=sys.stderr)
+            return recommended
+    if threads is None:
+        threads = max(1, cpus // jobs) if jobs else min(DEFAULT_THREADS_PER_JOB, cpus)
+    if jobs is None:
+        jobs = max(1, cpus // threads)
+    return jobs, threads
+
+
+def _attach_cached_features(jobs: list[Job], cache_path: Path) -> None:
+    if not cache_path.is_file():
+        return
+    # Read-only: convert must not migrate or touch the scan's cache
+    cache = ProbeCache(cache_path, read_only=True)
+    try:
+        cache.open()
+        attach_features(jobs, cache)
+    except sqlite3.Error as e:
+        print(f"Warning: probe cache unreadable: {e}", file=sys.stderr)
+    finally:
+        cache.close()
+
+
+def convert_main(argv: list[str]) -> int:
+    """Entry point for the 'convert' subcommand; returns the exit status."""
+    parser = argparse.ArgumentParser(
+        prog="check-video-codecs convert",
+        description=(
+            "Run the conversions from a report CSV or JSON job manifest in "
+            "parallel, longest job first"
+        ),
+    )
+    parser.add_argument("source", type=Path, help="Report CSV or JSON job manifest")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Concurrent encodes (default: CPU count / --threads)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help=f"Threads per encode (default: {DEFAULT_THREADS_PER_JOB})",
+    )
+    parser.add_argument(
+        "--host-profile",
+        type=Path,
+        default=None,
+        help=(
+            "Host profile from 'check-video-codecs calibrate' giving -j/--threads when "
+            f"neither is set (default: {default_host_profile_path()} if present)"
+        ),
+    )
+    parser.add_argument(
+        "--ledger",
+        type=Path,
+        default=Path("convert_ledger.jsonl"),
+        help="JSONL results ledger to append to (default: convert_ledger.jsonl)",
+    )
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        default=None,
+        help="Directory for per-job logs (default: convert_logs_<timestamp>)",
+    )
+    parser.add_argument(
+        "--order",
+        choices=[ORDER_LONGEST, ORDER_SAVINGS],
+        default=ORDER_LONGEST,
+        help=(
+            "longest: heaviest jobs first for the shortest total time; savings: "
+            "most estimated bytes saved per CPU-hour first (default: longest)"
+        ),
+    )
+    parser.add_argument(
+        "--cpu-hours",
+        type=float,
+        default=None,
+        help=(
+            "Only run the jobs with the best estimated savings per CPU-hour that "
+            "fit in this many CPU-hours (needs a report with Est_* columns)"
+        ),
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=None,
+        help="Probe cache to read source geometry from for the ledger",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Skip jobs whose output file already exists",
+    )
+    cleanup = parser.add_mutually_exclusive_group()
+    cleanup.add_argument(
+        "-r",
+        "--delete-original",
+        action="store_true",
+        help="Delete the source after a successful conversion",
+    )
+    cleanup.add_argument(
+        "-t",
+        "--trash-original",
+        action="store_true",
+        help="Move the source to the trash after a successful conversion",
+    )
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="Print the plan and exit"
+    )
+    add_metrics_arguments(parser, "conversion")
+    args = parser.parse_args(argv)
+    if not args.source.is_file():
+        parser.error(f"not found: {args.source}")
+
+    try:
+        trash = resolve_trash_config(args.trash_original)
+        if args.source.suffix.lower() == ".json":
+            jobs = jobs_from_manifest(args.source)
+        else:
+            jobs = jobs_from_report(args.source)
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    _attach_cached_features(jobs, args.cache_path or default_cache_path())
+    slots, threads = _default_slots_threads(
+        args.jobs, args.threads, args.host_profile or default_host_profile_path()
+    )
+    planned = plan(
+        jobs,
+        skip_existing=args.skip_existing,
+        order=args.order,
+        cpu_budget=args.cpu_hours * 3600 if args.cpu_hours is not None else None,
+    )
+    print(
+        f"Converting {len(planned)} files, {slots} at a time with "
+        f"{threads} threads each",
+        file=sys.stderr,
+    )
+    if args.dry_run:
+        for job in planned:
+            print(shlex.join(limit_threads(job.argv, threads)))
+        return 0
+
+    log_dir = args.log_dir or Path(
+        datetime.now().strftime("convert_logs_%Y%m%d_%H%M%S")
+    )
+    scheduler = ConvertScheduler(
+        slots=slots,
+        threads=threads,
+        log_dir=log_dir,
+        ledger=args.ledger,
+        delete_original=args.delete_original,
+        trash_config=trash,
+    )
+    metrics = metrics_settings(args)
+    if metrics is not None:
+        with MetricsExporter(metrics, scheduler.metrics):
+            failed = scheduler.run(planned)
+    else:
+        failed = scheduler.run(planned)
+    print(
+        f"Converted {scheduler.succeeded}, failed {failed}; "
+        f"ledger: {args.ledger}, logs: {log_dir}",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
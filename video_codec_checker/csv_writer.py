@@ -7,32 +7,48 @@ from __future__ import annotations
 
 import csv
 from pathlib import Path
-from typing import IO
+from typing import IO, Iterator
 
 from video_codec_checker.models import CsvRow
 
+# Columns are only ever appended, so positional readers of older reports
+# keep working
 CSV_FIELDS = [
     "File",
     "Codec",
     "Audio_Channels",
     "Bits_Per_Pixel",
     "FFmpeg_Command",
+    "Est_Output_Bytes",
+    "Est_Bytes_Saved",
+    "Est_Encode_CPU_Seconds",
+    "Probe_Status",
+    "Duplicate_Of",
+    "Est_Source",
+    "Preset",
 ]
 
+DELTA_FIELDS = ["Change", *CSV_FIELDS]
+
 
 class CsvResultsWriter:
     """Write results rows to a CSV file with a fixed header."""
 
+    fields = CSV_FIELDS
+
     def __init__(self, path: str | Path) -> None:
         self.path = Path(path)
         self._fh: IO[str] | None = None
         self._writer: csv.DictWriter | None = None
 
-    def open(self) -> None:
-        fh = self.path.open("w", newline="", encoding="utf-8")
+    def open(self, append: bool = False) -> None:
+        """Start the file; with append, continue a non-empty one without a header."""
+        resume = append and self.path.is_file() and self.path.stat().st_size > 0
+        fh = self.path.open("a" if resume else "w", newline="", encoding="utf-8")
         self._fh = fh
-        writer = csv.DictWriter(fh, fieldnames=CSV_FIELDS)
-        writer.writeheader()
+        writer = csv.DictWriter(fh, fieldnames=self.fields)
+        if not resume:
+            writer.writeheader()
         self._writer = writer
 
     def write_row(
@@ -55,9 +71,31 @@ class CsvResultsWriter:
             raise RuntimeError("CSV writer is not open")
         self._writer.writerow(row.as_dict())
 
+    def flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
     def close(self) -> None:
         if self._fh is not None:
             self._fh.flush()
             self._fh.close()
             self._fh = None
             self._writer = None
+
+
+class CsvDeltaWriter(CsvResultsWriter):
+    """Write added/removed/changed rows with a leading Change column."""
+
+    fields = DELTA_FIELDS
+
+    def write_change(self, change: str, row: CsvRow) -> None:
+        if self._writer is None:
+            raise RuntimeError("CSV writer is not open")
+        self._writer.writerow({"Change": change, **row.as_dict()})
+
+
+def read_results(path: str | Path) -> Iterator[CsvRow]:
+    """Yield rows from a report written by CsvResultsWriter."""
+    with Path(path).open("r", newline="", encoding="utf-8") as fh:
+        for data in csv.DictReader(fh):
+            yield CsvRow.from_dict(data)
@@ -0,0 +1,209 @@
+"""Hardlink and duplicate-content detection for scans.
+
+Deduplicator sits between discovery and the probe pool. A hardlink of a file
+already seen (same st_dev and st_ino) is not probed again; with
+fingerprints, neither is a file whose size and sampled content match an
+earlier one, which also catches a file reached again through a bind mount.
+Each duplicate is reported with its primary's probe result once that result
+is in, marked with the primary's path, and left out of the conversion script.
+
+Memory stays flat on large scans: only files with more than one link are
+tracked by inode, until all their links have been seen, and a primary's
+result is kept as a small tuple of probed fields. Fingerprints (opt-in)
+keep one digest and tuple per distinct file.
+
+Fingerprints hash SAMPLE_BYTES from the head, middle and tail of the file
+(small files are hashed whole), so they cost three reads rather than a full
+pass; files that differ only outside the samples are treated as copies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Collection, Iterable, Iterator
+
+from video_codec_checker.models import FileProbeResult
+
+SAMPLE_BYTES = 64 * 1024
+
+_DupKey = tuple[int, int] | str
+
+# FileProbeResult fields after path: codec, channels, width, height, fps,
+# bit_rate, duration, error
+_Probed = tuple[str | None, int, int, int, float, int, float, str | None]
+
+
+def fingerprint(path: Path, size: int) -> str:
+    """Size plus a BLAKE2b digest of sampled head, middle and tail blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        if size <= 3 * SAMPLE_BYTES:
+            digest.update(fh.read())
+        else:
+            for offset in (0, (size - SAMPLE_BYTES) // 2, size - SAMPLE_BYTES):
+                fh.seek(offset)
+                digest.update(fh.read(SAMPLE_BYTES))
+    return f"{size}:{digest.hexdigest()}"
+
+
+def _compact(r: FileProbeResult) -> _Probed:
+    return (
+        r.codec,
+        r.channels,
+        r.width,
+        r.height,
+        r.fps,
+        r.bit_rate,
+        r.duration,
+        r.error,
+    )
+
+
+@dataclass
+class _Group:
+    """A primary file and the duplicates waiting for its result."""
+
+    primary: str
+    probed: _Probed | None = None
+    waiting: list[str] = field(default_factory=list)
+
+
+class Deduplicator:
+    """Drop duplicate files from a scan and hand them back with results.
+
+    `select` runs on the discovery thread; `resolve`, `drain` and
+    `unresolved` are called by the consumer of the probe results. With
+    `done` (files an interrupted scan already reported), duplicates among
+    them are dropped rather than reported again.
+    """
+
+    def __init__(self, fingerprints: bool = False, done: Collection[str] = ()) -> None:
+        self.fingerprints = fingerprints
+        self.hardlinks = 0
+        self.copies = 0
+        self.bytes_skipped = 0
+        self._done = done
+        self._groups: dict[_DupKey, _Group] = {}
+        # Links of each tracked inode not seen yet
+        self._links_left: dict[_DupKey, int] = {}
+        # Primaries whose results are still to come
+        self._pending: dict[str, _Group] = {}
+        self._ready: list[tuple[FileProbeResult, Path]] = []
+        self._lock = threading.Lock()
+
+    def select(self, files: Iterable[Path]) -> Iterator[Path]:
+        """Yield the files that need probing; remember the duplicates."""
+        for fp in files:
+            if not self._duplicate(fp):
+                yield fp
+
+    def resolve(self, result: FileProbeResult) -> list[tuple[FileProbeResult, Path]]:
+        """Store a primary's result; return (result, primary) for duplicates.
+
+        Also returns duplicates of earlier primaries found since the last call.
+        """
+        with self._lock:
+            ready = self._ready
+            self._ready = []
+            group = self._pending.pop(str(result.path), None)
+            if group is not None:
+                group.probed = _compact(result)
+                for dup in group.waiting:
+                    ready.append((_expand(Path(dup), group.probed), result.path))
+                group.waiting = []
+        return ready
+
+    def drain(self) -> list[tuple[FileProbeResult, Path]]:
+        """Duplicates whose primary was already reported (call after the scan)."""
+        with self._lock:
+            ready = self._ready
+            self._ready = []
+        return ready
+
+    def unresolved(self) -> list[Path]:
+        """Primaries never resolved that have duplicates waiting on them.
+
+        These were left out of the probe stream after select (e.g. already
+        done in a resumed scan); probe them again to resolve the duplicates.
+        """
+        with self._lock:
+            return [Path(p) for p, g in self._pending.items() if g.waiting]
+
+    def summary(self) -> str | None:
+        if not (self.hardlinks or self.copies):
+            return None
+        return (
+            f"Duplicates: {self.hardlinks} hardlinks, {self.copies} copies "
+            f"({self.bytes_skipped / 1024**3:.2f} GiB) reported without probing"
+        )
+
+    # Internal
+    def _duplicate(self, fp: Path) -> bool:
+        try:
+            st = os.stat(fp)
+        except OSError:
+            return False  # let the probe report it
+        # A single-link file recurs only through a bind mount (fingerprints)
+        inode = (st.st_dev, st.st_ino) if st.st_nlink > 1 else None
+        group = self._groups.get(inode) if inode is not None else None
+        if group is not None:
+            if group.primary == str(fp):
+                return False  # seen again by watch mode, after being rewritten
+            self.hardlinks += 1
+            self._link_seen(inode)
+            return self._add_duplicate(fp, group, st.st_size)
+        copy = False
+        if self.fingerprints and st.st_size > 0:
+            group, copy = self._by_content(fp, st.st_size)
+        if inode is not None:
+            # Later links of this file resolve to the same primary
+            self._groups[inode] = group or self._add_primary(fp)
+            self._links_left[inode] = st.st_nlink - 1
+        return copy and group is not None and self._add_duplicate(fp, group, st.st_size)
+
+    def _by_content(self, fp: Path, size: int) -> tuple[_Group | None, bool]:
+        """fp's fingerprint group (made if new) and whether fp is a copy."""
+        try:
+            key = fingerprint(fp, size)
+        except OSError:
+            return None, False
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = self._add_primary(fp)
+        if group.primary == str(fp):
+            return group, False
+        self.copies += 1
+        return group, True
+
+    def _link_seen(self, inode: _DupKey | None) -> None:
+        if inode is None:
+            return
+        self._links_left[inode] -= 1
+        if self._links_left[inode] <= 0:
+            del self._links_left[inode]
+            del self._groups[inode]
+
+    def _add_primary(self, fp: Path) -> _Group:
+        group = _Group(str(fp))
+        with self._lock:
+            self._pending[group.primary] = group
+        return group
+
+    def _add_duplicate(self, fp: Path, group: _Group, size: int) -> bool:
+        self.bytes_skipped += size
+        if str(fp) in self._done:
+            return True  # reported before the scan was interrupted
+        with self._lock:
+            if group.probed is None:
+                group.waiting.append(str(fp))
+            else:
+                self._ready.append((_expand(fp, group.probed), Path(group.primary)))
+        return True
+
+
+def _expand(path: Path, probed: _Probed) -> FileProbeResult:
+    return FileProbeResult(path, *probed)
@@ -0,0 +1,151 @@
+"""Incremental scans against a previous report.
+
+Every scan records when it started in a sidecar next to its report
+(`<report>.started`). A file whose mtime and ctime both predate the start of
+the previous scan cannot have changed since that scan looked at it, so it is
+not probed again: its row (if it had one) is carried forward, and a file
+without a row was skipped then and still is. Only new or changed files reach
+the probe pool, and the differences against the previous report are collected
+for a delta CSV.
+
+The report's own mtime is no cutoff: it is written near the end of the scan,
+after files may have landed in directories the walk had already passed. A
+report without a recorded start is compared file by file: everything is
+probed again.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from video_codec_checker.csv_writer import CsvDeltaWriter
+from video_codec_checker.models import CsvRow
+from video_codec_checker.sinks import read_rows
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+# Allowance for file servers whose clock runs ahead of this host's
+CLOCK_SKEW_NS = 60 * 10**9
+
+
+def default_delta_path(output: str | Path) -> Path:
+    """Return `<output stem>.delta.csv` next to the report."""
+    out = Path(output)
+    return out.with_name(f"{out.stem}.delta.csv")
+
+
+def scan_start_path(output: str | Path) -> Path:
+    """Return `<output>.started` next to the report."""
+    out = Path(output)
+    return out.with_name(f"{out.name}.started")
+
+
+def record_scan_start(output: str | Path, started_ns: int) -> None:
+    """Note when the scan writing `output` started (ns since the epoch)."""
+    scan_start_path(output).write_text(f"{started_ns}\n", encoding="utf-8")
+
+
+def read_scan_start(report: str | Path) -> int | None:
+    """When the scan that wrote `report` started, if it was recorded."""
+    try:
+        return int(scan_start_path(report).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+class DeltaScan:
+    """Filter discovered files against a previous report and track changes.
+
+    `select` runs on the discovery thread; `record`/`record_dropped` run on the
+    consumer thread. They share only the read-only previous rows, and
+    `carried`/`removed` are read after the scan has completed. With `scope`
+    (e.g. a shard's membership test), previous rows outside it are never
+    reported as removed, since this scan does not look at their files.
+    `since_ns` is None when the previous scan's start was not recorded.
+    """
+
+    def __init__(
+        self, previous: str | Path, scope: Callable[[Path], bool] | None = None
+    ) -> None:
+        self.previous_path = Path(previous)
+        started = read_scan_start(self.previous_path)
+        self.since_ns = None if started is None else started - CLOCK_SKEW_NS
+        self.previous = {row.file: row for row in read_rows(self.previous_path)}
+        self.carried: list[CsvRow] = []
+        self.unchanged = 0
+        self.changes: list[tuple[str, CsvRow]] = []
+        # Previous rows whose files have not been discovered (yet)
+        self._unseen = {
+            key for key in self.previous if scope is None or scope(Path(key))
+        }
+
+    def _unchanged(self, path: Path) -> bool:
+        if self.since_ns is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return max(st.st_mtime_ns, st.st_ctime_ns) < self.since_ns
+
+    def select(self, files: Iterable[Path]) -> Iterator[Path]:
+        """Yield only files that are new or changed since the previous report."""
+        for fp in files:
+            key = str(fp)
+            self._unseen.discard(key)
+            if not self._unchanged(fp):
+                yield fp
+                continue
+            self.unchanged += 1
+            row = self.previous.get(key)
+            if row is not None:
+                self.carried.append(row)
+
+    def record(self, row: CsvRow) -> None:
+        """Note a freshly probed report row."""
+        old = self.previous.get(row.file)
+        if old is None:
+            self.changes.append((ADDED, row))
+        elif _differs(old, row):
+            self.changes.append((CHANGED, row))
+
+    def record_dropped(self, row: CsvRow) -> None:
+        """Note a re-probed file that no longer belongs in the report.
+
+        The file still exists (e.g. it now has a good codec), so a previous
+        row for it is a change, described by `row`, rather than a removal.
+        """
+        if row.file in self.previous:
+            self.changes.append((CHANGED, row))
+
+    def removed(self) -> list[CsvRow]:
+        """Previous rows for files that were not found by this scan."""
+        return [self.previous[key] for key in sorted(self._unseen)]
+
+    def write(self, path: str | Path) -> int:
+        """Write the delta CSV and return the number of entries."""
+        writer = CsvDeltaWriter(path)
+        writer.open()
+        count = 0
+        try:
+            for change, row in self.changes:
+                writer.write_change(change, row)
+                count += 1
+            for row in self.removed():
+                writer.write_change(REMOVED, row)
+                count += 1
+        finally:
+            writer.close()
+        return count
+
+
+def _differs(old: CsvRow, new: CsvRow) -> bool:
+    """Whether two rows for the same file disagree on what was found."""
+    fields = ("codec", "channels", "command", "status", "duplicate_of")
+    if any(getattr(old, f) != getattr(new, f) for f in fields):
+        return True
+    return abs(old.bpp - new.bpp) > 1e-9
@@ -0,0 +1,187 @@
+"""Per-device probe concurrency.
+
+Files are grouped by the device they live on (`st_dev`). Each device gets
+its own limit on concurrent probes, and waiting files are handed out
+round-robin across devices, so a library spread over several disks keeps
+every spindle busy without piling dozens of seeks onto any one of them.
+
+Limits come from `--device-limit` (per path or per device class) or are
+auto-detected: rotational disks (per /sys/dev/block/<maj>:<min>) get
+HDD_LIMIT, other devices (SSDs, and network or virtual filesystems without a
+block device) are bounded only by the global probe window.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from collections import Counter, deque
+from pathlib import Path
+
+# Concurrent probes per rotational disk when not configured
+HDD_LIMIT = 2
+
+CLASS_HDD = "hdd"
+CLASS_SSD = "ssd"
+CLASS_OTHER = "other"  # network, FUSE, tmpfs and other non-block filesystems
+DEVICE_CLASSES = (CLASS_HDD, CLASS_SSD, CLASS_OTHER)
+
+# Device key for files that cannot be stat'ed (or when grouping is off)
+UNKNOWN_DEVICE = -1
+
+UNLIMITED = sys.maxsize
+
+_SYS_DEV_BLOCK = Path("/sys/dev/block")
+
+
+def device_class(dev: int, sys_dev_block: Path = _SYS_DEV_BLOCK) -> str:
+    """Classify a device as hdd, ssd or other from its sysfs queue flags.
+
+    Partitions have no queue directory of their own; their parent disk's is
+    used.
+    """
+    if dev == UNKNOWN_DEVICE or os.major(dev) == 0:
+        return CLASS_OTHER  # anonymous device: NFS, CIFS, FUSE, tmpfs, ...
+    base = sys_dev_block / f"{os.major(dev)}:{os.minor(dev)}"
+    for flag in (base / "queue" / "rotational", base / ".." / "queue" / "rotational"):
+        try:
+            rotational = flag.read_text().strip()
+        except OSError:
+            continue
+        return CLASS_HDD if rotational == "1" else CLASS_SSD
+    return CLASS_OTHER
+
+
+class DeviceLimits:
+    """Device lookup and per-device probe limits (used from one thread).
+
+    `overrides` maps device numbers or device classes to limits; devices
+    without one get HDD_LIMIT if rotational and are unlimited otherwise.
+    With `enabled` False every file maps to one unlimited device.
+    """
+
+    def __init__(
+        self,
+        overrides: dict[int | str, int] | None = None,
+        enabled: bool = True,
+        sys_dev_block: Path = _SYS_DEV_BLOCK,
+    ) -> None:
+        self.overrides = dict(overrides or {})
+        self.enabled = enabled
+        self.files: Counter[int] = Counter()
+        self._sys = sys_dev_block
+        self._dirs: dict[str, int] = {}
+        self._limits: dict[int, int] = {}
+        self._classes: dict[int, str] = {}
+
+    @classmethod
+    def from_settings(
+        cls, limits: tuple[tuple[str, int], ...], enabled: bool
+    ) -> DeviceLimits:
+        """Resolve `--device-limit KEY=N` pairs (KEY: a path or a class)."""
+        overrides: dict[int | str, int] = {}
+        for key, limit in limits:
+            if key in DEVICE_CLASSES:
+                overrides[key] = limit
+            else:
+                overrides[os.stat(key).st_dev] = limit
+        return cls(overrides, enabled)
+
+    def largest_override(self) -> int:
+        return max(self.overrides.values(), default=0)
+
+    def device(self, path: Path) -> int:
+        """st_dev of `path`, looked up once per directory."""
+        if not self.enabled:
+            return UNKNOWN_DEVICE
+        parent = os.path.dirname(path)
+        dev = self._dirs.get(parent)
+        if dev is None:
+            try:
+                dev = os.stat(parent or ".").st_dev
+            except OSError:
+                dev = UNKNOWN_DEVICE
+            self._dirs[parent] = dev
+        return dev
+
+    def device_class(self, dev: int) -> str:
+        if dev not in self._classes:
+            self._classes[dev] = device_class(dev, self._sys)
+        return self._classes[dev]
+
+    def limit(self, dev: int) -> int:
+        cached = self._limits.get(dev)
+        if cached is not None:
+            return cached
+        if not self.enabled:
+            limit = UNLIMITED
+        elif dev in self.overrides:
+            limit = self.overrides[dev]
+        else:
+            kind = self.device_class(dev)
+            fallback = HDD_LIMIT if kind == CLASS_HDD else UNLIMITED
+            limit = self.overrides.get(kind, fallback)
+        self._limits[dev] = max(1, limit)
+        return self._limits[dev]
+
+    def summary(self) -> list[str]:
+        """One line per device probed: class, limit and file count."""
+        if not self.enabled:
+            return []
+        lines = []
+        for dev, count in self.files.most_common():
+            name = (
+                "unknown"
+                if dev == UNKNOWN_DEVICE
+                else f"{os.major(dev)}:{os.minor(dev)}"
+            )
+            limit = self.limit(dev)
+            shown = "none" if limit == UNLIMITED else str(limit)
+            lines.append(
+                f"Device {name} ({self.device_class(dev)}): "
+                f"limit={shown}, files={count}"
+            )
+        return lines
+
+
+class DeviceQueues:
+    """Files waiting to be probed, grouped by device.
+
+    `pop_ready` hands out the next file whose device is below its limit,
+    rotating through devices so each gets a turn.
+    """
+
+    def __init__(self, limits: DeviceLimits) -> None:
+        self.limits = limits
+        self._pending: dict[int, deque[Path]] = {}
+        self._running: Counter[int] = Counter()
+        self._devices: dict[Path, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, path: Path) -> None:
+        dev = self.limits.device(path)
+        self._pending.setdefault(dev, deque()).append(path)
+        self._size += 1
+
+    def pop_ready(self) -> Path | None:
+        for dev in list(self._pending):
+            if self._running[dev] >= self.limits.limit(dev):
+                continue
+            queue = self._pending.pop(dev)
+            path = queue.popleft()
+            if queue:
+                self._pending[dev] = queue  # back of the rotation
+            self._size -= 1
+            self._running[dev] += 1
+            self._devices[path] = dev
+            self.limits.files[dev] += 1
+            return path
+        return None
+
+    def done(self, path: Path) -> None:
+        dev = self._devices.pop(path, None)
+        if dev is not None:
+            self._running[dev] -= 1
@@ -0,0 +1,163 @@
+"""Output size and encode cost estimates for reported files.
+
+The model is deliberately small: AV1 video costs `out_bpp` bits per pixel
+(capped at the source's own bits-per-pixel), Opus audio runs at the bitrate
+the generated command asks for, and encoding costs `cpu_per_mpx` CPU-seconds
+per million pixels. Both coefficients default to typical SVT-AV1 preset 3 /
+CRF 32 figures and can be calibrated from the `convert` ledger, whose
+successful entries record the source geometry alongside the real output size
+and CPU time. Other presets scale the CPU time and output size by
+PRESET_SCALING; ledger entries encoded at another preset are scaled back to
+the default before fitting.
+"""
+
+from __future__ import annotations
+
+import json
+import shlex
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from video_codec_checker.ffmpeg_generator import DEFAULT_PRESET, get_audio_bitrate
+from video_codec_checker.models import FileProbeResult
+
+# Fewer successful conversions than this leave the defaults in place.
+MIN_CALIBRATION_SAMPLES = 3
+
+# (CPU time, output size) of SVT-AV1 presets relative to DEFAULT_PRESET at
+# the generated CRF; typical figures for 1080p live-action content.
+PRESET_SCALING: dict[int, tuple[float, float]] = {
+    2: (1.8, 0.98),
+    3: (1.0, 1.0),
+    4: (0.62, 1.02),
+    5: (0.4, 1.04),
+    6: (0.27, 1.06),
+    7: (0.19, 1.09),
+    8: (0.13, 1.12),
+    9: (0.1, 1.15),
+    10: (0.07, 1.18),
+    11: (0.055, 1.22),
+    12: (0.04, 1.26),
+}
+
+
+@dataclass(frozen=True)
+class Estimate:
+    output_bytes: int
+    bytes_saved: int
+    cpu_seconds: float
+
+    def scaled(self, input_bytes: int, cpu: float, size: float) -> Estimate:
+        """This estimate with CPU time and output size multiplied by factors."""
+        output = int(self.output_bytes * size)
+        return Estimate(
+            output_bytes=output,
+            bytes_saved=max(0, input_bytes - output),
+            cpu_seconds=round(self.cpu_seconds * cpu, 1),
+        )
+
+    @property
+    def saved_per_cpu_hour(self) -> float:
+        """Bytes saved per CPU-hour of encoding; 0.0 if the cost is unknown."""
+        if self.cpu_seconds <= 0:
+            return 0.0
+        return self.bytes_saved * 3600.0 / self.cpu_seconds
+
+
+def audio_bits_per_second(channels: int) -> int:
+    """Opus bitrate the generated command uses, in bits/s (0 without audio)."""
+    if channels <= 0:
+        return 0
+    return int(get_audio_bitrate(channels).rstrip("k")) * 1000
+
+
+def pixel_count(width: float, height: float, fps: float, duration: float) -> float:
+    """Pixels encoded over the whole file; 0.0 if any factor is unknown."""
+    if min(width, height, fps, duration) <= 0:
+        return 0.0
+    return width * height * fps * duration
+
+
+@dataclass
+class EncodeEstimator:
+    # AV1 video bits per pixel at the generated CRF
+    out_bpp: float = 0.04
+    # CPU-seconds per million encoded pixels at the generated preset
+    cpu_per_mpx: float = 0.5
+    # Ledger entries the coefficients were fitted from (0 = defaults)
+    samples: int = 0
+
+    def estimate(self, result: FileProbeResult, input_bytes: int) -> Estimate | None:
+        """Estimate the conversion of `result`; None without geometry/duration."""
+        pixels = pixel_count(result.width, result.height, result.fps, result.duration)
+        if pixels <= 0:
+            return None
+        bpp = min(self.out_bpp, result.bpp) if result.bpp > 0 else self.out_bpp
+        audio = audio_bits_per_second(result.channels) * result.duration
+        output = int((bpp * pixels + audio) / 8)
+        return Estimate(
+            output_bytes=output,
+            bytes_saved=max(0, input_bytes - output),
+            cpu_seconds=round(self.cpu_per_mpx * pixels / 1e6, 1),
+        )
+
+    @classmethod
+    def from_ledger(cls, path: str | Path) -> EncodeEstimator:
+        """Fit the coefficients from successful entries of a convert ledger."""
+        bpps: list[float] = []
+        cpus: list[float] = []
+        with Path(path).open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                sample = _sample(entry)
+                if sample is not None:
+                    bpps.append(sample[0])
+                    cpus.append(sample[1])
+        if len(bpps) < MIN_CALIBRATION_SAMPLES:
+            return cls()
+        # Medians keep a few odd encodes (e.g. static slideshows) from skewing
+        return cls(
+            out_bpp=statistics.median(bpps),
+            cpu_per_mpx=statistics.median(cpus),
+            samples=len(bpps),
+        )
+
+
+def preset_of(command: str) -> int | None:
+    """The -preset of an ffmpeg command line; None if absent or unparsable."""
+    try:
+        argv = shlex.split(command)
+        return int(argv[argv.index("-preset") + 1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _sample(entry: dict[str, Any]) -> tuple[float, float] | None:
+    """(video bits per pixel, CPU-seconds per megapixel) at DEFAULT_PRESET."""
+    if entry.get("exit_code") != 0 or not entry.get("output_bytes"):
+        return None
+    preset = preset_of(str(entry.get("command") or "")) or DEFAULT_PRESET
+    if preset not in PRESET_SCALING:
+        return None
+    cpu_factor, size_factor = PRESET_SCALING[preset]
+    try:
+        duration = float(entry.get("duration") or 0)
+        pixels = pixel_count(
+            float(entry.get("width") or 0),
+            float(entry.get("height") or 0),
+            float(entry.get("fps") or 0),
+            duration,
+        )
+        cpu = float(entry["cpu_user_seconds"]) + float(entry["cpu_system_seconds"])
+        audio = audio_bits_per_second(int(entry.get("channels") or 0)) * duration
+        video_bits = float(entry["output_bytes"]) * 8 - audio
+    except (KeyError, TypeError, ValueError):
+        return None
+    if pixels <= 0 or cpu <= 0 or video_bits <= 0:
+        return None
+    return video_bits / pixels / size_factor, cpu * 1e6 / pixels / cpu_factor
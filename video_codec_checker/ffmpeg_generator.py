@@ -2,6 +2,10 @@
 
 from pathlib import Path
 
+# SVT-AV1 settings of the generated commands (the planner may vary the preset)
+DEFAULT_PRESET = 3
+DEFAULT_CRF = 32
+
 
 def _single_quote(path: str) -> str:
     """Return path wrapped in single quotes with internal quotes escaped.
@@ -36,11 +40,14 @@ def get_output_path(input_file: Path) -> Path:
     return input_file.with_stem(input_file.stem + "_av1").with_suffix(".mkv")
 
 
-def generate_ffmpeg_command(input_file: Path, channels: int) -> str:
+def generate_ffmpeg_command(
+    input_file: Path, channels: int, preset: int = DEFAULT_PRESET
+) -> str:
     """Generate FFmpeg command to convert video to AV1 and audio to Opus.
 
     - Explicitly maps primary video stream and optional primary audio stream
     - Uses -an when no audio is present
+    - Encodes with the given SVT-AV1 preset at DEFAULT_CRF
     """
     output_file = get_output_path(input_file)
     q_input = _single_quote(str(input_file))
@@ -58,9 +65,9 @@ def generate_ffmpeg_command(input_file: Path, channels: int) -> str:
         "-c:v",
         "libsvtav1",
         "-preset",
-        "3",
+        str(preset),
         "-crf",
-        "32",
+        str(DEFAULT_CRF),
     ]
 
     if channels and channels > 0:
@@ -78,3 +85,25 @@ def generate_ffmpeg_command(input_file: Path, channels: int) -> str:
 
     cmd_parts.append(q_output)
     return " ".join(cmd_parts)
+
+
+def limit_threads(argv: list[str], threads: int) -> list[str]:
+    """Return argv with encoder thread limits and -nostdin injected.
+
+    Adds `-threads N` as an output option and, for libsvtav1, `lp=N` to
+    -svtav1-params (SVT-AV1 ignores -threads).
+    """
+    out = list(argv)
+    if "-nostdin" not in out:
+        out.insert(1, "-nostdin")
+    opts = out[:-1]
+    if "-threads" not in opts:
+        opts += ["-threads", str(threads)]
+    if "libsvtav1" in opts:
+        if "-svtav1-params" in opts:
+            i = opts.index("-svtav1-params") + 1
+            if "lp=" not in opts[i]:
+                opts[i] = f"{opts[i]}:lp={threads}"
+        else:
+            opts += ["-svtav1-params", f"lp={threads}"]
+    return opts + out[-1:]
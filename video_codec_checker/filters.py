@@ -0,0 +1,226 @@
+"""Discovery filters applied by the directory walk, before anything is probed.
+
+FileFilter decides per directory entry whether it is walked (directories)
+or yielded (video files):
+
+- include/exclude globs: a pattern without "/" matches the entry name, one
+  with "/" the path relative to the scan directory; excluded directories are
+  not descended into.
+- min/max size and newer/older-than bounds on mtime (these cost one stat
+  per candidate file, and only when set).
+- converted files (opt-in, since a partial output from a failed encode
+  looks the same): `*_av1.mkv` outputs and sources whose output (see
+  ffmpeg_generator.get_output_path) already sits next to them, found from
+  the directory listing without extra stats.
+- `.vccignore` files: an empty one (or any configured marker file) prunes
+  its directory; otherwise each line is a glob, relative to that directory
+  and applied below it. A trailing "/" limits a pattern to directories and
+  lines starting with "#" are comments.
+
+Every skip is counted by reason in `counts`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+
+from video_codec_checker.models import FilterSettings
+
+IGNORE_FILE = ".vccignore"
+CONVERTED_SUFFIX = "_av1.mkv"
+
+# Skip reasons, as counted in FileFilter.counts
+SKIP_EXCLUDED = "excluded"
+SKIP_NOT_INCLUDED = "not_included"
+SKIP_IGNORED = "ignored"
+SKIP_SIZE = "size"
+SKIP_AGE = "age"
+SKIP_CONVERTED = "converted"
+SKIP_PRUNED = "pruned_dirs"
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_size(value: str) -> int:
+    """Bytes from "500", "100M", "1.5G" (binary units, optional "B")."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", value.upper())
+    if match is None:
+        raise ValueError(f"invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def parse_time(value: str, now: float | None = None) -> float:
+    """Epoch seconds from an age ("30d", "12h", "2w") or an ISO date."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*", value.lower())
+    if match is not None:
+        now = time.time() if now is None else now
+        return now - float(match.group(1)) * _AGE_UNITS[match.group(2)]
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"invalid age or date: {value!r}") from None
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """One glob; `base` is the directory it is relative to (with a slash)."""
+
+    base: str
+    pattern: str
+    anchored: bool
+    dir_only: bool = False
+
+    @classmethod
+    def parse(cls, base: str, line: str) -> _Rule:
+        anchored = "/" in line.rstrip("/")
+        return cls(base, line.strip("/"), anchored, line.endswith("/"))
+
+    def matches(self, path: str, name: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if not self.anchored:
+            return fnmatch(name, self.pattern)
+        return path.startswith(self.base) and fnmatch(
+            path[len(self.base) :], self.pattern
+        )
+
+
+@dataclass(frozen=True)
+class DirScope:
+    """Ignore rules in force for one directory, plus its entry names."""
+
+    filter: FileFilter
+    rules: tuple[_Rule, ...]
+    names: frozenset[str]
+
+    def keep_dir(self, entry: os.DirEntry[str]) -> bool:
+        return self.filter.keep_dir(entry, self)
+
+    def keep_file(self, entry: os.DirEntry[str]) -> bool:
+        return self.filter.keep_file(entry, self)
+
+
+class FileFilter:
+    """Walk-time filters for one scan directory (used from one thread)."""
+
+    def __init__(self, settings: FilterSettings, root: str | Path) -> None:
+        self.settings = settings
+        base = os.path.join(str(root), "")
+        self._include = [_Rule.parse(base, p) for p in settings.include]
+        self._exclude = tuple(_Rule.parse(base, p) for p in settings.exclude)
+        self._stat = (
+            settings.min_size is not None
+            or settings.max_size is not None
+            or settings.newer_than is not None
+            or settings.older_than is not None
+        )
+        self.counts: Counter[str] = Counter()
+
+    def root_rules(self) -> tuple[_Rule, ...]:
+        return self._exclude
+
+    def enter(
+        self, path: str, entries: list[os.DirEntry[str]], rules: tuple[_Rule, ...]
+    ) -> DirScope | None:
+        """Scope for walking `path`, or None if a marker prunes it."""
+        names = frozenset(e.name for e in entries)
+        if any(marker in names for marker in self.settings.markers):
+            self.counts[SKIP_PRUNED] += 1
+            return None
+        if self.settings.ignore_files and IGNORE_FILE in names:
+            added = self._ignore_rules(path)
+            if added is None:
+                self.counts[SKIP_PRUNED] += 1
+                return None
+            rules = rules + added
+        return DirScope(self, rules, names)
+
+    def keep_dir(self, entry: os.DirEntry[str], scope: DirScope) -> bool:
+        if self._ignored(entry.path, entry.name, True, scope.rules):
+            self.counts[SKIP_PRUNED] += 1
+            return False
+        return True
+
+    def keep_file(self, entry: os.DirEntry[str], scope: DirScope) -> bool:
+        """Apply every file filter; count the first one that rejects."""
+        reason = self._ignored(entry.path, entry.name, False, scope.rules)
+        if reason is None:
+            reason = self._converted(entry.name, scope.names)
+        if reason is None and self._stat:
+            st = entry.stat()
+            reason = self._bounds(st.st_size, st.st_mtime)
+        if reason is not None:
+            self.counts[reason] += 1
+            return False
+        return True
+
+    def accepts(self, path: Path) -> bool:
+        """keep_file for a single path (watch mode); .vccignore is not read."""
+        sp = str(path)
+        reason = self._ignored(sp, path.name, False, self._exclude)
+        if reason is None and self.settings.skip_converted:
+            sibling = path.with_name(path.stem + CONVERTED_SUFFIX)
+            if path.name.endswith(CONVERTED_SUFFIX) or sibling.exists():
+                reason = SKIP_CONVERTED
+        if reason is None and self._stat:
+            try:
+                st = path.stat()
+            except OSError:
+                return False
+            reason = self._bounds(st.st_size, st.st_mtime)
+        if reason is not None:
+            self.counts[reason] += 1
+            return False
+        return True
+
+    # Internal
+    def _ignore_rules(self, path: str) -> tuple[_Rule, ...] | None:
+        try:
+            text = Path(path, IGNORE_FILE).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return ()
+        lines = [ln.strip() for ln in text.splitlines()]
+        patterns = [ln for ln in lines if ln and not ln.startswith("#")]
+        if not patterns:
+            return None  # an empty ignore file prunes the whole directory
+        base = os.path.join(path, "")
+        return tuple(_Rule.parse(base, p) for p in patterns)
+
+    def _ignored(
+        self, path: str, name: str, is_dir: bool, rules: tuple[_Rule, ...]
+    ) -> str | None:
+        for rule in rules:
+            if rule.matches(path, name, is_dir):
+                return SKIP_EXCLUDED if rule in self._exclude else SKIP_IGNORED
+        if self._include and not is_dir:
+            if not any(r.matches(path, name, False) for r in self._include):
+                return SKIP_NOT_INCLUDED
+        return None
+
+    def _converted(self, name: str, names: frozenset[str]) -> str | None:
+        if not self.settings.skip_converted:
+            return None
+        stem = os.path.splitext(name)[0]
+        if name.endswith(CONVERTED_SUFFIX) or stem + CONVERTED_SUFFIX in names:
+            return SKIP_CONVERTED
+        return None
+
+    def _bounds(self, size: int, mtime: float) -> str | None:
+        s = self.settings
+        if (s.min_size is not None and size < s.min_size) or (
+            s.max_size is not None and size > s.max_size
+        ):
+            return SKIP_SIZE
+        if (s.newer_than is not None and mtime < s.newer_than) or (
+            s.older_than is not None and mtime >= s.older_than
+        ):
+            return SKIP_AGE
+        return None
@@ -0,0 +1,720 @@
+"""Native container header parsing for MKV/WebM, MP4/MOV and AVI.
+
+Reads track headers straight from a memory-mapped file to classify the video
+codec and audio channel count without spawning ffprobe. Any container detail
+this parser cannot interpret with confidence makes it return None so the
+caller falls back to ffprobe.
+
+Bitrate follows ffprobe's preference for a per-stream value: MP4 sums the
+video track's sample sizes and AVI sums its idx1 chunks; MKV (and AVI without
+idx1) use the container rate, as ffprobe reports for those files.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from video_codec_checker.models import FileProbeResult
+
+
+class _Ambiguous(Exception):
+    """Raised when a header cannot be interpreted with confidence."""
+
+
+@dataclass
+class _Track:
+    codec: str | None = None
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    bit_rate: int = 0
+    channels: int = 0
+
+
+# ---- codec tables (values are ffprobe codec_name) ----
+
+_MP4_VIDEO = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"dva1": "h264",
+    b"dvav": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"dvh1": "hevc",
+    b"dvhe": "hevc",
+    b"av01": "av1",
+    b"dav1": "av1",
+    b"vp09": "vp9",
+    b"vp08": "vp8",
+    b"s263": "h263",
+    b"h263": "h263",
+    b"jpeg": "mjpeg",
+    b"mjpa": "mjpeg",
+    b"mjpb": "mjpeg",
+    b"apcn": "prores",
+    b"apch": "prores",
+    b"apcs": "prores",
+    b"apco": "prores",
+    b"ap4h": "prores",
+    b"ap4x": "prores",
+    b"dvc ": "dvvideo",
+    b"dvcp": "dvvideo",
+    b"dv5n": "dvvideo",
+    b"dv5p": "dvvideo",
+    b"SVQ1": "svq1",
+    b"SVQ3": "svq3",
+    b"cvid": "cinepak",
+    b"rle ": "qtrle",
+    b"png ": "png",
+}
+
+# ISO/IEC 14496-1 objectTypeIndication for 'mp4v' sample entries
+_MP4V_OTI = {
+    0x20: "mpeg4",
+    0x60: "mpeg2video",
+    0x61: "mpeg2video",
+    0x62: "mpeg2video",
+    0x63: "mpeg2video",
+    0x64: "mpeg2video",
+    0x65: "mpeg2video",
+    0x6A: "mpeg1video",
+    0x6C: "mjpeg",
+}
+
+# Audio sample entries whose channelcount field is authoritative
+_MP4_PLAIN_AUDIO = {
+    b"sowt",
+    b"twos",
+    b"lpcm",
+    b"in24",
+    b"in32",
+    b"fl32",
+    b"fl64",
+    b"alac",
+    b".mp3",
+    b"ulaw",
+    b"alaw",
+    b"raw ",
+}
+
+# AAC channelConfiguration -> channel count (0 means "in PCE": ambiguous)
+_AAC_CHANNELS = {1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 8, 11: 7, 12: 8, 14: 8}
+
+# AC-3 acmod -> full-bandwidth channel count
+_AC3_CHANNELS = (2, 1, 2, 3, 3, 4, 4, 5)
+
+_MKV_VIDEO = {
+    "V_MPEG4/ISO/AVC": "h264",
+    "V_MPEGH/ISO/HEVC": "hevc",
+    "V_AV1": "av1",
+    "V_VP8": "vp8",
+    "V_VP9": "vp9",
+    "V_MPEG4/ISO/ASP": "mpeg4",
+    "V_MPEG4/ISO/SP": "mpeg4",
+    "V_MPEG4/ISO/AP": "mpeg4",
+    "V_MPEG4/MS/V3": "msmpeg4v3",
+    "V_MPEG1": "mpeg1video",
+    "V_MPEG2": "mpeg2video",
+    "V_THEORA": "theora",
+    "V_MJPEG": "mjpeg",
+    "V_PRORES": "prores",
+    "V_FFV1": "ffv1",
+    "V_DIRAC": "dirac",
+    "V_REAL/RV10": "rv10",
+    "V_REAL/RV20": "rv20",
+    "V_REAL/RV30": "rv30",
+    "V_REAL/RV40": "rv40",
+}
+
+# BITMAPINFOHEADER biCompression (upper-cased) for AVI and V_MS/VFW/FOURCC
+_VFW_FOURCC = {
+    b"XVID": "mpeg4",
+    b"DIVX": "mpeg4",
+    b"DX50": "mpeg4",
+    b"FMP4": "mpeg4",
+    b"MP4V": "mpeg4",
+    b"DIV3": "msmpeg4v3",
+    b"DIV4": "msmpeg4v3",
+    b"MP43": "msmpeg4v3",
+    b"MP42": "msmpeg4v2",
+    b"MPG4": "msmpeg4v1",
+    b"H264": "h264",
+    b"X264": "h264",
+    b"AVC1": "h264",
+    b"DAVC": "h264",
+    b"HEVC": "hevc",
+    b"H265": "hevc",
+    b"HVC1": "hevc",
+    b"AV01": "av1",
+    b"VP80": "vp8",
+    b"VP90": "vp9",
+    b"MJPG": "mjpeg",
+    b"WMV1": "wmv1",
+    b"WMV2": "wmv2",
+    b"WMV3": "wmv3",
+    b"WVC1": "vc1",
+    b"DVSD": "dvvideo",
+    b"CVID": "cinepak",
+    b"MPG1": "mpeg1video",
+    b"MPG2": "mpeg2video",
+    b"IV32": "indeo3",
+    b"IV41": "indeo4",
+    b"IV50": "indeo5",
+    b"THEO": "theora",
+    b"FFV1": "ffv1",
+    b"HFYU": "huffyuv",
+    b"FFVH": "ffvhuff",
+    b"MSVC": "msvideo1",
+    b"CRAM": "msvideo1",
+    b"TSCC": "tscc",
+}
+
+
+# ---- entry point ----
+
+
+def parse_container_header(path: Path) -> FileProbeResult | None:
+    """Return a probe result read from container headers, or None.
+
+    None means the container is unsupported or its headers are ambiguous
+    (unknown codec tag, missing timing, fragmented MP4, ...); ffprobe should
+    be used instead.
+    """
+    try:
+        with open(path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size < 16:
+                return None
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _parse(path, mm, size)
+    except (OSError, ValueError, IndexError, struct.error, _Ambiguous):
+        return None
+
+
+def _parse(path: Path, mm: mmap.mmap, size: int) -> FileProbeResult | None:
+    head = mm[:12]
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        video, audio, duration = _parse_mkv(mm, size)
+    elif head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        video, audio, duration = _parse_avi(mm, size)
+    elif head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"):
+        video, audio, duration = _parse_mp4(mm, size)
+    else:
+        return None
+    if (
+        video is None
+        or not video.codec
+        or video.width <= 0
+        or video.height <= 0
+        or video.fps <= 0.0
+        or duration <= 0.0
+    ):
+        return None
+    bit_rate = video.bit_rate or int(size * 8 / duration)
+    return FileProbeResult(
+        path=path,
+        codec=video.codec,
+        channels=audio.channels if audio is not None else 0,
+        width=video.width,
+        height=video.height,
+        fps=video.fps,
+        bit_rate=bit_rate,
+        duration=duration,
+    )
+
+
+# ---- MP4 / MOV ----
+
+
+def _boxes(mm: mmap.mmap, start: int, end: int) -> list[tuple[bytes, int, int]]:
+    """Return (type, payload_start, payload_end) for boxes in [start, end)."""
+    out = []
+    pos = start
+    while pos + 8 <= end:
+        size, btype = struct.unpack_from(">I4s", mm, pos)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", mm, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise _Ambiguous("truncated box")
+        out.append((btype, pos + header, pos + size))
+        pos += size
+    return out
+
+
+def _child(mm: mmap.mmap, start: int, end: int, btype: bytes) -> tuple[int, int] | None:
+    for t, s, e in _boxes(mm, start, end):
+        if t == btype:
+            return s, e
+    return None
+
+
+def _require(box: tuple[int, int] | None) -> tuple[int, int]:
+    if box is None:
+        raise _Ambiguous("missing box")
+    return box
+
+
+def _timescale_duration(mm: mmap.mmap, start: int) -> tuple[int, int]:
+    """Parse (timescale, duration) from an mvhd or mdhd payload."""
+    if mm[start] == 1:
+        return struct.unpack_from(">IQ", mm, start + 20)
+    return struct.unpack_from(">II", mm, start + 12)
+
+
+def _parse_mp4(mm: mmap.mmap, size: int) -> tuple[_Track | None, _Track | None, float]:
+    # moov may follow mdat at the end of the file; walking top-level box
+    # headers jumps straight to it without touching the media data.
+    ms, me = _require(_child(mm, 0, size, b"moov"))
+    mvs, _ = _require(_child(mm, ms, me, b"mvhd"))
+    timescale, dur = _timescale_duration(mm, mvs)
+    if timescale <= 0:
+        raise _Ambiguous("bad timescale")
+    video: _Track | None = None
+    audio: _Track | None = None
+    for btype, ts, te in _boxes(mm, ms, me):
+        if btype != b"trak":
+            continue
+        mds, mde = _require(_child(mm, ts, te, b"mdia"))
+        hs, _ = _require(_child(mm, mds, mde, b"hdlr"))
+        handler = mm[hs + 8 : hs + 12]
+        if handler == b"vide" and video is None:
+            video = _mp4_track(mm, mds, mde, video=True)
+        elif handler == b"soun" and audio is None:
+            audio = _mp4_track(mm, mds, mde, video=False)
+    return video, audio, dur / timescale
+
+
+def _mp4_track(mm: mmap.mmap, mds: int, mde: int, video: bool) -> _Track:
+    hs, _ = _require(_child(mm, mds, mde, b"mdhd"))
+    timescale, dur = _timescale_duration(mm, hs)
+    mis, mie = _require(_child(mm, mds, mde, b"minf"))
+    sts, ste = _require(_child(mm, mis, mie, b"stbl"))
+    ds, de = _require(_child(mm, sts, ste, b"stsd"))
+    # stsd: version/flags(4) entry_count(4) then sample entry boxes
+    entries = _boxes(mm, ds + 8, de)
+    if not entries:
+        raise _Ambiguous("empty stsd")
+    fourcc, es, ee = entries[0]
+    if not video:
+        return _Track(channels=_mp4_audio_channels(mm, fourcc, es, ee))
+
+    # VisualSampleEntry: 8 bytes SampleEntry, 16 pre-defined, then width/height
+    width, height = struct.unpack_from(">HH", mm, es + 24)
+    codec = _MP4_VIDEO.get(fourcc)
+    if fourcc == b"mp4v":
+        oti = _esds_object_type(mm, es + 78, ee)
+        codec = _MP4V_OTI.get(oti) if oti is not None else None
+    if codec is None:
+        raise _Ambiguous(f"unknown video sample entry {fourcc!r}")
+    track = _Track(codec=codec, width=width, height=height)
+
+    zs, _ = _require(_child(mm, sts, ste, b"stsz"))
+    sample_size, count = struct.unpack_from(">II", mm, zs + 4)
+    if count == 0 or timescale <= 0 or dur <= 0:
+        raise _Ambiguous("fragmented or empty track")
+    seconds = dur / timescale
+    if sample_size:
+        total = sample_size * count
+    else:
+        sizes = array("I")
+        sizes.frombytes(mm[zs + 12 : zs + 12 + 4 * count])
+        if sys.byteorder == "little":
+            sizes.byteswap()
+        total = sum(sizes)
+    track.fps = count / seconds
+    track.bit_rate = int(total * 8 / seconds)
+    return track
+
+
+def _mp4_audio_channels(mm: mmap.mmap, fourcc: bytes, es: int, ee: int) -> int:
+    # SoundDescription: 8 bytes SampleEntry, version(2) revision(2) vendor(4)
+    # channelcount(2) ...; QuickTime v1 adds 16 bytes, v2 adds 36.
+    version = struct.unpack_from(">H", mm, es + 8)[0]
+    channels = struct.unpack_from(">H", mm, es + 16)[0]
+    children = es + 28 + {0: 0, 1: 16, 2: 36}.get(version, 0)
+    if version == 2:
+        channels = struct.unpack_from(">I", mm, es + 40)[0]
+    if fourcc in _MP4_PLAIN_AUDIO and channels > 0:
+        return int(channels)
+    if fourcc == b"mp4a":
+        return _aac_channels(mm, children, ee)
+    if fourcc == b"ac-3":
+        dac3 = _require(_child(mm, children, ee, b"dac3"))
+        v = int.from_bytes(mm[dac3[0] : dac3[0] + 3], "big")
+        return _AC3_CHANNELS[(v >> 11) & 7] + ((v >> 10) & 1)
+    if fourcc == b"Opus":
+        dops = _require(_child(mm, children, ee, b"dOps"))
+        return int(mm[dops[0] + 1])
+    raise _Ambiguous(f"unknown audio sample entry {fourcc!r}")
+
+
+def _find_esds(mm: mmap.mmap, start: int, end: int) -> tuple[int, int] | None:
+    """Locate esds directly or inside a QuickTime 'wave' atom."""
+    esds = _child(mm, start, end, b"esds")
+    if esds is None:
+        wave = _child(mm, start, end, b"wave")
+        if wave is not None:
+            esds = _child(mm, wave[0], wave[1], b"esds")
+    return esds
+
+
+def _descriptor(mm: mmap.mmap, pos: int) -> tuple[int, int, int]:
+    """Return (tag, payload_start, payload_length) of an MPEG-4 descriptor."""
+    tag = mm[pos]
+    pos += 1
+    length = 0
+    for _ in range(4):
+        b = mm[pos]
+        pos += 1
+        length = (length << 7) | (b & 0x7F)
+        if not b & 0x80:
+            break
+    return tag, pos, length
+
+
+def _decoder_config(mm: mmap.mmap, start: int, end: int) -> int:
+    """Return the offset of the DecoderConfigDescriptor payload in an esds."""
+    esds = _require(_find_esds(mm, start, end))
+    tag, pos, _ = _descriptor(mm, esds[0] + 4)
+    if tag != 0x03:
+        raise _Ambiguous("no ES_Descriptor")
+    flags = mm[pos + 2]
+    pos += 3
+    if flags & 0x80:
+        pos += 2
+    if flags & 0x40:
+        pos += 1 + mm[pos]
+    if flags & 0x20:
+        pos += 2
+    tag, pos, _ = _descriptor(mm, pos)
+    if tag != 0x04:
+        raise _Ambiguous("no DecoderConfigDescriptor")
+    return pos
+
+
+def _esds_object_type(mm: mmap.mmap, start: int, end: int) -> int | None:
+    try:
+        return int(mm[_decoder_config(mm, start, end)])
+    except _Ambiguous:
+        return None
+
+
+def _aac_channels(mm: mmap.mmap, start: int, end: int) -> int:
+    pos = _decoder_config(mm, start, end)
+    tag, pos, length = _descriptor(mm, pos + 13)
+    if tag != 0x05 or length < 2:
+        raise _Ambiguous("no AudioSpecificConfig")
+    bits = int.from_bytes(mm[pos : pos + min(length, 6)], "big")
+    nbits = 8 * min(length, 6)
+    shift = nbits - 5
+    if (bits >> shift) & 0x1F == 31:  # escaped audioObjectType
+        shift -= 6
+    shift -= 4
+    if (bits >> shift) & 0xF == 15:  # explicit 24-bit sampling frequency
+        shift -= 24
+    shift -= 4
+    if shift < 0:
+        raise _Ambiguous("short AudioSpecificConfig")
+    config = (bits >> shift) & 0xF
+    if config not in _AAC_CHANNELS:
+        raise _Ambiguous("channel layout in program config element")
+    return _AAC_CHANNELS[config]
+
+
+# ---- Matroska / WebM ----
+
+
+def _ebml_id(mm: mmap.mmap, pos: int) -> tuple[int, int]:
+    first = mm[pos]
+    length = 1
+    while length <= 4 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 4:
+        raise _Ambiguous("bad EBML id")
+    return int.from_bytes(mm[pos : pos + length], "big"), pos + length
+
+
+def _ebml_size(mm: mmap.mmap, pos: int) -> tuple[int | None, int]:
+    """Return (size or None when unknown, next position)."""
+    first = mm[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise _Ambiguous("bad EBML size")
+    value = first & (0xFF >> length)
+    for b in mm[pos + 1 : pos + length]:
+        value = (value << 8) | b
+    if value == (1 << (7 * length)) - 1:  # all ones: unknown size
+        return None, pos + length
+    return value, pos + length
+
+
+def _ebml_children(mm: mmap.mmap, start: int, end: int) -> list[tuple[int, int, int]]:
+    out = []
+    pos = start
+    while pos < end:
+        eid, pos = _ebml_id(mm, pos)
+        size, pos = _ebml_size(mm, pos)
+        if size is None:
+            raise _Ambiguous("unknown-size element inside a master element")
+        out.append((eid, pos, pos + size))
+        pos += size
+    return out
+
+
+def _ebml_uint(mm: mmap.mmap, start: int, end: int) -> int:
+    return int.from_bytes(mm[start:end], "big")
+
+
+def _ebml_float(mm: mmap.mmap, start: int, end: int) -> float:
+    if end - start == 4:
+        return float(struct.unpack_from(">f", mm, start)[0])
+    if end - start == 8:
+        return float(struct.unpack_from(">d", mm, start)[0])
+    raise _Ambiguous("bad EBML float")
+
+
+_SEGMENT = 0x18538067
+_SEEK_HEAD = 0x114D9B74
+_INFO = 0x1549A966
+_TRACKS = 0x1654AE6B
+_CLUSTER = 0x1F43B675
+
+
+def _parse_mkv(mm: mmap.mmap, size: int) -> tuple[_Track | None, _Track | None, float]:
+    info, tracks = _mkv_locate(mm, size)
+    scale = 1_000_000
+    duration = 0.0
+    for eid, s, e in _ebml_children(mm, *info):
+        if eid == 0x2AD7B1:
+            scale = _ebml_uint(mm, s, e)
+        elif eid == 0x4489:
+            duration = _ebml_float(mm, s, e)
+    video: _Track | None = None
+    audio: _Track | None = None
+    for eid, s, e in _ebml_children(mm, *tracks):
+        if eid != 0xAE:
+            continue
+        track_type, track = _mkv_track(mm, s, e)
+        if track_type == 1 and video is None:
+            video = track
+        elif track_type == 2 and audio is None:
+            audio = track
+    if video is not None and video.codec is None:
+        raise _Ambiguous("unknown Matroska video codec")
+    return video, audio, duration * scale / 1e9
+
+
+def _mkv_segment(mm: mmap.mmap, size: int) -> tuple[int, int]:
+    """Return the (start, end) of the Segment payload after the EBML header."""
+    _, pos = _ebml_id(mm, 0)
+    hsize, pos = _ebml_size(mm, pos)
+    if hsize is None:
+        raise _Ambiguous("bad EBML header")
+    seg_id, pos = _ebml_id(mm, pos + hsize)
+    if seg_id != _SEGMENT:
+        raise _Ambiguous("no Segment")
+    seg_size, seg_start = _ebml_size(mm, pos)
+    return seg_start, size if seg_size is None else min(size, seg_start + seg_size)
+
+
+def _mkv_locate(mm: mmap.mmap, size: int) -> tuple[tuple[int, int], tuple[int, int]]:
+    """Find the Info and Tracks payload ranges inside the Segment."""
+    seg_start, seg_end = _mkv_segment(mm, size)
+    found: dict[int, tuple[int, int]] = {}
+    seek_targets: dict[int, int] = {}
+    pos = seg_start
+    # Walk top-level elements until Info and Tracks are found; Clusters may be
+    # of unknown size, so stop there and use SeekHead positions instead.
+    while pos < seg_end and not (_INFO in found and _TRACKS in found):
+        eid, p = _ebml_id(mm, pos)
+        esize, p = _ebml_size(mm, p)
+        if eid == _CLUSTER or esize is None:
+            break
+        if eid in (_INFO, _TRACKS):
+            found.setdefault(eid, (p, p + esize))
+        elif eid == _SEEK_HEAD:
+            seek_targets.update(_mkv_seek_head(mm, p, p + esize))
+        pos = p + esize
+    for eid in (_INFO, _TRACKS):
+        if eid not in found and eid in seek_targets:
+            tid, p = _ebml_id(mm, seg_start + seek_targets[eid])
+            esize, p = _ebml_size(mm, p)
+            if tid == eid and esize is not None:
+                found[eid] = (p, p + esize)
+    if _INFO not in found or _TRACKS not in found:
+        raise _Ambiguous("Info/Tracks not found")
+    return found[_INFO], found[_TRACKS]
+
+
+def _mkv_seek_head(mm: mmap.mmap, start: int, end: int) -> dict[int, int]:
+    targets: dict[int, int] = {}
+    for eid, s, e in _ebml_children(mm, start, end):
+        if eid != 0x4DBB:
+            continue
+        seek_id = seek_pos = None
+        for cid, cs, ce in _ebml_children(mm, s, e):
+            if cid == 0x53AB:
+                seek_id = _ebml_uint(mm, cs, ce)
+            elif cid == 0x53AC:
+                seek_pos = _ebml_uint(mm, cs, ce)
+        if seek_id is not None and seek_pos is not None:
+            targets.setdefault(seek_id, seek_pos)
+    return targets
+
+
+def _ebml_uint_fields(
+    mm: mmap.mmap, start: int, end: int, ids: set[int]
+) -> dict[int, int]:
+    return {
+        eid: _ebml_uint(mm, s, e)
+        for eid, s, e in _ebml_children(mm, start, end)
+        if eid in ids
+    }
+
+
+def _mkv_track(mm: mmap.mmap, start: int, end: int) -> tuple[int, _Track]:
+    fields: dict[int, int] = {}
+    codec_id = ""
+    private = b""
+    track = _Track(channels=1)  # Matroska default Channels is 1
+    for eid, s, e in _ebml_children(mm, start, end):
+        if eid in (0x83, 0x23E383):  # TrackType, DefaultDuration
+            fields[eid] = _ebml_uint(mm, s, e)
+        elif eid == 0x86:
+            codec_id = bytes(mm[s:e]).rstrip(b"\0").decode("ascii", "replace")
+        elif eid == 0x63A2:
+            private = bytes(mm[s : min(e, s + 20)])
+        elif eid == 0xE0:
+            dims = _ebml_uint_fields(mm, s, e, {0xB0, 0xBA})
+            track.width = dims.get(0xB0, 0)
+            track.height = dims.get(0xBA, 0)
+        elif eid == 0xE1:
+            track.channels = _ebml_uint_fields(mm, s, e, {0x9F}).get(0x9F, 1)
+    track_type = fields.get(0x83, 0)
+    if track_type == 1:
+        track.codec = _MKV_VIDEO.get(codec_id)
+        if codec_id == "V_MS/VFW/FOURCC":
+            # CodecPrivate is a BITMAPINFOHEADER; biCompression is at 16
+            track.codec = _VFW_FOURCC.get(private[16:20].upper())
+        if fields.get(0x23E383):
+            track.fps = 1e9 / fields[0x23E383]
+    return track_type, track
+
+
+# ---- AVI ----
+
+
+def _riff_chunks(mm: mmap.mmap, start: int, end: int) -> list[tuple[bytes, int, int]]:
+    """Return (id, payload_start, payload_end); LIST ids become the list type."""
+    out = []
+    pos = start
+    while pos + 8 <= end:
+        cid, csize = struct.unpack_from("<4sI", mm, pos)
+        body = pos + 8
+        if body + csize > end:
+            csize = end - body  # tolerate a truncated trailing chunk
+        if cid in (b"LIST", b"RIFF"):
+            out.append((bytes(mm[body : body + 4]), body + 4, body + csize))
+        else:
+            out.append((cid, body, body + csize))
+        pos = body + csize + (csize & 1)
+    return out
+
+
+def _riff_find(
+    chunks: list[tuple[bytes, int, int]], cid: bytes
+) -> tuple[int, int] | None:
+    return next(((s, e) for c, s, e in chunks if c == cid), None)
+
+
+def _avi_stream(mm: mmap.mmap, start: int, end: int) -> tuple[bytes, _Track, int]:
+    """Parse a strl list into (fccType, track, frame count)."""
+    parts = _riff_chunks(mm, start, end)
+    strh = _riff_find(parts, b"strh")
+    strf = _riff_find(parts, b"strf")
+    if strh is None or strf is None:
+        return b"", _Track(), 0
+    hs, fs = strh[0], strf[0]
+    fcc_type = bytes(mm[hs : hs + 4])
+    scale, rate, _, length = struct.unpack_from("<IIII", mm, hs + 20)
+    if fcc_type == b"auds":
+        return fcc_type, _Track(channels=struct.unpack_from("<H", mm, fs + 2)[0]), 0
+    if fcc_type != b"vids":
+        return fcc_type, _Track(), 0
+    width, height = struct.unpack_from("<ii", mm, fs + 4)
+    compression = bytes(mm[fs + 16 : fs + 20])
+    codec = (
+        "rawvideo"
+        if compression == b"\0\0\0\0"
+        else _VFW_FOURCC.get(compression.upper())
+    )
+    if codec is None:
+        raise _Ambiguous(f"unknown AVI fourcc {compression!r}")
+    fps = rate / scale if scale else 0.0
+    return (
+        fcc_type,
+        _Track(codec=codec, width=width, height=abs(height), fps=fps),
+        length,
+    )
+
+
+def _parse_avi(mm: mmap.mmap, size: int) -> tuple[_Track | None, _Track | None, float]:
+    chunks = _riff_chunks(mm, 12, min(size, 8 + struct.unpack_from("<I", mm, 4)[0]))
+    hdrl = _riff_find(chunks, b"hdrl")
+    if hdrl is None:
+        raise _Ambiguous("no hdrl")
+    video: _Track | None = None
+    audio: _Track | None = None
+    video_index = -1
+    video_frames = 0
+    grand_frames = 0
+    stream = -1
+    for cid, s, e in _riff_chunks(mm, *hdrl):
+        if cid == b"odml":
+            dmlh = _riff_find(_riff_chunks(mm, s, e), b"dmlh")
+            if dmlh is not None:
+                grand_frames = struct.unpack_from("<I", mm, dmlh[0])[0]
+        elif cid == b"strl":
+            stream += 1
+            fcc_type, track, frames = _avi_stream(mm, s, e)
+            if fcc_type == b"vids" and video is None:
+                video, video_index, video_frames = track, stream, frames
+            elif fcc_type == b"auds" and audio is None:
+                audio = track
+    if video is None or video.fps <= 0:
+        return video, audio, 0.0
+    # OpenDML files count frames beyond the first RIFF only in dmlh
+    duration = (grand_frames or video_frames) / video.fps
+    if duration > 0:
+        video.bit_rate = _avi_index_bitrate(mm, chunks, video_index, duration)
+    return video, audio, duration
+
+
+def _avi_index_bitrate(
+    mm: mmap.mmap,
+    chunks: list[tuple[bytes, int, int]],
+    stream: int,
+    duration: float,
+) -> int:
+    """Sum a stream's chunk sizes from idx1; 0 when there is no legacy index."""
+    idx1 = _riff_find(chunks, b"idx1")
+    if idx1 is None:
+        return 0
+    prefix = b"%02d" % stream
+    total = 0
+    for off in range(idx1[0], idx1[1] - 15, 16):
+        if mm[off : off + 2] == prefix:
+            total += struct.unpack_from("<I", mm, off + 12)[0]
+    return int(total * 8 / duration)
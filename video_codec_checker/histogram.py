@@ -0,0 +1,217 @@
+"""Fixed-bucket latency histograms per pipeline stage.
+
+Each histogram has log-spaced buckets (four per doubling, 1µs to ~18 min)
+plus count, total and max, so recording is O(1) with no per-sample storage
+and quantiles are accurate to within one bucket (~19%). StageTimings keeps
+one histogram per stage overall, per file extension and per mount point.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator, TypeVar
+
+from video_codec_checker.mounts import mount_point, read_mounts
+
+T = TypeVar("T")
+
+# Pipeline stages timed during a scan, in display order.
+STAGES = (
+    "walk",
+    "native",
+    "fast_probe",
+    "full_probe",
+    "trial_encode",
+    "csv_write",
+    "script_write",
+)
+
+_MIN_SECONDS = 1e-6
+_SUB_BUCKETS = 4  # per doubling
+_NUM_BUCKETS = 30 * _SUB_BUCKETS + 1  # last bucket catches everything slower
+
+# Breakdown rows printed per dimension in the text summary.
+_SUMMARY_ROWS = 5
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with O(1) recording."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket(seconds: float) -> int:
+        if seconds <= _MIN_SECONDS:
+            return 0
+        idx = int(math.log2(seconds / _MIN_SECONDS) * _SUB_BUCKETS) + 1
+        return min(idx, _NUM_BUCKETS - 1)
+
+    @staticmethod
+    def upper_bound(idx: int) -> float:
+        return _MIN_SECONDS * 2 ** (idx / _SUB_BUCKETS)
+
+    def record(self, seconds: float) -> None:
+        self.counts[self.bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile q (capped at max)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                if idx == _NUM_BUCKETS - 1:
+                    return self.max  # overflow bucket has no upper bound
+                return min(self.upper_bound(idx), self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "total": round(self.total, 6),
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class _MountLookup:
+    """Map a file to its mount point, memoised per parent directory.
+
+    The mount table is read on the first lookup, so timings that are never
+    attributed to a path cost nothing.
+    """
+
+    def __init__(self) -> None:
+        self._mounts: list[tuple[str, str]] | None = None
+        self._by_dir: dict[str, str] = {}
+
+    def __call__(self, path: Path) -> str:
+        parent = os.path.dirname(os.path.abspath(path))
+        mnt = self._by_dir.get(parent)
+        if mnt is None:
+            if self._mounts is None:
+                self._mounts = read_mounts()
+            found = mount_point(parent, self._mounts)
+            mnt = found[0] if found else "?"
+            self._by_dir[parent] = mnt
+        return mnt
+
+
+class StageTimings:
+    """Histograms per stage, overall and broken down by extension and mount.
+
+    Thread-safe: the walk is timed on the discovery thread while writes are
+    timed on the main thread.
+    """
+
+    def __init__(self) -> None:
+        self.overall: dict[str, LatencyHistogram] = {}
+        self.by_ext: dict[str, dict[str, LatencyHistogram]] = {}
+        self.by_mount: dict[str, dict[str, LatencyHistogram]] = {}
+        self._mount_of = _MountLookup()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, path: Path | None = None) -> None:
+        with self._lock:
+            self._hist(self.overall, stage).record(seconds)
+            if path is None:
+                return
+            ext = path.suffix.lower() or "(none)"
+            self._hist(self.by_ext.setdefault(stage, {}), ext).record(seconds)
+            mnt = self._mount_of(path)
+            self._hist(self.by_mount.setdefault(stage, {}), mnt).record(seconds)
+
+    def timed(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, recording how long each next() took.
+
+        Items that are paths are attributed to their extension and mount.
+        """
+        it = iter(items)
+        clock = time.perf_counter
+        while True:
+            t0 = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            elapsed = clock() - t0
+            self.record(stage, elapsed, item if isinstance(item, Path) else None)
+            yield item
+
+    @staticmethod
+    def _hist(table: dict[str, LatencyHistogram], key: str) -> LatencyHistogram:
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = LatencyHistogram()
+        return hist
+
+    def _ordered(self) -> list[str]:
+        known = [s for s in STAGES if s in self.overall]
+        return known + sorted(set(self.overall) - set(STAGES))
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            stage: {
+                "all": self.overall[stage].to_dict(),
+                "by_extension": {
+                    k: h.to_dict() for k, h in self.by_ext.get(stage, {}).items()
+                },
+                "by_mount": {
+                    k: h.to_dict() for k, h in self.by_mount.get(stage, {}).items()
+                },
+            }
+            for stage in self._ordered()
+        }
+
+    def print_table(self, stream: IO[str]) -> None:
+        """Print p50/p95/p99/max per stage, then the slowest-tail breakdowns."""
+        if not self.overall:
+            return
+        print(
+            f"{'Latency':<28} {'n':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}",
+            file=stream,
+        )
+        for stage in self._ordered():
+            self._row(stage, self.overall[stage], stream)
+            for label, table in (("ext", self.by_ext), ("mount", self.by_mount)):
+                rows = table.get(stage, {})
+                if len(rows) < 2:
+                    continue
+                slowest = sorted(rows.items(), key=lambda kv: -kv[1].quantile(0.99))
+                for key, hist in slowest[:_SUMMARY_ROWS]:
+                    self._row(f"  {label} {key}", hist, stream)
+
+    @staticmethod
+    def _row(label: str, hist: LatencyHistogram, stream: IO[str]) -> None:
+        cells = (hist.quantile(0.5), hist.quantile(0.95), hist.quantile(0.99))
+        print(
+            f"{label[:28]:<28} {hist.count:>8} "
+            + " ".join(_fmt(v) for v in (*cells, hist.max)),
+            file=stream,
+        )
+
+
+def _fmt(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:>7.0f}us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:>7.1f}ms"
+    return f"{seconds:>8.2f}s"
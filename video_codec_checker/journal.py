@@ -0,0 +1,173 @@
+"""Crash-safe scan journal for `--resume`.
+
+While a scan runs, each file it has finished with (reported or skipped) is
+appended to a small JSONL journal next to the report. Entries are written in
+batches at checkpoints: the report and script are flushed and fsynced first,
+their sizes recorded, then the entries and a checkpoint line are appended and
+the journal is fsynced. Entries after the last checkpoint line are ignored on
+resume, and the report and script are cut back to the checkpointed sizes, so
+a scan killed at any point (Ctrl-C, OOM, power loss) resumes without lost or
+duplicated rows. The journal is removed once the scan completes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+JOURNAL_VERSION = 1
+
+# Checkpoint after this many finished files or seconds, whichever comes first
+CHECKPOINT_FILES = 1000
+CHECKPOINT_SECONDS = 5.0
+
+
+def default_journal_path(output: str | Path) -> Path:
+    """Return `<output>.journal` next to the report."""
+    out = Path(output)
+    return out.with_name(f"{out.name}.journal")
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ScanJournal:
+    """Append-only record of the files a scan has finished with.
+
+    `done` and `processed` hold the committed state of an earlier run after
+    `load()`; `sizes` maps each checkpointed output path to its size then.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        output: str | Path,
+        every_files: int = CHECKPOINT_FILES,
+        every_seconds: float = CHECKPOINT_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.output = str(output)
+        self.every_files = max(1, every_files)
+        self.every_seconds = every_seconds
+        self.done: set[str] = set()
+        self.processed = 0
+        self.sizes: dict[str, int] = {}
+        self.resumed = False
+        self.skipped = 0
+        self._pending: list[tuple[str, bool]] = []
+        self._last = time.monotonic()
+        self._fh: IO[str] | None = None
+
+    def load(self) -> None:
+        """Read the committed state of an interrupted scan of the same report.
+
+        Raises ValueError if the journal belongs to another report or
+        version. A torn last line (killed mid-write) ends the read.
+        """
+        pending: list[tuple[str, bool]] = []
+        with self.path.open("r", encoding="utf-8") as fh:
+            header = json.loads(fh.readline() or "{}")
+            if header.get("journal") != JOURNAL_VERSION:
+                raise ValueError(f"{self.path}: not a scan journal")
+            if header.get("output") != self.output:
+                raise ValueError(
+                    f"{self.path}: journal is for {header.get('output')}, "
+                    f"not {self.output}"
+                )
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if "checkpoint" in entry:
+                    for file, processed in pending:
+                        self.done.add(file)
+                        self.processed += processed
+                    pending = []
+                    self.sizes = {k: int(v) for k, v in entry["checkpoint"].items()}
+                else:
+                    pending.append((entry["f"], bool(entry.get("p"))))
+        self.resumed = True
+
+    def restore(self, outputs: Iterable[Path]) -> None:
+        """Cut outputs back to their checkpointed sizes; drop unrecorded ones.
+
+        An output that is shorter than recorded has lost rows the journal
+        counts as done, so resuming would leave gaps: raise ValueError.
+        """
+        for out in outputs:
+            size = self.sizes.get(str(out))
+            if size is None:
+                out.unlink(missing_ok=True)  # created after the last checkpoint
+                continue
+            actual = out.stat().st_size if out.is_file() else -1
+            if actual < size:
+                raise ValueError(f"cannot resume: {out} is shorter than journaled")
+            if actual > size:
+                os.truncate(out, size)
+
+    def open(self) -> None:
+        if self.resumed:
+            self._fh = self.path.open("a", encoding="utf-8")
+            return
+        self._fh = self.path.open("w", encoding="utf-8")
+        header = {"journal": JOURNAL_VERSION, "output": self.output}
+        self._fh.write(json.dumps(header) + "\n")
+
+    def select(self, files: Iterable[Path]) -> Iterator[Path]:
+        """Yield only files the interrupted run had not finished."""
+        for fp in files:
+            if str(fp) in self.done:
+                self.skipped += 1
+                continue
+            yield fp
+
+    def record(self, file: str, processed: bool) -> None:
+        """Note a finished file; it is committed at the next checkpoint."""
+        self._pending.append((file, processed))
+
+    def due(self) -> bool:
+        return bool(self._pending) and (
+            len(self._pending) >= self.every_files
+            or time.monotonic() - self._last >= self.every_seconds
+        )
+
+    def commit(self, outputs: Iterable[Path]) -> None:
+        """Checkpoint: make `outputs` durable, then the pending entries.
+
+        Call after flushing the outputs. Outputs that do not exist yet are
+        left out and removed again on resume.
+        """
+        fh = self._fh
+        if fh is None:
+            raise RuntimeError("ScanJournal is not open")
+        sizes = {}
+        for out in outputs:
+            if out.is_file():
+                _fsync(out)
+                sizes[str(out)] = out.stat().st_size
+        lines = [json.dumps({"f": f, "p": int(p)}) for f, p in self._pending]
+        lines.append(json.dumps({"checkpoint": sizes}))
+        fh.write("\n".join(lines) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+        self._pending = []
+        self._last = time.monotonic()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def remove(self) -> None:
+        """Delete the journal once the scan has completed."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -1,39 +1,476 @@
 #!/usr/bin/env python3
 """
 Script to find video files using codecs less than state-of-the-art (AV1, HEVC, H.264)
-Outputs CSV: File, Codec, Audio_Channels, Bits_Per_Pixel, FFmpeg_Command
+Outputs CSV: File, Codec, Audio_Channels, Bits_Per_Pixel, FFmpeg_Command,
+Est_Output_Bytes, Est_Bytes_Saved, Est_Encode_CPU_Seconds, Probe_Status,
+Duplicate_Of, Est_Source, Preset
 State-of-the-art: av1, hevc, h264 (h264 is included in CSV for analysis only)
 """
 
+import os
+import signal
 import sys
+import time
+from contextlib import nullcontext
+from dataclasses import replace
 from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, ContextManager, Iterable
 
+from video_codec_checker.calibrate import calibrate_main
 from video_codec_checker.cli import parse_args
-from video_codec_checker.concurrency import ProbeExecutor
-from video_codec_checker.csv_writer import CsvResultsWriter
+from video_codec_checker.concurrency import AsyncProbeExecutor, ProbeExecutor
+from video_codec_checker.converter import convert_main
+from video_codec_checker.dedup import Deduplicator
+from video_codec_checker.delta import (
+    DeltaScan,
+    default_delta_path,
+    record_scan_start,
+)
+from video_codec_checker.devices import DeviceLimits
+from video_codec_checker.estimator import EncodeEstimator, Estimate
 from video_codec_checker.ffmpeg_generator import (
+    DEFAULT_PRESET,
     generate_ffmpeg_command,
     get_output_path,
 )
-from video_codec_checker.models import AppConfig, CsvRow
+from video_codec_checker.filters import FileFilter
+from video_codec_checker.histogram import StageTimings
+from video_codec_checker.journal import ScanJournal, default_journal_path
+from video_codec_checker.merge import merge_main
+from video_codec_checker.metrics import MetricsExporter, scan_metrics
+from video_codec_checker.models import (
+    EST_MODEL,
+    EST_TRIAL,
+    GOOD_CODECS,
+    STATUS_NOT_A_VIDEO,
+    STATUS_PROBE_ERROR,
+    STATUS_TIMEOUT,
+    AppConfig,
+    CsvRow,
+    DedupSettings,
+    DeltaSettings,
+    DeviceSettings,
+    FileProbeResult,
+    FilterSettings,
+    JournalSettings,
+    MetricsSettings,
+    OutputFormat,
+    PlanSettings,
+    ProbeBackend,
+    ProbeSettings,
+    ShardSpec,
+    TrialSettings,
+    WatchSettings,
+)
+from video_codec_checker.planner import plan_presets, preset_table
+from video_codec_checker.probe_cache import ProbeCache
+from video_codec_checker.probe_policy import (
+    ProbePolicy,
+)
+from video_codec_checker.probe_tuner import ProbeTuner
 from video_codec_checker.script_writer import (
     ScriptWriter,
     resolve_trash_config,
 )
+from video_codec_checker.sinks import SUFFIXES, make_sink
+from video_codec_checker.stats import ProbeStats
+from video_codec_checker.trial import TrialEncoder
 from video_codec_checker.video_processor import (
-    compute_bpp,
+    ERROR_NOT_A_VIDEO,
+    ERROR_TIMEOUT,
     get_video_files,
-    probe_video_metadata,
+    iter_video_files,
+    probe_video,
 )
+from video_codec_checker.watcher import Watcher
+
+# Probe_Status for FileProbeResult.error kinds (anything else: probe_error)
+_FAILURE_STATUS = {
+    ERROR_TIMEOUT: STATUS_TIMEOUT,
+    ERROR_NOT_A_VIDEO: STATUS_NOT_A_VIDEO,
+}
+
+
+def _file_size(path: Path) -> int | None:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+class _ReportOutputs:
+    """Results report plus the conversion script, created lazily when needed."""
+
+    def __init__(
+        self,
+        output_file: str,
+        script_file: str | None,
+        delete_original: bool,
+        trash_original: bool,
+        delta: DeltaScan | None,
+        estimator: EncodeEstimator | None = None,
+        timings: StageTimings | None = None,
+        output_format: OutputFormat = OutputFormat.CSV,
+        journal: ScanJournal | None = None,
+        trials: TrialEncoder | None = None,
+        plan: PlanSettings | None = None,
+    ) -> None:
+        self.sink = make_sink(output_format, output_file)
+        self.output_file = output_file
+        self.output_format = output_format
+        self.journal = journal
+        self.script_file = script_file
+        self.delete_original = delete_original
+        self.trash_original = trash_original
+        self.delta = delta
+        self.estimator = estimator or EncodeEstimator()
+        self.trials = trials
+        self.plan = plan
+        # Queued rows held back until their presets are planned
+        self._planned: list[tuple[CsvRow, Path, Estimate | None, int]] = []
+        self.timings = timings or StageTimings()
+        self.script: ScriptWriter | None = None
+        self.processed_count = 0
+        self.probed_count = 0
+        # Watch mode only: (size, mtime_ns) of each reported file and the
+        # files already in the script, so watch batches repeat neither
+        self.reported: dict[Path, tuple[int, int]] | None = None
+        self._scripted: set[Path] = set()
+
+    def open(self) -> None:
+        journal = self.journal
+        resumed = journal is not None and journal.resumed
+        if journal is not None and resumed:
+            journal.restore(self._journaled_files())
+            self.processed_count = journal.processed
+            self.probed_count = len(journal.done)
+        self.sink.open(append=resumed)
+        if journal is not None:
+            journal.open()
+            self.checkpoint()
+
+    def _journaled_files(self) -> list[Path]:
+        """Outputs cut back to their checkpointed size on resume.
+
+        SQLite reports are left alone: rewriting a row replaces it.
+        """
+        files = []
+        if self.output_format is not OutputFormat.SQLITE:
+            files.append(Path(self.output_file))
+        if self.script_file:
+            files.append(Path(self.script_file))
+        return files
+
+    def handle(self, result: FileProbeResult, duplicate_of: Path | None = None) -> None:
+        """Report one probe result and journal the file as done.
+
+        A duplicate (given the file it duplicates) reuses that file's result
+        and is not probed, estimated or added to the script.
+        """
+        queued = self._report(result, duplicate_of)
+        if self.reported is not None:
+            try:
+                st = os.stat(result.path)
+                self.reported[result.path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass
+        if self.journal is not None:
+            self.journal.record(str(result.path), queued)
+            if self.journal.due():
+                self.checkpoint()
+
+    def unreported(self, paths: Iterable[Path]) -> list[Path]:
+        """Paths not reported yet, or changed since (see `reported`)."""
+        if self.reported is None:
+            return list(paths)
+        fresh = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if self.reported.get(path) != (st.st_size, st.st_mtime_ns):
+                fresh.append(path)
+        return fresh
+
+    def checkpoint(self) -> None:
+        """Flush the outputs, then commit the files finished so far."""
+        self.flush()
+        if self.journal is not None:
+            self.journal.commit(self._journaled_files())
+
+    def _report(
+        self, result: FileProbeResult, duplicate_of: Path | None = None
+    ) -> bool:
+        """Report one probe result; return True if queued for conversion."""
+        if duplicate_of is None:
+            self.probed_count += 1
+        dup = str(duplicate_of) if duplicate_of is not None else ""
+        if result.error is not None:
+            self._report_failure(result, dup)
+            return False
+        file_path = result.path
+        codec = result.codec
+        channels = result.channels
+        # Determine if the file should be included in the report
+        include_in_report = bool(codec) and (
+            codec not in GOOD_CODECS or codec == "h264"
+        )
+        if not include_in_report:
+            print(f"Skipped: {file_path}", file=sys.stderr)
+            if self.delta is not None:
+                self.delta.record_dropped(
+                    CsvRow(
+                        file=str(file_path),
+                        codec=codec or "",
+                        channels=channels,
+                        bpp=result.bpp,
+                        command="",
+                        duplicate_of=dup,
+                    )
+                )
+            return False
+
+        # abspath is purely lexical; no per-file filesystem round trips
+        abs_in = Path(os.path.abspath(file_path))
+        # Generate conversion command for all reported files
+        ffmpeg_cmd = generate_ffmpeg_command(abs_in, channels)
+        queued = codec not in GOOD_CODECS and not dup
+        if dup:
+            print(f"Duplicate of {dup}: {file_path}", file=sys.stderr)
+        elif queued:
+            self.processed_count += 1
+            print(f"Processed: {file_path}", file=sys.stderr)
+        else:
+            print(f"Analyzed (h264): {file_path}", file=sys.stderr)
+
+        size = None if dup else _file_size(file_path)
+        est, source = self._estimate(result, size, ffmpeg_cmd, queued)
+        row = CsvRow(
+            file=str(file_path),
+            codec=codec or "",
+            channels=channels,
+            bpp=result.bpp,
+            command=ffmpeg_cmd,
+            est_output_bytes=est.output_bytes if est else None,
+            est_bytes_saved=est.bytes_saved if est else None,
+            est_cpu_seconds=est.cpu_seconds if est else None,
+            width=result.width,
+            height=result.height,
+            fps=result.fps,
+            duration=result.duration,
+            bit_rate=result.bit_rate,
+            duplicate_of=dup,
+            est_source=source,
+            preset=DEFAULT_PRESET,
+        )
+        if queued and self.plan is not None:
+            # Without an estimate (or size) the file is planned at a fallback
+            self._planned.append((row, abs_in, est if size else None, size or 0))
+            return queued
+        # Only write to script file for legacy codecs (not h264)
+        if queued:
+            self._write_script(ffmpeg_cmd, abs_in)
+        self._write_row(row)
+        return queued
+
+    def _report_failure(self, result: FileProbeResult, duplicate_of: str) -> None:
+        """Keep a file that could not be probed in the report, flagged."""
+        print(f"Probe failed ({result.error}): {result.path}", file=sys.stderr)
+        row = CsvRow(
+            file=str(result.path),
+            codec="",
+            channels=0,
+            bpp=0.0,
+            command="",
+            status=_FAILURE_STATUS.get(result.error or "", STATUS_PROBE_ERROR),
+            duplicate_of=duplicate_of,
+        )
+        self._write_row(row)
+
+    def _write_row(self, row: CsvRow) -> None:
+        t0 = time.perf_counter()
+        self.sink.write_row_dc(row)
+        self.timings.record("csv_write", time.perf_counter() - t0, Path(row.file))
+        if self.delta is not None:
+            self.delta.record(row)
+
+    def _estimate(
+        self, result: FileProbeResult, size: int | None, ffmpeg_cmd: str, queued: bool
+    ) -> tuple[Estimate | None, str]:
+        """(estimate, EST_* source); queued files try a trial encode first."""
+        if size is None:
+            return None, ""
+        if queued and self.trials is not None:
+            t0 = time.perf_counter()
+            est = self.trials.estimate(result, size, ffmpeg_cmd)
+            self.timings.record("trial_encode", time.perf_counter() - t0, result.path)
+            if est is not None:
+                return est, EST_TRIAL
+        est = self.estimator.estimate(result, size)
+        return est, EST_MODEL if est is not None else ""
+
+    def write_plan(self) -> None:
+        """Choose presets for the held-back queued files and write them out."""
+        if self.plan is None:
+            return
+        items = [(est, size) for _, _, est, size in self._planned if est is not None]
+        plan = plan_presets(
+            items,
+            self.plan.cpu_budget,
+            preset_table(self.plan.preset_speeds),
+            unestimated=len(self._planned) - len(items),
+        )
+        choices = iter(plan.choices)
+        for row, abs_in, est, _ in self._planned:
+            if est is None:
+                fallback = plan.fallback_preset
+                preset = DEFAULT_PRESET if fallback is None else fallback
+                planned = row
+            else:
+                choice = next(choices)
+                preset, est = choice.preset, choice.estimate
+                planned = replace(
+                    row,
+                    est_output_bytes=est.output_bytes,
+                    est_bytes_saved=est.bytes_saved,
+                    est_cpu_seconds=est.cpu_seconds,
+                )
+            command = generate_ffmpeg_command(abs_in, row.channels, preset)
+            self._write_script(command, abs_in)
+            self._write_row(replace(planned, command=command, preset=preset))
+        self._planned.clear()
+        for line in plan.summary():
+            print(line, file=sys.stderr)
+
+    def _write_script(self, ffmpeg_cmd: str, abs_in: Path) -> None:
+        if not self.script_file:
+            return
+        if self.reported is not None:
+            # A rewritten file's earlier command converts its new contents
+            if abs_in in self._scripted:
+                return
+            self._scripted.add(abs_in)
+        if self.script is None:
+            trash_cfg = resolve_trash_config(self.trash_original)
+            self.script = ScriptWriter(
+                path=self.script_file,
+                delete_original=self.delete_original,
+                trash_config=trash_cfg,
+            )
+            self.script.open(append=self.journal is not None and self.journal.resumed)
+        t0 = time.perf_counter()
+        dst = get_output_path(abs_in)
+        if self.delete_original or self.trash_original:
+            self.script.write_command(ffmpeg_cmd, abs_in, dst)
+        else:
+            self.script.write_command_no_cleanup(ffmpeg_cmd, dst)
+        self.timings.record("script_write", time.perf_counter() - t0, abs_in)
+
+    def write_carried(self, rows: Iterable[CsvRow]) -> None:
+        for row in rows:
+            self.sink.write_row_dc(row)
+
+    def flush(self) -> None:
+        """Push rows and commands to disk (watch mode appends as it goes)."""
+        self.sink.flush()
+        if self.script is not None:
+            self.script.flush()
 
-GOOD_CODECS = {"av1", "hevc", "h264"}
+    def close(self) -> None:
+        if self.script is not None:
+            self.script.close()
+            print(f"Script written to: {self.script_file}", file=sys.stderr)
+        self.sink.close()
+        if self.journal is not None:
+            self.journal.commit(self._journaled_files())
+            self.journal.close()
+
+
+def _report_all(
+    executor: ProbeExecutor,
+    files: Iterable[Path],
+    outputs: _ReportOutputs,
+    dedup: Deduplicator | None,
+) -> None:
+    """Probe files and report each result, then any duplicates of it.
+
+    files have already been through dedup.select. Primaries a resumed scan
+    had reported are probed again (usually a cache hit), without reporting,
+    so that their remaining duplicates can be.
+    """
+    for result in executor.run(files):
+        outputs.handle(result)
+        if dedup is not None:
+            for dup, primary in dedup.resolve(result):
+                outputs.handle(dup, duplicate_of=primary)
+    if dedup is None:
+        return
+    for result in executor.run(dedup.unresolved()):
+        for dup, primary in dedup.resolve(result):
+            outputs.handle(dup, duplicate_of=primary)
+    for dup, primary in dedup.drain():
+        outputs.handle(dup, duplicate_of=primary)
+
+
+def _executor(
+    jobs: int | None,
+    ffprobe_args: list[str] | None,
+    probe: ProbeSettings,
+    cache: ProbeCache | None,
+    tuner: ProbeTuner | None,
+    devices: DeviceSettings,
+) -> ProbeExecutor:
+    """The probe executor for the configured backend."""
+    policy = ProbePolicy(retries=probe.retries, max_timeout=probe.max_timeout)
+    limits = DeviceLimits.from_settings(devices.limits, devices.enabled)
+    if probe.backend == ProbeBackend.ASYNC:
+        return AsyncProbeExecutor(
+            jobs=jobs,
+            ffprobe_args=ffprobe_args,
+            cache=cache,
+            window_per_worker=probe.window,
+            native_probe=probe.native,
+            tuner=tuner,
+            policy=policy,
+            devices=limits,
+            sniff=probe.sniff,
+        )
+    return ProbeExecutor(
+        jobs=jobs,
+        ffprobe_args=ffprobe_args,
+        probe_func=probe_video,
+        cache=cache,
+        window_per_worker=probe.window,
+        native_probe=probe.native,
+        tuner=tuner,
+        policy=policy,
+        devices=limits,
+        sniff=probe.sniff,
+    )
+
+
+def _exporter(
+    settings: MetricsSettings | None, stats: ProbeStats
+) -> ContextManager[object]:
+    if settings is None:
+        return nullcontext()
+    return MetricsExporter(settings, partial(scan_metrics, stats))
 
 
 class VideoCodecChecker:
-    def __init__(self, output_file: str | None = None) -> None:
+    def __init__(
+        self,
+        output_file: str | None = None,
+        output_format: OutputFormat = OutputFormat.CSV,
+    ) -> None:
+        self.output_format = output_format
         self.output_file = (
             output_file
-            or f"video_codec_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            or f"video_codec_check_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"{SUFFIXES[output_format]}"
         )
 
     def process_files(
@@ -44,85 +481,259 @@ class VideoCodecChecker:
         delete_original: bool = False,
         trash_original: bool = False,
         ffprobe_args: list[str] | None = None,
+        probe: ProbeSettings | None = None,
+        sort_files: bool = False,
+        delta: DeltaSettings | None = None,
+        watch: WatchSettings | None = None,
+        shard: ShardSpec | None = None,
+        encode_ledger: Path | None = None,
+        stats_json: Path | None = None,
+        metrics: MetricsSettings | None = None,
+        journal: JournalSettings | None = None,
+        devices: DeviceSettings | None = None,
+        dedup: DedupSettings | None = None,
+        filters: FilterSettings | None = None,
+        trial: TrialSettings | None = None,
+        plan: PlanSettings | None = None,
     ) -> int:
         """Process all video files and generate CSV output."""
-        video_files = get_video_files(directory)
-        print(f"Processing {len(video_files)} video files...", file=sys.stderr)
+        started_ns = time.time_ns()
+        probe = probe or ProbeSettings()
+        journal = journal or JournalSettings()
+        dedup = dedup or DedupSettings()
+        if plan is not None and (watch is not None or journal.resume):
+            raise ValueError("preset planning cannot be combined with watch or resume")
+        in_shard: Callable[[Path], bool] | None = None
+        if shard is not None:
+            in_shard = partial(shard.includes, root=directory)
+            print(f"Shard {shard}: probing its slice only", file=sys.stderr)
 
-        processed_count = 0
-        # Initialize CSV writer
-        csv_writer = CsvResultsWriter(self.output_file)
-        csv_writer.open()
+        file_filter = FileFilter(filters or FilterSettings(), directory)
 
-        # Optional script writer (lazy creation only when a conversion is needed)
-        script: ScriptWriter | None = None
-        want_script = bool(script_file)
+        def accept(path: Path) -> bool:
+            return (in_shard is None or in_shard(path)) and file_filter.accepts(path)
 
-        # Run metadata probing concurrently
-        executor = ProbeExecutor(
-            jobs=jobs, ffprobe_args=ffprobe_args, probe_func=probe_video_metadata
-        )
-        for result in executor.run(video_files):
-            file_path = result.path
-            codec = result.codec
-            channels = result.channels
-            # Determine if the file should be included in the report
-            include_in_report = bool(codec) and (
-                codec not in GOOD_CODECS or codec == "h264"
+        # Watch before scanning so files landing mid-scan are not missed
+        watcher: Watcher | None = None
+        if watch is not None:
+            watcher = Watcher(directory, watch, accept=accept)
+
+        video_files: Iterable[Path]
+        if sort_files:
+            video_files = get_video_files(directory, file_filter=file_filter)
+            print(f"Processing {len(video_files)} video files...", file=sys.stderr)
+        else:
+            video_files = iter_video_files(directory, file_filter=file_filter)
+            print(f"Scanning {directory} for video files...", file=sys.stderr)
+        if in_shard is not None:
+            video_files = filter(in_shard, video_files)
+
+        delta_scan: DeltaScan | None = None
+        delta_output: Path | None = None
+        if delta is not None:
+            delta_output = delta.output
+            delta_scan = DeltaScan(delta.previous, scope=in_shard)
+            video_files = delta_scan.select(video_files)
+            print(
+                f"Comparing against {delta.previous} ({len(delta_scan.previous)} rows)",
+                file=sys.stderr,
             )
+            if delta_scan.since_ns is None:
+                print(
+                    f"Warning: no scan start recorded for {delta.previous}; "
+                    "probing every file",
+                    file=sys.stderr,
+                )
 
-            if include_in_report:
-                abs_in = file_path.resolve()
-                # Compute bits-per-pixel for reporting
-                bpp = compute_bpp(abs_in, ffprobe_args) or 0.0
-
-                # Generate conversion command for all reported files
-                ffmpeg_cmd = ""
-                if codec:
-                    ffmpeg_cmd = generate_ffmpeg_command(abs_in, channels)
-                    # Only write to script file for legacy codecs (not h264)
-                    if codec not in GOOD_CODECS:
-                        if want_script and script is None:
-                            trash_cfg = resolve_trash_config(trash_original)
-                            script = ScriptWriter(
-                                path=script_file,  # type: ignore[arg-type]
-                                delete_original=delete_original,
-                                trash_config=trash_cfg,
-                            )
-                            script.open()
-                        if script is not None:
-                            if delete_original or trash_original:
-                                dst = get_output_path(abs_in)
-                                script.write_command(ffmpeg_cmd, abs_in, dst)
-                            else:
-                                script.write_command_no_cleanup(ffmpeg_cmd)
-                        processed_count += 1
-                        print(f"Processed: {file_path}", file=sys.stderr)
-                    else:
-                        print(f"Analyzed (h264): {file_path}", file=sys.stderr)
-
-                csv_writer.write_row_dc(
-                    CsvRow(
-                        file=str(file_path),
-                        codec=codec or "",
-                        channels=channels,
-                        bpp=bpp,
-                        command=ffmpeg_cmd,
-                    )
+        # Parquet cannot be appended to, and --since and planning rewrite or
+        # hold back rows until the end
+        scan_journal: ScanJournal | None = None
+        if (
+            self.output_format is not OutputFormat.PARQUET
+            and delta is None
+            and plan is None
+        ):
+            scan_journal = ScanJournal(
+                journal.path or default_journal_path(self.output_file),
+                self.output_file,
+            )
+            if journal.resume:
+                scan_journal.load()
+                print(
+                    f"Resuming: {len(scan_journal.done)} files already done",
+                    file=sys.stderr,
                 )
-            else:
-                print(f"Skipped: {file_path}", file=sys.stderr)
+        resumed = scan_journal is not None and journal.resume
+        if not resumed:
+            # A resumed scan keeps the start of its first run
+            record_scan_start(self.output_file, started_ns)
 
-        # Close resources
-        if script is not None:
-            script.close()
-            print(f"Script written to: {script_file}", file=sys.stderr)
-        csv_writer.close()
+        # Before the journal filter, so that a hardlink of a file done before
+        # the interruption is still reported as its duplicate
+        dedup_files: Deduplicator | None = None
+        if dedup.enabled or dedup.fingerprint:
+            dedup_files = Deduplicator(
+                fingerprints=dedup.fingerprint,
+                done=scan_journal.done if scan_journal is not None and resumed else (),
+            )
+            video_files = dedup_files.select(video_files)
+        if scan_journal is not None and resumed:
+            video_files = scan_journal.select(video_files)
+
+        estimator = EncodeEstimator()
+        if encode_ledger:
+            estimator = EncodeEstimator.from_ledger(encode_ledger)
+            print(
+                f"Estimates calibrated from {estimator.samples} conversions"
+                if estimator.samples
+                else f"Too few conversions in {encode_ledger}; default estimates",
+                file=sys.stderr,
+            )
+
+        tuner: ProbeTuner | None = None
+        if probe.profile and ffprobe_args:
+            tuner = ProbeTuner(ffprobe_args, probe.profile)
+            tuner.load()
+
+        cache: ProbeCache | None = None
+        if probe.cache_path:
+            cache = ProbeCache(probe.cache_path)
+            cache.open()
+        trials = TrialEncoder.from_settings(trial) if trial is not None else None
+        try:
+            executor = _executor(
+                jobs, ffprobe_args, probe, cache, tuner, devices or DeviceSettings()
+            )
+            executor.stats.filtered = file_filter.counts
+            outputs = _ReportOutputs(
+                self.output_file,
+                script_file=script_file,
+                delete_original=delete_original,
+                trash_original=trash_original,
+                delta=delta_scan,
+                estimator=estimator,
+                timings=executor.stats.timings,
+                output_format=self.output_format,
+                journal=scan_journal,
+                trials=trials,
+                plan=plan,
+            )
+            processed_count = self._process(
+                video_files,
+                executor,
+                outputs,
+                watcher=watcher,
+                dedup=dedup_files,
+                metrics=metrics,
+                stats_json=stats_json,
+            )
+            if delta_scan is not None:
+                dpath = delta_output or default_delta_path(self.output_file)
+                changes = delta_scan.write(dpath)
+                print(
+                    f"Delta: {changes} changes vs {delta_scan.previous_path} "
+                    f"written to: {dpath}",
+                    file=sys.stderr,
+                )
+            if tuner is not None:
+                try:
+                    tuner.save()
+                except OSError as e:
+                    print(
+                        f"Warning: could not save probe profile: {e}", file=sys.stderr
+                    )
+            if cache is not None:
+                pruned = cache.prune(directory)
+                if pruned:
+                    print(f"Cache: pruned {pruned} stale entries", file=sys.stderr)
+        finally:
+            if cache is not None:
+                cache.close()
+            if trials is not None:
+                trials.close()
+        return processed_count
+
+    def _process(
+        self,
+        video_files: Iterable[Path],
+        executor: ProbeExecutor,
+        outputs: _ReportOutputs,
+        watcher: Watcher | None = None,
+        dedup: Deduplicator | None = None,
+        metrics: MetricsSettings | None = None,
+        stats_json: Path | None = None,
+    ) -> int:
+        delta = outputs.delta
+        if watcher is not None:
+            outputs.reported = {}
+        outputs.open()
+        try:
+            with executor.session(), _exporter(metrics, executor.stats):
+                _report_all(executor, video_files, outputs, dedup)
+                outputs.write_plan()
+
+                if delta is not None:
+                    # Unchanged files were not probed; keep their previous rows
+                    outputs.write_carried(delta.carried)
+                    print(
+                        f"Unchanged since previous report: {delta.unchanged} files "
+                        f"({len(delta.carried)} rows carried forward)",
+                        file=sys.stderr,
+                    )
+                if watcher is not None:
+                    self._watch(executor, watcher, outputs, dedup)
+        finally:
+            outputs.close()
+        if outputs.journal is not None:
+            outputs.journal.remove()
+        print(f"Probed {outputs.probed_count} video files.", file=sys.stderr)
         print(f"Results written to: {self.output_file}", file=sys.stderr)
 
         # Print probe stats summary if fast-probe was enabled
-        executor.stats.print_summary(ffprobe_args is not None, stream=sys.stderr)
-        return processed_count
+        executor.stats.print_summary(
+            executor.ffprobe_args is not None, stream=sys.stderr
+        )
+        if stats_json:
+            executor.stats.write_json(stats_json)
+            print(f"Stats written to: {stats_json}", file=sys.stderr)
+        if executor.tuner is not None:
+            executor.tuner.print_summary(stream=sys.stderr)
+        for line in executor.devices.summary():
+            print(line, file=sys.stderr)
+        if dedup is not None and (note := dedup.summary()):
+            print(note, file=sys.stderr)
+        if outputs.trials is not None and (note := outputs.trials.summary()):
+            print(note, file=sys.stderr)
+        return outputs.processed_count
+
+    def _watch(
+        self,
+        executor: ProbeExecutor,
+        watcher: Watcher,
+        outputs: _ReportOutputs,
+        dedup: Deduplicator | None,
+    ) -> None:
+        """Probe settled new files in batches until interrupted or stopped."""
+        outputs.flush()
+        watcher.started()
+        print(
+            f"Watching {watcher.root} for new files ({watcher.mode}); "
+            "press Ctrl-C to stop.",
+            file=sys.stderr,
+        )
+        previous = signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+        try:
+            for batch in watcher.batches():
+                files: Iterable[Path] = outputs.unreported(batch)
+                if dedup is not None:
+                    files = dedup.select(files)
+                _report_all(executor, files, outputs, dedup)
+                outputs.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        print("Watch stopped.", file=sys.stderr)
 
     def process_config(self, cfg: AppConfig) -> int:
         """Process using a typed AppConfig."""
@@ -136,18 +747,41 @@ class VideoCodecChecker:
             delete_original=delete,
             trash_original=trash,
             ffprobe_args=ffargs,
+            probe=cfg.probe,
+            sort_files=cfg.sort_files,
+            delta=cfg.delta,
+            watch=cfg.watch,
+            shard=cfg.shard,
+            encode_ledger=cfg.encode_ledger,
+            stats_json=cfg.stats_json,
+            metrics=cfg.metrics,
+            journal=cfg.journal,
+            devices=cfg.devices,
+            dedup=cfg.dedup,
+            filters=cfg.filters,
+            trial=cfg.trial,
+            plan=cfg.plan,
         )
 
 
-def main() -> None:
-    cfg = parse_args()
+def main(argv: list[str] | None = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    if args and args[0] == "merge":
+        sys.exit(merge_main(args[1:]))
+    if args and args[0] == "convert":
+        sys.exit(convert_main(args[1:]))
+    if args and args[0] == "calibrate":
+        sys.exit(calibrate_main(args[1:]))
+    cfg = parse_args(args)
 
     try:
-        checker = VideoCodecChecker(str(cfg.output))
+        checker = VideoCodecChecker(str(cfg.output), cfg.output_format)
         processed_count = checker.process_config(cfg)
         print(f"Found {processed_count} files that need conversion.")
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.", file=sys.stderr)
+        if (cfg.journal.path or default_journal_path(cfg.output)).is_file():
+            print("Run again with --resume to continue the scan.", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
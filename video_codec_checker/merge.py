@@ -0,0 +1,123 @@
+"""Merge per-shard reports and scripts into one.
+
+`check-video-codecs merge -o report.csv shard-*.csv` combines the CSVs written
+by `--shard K/N` runs into a single report sorted by file (any report format;
+the output format follows its suffix), and optionally the
+matching conversion scripts into one script, then prints summary stats.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+from video_codec_checker.models import GOOD_CODECS, CsvRow
+from video_codec_checker.script_writer import split_script, write_merged_script
+from video_codec_checker.sinks import format_for_path, make_sink, read_rows
+
+
+def merge_reports(reports: list[Path], output: Path) -> list[CsvRow]:
+    """Write the union of `reports` sorted by file; return the merged rows.
+
+    A file listed by more than one report (overlapping shards) keeps the row
+    from the first report that lists it.
+    """
+    rows: dict[str, CsvRow] = {}
+    for report in reports:
+        count = dupes = 0
+        for row in read_rows(report):
+            count += 1
+            if row.file in rows:
+                dupes += 1
+                continue
+            rows[row.file] = row
+        note = f", {dupes} duplicates skipped" if dupes else ""
+        print(f"  {report}: {count} rows{note}", file=sys.stderr)
+    merged = [rows[key] for key in sorted(rows)]
+    writer = make_sink(format_for_path(output), output)
+    writer.open()
+    try:
+        for row in merged:
+            writer.write_row_dc(row)
+    finally:
+        writer.close()
+    return merged
+
+
+def merge_scripts(scripts: list[Path], output: Path) -> int:
+    """Merge shard scripts into one; return the number of commands.
+
+    All scripts must have been generated with the same cleanup settings.
+    Commands are de-duplicated and sorted, which orders them by source file.
+    """
+    preamble: list[str] | None = None
+    commands: set[str] = set()
+    for script in scripts:
+        pre, cmds = split_script(script.read_text(encoding="utf-8"))
+        if preamble is None:
+            preamble = pre
+        elif pre != preamble:
+            raise ValueError(
+                f"{script} was generated with different cleanup settings "
+                f"than {scripts[0]}"
+            )
+        commands.update(cmds)
+    write_merged_script(output, preamble or [], sorted(commands), len(scripts))
+    return len(commands)
+
+
+def print_summary(rows: list[CsvRow]) -> None:
+    codecs = Counter(row.codec for row in rows)
+    legacy = sum(n for codec, n in codecs.items() if codec not in GOOD_CODECS)
+    print(f"Total rows: {len(rows)}")
+    print(
+        "Codecs: "
+        + ", ".join(f"{codec or '?'}={n}" for codec, n in codecs.most_common())
+    )
+    print(f"Need conversion: {legacy}")
+
+
+def merge_main(argv: list[str]) -> int:
+    """Entry point for the 'merge' subcommand; returns the exit status."""
+    parser = argparse.ArgumentParser(
+        prog="check-video-codecs merge",
+        description="Merge per-shard reports (and scripts) into one",
+    )
+    parser.add_argument("reports", nargs="+", type=Path, help="Shard reports")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        help="Merged report (format from its suffix)",
+    )
+    parser.add_argument(
+        "--scripts", nargs="+", type=Path, default=[], help="Shard scripts to merge"
+    )
+    parser.add_argument("-s", "--script", type=Path, help="Merged script output")
+    args = parser.parse_args(argv)
+    if bool(args.scripts) != bool(args.script):
+        parser.error("--scripts and -s/--script must be used together")
+    missing = [p for p in [*args.reports, *args.scripts] if not p.is_file()]
+    if missing:
+        parser.error(f"not found: {', '.join(map(str, missing))}")
+    if args.output in args.reports:
+        parser.error("--output must not be one of the input reports")
+
+    print(f"Merging {len(args.reports)} reports:", file=sys.stderr)
+    try:
+        rows = merge_reports(args.reports, args.output)
+        print(f"Merged report written to: {args.output}", file=sys.stderr)
+        if args.script:
+            count = merge_scripts(args.scripts, args.script)
+            print(
+                f"Merged script with {count} commands written to: {args.script}",
+                file=sys.stderr,
+            )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print_summary(rows)
+    return 0
@@ -0,0 +1,194 @@
+"""Opt-in live metrics in Prometheus text format.
+
+A MetricsExporter periodically renders samples from a callback and publishes
+them as a textfile (for node_exporter's textfile collector, replaced
+atomically) and/or on a localhost HTTP endpoint (`GET /metrics`). Scans feed
+it from ProbeStats; `convert` feeds it from its scheduler.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from video_codec_checker.models import MetricsSettings
+from video_codec_checker.stats import ProbeStats
+
+PREFIX = "video_codec_checker_"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(NamedTuple):
+    name: str
+    kind: str  # "counter" or "gauge"
+    help: str
+    value: float
+
+
+def render(metrics: list[Metric]) -> str:
+    """Render samples in the Prometheus text exposition format."""
+    lines = []
+    for m in metrics:
+        if math.isnan(m.value):
+            continue  # unknown (e.g. ETA before the walk finishes)
+        name = PREFIX + m.name
+        lines.append(f"# HELP {name} {m.help}")
+        lines.append(f"# TYPE {name} {m.kind}")
+        value = int(m.value) if float(m.value).is_integer() else m.value
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def scan_metrics(stats: ProbeStats) -> list[Metric]:
+    """Progress, throughput and cache/probe health of a running scan."""
+    elapsed = max(time.monotonic() - stats.started, 1e-9)
+    rate = stats.probed / elapsed
+    remaining = stats.discovered - stats.probed
+    eta = remaining / rate if stats.discovery_done and rate > 0 else math.nan
+    fallback_rate = (
+        stats.fast_fallbacks / stats.fast_attempted if stats.fast_attempted else 0.0
+    )
+    return [
+        Metric("files_discovered_total", "counter", "Files found.", stats.discovered),
+        Metric("files_probed_total", "counter", "Files probed.", stats.probed),
+        Metric(
+            "files_queued",
+            "gauge",
+            "Files found but not yet submitted for probing.",
+            stats.discovered - stats.submitted,
+        ),
+        Metric("probes_in_flight", "gauge", "Probes running.", stats.in_flight),
+        Metric("probe_retries_total", "counter", "Probe retries.", stats.retries),
+        Metric(
+            "probe_failures_total",
+            "counter",
+            "Files that could not be probed even after retries.",
+            stats.probe_errors,
+        ),
+        Metric("cache_hits_total", "counter", "Probe cache hits.", stats.cache_hits),
+        Metric(
+            "cache_misses_total", "counter", "Probe cache misses.", stats.cache_misses
+        ),
+        Metric(
+            "fast_probe_fallback_ratio",
+            "gauge",
+            "Share of fast probes that fell back to a full probe.",
+            fallback_rate,
+        ),
+        Metric("files_per_second", "gauge", "Probe throughput since start.", rate),
+        Metric(
+            "eta_seconds",
+            "gauge",
+            "Estimated seconds until all discovered files are probed.",
+            eta,
+        ),
+        Metric(
+            "discovery_done",
+            "gauge",
+            "1 once the directory walk has finished.",
+            float(stats.discovery_done),
+        ),
+        Metric(
+            "last_update_timestamp_seconds",
+            "gauge",
+            "Unix time these metrics were rendered (alert when stale).",
+            round(time.time(), 3),
+        ),
+    ]
+
+
+class MetricsExporter:
+    """Publish rendered metrics to a textfile and/or localhost HTTP."""
+
+    def __init__(
+        self, settings: MetricsSettings, collect: Callable[[], list[Metric]]
+    ) -> None:
+        self.settings = settings
+        self._collect = collect
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+
+    def __enter__(self) -> MetricsExporter:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    @property
+    def port(self) -> int | None:
+        """Bound HTTP port (useful when configured as 0)."""
+        return self._server.server_address[1] if self._server else None
+
+    def start(self) -> None:
+        if self.settings.port is not None:
+            self._server = ThreadingHTTPServer(
+                ("127.0.0.1", self.settings.port), self._handler()
+            )
+            threading.Thread(
+                target=self._server.serve_forever, name="metrics-http", daemon=True
+            ).start()
+        if self.settings.textfile is not None:
+            self._thread = threading.Thread(
+                target=self._write_loop, name="metrics-textfile", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def write_textfile(self) -> None:
+        """Rewrite the textfile atomically so collectors never see half a file."""
+        path = self.settings.textfile
+        if path is None:
+            return
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(render(self._collect()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                self.write_textfile()
+            except OSError:
+                pass  # keep scanning; the next interval may succeed
+            if self._stop.wait(self.settings.interval):
+                break
+        try:
+            self.write_textfile()  # final values
+        except OSError:
+            pass
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        collect = self._collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render(collect()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass  # keep stderr for scan progress
+
+        return Handler
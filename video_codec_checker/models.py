@@ -2,13 +2,40 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Protocol
+from typing import Any, Mapping, Protocol
 
 from video_codec_checker.script_writer import TrashConfig
 
+# State-of-the-art codecs; h264 is still reported for analysis.
+GOOD_CODECS = frozenset({"av1", "hevc", "h264"})
+
+# Report Probe_Status values
+STATUS_OK = "ok"
+STATUS_PROBE_ERROR = "probe_error"
+STATUS_TIMEOUT = "timeout"
+STATUS_NOT_A_VIDEO = "not_a_video"
+
+# Report Est_Source values
+EST_MODEL = "model"
+EST_TRIAL = "trial"
+
+
+class ProbeBackend(str, Enum):
+    THREAD = "thread"
+    ASYNC = "async"
+
+
+class OutputFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    SQLITE = "sqlite"
+    PARQUET = "parquet"
+
 
 class CleanupMode(str, Enum):
     NONE = "none"
@@ -34,11 +61,26 @@ class CleanupPolicy:
 
 @dataclass(frozen=True)
 class ProbeSettings:
-    """ffprobe behavior configuration."""
+    """ffprobe behavior configuration.
+
+    window: in-flight probes per worker (None: default). native and sniff
+    try the built-in header parser and content check before ffprobe.
+    profile: per-extension fast-probe limits, learned and saved there.
+    cache_path: probe cache database (None: no cache).
+    """
 
     fast_probe: bool = True
     probe_size: str = "5M"
     analyze_duration: str = "10M"
+    # Retries of transient failures, and the longest timeout any probe gets
+    retries: int = 2
+    max_timeout: float = 300.0
+    backend: ProbeBackend = ProbeBackend.THREAD
+    window: int | None = None
+    native: bool = False
+    sniff: bool = True
+    profile: Path | None = None
+    cache_path: Path | None = None
 
     @property
     def args(self) -> list[str] | None:
@@ -52,6 +94,164 @@ class ProbeSettings:
         ]
 
 
+@dataclass(frozen=True)
+class DeltaSettings:
+    """Incremental scan against a previous report (see delta.DeltaScan).
+
+    output: where the delta CSV goes (None: next to the new report).
+    """
+
+    previous: Path
+    output: Path | None = None
+
+
+@dataclass(frozen=True)
+class JournalSettings:
+    """Scan journal (see journal.ScanJournal).
+
+    path None means `<output>.journal`; resume continues the interrupted
+    scan it records.
+    """
+
+    path: Path | None = None
+    resume: bool = False
+
+
+@dataclass(frozen=True)
+class DedupSettings:
+    """Duplicate detection (see dedup.Deduplicator).
+
+    enabled: hardlinks are probed once; fingerprint: so are files with the
+    same size and sampled content.
+    """
+
+    enabled: bool = True
+    fingerprint: bool = False
+
+
+@dataclass(frozen=True)
+class WatchSettings:
+    """Watch mode configuration.
+
+    settle: seconds a file's size and mtime must stay unchanged before it is
+    probed. poll_interval: seconds between directory polls when inotify is
+    not used. force_poll: poll even where inotify is available.
+    """
+
+    settle: float = 5.0
+    poll_interval: float = 10.0
+    force_poll: bool = False
+
+
+@dataclass(frozen=True)
+class MetricsSettings:
+    """Live metrics configuration.
+
+    textfile: Prometheus textfile rewritten every `interval` seconds.
+    port: serve /metrics on 127.0.0.1:port (0 picks a free port).
+    """
+
+    textfile: Path | None = None
+    port: int | None = None
+    interval: float = 15.0
+
+
+@dataclass(frozen=True)
+class FilterSettings:
+    """Discovery filters (see filters.FileFilter).
+
+    Sizes are bytes; newer_than/older_than are epoch seconds compared with
+    the file's mtime. markers are file names that prune their directory.
+    """
+
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    min_size: int | None = None
+    max_size: int | None = None
+    newer_than: float | None = None
+    older_than: float | None = None
+    skip_converted: bool = False
+    ignore_files: bool = True
+    markers: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class DeviceSettings:
+    """Per-device probe concurrency.
+
+    limits: (key, n) pairs, key being a path on the device or a device
+    class (hdd, ssd, other); unset devices are auto-detected.
+    """
+
+    enabled: bool = True
+    limits: tuple[tuple[str, int], ...] = ()
+
+
+@dataclass(frozen=True)
+class TrialSettings:
+    """Sampled trial encodes (see trial.TrialEncoder).
+
+    segments of `seconds` each are encoded per file; cache_path None with
+    cache=True means the default trial cache next to the probe cache.
+    """
+
+    segments: int = 3
+    seconds: float = 5.0
+    cache: bool = True
+    cache_path: Path | None = None
+
+
+@dataclass(frozen=True)
+class PlanSettings:
+    """Per-file preset planning (see planner.plan_presets).
+
+    cpu_budget: CPU-seconds the queued conversions may take in total;
+    preset_speeds: JSON of measured preset factors (PresetTable.load).
+    """
+
+    cpu_budget: float
+    preset_speeds: Path | None = None
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """One slice (1-based index of count) of a scan split across hosts.
+
+    A file belongs to the shard picked by a stable hash of its path relative
+    to the scan root, so every host sees the same partition regardless of
+    where the share is mounted or the order files are discovered in.
+    """
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> ShardSpec:
+        """Parse 'K/N' with 1 <= K <= N; raise ValueError otherwise."""
+        k, sep, n = spec.partition("/")
+        if not sep:
+            raise ValueError(f"shard must look like K/N, got {spec!r}")
+        index, count = int(k), int(n)
+        if not 1 <= index <= count:
+            raise ValueError(f"shard index must be between 1 and {count}")
+        return cls(index=index, count=count)
+
+    @staticmethod
+    def bucket(rel_path: str, count: int) -> int:
+        """Return the 0-based bucket for a '/'-separated relative path."""
+        digest = hashlib.blake2b(
+            rel_path.encode("utf-8", "surrogateescape"), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") % count
+
+    def includes(self, path: Path, root: str | Path) -> bool:
+        rel = os.path.relpath(os.path.abspath(path), os.path.abspath(root))
+        return self.bucket(rel.replace(os.sep, "/"), self.count) == self.index - 1
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
 @dataclass(frozen=True)
 class AppConfig:
     """Top-level configuration normalized from CLI/env/YAML."""
@@ -62,19 +262,83 @@ class AppConfig:
     script_file: Path | None
     cleanup: CleanupPolicy
     probe: ProbeSettings
+    sort_files: bool = False
+    delta: DeltaSettings | None = None
+    watch: WatchSettings | None = None
+    shard: ShardSpec | None = None
+    encode_ledger: Path | None = None
+    stats_json: Path | None = None
+    metrics: MetricsSettings | None = None
+    output_format: OutputFormat = OutputFormat.CSV
+    journal: JournalSettings = JournalSettings()
+    dedup: DedupSettings = DedupSettings()
+    filters: FilterSettings = FilterSettings()
+    devices: DeviceSettings = DeviceSettings()
+    trial: TrialSettings | None = None
+    plan: PlanSettings | None = None
 
 
 @dataclass(frozen=True)
 class FileProbeResult:
-    """Result of probing a single file."""
+    """Result of probing a single file.
+
+    Carries everything the report needs so a file is probed only once:
+    codec and audio channels for classification, plus geometry, frame rate,
+    bitrate and duration for bits-per-pixel.
+    """
 
     path: Path
     codec: str | None
     channels: int
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    # Primary video stream bit_rate, falling back to the container bit_rate
+    bit_rate: int = 0
+    duration: float = 0.0
+    # Why probing failed (video_processor.ERROR_*); None when it did not
+    error: str | None = None
+
+    @property
+    def bpp(self) -> float:
+        """Bits per pixel: bit_rate / (fps * width * height); 0.0 if unknown."""
+        denom = self.fps * self.width * self.height
+        if self.bit_rate <= 0 or denom <= 0:
+            return 0.0
+        return float(self.bit_rate) / denom
 
     def needs_conversion(self, good_codecs: set[str]) -> bool:
         return bool(self.codec) and str(self.codec) not in good_codecs
 
+    def to_dict(self) -> dict[str, str | int | float | None]:
+        """Return the probed fields (without path) as a JSON-friendly dict."""
+        return {
+            "codec": self.codec,
+            "channels": self.channels,
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "bit_rate": self.bit_rate,
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, path: Path, data: dict[str, str | int | float | None]
+    ) -> FileProbeResult:
+        """Inverse of to_dict; missing fields take their defaults."""
+        codec = data.get("codec")
+        return cls(
+            path=path,
+            codec=str(codec) if codec else None,
+            channels=int(data.get("channels") or 0),
+            width=int(data.get("width") or 0),
+            height=int(data.get("height") or 0),
+            fps=float(data.get("fps") or 0.0),
+            bit_rate=int(data.get("bit_rate") or 0),
+            duration=float(data.get("duration") or 0.0),
+        )
+
 
 @dataclass(frozen=True)
 class CsvRow:
@@ -85,6 +349,24 @@ class CsvRow:
     channels: int
     bpp: float
     command: str
+    # Conversion estimates; None when geometry or duration is unknown
+    est_output_bytes: int | None = None
+    est_bytes_saved: int | None = None
+    est_cpu_seconds: float | None = None
+    # Probe details kept by the JSONL/SQLite/Parquet sinks (not in the CSV)
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    duration: float = 0.0
+    bit_rate: int = 0
+    # "ok", or why the file could not be probed (see STATUS_*)
+    status: str = STATUS_OK
+    # Path of the file this one duplicates (hardlink or identical content)
+    duplicate_of: str = ""
+    # Where the Est_* figures came from (EST_*); "" when there are none
+    est_source: str = ""
+    # SVT-AV1 preset of the command; None without a command
+    preset: int | None = None
 
     def as_dict(self) -> dict[str, str | int | float]:
         return {
@@ -93,10 +375,107 @@ class CsvRow:
             "Audio_Channels": self.channels,
             "Bits_Per_Pixel": self.bpp,
             "FFmpeg_Command": self.command,
+            "Est_Output_Bytes": _blank(self.est_output_bytes),
+            "Est_Bytes_Saved": _blank(self.est_bytes_saved),
+            "Est_Encode_CPU_Seconds": _blank(self.est_cpu_seconds),
+            "Probe_Status": self.status,
+            "Duplicate_Of": self.duplicate_of,
+            "Est_Source": self.est_source,
+            "Preset": _blank(self.preset),
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, str]) -> CsvRow:
+        """Inverse of as_dict for a row read back with csv.DictReader.
+
+        Reports written before the estimate and status columns existed read
+        back with the estimates set to None and status "ok".
+        """
+        return cls(
+            file=data.get("File", ""),
+            codec=data.get("Codec", ""),
+            status=data.get("Probe_Status") or STATUS_OK,
+            channels=int(data.get("Audio_Channels") or 0),
+            bpp=float(data.get("Bits_Per_Pixel") or 0.0),
+            command=data.get("FFmpeg_Command", ""),
+            est_output_bytes=_opt_int(data.get("Est_Output_Bytes")),
+            est_bytes_saved=_opt_int(data.get("Est_Bytes_Saved")),
+            est_cpu_seconds=_opt_float(data.get("Est_Encode_CPU_Seconds")),
+            duplicate_of=data.get("Duplicate_Of") or "",
+            est_source=data.get("Est_Source") or "",
+            preset=_opt_int(data.get("Preset")),
+        )
+
+    def as_record(self) -> dict[str, str | int | float | None]:
+        """All fields with snake_case keys, as stored by the non-CSV sinks."""
+        return {
+            "file": self.file,
+            "codec": self.codec,
+            "probe_status": self.status,
+            "audio_channels": self.channels,
+            "bits_per_pixel": self.bpp,
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "duration": self.duration,
+            "bit_rate": self.bit_rate,
+            "est_output_bytes": self.est_output_bytes,
+            "est_bytes_saved": self.est_bytes_saved,
+            "est_encode_cpu_seconds": self.est_cpu_seconds,
+            "ffmpeg_command": self.command,
+            "duplicate_of": self.duplicate_of,
+            "est_source": self.est_source,
+            "preset": self.preset,
+        }
+
+    @classmethod
+    def from_record(cls, data: Mapping[str, Any]) -> CsvRow:
+        """Inverse of as_record."""
+
+        def opt(key: str, kind: type[int] | type[float]) -> Any:
+            value = data.get(key)
+            return None if value is None else kind(value)
+
+        return cls(
+            file=str(data.get("file", "")),
+            codec=str(data.get("codec") or ""),
+            status=str(data.get("probe_status") or STATUS_OK),
+            channels=int(data.get("audio_channels") or 0),
+            bpp=float(data.get("bits_per_pixel") or 0.0),
+            command=str(data.get("ffmpeg_command") or ""),
+            est_output_bytes=opt("est_output_bytes", int),
+            est_bytes_saved=opt("est_bytes_saved", int),
+            est_cpu_seconds=opt("est_encode_cpu_seconds", float),
+            width=int(data.get("width") or 0),
+            height=int(data.get("height") or 0),
+            fps=float(data.get("fps") or 0.0),
+            duration=float(data.get("duration") or 0.0),
+            bit_rate=int(data.get("bit_rate") or 0),
+            duplicate_of=str(data.get("duplicate_of") or ""),
+            est_source=str(data.get("est_source") or ""),
+            preset=opt("preset", int),
+        )
+
+
+def _blank(value: int | float | None) -> str | int | float:
+    return "" if value is None else value
+
+
+def _opt_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+def _opt_float(value: str | None) -> float | None:
+    return float(value) if value else None
+
 
 class Prober(Protocol):
     def __call__(
-        self, path: Path, args: list[str] | None, stats: dict | None
-    ) -> tuple[str | None, int]: ...
+        self, path: Path, args: list[str] | None, stats: dict | None, /
+    ) -> FileProbeResult: ...
+
+
+class AsyncProber(Protocol):
+    async def __call__(
+        self, path: Path, args: list[str] | None, stats: dict | None, /
+    ) -> FileProbeResult: ...
@@ -0,0 +1,37 @@
+"""Mount table lookups (Linux /proc/self/mounts; empty elsewhere)."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def read_mounts() -> list[tuple[str, str]]:
+    """Return (mount point, filesystem type) pairs (Linux only, else empty)."""
+    mounts = []
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as fh:
+            for line in fh:
+                parts = line.split()
+                if len(parts) >= 3:
+                    mounts.append((parts[1].replace("\\040", " "), parts[2]))
+    except OSError:
+        return []
+    return mounts
+
+
+def mount_point(path: str, mounts: list[tuple[str, str]]) -> tuple[str, str] | None:
+    """Return the (mount point, fstype) of the longest mount containing path."""
+    best: tuple[str, str] | None = None
+    for mnt, fstype in mounts:
+        if (path == mnt or path.startswith(os.path.join(mnt, ""))) and (
+            best is None or len(mnt) > len(best[0])
+        ):
+            best = (mnt, fstype)
+    return best
+
+
+def filesystem_type(path: str | Path) -> str | None:
+    """Return the filesystem type of the mount containing path (Linux only)."""
+    found = mount_point(os.path.realpath(path), read_mounts())
+    return found[1] if found else None
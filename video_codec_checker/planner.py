@@ -0,0 +1,217 @@
+"""Per-file SVT-AV1 preset planning under a CPU budget.
+
+Generated commands use DEFAULT_PRESET unless the scan is planned. Given a
+budget in CPU-seconds (CPU-hours, or the time to a deadline times a core
+count), the planner picks a preset for each queued file so that the batch
+fits the budget while saving as many bytes as possible.
+
+A file's options are its estimate scaled by a PresetTable: the typical
+figures in estimator.PRESET_SCALING, optionally overridden by measured ones.
+Every file starts at its cheapest preset. Upgrades along each file's
+efficient frontier (a slower preset that saves more bytes) are then bought
+greedily, best bytes saved per extra CPU-second first, until the budget runs
+out. This is the usual greedy for a multiple-choice knapsack; it stays
+within one upgrade of the optimum. Files without an estimate cannot be costed
+against the budget; they get the fastest preset and are counted separately.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from video_codec_checker.calibrate import default_host_profile_path
+from video_codec_checker.estimator import PRESET_SCALING, Estimate
+
+_DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def parse_deadline(value: str, now: float | None = None) -> float:
+    """Seconds from now to a deadline: a duration ("8h", "2d") or ISO time."""
+    now = time.time() if now is None else now
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([mhd])\s*", value.lower())
+    if match is not None:
+        return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    try:
+        seconds = datetime.fromisoformat(value.strip()).timestamp() - now
+    except ValueError:
+        raise ValueError(f"invalid duration or time: {value!r}") from None
+    if seconds <= 0:
+        raise ValueError(f"deadline is in the past: {value!r}")
+    return seconds
+
+
+@dataclass(frozen=True)
+class Choice:
+    """A preset for one file and the estimate of encoding it with it."""
+
+    preset: int
+    estimate: Estimate
+
+
+class PresetTable:
+    """(CPU time, output size) factors per preset, relative to the default."""
+
+    def __init__(
+        self, scaling: Mapping[int, tuple[float, float]] | None = None
+    ) -> None:
+        self.scaling = dict(PRESET_SCALING if scaling is None else scaling)
+
+    @classmethod
+    def load(cls, path: str | Path, sizes: bool = True) -> PresetTable:
+        """Defaults overridden by a JSON file's measured presets.
+
+        The file (e.g. a `calibrate` host profile) holds {"presets":
+        {"<preset>": {"cpu_factor": ..., "size_factor": ...}}}; entries
+        without a cpu_factor are ignored. Without sizes, only the CPU
+        factors are taken from the file.
+        """
+        with Path(path).open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        scaling = dict(PRESET_SCALING)
+        for key, entry in (data.get("presets") or {}).items():
+            try:
+                preset = int(key)
+                cpu = float(entry["cpu_factor"])
+                size = float(entry.get("size_factor") or 0.0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if size <= 0 or not sizes:  # keep the typical size figure
+                size = scaling.get(preset, (cpu, 1.0))[1]
+            if cpu > 0:
+                scaling[preset] = (cpu, size)
+        return cls(scaling)
+
+    def fastest(self) -> int:
+        """The preset with the smallest CPU factor."""
+        return min(self.scaling, key=lambda preset: self.scaling[preset][0])
+
+    def choices(self, estimate: Estimate, input_bytes: int) -> list[Choice]:
+        return [
+            Choice(preset, estimate.scaled(input_bytes, cpu, size))
+            for preset, (cpu, size) in sorted(self.scaling.items())
+        ]
+
+
+@dataclass(frozen=True)
+class Plan:
+    """The chosen preset per file, in the order the files were given."""
+
+    choices: list[Choice]
+    budget: float
+    # CPU-seconds of the cheapest presets, when that alone exceeds the budget
+    shortfall: float = 0.0
+    # Files without estimates, given `fallback_preset` outside the budget
+    unestimated: int = 0
+    fallback_preset: int | None = None
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(c.estimate.cpu_seconds for c in self.choices)
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(c.estimate.bytes_saved for c in self.choices)
+
+    def summary(self) -> list[str]:
+        presets = Counter(c.preset for c in self.choices)
+        mix = ", ".join(f"{n} at preset {p}" for p, n in sorted(presets.items()))
+        lines = [
+            f"Preset plan: {len(self.choices)} files, "
+            f"{self.cpu_seconds / 3600:.1f} of {self.budget / 3600:.1f} CPU-hours, "
+            f"{self.bytes_saved / 1e9:.1f} GB saved ({mix or 'no files'})"
+        ]
+        if self.unestimated:
+            lines.append(
+                f"Warning: {self.unestimated} files without estimates at preset "
+                f"{self.fallback_preset}, not counted against the budget"
+            )
+        if self.shortfall > 0:
+            lines.append(
+                "Warning: the budget is too small even at the fastest presets "
+                f"({self.shortfall / 3600:.1f} CPU-hours needed)"
+            )
+        return lines
+
+
+def frontier(choices: Sequence[Choice]) -> list[Choice]:
+    """Choices where more CPU buys more savings at a falling rate."""
+    hull: list[Choice] = []
+    for choice in sorted(
+        choices, key=lambda c: (c.estimate.cpu_seconds, -c.estimate.bytes_saved)
+    ):
+        if hull and choice.estimate.bytes_saved <= hull[-1].estimate.bytes_saved:
+            continue
+        while len(hull) >= 2 and _rate(hull[-2], hull[-1]) <= _rate(hull[-1], choice):
+            hull.pop()
+        hull.append(choice)
+    return hull
+
+
+def preset_table(speeds: Path | None) -> PresetTable:
+    """Factors from `speeds`, else CPU factors from this host's profile.
+
+    Output sizes measured by `calibrate` come from synthetic clips and say
+    little about real footage, so they are only used when the profile is
+    passed explicitly as `speeds`.
+    """
+    if speeds is not None:
+        return PresetTable.load(speeds)
+    host = default_host_profile_path()
+    if host.is_file():
+        try:
+            return PresetTable.load(host, sizes=False)
+        except (OSError, ValueError):
+            pass
+    return PresetTable()
+
+
+def plan_presets(
+    items: Sequence[tuple[Estimate, int]],
+    budget: float,
+    table: PresetTable | None = None,
+    unestimated: int = 0,
+) -> Plan:
+    """Pick one preset per (estimate at the default preset, input bytes).
+
+    `unestimated` files (not in `items`) are noted in the plan at the
+    table's fastest preset.
+    """
+    table = table or PresetTable()
+    hulls = [frontier(table.choices(est, size)) for est, size in items]
+    chosen = [hull[0] for hull in hulls]
+    floor = sum(c.estimate.cpu_seconds for c in chosen)
+    remaining = budget - floor
+    steps = [(-_rate(h[0], h[1]), i, 1) for i, h in enumerate(hulls) if len(h) > 1]
+    heapq.heapify(steps)
+    while steps and remaining > 0:
+        _, i, k = heapq.heappop(steps)
+        hull = hulls[i]
+        cost = hull[k].estimate.cpu_seconds - hull[k - 1].estimate.cpu_seconds
+        if cost > remaining:
+            continue
+        remaining -= cost
+        chosen[i] = hull[k]
+        if k + 1 < len(hull):
+            heapq.heappush(steps, (-_rate(hull[k], hull[k + 1]), i, k + 1))
+    return Plan(
+        chosen,
+        budget,
+        shortfall=floor if floor > budget else 0.0,
+        unestimated=unestimated,
+        fallback_preset=table.fastest() if unestimated else None,
+    )
+
+
+def _rate(a: Choice, b: Choice) -> float:
+    """Extra bytes saved per extra CPU-second going from a to b."""
+    cost = b.estimate.cpu_seconds - a.estimate.cpu_seconds
+    gain = b.estimate.bytes_saved - a.estimate.bytes_saved
+    return gain / cost if cost > 0 else float("inf")
@@ -0,0 +1,258 @@
+"""Persistent on-disk cache of ffprobe results.
+
+Entries are keyed on the absolute file path and validated against the file's
+size, mtime_ns and inode, so rescans of an unchanged library skip ffprobe.
+A file that was moved or renamed within its filesystem keeps its device,
+inode, size and mtime, so a path miss falls back to those and the entry
+follows it (inode numbers are only unique per device).
+
+Consumers other than the scan (e.g. `convert`) open the cache read-only: a
+cache from another schema version is skipped rather than dropped, and
+`lookup` leaves the rows alone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Bump when the payload layout changes; older caches are discarded on open.
+SCHEMA_VERSION = 3
+
+# Commit pending writes after this many statements.
+_COMMIT_EVERY = 500
+
+# Only VACUUM when pruning removed at least this fraction of the rows.
+_VACUUM_RATIO = 0.2
+
+CachePayload = dict[str, str | int | float | None]
+
+
+def default_cache_path() -> Path:
+    """Return the default cache location (honours XDG_CACHE_HOME)."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "video-codec-checker" / "probe-cache.sqlite3"
+
+
+@dataclass(frozen=True)
+class FileSignature:
+    """Identity of a file's content as far as the cache is concerned."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+    device: int
+
+    @classmethod
+    def from_stat(cls, st: os.stat_result) -> FileSignature:
+        return cls(
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            inode=st.st_ino,
+            device=st.st_dev,
+        )
+
+    def as_tuple(self) -> tuple[int, int, int, int]:
+        return (self.size, self.mtime_ns, self.inode, self.device)
+
+
+class ProbeCache:
+    """SQLite-backed probe cache safe to share between worker threads."""
+
+    def __init__(self, path: str | Path, read_only: bool = False) -> None:
+        self.path = Path(path)
+        self.read_only = read_only
+        self.run_id = time.time_ns()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def open(self) -> None:
+        """Open (and create or migrate) the cache.
+
+        Read-only, raises sqlite3.DatabaseError for another schema version.
+        """
+        if self.read_only:
+            self._open_read_only()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS probes")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " device INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " seen_run INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS probes_inode ON probes (inode)")
+        conn.commit()
+        self._conn = conn
+
+    @staticmethod
+    def signature(path: Path) -> FileSignature | None:
+        """Stat the file and return its signature, or None if it is gone."""
+        try:
+            return FileSignature.from_stat(os.stat(path))
+        except OSError:
+            return None
+
+    def get(self, path: Path, sig: FileSignature | None) -> CachePayload | None:
+        """Return the cached payload if the stored signature still matches.
+
+        A hit is stored under this path and marked as seen by this run.
+        """
+        if sig is None:
+            return None
+        key = os.path.abspath(path)
+        with self._lock:
+            conn = self._require_open()
+            row = self._find(conn, key, sig)
+            if row is None:
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO probes"
+                " (path, size, mtime_ns, inode, device, payload, seen_run)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, *sig.as_tuple(), row[4], self.run_id),
+            )
+            self._tick()
+        payload: CachePayload = json.loads(row[4])
+        return payload
+
+    def lookup(self, path: Path, sig: FileSignature | None) -> CachePayload | None:
+        """Like `get`, without writing anything back."""
+        if sig is None:
+            return None
+        with self._lock:
+            row = self._find(self._require_open(), os.path.abspath(path), sig)
+        if row is None:
+            return None
+        payload: CachePayload = json.loads(row[4])
+        return payload
+
+    def put(self, path: Path, sig: FileSignature | None, payload: CachePayload) -> None:
+        """Insert or replace the payload for a file."""
+        if sig is None:
+            return
+        with self._lock:
+            conn = self._require_open()
+            conn.execute(
+                "INSERT OR REPLACE INTO probes"
+                " (path, size, mtime_ns, inode, device, payload, seen_run)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(path),
+                    sig.size,
+                    sig.mtime_ns,
+                    sig.inode,
+                    sig.device,
+                    json.dumps(payload, separators=(",", ":")),
+                    self.run_id,
+                ),
+            )
+            self._tick()
+
+    def prune(self, root: str | Path) -> int:
+        """Evict entries under `root` that this run did not see and are gone.
+
+        Call only after a complete scan of `root`. Returns the number of rows
+        removed; the database is vacuumed when a large share was removed.
+        """
+        base = os.path.join(os.path.abspath(root), "")
+        # Every path under `base` sorts between base and base with its trailing
+        # separator bumped by one code point.
+        upper = base[:-1] + chr(ord(base[-1]) + 1)
+        with self._lock:
+            conn = self._require_open()
+            stale = [
+                r[0]
+                for r in conn.execute(
+                    "SELECT path FROM probes"
+                    " WHERE path >= ? AND path < ? AND seen_run != ?",
+                    (base, upper, self.run_id),
+                )
+                if not os.path.exists(r[0])
+            ]
+            conn.executemany("DELETE FROM probes WHERE path = ?", [(p,) for p in stale])
+            conn.commit()
+            self._pending = 0
+            total = conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+            if stale and len(stale) >= _VACUUM_RATIO * (total + len(stale)):
+                conn.execute("VACUUM")
+        return len(stale)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    # Internal
+    def _open_read_only(self) -> None:
+        uri = f"{self.path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.Error:
+            conn.close()
+            raise
+        if version != SCHEMA_VERSION:
+            conn.close()
+            raise sqlite3.DatabaseError(
+                f"schema version {version}, expected {SCHEMA_VERSION}"
+            )
+        self._conn = conn
+
+    @classmethod
+    def _find(
+        cls, conn: sqlite3.Connection, key: str, sig: FileSignature
+    ) -> tuple[int, int, int, int, str] | None:
+        row = conn.execute(
+            "SELECT size, mtime_ns, inode, device, payload FROM probes WHERE path = ?",
+            (key,),
+        ).fetchone()
+        # The device is not compared here: it can change when removable
+        # or network storage is remounted, while the path stays the same
+        if row is None or tuple(row[:3]) != sig.as_tuple()[:3]:
+            return cls._moved(conn, sig)
+        return tuple(row)
+
+    @staticmethod
+    def _moved(
+        conn: sqlite3.Connection, sig: FileSignature
+    ) -> tuple[int, int, int, int, str] | None:
+        """An entry stored under another path for the same file and content."""
+        row = conn.execute(
+            "SELECT size, mtime_ns, inode, device, payload FROM probes"
+            " WHERE inode = ? AND device = ? AND size = ? AND mtime_ns = ?"
+            " LIMIT 1",
+            (sig.inode, sig.device, sig.size, sig.mtime_ns),
+        ).fetchone()
+        return None if row is None else tuple(row)
+
+    def _tick(self) -> None:
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self._require_open().commit()
+            self._pending = 0
+
+    def _require_open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("ProbeCache is not open")
+        return self._conn
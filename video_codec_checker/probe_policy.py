@@ -0,0 +1,71 @@
+"""Adaptive ffprobe timeouts and retries.
+
+A fixed timeout is wrong both ways: a hung NFS read holds a worker for the
+whole limit, while a large file on slow storage can legitimately need longer.
+ProbePolicy derives each probe's limit from the latency of successful probes
+so far (a multiple of their p99, clamped) plus an allowance per GiB of file,
+keeping the old fixed limit until enough probes have been observed. Probes
+that fail transiently (timeout, I/O errors) are retried a bounded number of
+times with jittered exponential backoff and a doubled limit; files that still
+fail are quarantined by ProbeExecutor and retried once more at the end of the
+run, at lower concurrency with the maximum limit.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from dataclasses import dataclass, field
+
+from video_codec_checker.histogram import LatencyHistogram
+from video_codec_checker.video_processor import PROBE_TIMEOUT, TRANSIENT_ERRORS
+
+DEFAULT_RETRIES = 2
+DEFAULT_MAX_TIMEOUT = 300.0
+
+# Successful probes needed before timeouts follow observed latency
+MIN_SAMPLES = 20
+
+_GIB = 1024**3
+
+
+@dataclass
+class ProbePolicy:
+    """Per-probe timeout and retry decisions, fed by observed latencies."""
+
+    retries: int = DEFAULT_RETRIES
+    max_timeout: float = DEFAULT_MAX_TIMEOUT
+    min_timeout: float = 5.0
+    # Limit = p99 of successful probes times this, before the size allowance
+    p99_multiplier: float = 4.0
+    seconds_per_gib: float = 2.0
+    backoff: float = 0.5
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def observe(self, seconds: float) -> None:
+        """Record how long a successful probe took."""
+        with self._lock:
+            self.latency.record(seconds)
+
+    def timeout(self, size: int, attempt: int = 0, final: bool = False) -> float:
+        """Seconds allowed for one ffprobe call on a file of `size` bytes."""
+        if final:
+            return self.max_timeout
+        with self._lock:
+            observed = self.latency.count >= MIN_SAMPLES
+            p99 = self.latency.quantile(0.99)
+        base = PROBE_TIMEOUT
+        if observed:
+            base = max(self.min_timeout, self.p99_multiplier * p99)
+        limit = (base + self.seconds_per_gib * size / _GIB) * 2.0**attempt
+        return min(self.max_timeout, limit)
+
+    def should_retry(self, error: str | None, attempt: int) -> bool:
+        return error in TRANSIENT_ERRORS and attempt < self.retries
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before retry `attempt + 1`, jittered to spread retries."""
+        return self.backoff * 2.0**attempt * random.uniform(0.5, 1.5)
@@ -0,0 +1,215 @@
+"""Self-tuning fast-probe settings per file extension.
+
+Fast-probe fallbacks cluster by container: most files succeed with a small
+-probesize/-analyzeduration while some (MPEG-PS/TS, odd AVIs) almost always
+need a second, full probe. ProbeTuner tracks fallback rates and timings per
+extension, raises the probe limits for extensions that keep falling back and,
+once the largest limits still fail, sends those files straight to the full
+probe. The learned levels are persisted as JSON for the next run.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO
+
+from video_codec_checker.probe_cache import default_cache_path
+
+# Bump when the profile layout changes; other versions are ignored on load.
+PROFILE_VERSION = 1
+
+# Each level multiplies -probesize and -analyzeduration by this factor.
+LEVEL_FACTOR = 4
+MAX_LEVEL = 3
+
+# Decide only after this many fast attempts at the current level.
+MIN_SAMPLES = 16
+
+# Escalate when more than this share of fast attempts fell back.
+ESCALATE_RATE = 0.25
+
+# While fast probing is skipped, still try it on one file in this many so the
+# extension can recover if its files change.
+EXPLORE_EVERY = 32
+
+_SIZE_RE = re.compile(r"^(\d+(?:\.\d+)?)([KMG]?)(i?)$")
+_TUNED_OPTS = ("-probesize", "-analyzeduration")
+
+
+def default_profile_path() -> Path:
+    """Return the default profile location, next to the probe cache."""
+    return default_cache_path().with_name("probe-profile.json")
+
+
+def _parse_size(value: str) -> int | None:
+    """Parse an ffmpeg size option ('5M', '500K', '2Mi', '1000000')."""
+    m = _SIZE_RE.match(value.strip())
+    if not m:
+        return None
+    num, prefix, binary = m.groups()
+    base = 1024 if binary else 1000
+    return int(float(num) * base ** " KMG".index(prefix or " "))
+
+
+@dataclass
+class ExtensionProfile:
+    """Learned level and counters for one extension.
+
+    Counters cover the current level only and restart when it changes.
+    """
+
+    level: int = 0
+    skip_fast: bool = False
+    attempts: int = 0
+    fallbacks: int = 0
+    full_probes: int = 0
+    fast_time: float = 0.0
+    full_time: float = 0.0
+    seen: int = 0
+
+    def reset_window(self) -> None:
+        self.attempts = self.fallbacks = self.full_probes = 0
+        self.fast_time = self.full_time = 0.0
+
+
+class ProbeTuner:
+    """Choose fast-probe arguments per extension and learn from outcomes.
+
+    Thread-safe: args_for and record may be called from worker threads.
+    """
+
+    def __init__(self, ffprobe_args: list[str], path: Path | None = None) -> None:
+        self.base_args = list(ffprobe_args)
+        self.path = path
+        self._base: dict[str, int] = {}
+        for i, opt in enumerate(self.base_args[:-1]):
+            if opt in _TUNED_OPTS:
+                size = _parse_size(self.base_args[i + 1])
+                if size is not None:
+                    self._base[opt] = size
+        self._profiles: dict[str, ExtensionProfile] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return path.suffix.lower()
+
+    def load(self) -> None:
+        """Load a saved profile; ignore it if missing, corrupt or stale.
+
+        A profile learned from different base arguments is discarded.
+        """
+        if self.path is None:
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != PROFILE_VERSION
+            or data.get("base_args") != self.base_args
+        ):
+            return
+        profiles = {}
+        for ext, raw in (data.get("extensions") or {}).items():
+            try:
+                profiles[ext] = ExtensionProfile(**raw)
+            except TypeError:
+                return
+        with self._lock:
+            self._profiles = profiles
+
+    def save(self) -> None:
+        """Atomically write the learned profile."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "version": PROFILE_VERSION,
+                "base_args": self.base_args,
+                "extensions": {
+                    ext: asdict(p) for ext, p in sorted(self._profiles.items())
+                },
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, self.path)
+
+    def args_for(self, path: Path, key: str | None = None) -> list[str] | None:
+        """Return fast-probe args for this file, or None to probe fully.
+
+        `key` overrides the file's own extension (e.g. the sniffed container).
+        """
+        with self._lock:
+            p = self._profiles.setdefault(key or self.key(path), ExtensionProfile())
+            p.seen += 1
+            if p.skip_fast and p.seen % EXPLORE_EVERY:
+                return None
+            level = p.level
+        if level == 0 or not self._base:
+            return list(self.base_args)
+        scale = LEVEL_FACTOR**level
+        args = list(self.base_args)
+        for i, opt in enumerate(args[:-1]):
+            if opt in self._base:
+                args[i + 1] = str(self._base[opt] * scale)
+        return args
+
+    def record(self, path: Path, local_stats: dict, key: str | None = None) -> None:
+        """Update the extension's profile from one file's probe stats."""
+        with self._lock:
+            p = self._profiles.setdefault(key or self.key(path), ExtensionProfile())
+            p.attempts += int(local_stats.get("fast_attempted", 0))
+            p.fallbacks += int(local_stats.get("fast_fallbacks", 0))
+            p.full_probes += int(local_stats.get("full_probes", 0))
+            p.fast_time += float(local_stats.get("fast_time", 0.0))
+            p.full_time += float(local_stats.get("full_time", 0.0))
+            if p.attempts < MIN_SAMPLES:
+                return
+            failing = p.fallbacks > ESCALATE_RATE * p.attempts
+            if p.skip_fast:
+                # Exploration samples at the top level started succeeding
+                p.skip_fast = failing
+            elif failing and p.level < MAX_LEVEL and self._base:
+                p.level += 1
+            elif failing:
+                p.skip_fast = True
+            else:
+                return
+            p.reset_window()
+
+    def profile(self, ext: str) -> ExtensionProfile:
+        with self._lock:
+            return ExtensionProfile(**asdict(self._profiles[ext]))
+
+    def print_summary(self, stream: IO[str] = sys.stderr) -> None:
+        """Print one line per extension with a non-default setting or activity."""
+        with self._lock:
+            items = sorted(self._profiles.items())
+        for ext, p in items:
+            if not (p.level or p.skip_fast or p.fallbacks):
+                continue
+            avg_fast = p.fast_time / p.attempts if p.attempts else 0.0
+            avg_full = p.full_time / p.full_probes if p.full_probes else 0.0
+            print(
+                "Probe tuning %s: level=%d%s, fast_fallbacks=%d/%d, "
+                "avg_fast=%.3fs, avg_full=%.3fs"
+                % (
+                    ext or "(none)",
+                    p.level,
+                    " (full probe only)" if p.skip_fast else "",
+                    p.fallbacks,
+                    p.attempts,
+                    avg_fast,
+                    avg_full,
+                ),
+                file=stream,
+            )
@@ -42,6 +42,36 @@ def resolve_trash_config(trash_original: bool) -> TrashConfig:
     )
 
 
+_GENERATED_PREFIX = "# Generated by video-codec-checker"
+_COMMAND_PREFIXES = ("run_and_cleanup ", "ffmpeg ")
+
+
+def split_script(text: str) -> tuple[list[str], list[str]]:
+    """Split a script written by ScriptWriter into (preamble, command lines).
+
+    The "Generated by" timestamp line is dropped from the preamble so
+    preambles of scripts written with the same cleanup settings compare equal.
+    """
+    preamble: list[str] = []
+    commands: list[str] = []
+    for line in text.splitlines():
+        if line.startswith(_COMMAND_PREFIXES):
+            commands.append(line)
+        elif not commands and not line.startswith(_GENERATED_PREFIX):
+            preamble.append(line)
+    return preamble, commands
+
+
+def write_merged_script(
+    path: Path | str, preamble: list[str], commands: list[str], sources: int
+) -> None:
+    """Write a script from a split_script preamble and merged command lines."""
+    ts = datetime.now().isoformat()
+    header = f"{_GENERATED_PREFIX} on {ts} (merged from {sources} scripts)"
+    lines = [*preamble[:2], header, *preamble[2:], *commands]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
 class ScriptWriter:
     """Writes a shell script with conversion commands and optional cleanup."""
 
@@ -56,13 +86,17 @@ class ScriptWriter:
         self.trash_config = trash_config or TrashConfig(use_trash=False)
         self._fh: IO[str] | None = None
 
-    def open(self) -> None:
+    def open(self, append: bool = False) -> None:
+        """Write the preamble; with append, continue an existing script."""
+        if append and self.path.is_file() and self.path.stat().st_size > 0:
+            self._fh = self.path.open("a", encoding="utf-8")
+            return
         ts = datetime.now().isoformat()
         fh = self.path.open("w", encoding="utf-8")
         self._fh = fh
         fh.write("#!/usr/bin/env bash\n")
         fh.write("set -euo pipefail\n")
-        fh.write(f"# Generated by video-codec-checker on {ts}\n\n")
+        fh.write(f"{_GENERATED_PREFIX} on {ts}\n\n")
 
         if self.delete_original or self.trash_config.use_trash:
             fh.write(
@@ -89,6 +123,8 @@ class ScriptWriter:
                 '  if [ $rc -eq 0 ] && [ -f "$3" ]; then\n'
                 '    echo "[CLEANUP] Removing source: $2"\n'
                 '    cleanup_source "$2"\n'
+                "  elif [ $rc -ne 0 ]; then\n"
+                '    rm -f -- "$3"\n'
                 "  fi\n"
                 "  return $rc\n"
                 "}\n\n"
@@ -109,9 +145,15 @@ class ScriptWriter:
         )
         fh.write(line)
 
-    def write_command_no_cleanup(self, ffmpeg_cmd: str) -> None:
+    def write_command_no_cleanup(self, ffmpeg_cmd: str, dst: Path) -> None:
+        """Write the command alone; a failed encode removes its partial output."""
         fh = self._require_open()
-        fh.write(ffmpeg_cmd + "\n")
+        fh.write(
+            f"{ffmpeg_cmd} || {{ rc=$?; rm -f -- {sh_quote(str(dst))}; exit $rc; }}\n"
+        )
+
+    def flush(self) -> None:
+        self._require_open().flush()
 
     def close(self) -> None:
         fh = self._require_open()
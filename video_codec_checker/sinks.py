@@ -0,0 +1,284 @@
+"""Pluggable result sinks: CSV, JSONL, SQLite and (optionally) Parquet.
+
+Every sink takes CsvRow values. CSV keeps the historical column set; the
+other formats store the full record (CsvRow.as_record), including the probe
+geometry, frame rate, duration and bitrate. Non-CSV sinks buffer rows and
+write them in batches, flushing once `batch_rows` rows are pending or
+`batch_seconds` have passed since the last flush, so a large scan does not
+pay a write (or an SQLite commit) per file.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any, Iterator, Protocol
+
+from video_codec_checker.csv_writer import CsvResultsWriter, read_results
+from video_codec_checker.models import CsvRow, OutputFormat
+
+DEFAULT_BATCH_ROWS = 1000
+DEFAULT_BATCH_SECONDS = 2.0
+
+# SQLite column types, in CsvRow.as_record order
+_SQL_TYPES = {
+    "file": "TEXT PRIMARY KEY",
+    "codec": "TEXT",
+    "probe_status": "TEXT",
+    "audio_channels": "INTEGER",
+    "bits_per_pixel": "REAL",
+    "width": "INTEGER",
+    "height": "INTEGER",
+    "fps": "REAL",
+    "duration": "REAL",
+    "bit_rate": "INTEGER",
+    "est_output_bytes": "INTEGER",
+    "est_bytes_saved": "INTEGER",
+    "est_encode_cpu_seconds": "REAL",
+    "ffmpeg_command": "TEXT",
+    "duplicate_of": "TEXT",
+    "est_source": "TEXT",
+    "preset": "INTEGER",
+}
+RECORD_FIELDS = list(_SQL_TYPES)
+
+# pyarrow type factory for each SQLite type, so Parquet follows _SQL_TYPES
+_ARROW_TYPES = {"TEXT": "string", "INTEGER": "int64", "REAL": "float64"}
+
+SUFFIXES = {
+    OutputFormat.CSV: ".csv",
+    OutputFormat.JSONL: ".jsonl",
+    OutputFormat.SQLITE: ".sqlite",
+    OutputFormat.PARQUET: ".parquet",
+}
+
+
+class ResultSink(Protocol):
+    def open(self, append: bool = False) -> None: ...
+
+    def write_row_dc(self, row: CsvRow) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class BatchedSink(ABC):
+    """Buffer rows and hand them to `_write_batch` on size/time thresholds."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        batch_seconds: float = DEFAULT_BATCH_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_rows = max(1, batch_rows)
+        self.batch_seconds = batch_seconds
+        self._pending: list[CsvRow] = []
+        self._last_flush = time.monotonic()
+        self._open = False
+
+    def open(self, append: bool = False) -> None:
+        """Create the output, or continue an existing one with append."""
+        self._open_backend(append)
+        self._open = True
+        self._last_flush = time.monotonic()
+
+    def write_row_dc(self, row: CsvRow) -> None:
+        if not self._open:
+            raise RuntimeError(f"{type(self).__name__} is not open")
+        self._pending.append(row)
+        if (
+            len(self._pending) >= self.batch_rows
+            or time.monotonic() - self._last_flush >= self.batch_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._write_batch(self._pending)
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if not self._open:
+            return
+        self.flush()
+        self._close_backend()
+        self._open = False
+
+    @abstractmethod
+    def _open_backend(self, append: bool) -> None: ...
+
+    @abstractmethod
+    def _write_batch(self, rows: list[CsvRow]) -> None: ...
+
+    @abstractmethod
+    def _close_backend(self) -> None: ...
+
+
+class JsonlSink(BatchedSink):
+    """One JSON object per line; each batch is a single write call."""
+
+    _fh: IO[str] | None = None
+
+    def _open_backend(self, append: bool) -> None:
+        self._fh = self.path.open("a" if append else "w", encoding="utf-8")
+
+    def _write_batch(self, rows: list[CsvRow]) -> None:
+        assert self._fh is not None
+        self._fh.write(
+            "".join(json.dumps(r.as_record(), ensure_ascii=False) + "\n" for r in rows)
+        )
+        self._fh.flush()
+
+    def _close_backend(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class SqliteSink(BatchedSink):
+    """A `results` table keyed by path and indexed by codec.
+
+    Each batch is one transaction. The file starts empty like the other
+    report formats unless appending; rewriting a file's row replaces it.
+    Appending to a table from an older version adds the missing columns.
+    """
+
+    _conn: sqlite3.Connection | None = None
+
+    def _open_backend(self, append: bool) -> None:
+        if not append:
+            self.path.unlink(missing_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{name} {_SQL_TYPES[name]}" for name in RECORD_FIELDS)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS results ({columns})")
+        have = {info[1] for info in conn.execute("PRAGMA table_info(results)")}
+        for name in RECORD_FIELDS:
+            if name not in have:
+                conn.execute(
+                    f"ALTER TABLE results ADD COLUMN {name} {_SQL_TYPES[name]}"
+                )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_codec ON results (codec)")
+        conn.commit()
+        self._conn = conn
+
+    def _write_batch(self, rows: list[CsvRow]) -> None:
+        assert self._conn is not None
+        names = ", ".join(RECORD_FIELDS)
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS)
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO results ({names}) VALUES ({placeholders})",
+                [tuple(r.as_record()[name] for name in RECORD_FIELDS) for r in rows],
+            )
+
+    def _close_backend(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ParquetSink(BatchedSink):
+    """Columnar output via pyarrow (`pip install video-codec-checker[parquet]`).
+
+    Each batch becomes one row group. Parquet files cannot be appended to.
+    """
+
+    _writer: Any = None
+
+    def _open_backend(self, append: bool) -> None:
+        if append:
+            raise RuntimeError("Parquet reports cannot be appended to")
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError(
+                "Parquet output requires pyarrow: "
+                "pip install 'video-codec-checker[parquet]'"
+            ) from exc
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                (name, getattr(pa, _ARROW_TYPES[_SQL_TYPES[name].split()[0]])())
+                for name in RECORD_FIELDS
+            ]
+        )
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+
+    def _write_batch(self, rows: list[CsvRow]) -> None:
+        table = self._pa.Table.from_pylist(
+            [r.as_record() for r in rows], schema=self._schema
+        )
+        self._writer.write_table(table)
+
+    def _close_backend(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def make_sink(
+    fmt: OutputFormat,
+    path: str | Path,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    batch_seconds: float = DEFAULT_BATCH_SECONDS,
+) -> ResultSink:
+    """Return an unopened sink for `fmt` writing to `path`."""
+    if fmt is OutputFormat.CSV:
+        return CsvResultsWriter(path)
+    kinds: dict[OutputFormat, type[BatchedSink]] = {
+        OutputFormat.JSONL: JsonlSink,
+        OutputFormat.SQLITE: SqliteSink,
+        OutputFormat.PARQUET: ParquetSink,
+    }
+    return kinds[fmt](path, batch_rows, batch_seconds)
+
+
+def format_for_path(path: str | Path) -> OutputFormat:
+    """Guess a report's format from its suffix (CSV when unknown)."""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".db", ".sqlite3"):
+        return OutputFormat.SQLITE
+    for fmt, known in SUFFIXES.items():
+        if suffix == known:
+            return fmt
+    return OutputFormat.CSV
+
+
+def read_rows(path: str | Path) -> Iterator[CsvRow]:
+    """Yield rows from a report in any supported format."""
+    fmt = format_for_path(path)
+    if fmt is OutputFormat.CSV:
+        yield from read_results(path)
+    elif fmt is OutputFormat.JSONL:
+        with Path(path).open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield CsvRow.from_record(json.loads(line))
+    elif fmt is OutputFormat.SQLITE:
+        conn = sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            for record in conn.execute("SELECT * FROM results"):
+                yield CsvRow.from_record(dict(record))
+        finally:
+            conn.close()
+    else:
+        import pyarrow.parquet as pq
+
+        for record in pq.read_table(str(path)).to_pylist():
+            yield CsvRow.from_record(record)
@@ -0,0 +1,135 @@
+"""Container sniffing from the first bytes of a file.
+
+A cheap stage before ffprobe: SNIFF_BYTES are read and matched against
+container signatures (EBML, ISO BMFF/QuickTime, RIFF AVI, MPEG program and
+transport streams, ASF, FLV, Ogg). Files that are certainly not video,
+zero-byte placeholders, HTML/XML pages and documents, archives or images
+saved under a video name, are rejected without spawning ffprobe. Anything
+else is left to ffprobe, including heads that are merely odd: leading zero
+padding (common in MPEG-PS/TS captures), an ID3 tag before an MPEG stream,
+or text that is not markup.
+
+The detected container is reported as a canonical extension, so a file whose
+name disagrees with its content (an .avi that is really Matroska) is probed
+with the settings learned for what it actually is.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+SNIFF_BYTES = 1024
+
+_TS_PACKET = 188
+_M2TS_PACKET = 192
+
+_ASF_GUID = bytes.fromhex("3026b2758e66cf11a6d900aa0062ce6c")
+_QT_ATOMS = (b"moov", b"mdat", b"free", b"wide", b"skip", b"pnot")
+
+# Extensions each container is normally saved under
+FAMILIES = {
+    ".mkv": frozenset({".mkv", ".webm", ".mka", ".mk3d"}),
+    ".mp4": frozenset({".mp4", ".m4v", ".mov", ".3gp", ".3g2", ".f4v"}),
+    ".mov": frozenset({".mov", ".mp4", ".m4v", ".qt"}),
+    ".3gp": frozenset({".3gp", ".3g2", ".mp4"}),
+    ".avi": frozenset({".avi", ".divx"}),
+    ".mpg": frozenset({".mpg", ".mpeg", ".vob", ".m2v", ".mpe"}),
+    ".ts": frozenset({".ts", ".m2ts", ".mts", ".tp", ".trp"}),
+    ".wmv": frozenset({".wmv", ".asf", ".wma"}),
+    ".flv": frozenset({".flv"}),
+    ".ogv": frozenset({".ogv", ".ogg", ".ogm"}),
+}
+
+# Signatures at offset 0: (prefix, container)
+_PREFIXES = (
+    (b"\x1a\x45\xdf\xa3", ".mkv"),
+    (b"\x00\x00\x01\xba", ".mpg"),  # program stream pack header
+    (b"\x00\x00\x01\xb3", ".mpg"),  # elementary stream sequence header
+    (_ASF_GUID, ".wmv"),
+    (b"FLV\x01", ".flv"),
+    (b"OggS", ".ogv"),
+)
+
+# Signatures of common non-video files: (prefix, reason)
+_NOT_VIDEO = (
+    (b"%PDF", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"\x1f\x8b", "gzip"),
+    (b"Rar!", "rar"),
+    (b"7z\xbc\xaf", "7z"),
+    (b"\x89PNG", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF8", "gif"),
+)
+# Markup openings, compared lowercased
+_MARKUP = (b"<!doctype", b"<html", b"<?xml", b"<head", b"<body")
+
+
+@dataclass(frozen=True)
+class Sniffed:
+    """container: canonical extension or None; not_video: why it is rejected."""
+
+    container: str | None = None
+    not_video: str | None = None
+
+    def mismatch(self, path: Path) -> bool:
+        """True if the file's extension is not one used for its container."""
+        if self.container is None:
+            return False
+        return path.suffix.lower() not in FAMILIES[self.container]
+
+
+def container_of(head: bytes) -> str | None:
+    """Canonical extension for the container signature at the start of `head`."""
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand == b"qt  ":
+            return ".mov"
+        return ".3gp" if brand[:2] == b"3g" else ".mp4"
+    if head[4:8] in _QT_ATOMS:
+        return ".mov"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return ".avi"
+    for prefix, container in _PREFIXES:
+        if head.startswith(prefix):
+            return container
+    if _synced(head, 0, _TS_PACKET) or _synced(head, 4, _M2TS_PACKET):
+        return ".ts"
+    return None
+
+
+def not_video_reason(head: bytes) -> str | None:
+    """Why `head` cannot start a video file, or None if it might."""
+    if not head:
+        return "empty"
+    for prefix, reason in _NOT_VIDEO:
+        if head.startswith(prefix):
+            return reason
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(_MARKUP):
+        return "markup"
+    return None
+
+
+def sniff(head: bytes) -> Sniffed:
+    container = container_of(head)
+    if container is not None:
+        return Sniffed(container)
+    return Sniffed(not_video=not_video_reason(head))
+
+
+def sniff_file(path: Path) -> Sniffed:
+    """Sniff the first SNIFF_BYTES of `path`; unreadable files pass through."""
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(SNIFF_BYTES)
+    except OSError:
+        return Sniffed()
+    return sniff(head)
+
+
+def _synced(head: bytes, first: int, packet: int) -> bool:
+    """Three transport-stream sync bytes at packet spacing."""
+    offsets = range(first, first + 3 * packet, packet)
+    return len(head) > offsets[-1] and all(head[i] == 0x47 for i in offsets)
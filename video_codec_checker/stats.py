@@ -1,14 +1,20 @@
 """Probe statistics aggregation and reporting.
 
-Maintains counters and timings for fast and full ffprobe calls.
+Maintains counters and timings for fast and full ffprobe calls, plus
+per-stage latency histograms (see histogram.StageTimings).
 """
 
 from __future__ import annotations
 
+import json
 import sys
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
 from typing import IO, Dict
 
+from video_codec_checker.histogram import StageTimings
+
 
 @dataclass
 class ProbeStats:
@@ -16,7 +22,18 @@ class ProbeStats:
 
     Keys mirror those produced by video_processor.probe_video_metadata when a stats
     dict is provided: fast_attempted, fast_succeeded, fast_fallbacks, fast_time,
-    full_probes, full_time.
+    full_probes, full_time. ProbeExecutor adds cache_hits and cache_misses when a
+    probe cache is in use, native_attempted/native_hits/native_fallbacks for the
+    container header tier, and records its in-flight window size and the peak
+    number of probes in flight. discovered/submitted/probed/in_flight and
+    discovery_done track live progress for the metrics exporter. retries and
+    timeouts count probe attempts; files that still failed are quarantined
+    and retried at the end, and probe_errors counts those that never
+    succeeded. not_a_video counts files the content sniffer rejected before
+    ffprobe, sniff_mismatches those whose extension did not match their
+    container. filtered counts what the discovery filters skipped. Per-file
+    stage latencies (native header parse, fast and full probe) go into
+    `timings` when add() is given the file's path.
     """
 
     fast_attempted: int = 0
@@ -25,6 +42,28 @@ class ProbeStats:
     fast_time: float = 0.0
     full_probes: int = 0
     full_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    native_attempted: int = 0
+    native_hits: int = 0
+    native_fallbacks: int = 0
+    window_size: int = 0
+    peak_in_flight: int = 0
+    discovered: int = 0
+    submitted: int = 0
+    probed: int = 0
+    in_flight: int = 0
+    discovery_done: bool = False
+    retries: int = 0
+    timeouts: int = 0
+    quarantined: int = 0
+    probe_errors: int = 0
+    not_a_video: int = 0
+    sniff_mismatches: int = 0
+    # Files and directories skipped by discovery filters, by reason
+    filtered: dict[str, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic, compare=False)
+    timings: StageTimings = field(default_factory=StageTimings, compare=False)
 
     def new_local(self) -> Dict[str, float | int]:
         """Return a fresh local stats dict for a single file probe."""
@@ -35,16 +74,62 @@ class ProbeStats:
             "fast_time": 0.0,
             "full_probes": 0,
             "full_time": 0.0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "native_attempted": 0,
+            "native_hits": 0,
+            "native_fallbacks": 0,
+            "native_time": 0.0,
+            "retries": 0,
+            "timeouts": 0,
+            "not_a_video": 0,
+            "sniff_mismatches": 0,
         }
 
-    def add(self, local: Dict[str, float | int]) -> None:
+    def add(self, local: Dict[str, float | int], path: Path | None = None) -> None:
         """Merge a local stats dict produced during a single file probe."""
+        self._record_latencies(local, path)
         self.fast_attempted += int(local.get("fast_attempted", 0))
         self.fast_succeeded += int(local.get("fast_succeeded", 0))
         self.fast_fallbacks += int(local.get("fast_fallbacks", 0))
         self.fast_time += float(local.get("fast_time", 0.0))
         self.full_probes += int(local.get("full_probes", 0))
         self.full_time += float(local.get("full_time", 0.0))
+        self.cache_hits += int(local.get("cache_hits", 0))
+        self.cache_misses += int(local.get("cache_misses", 0))
+        self.native_attempted += int(local.get("native_attempted", 0))
+        self.native_hits += int(local.get("native_hits", 0))
+        self.native_fallbacks += int(local.get("native_fallbacks", 0))
+        self.retries += int(local.get("retries", 0))
+        self.timeouts += int(local.get("timeouts", 0))
+        self.not_a_video += int(local.get("not_a_video", 0))
+        self.sniff_mismatches += int(local.get("sniff_mismatches", 0))
+
+    def _record_latencies(
+        self, local: Dict[str, float | int], path: Path | None
+    ) -> None:
+        for stage, attempts, seconds in (
+            ("native", "native_attempted", "native_time"),
+            ("fast_probe", "fast_attempted", "fast_time"),
+            ("full_probe", "full_probes", "full_time"),
+        ):
+            if local.get(attempts):
+                self.timings.record(stage, float(local.get(seconds, 0.0)), path)
+
+    def to_dict(self) -> dict[str, object]:
+        """Counters plus per-stage latency histograms, for --stats-json."""
+        data: dict[str, object] = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name not in ("timings", "started")
+        }
+        data["latency"] = self.timings.to_dict()
+        return data
+
+    def write_json(self, path: str | Path) -> None:
+        with Path(path).open("w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+            fh.write("\n")
 
     def _fmt(self, sec: float) -> str:
         return f"{sec:.3f}s"
@@ -52,7 +137,63 @@ class ProbeStats:
     def print_summary(
         self, fast_probe_enabled: bool, stream: IO[str] = sys.stderr
     ) -> None:
-        """Print a short stats + timing summary if fast-probe was used."""
+        """Print a short stats + timing summary if fast-probe was used.
+
+        Scheduler, cache, native-header and latency lines are printed
+        regardless of fast-probe.
+        """
+        if self.window_size > 0:
+            print(
+                "Scheduler: window=%d, peak_in_flight=%d"
+                % (self.window_size, self.peak_in_flight),
+                file=stream,
+            )
+        lookups = self.cache_hits + self.cache_misses
+        if lookups > 0:
+            print(
+                "Cache: hits=%d, misses=%d, hit_rate=%.1f%%"
+                % (
+                    self.cache_hits,
+                    self.cache_misses,
+                    100.0 * self.cache_hits / lookups,
+                ),
+                file=stream,
+            )
+        if self.native_attempted > 0:
+            print(
+                "Native headers: attempted=%d, hits=%d, fallbacks=%d, hit_rate=%.1f%%"
+                % (
+                    self.native_attempted,
+                    self.native_hits,
+                    self.native_fallbacks,
+                    100.0 * self.native_hits / self.native_attempted,
+                ),
+                file=stream,
+            )
+        if self.filtered:
+            reasons = ", ".join(
+                f"{reason}={count}" for reason, count in sorted(self.filtered.items())
+            )
+            print(f"Filtered before probing: {reasons}", file=stream)
+        if self.not_a_video or self.sniff_mismatches:
+            print(
+                "Sniffed: not_a_video=%d, extension_mismatches=%d"
+                % (self.not_a_video, self.sniff_mismatches),
+                file=stream,
+            )
+        if self.retries or self.quarantined:
+            print(
+                "Probe failures: retries=%d, timeouts=%d, quarantined=%d, "
+                "failed=%d"
+                % (
+                    self.retries,
+                    self.timeouts,
+                    self.quarantined,
+                    self.probe_errors,
+                ),
+                file=stream,
+            )
+        self.timings.print_table(stream)
         if not fast_probe_enabled:
             return
         total_fast = self.fast_attempted
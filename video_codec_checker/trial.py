@@ -0,0 +1,325 @@
+"""Sampled trial encodes to predict output size and encode cost per file.
+
+The bpp model in estimator.py cannot tell grainy film from flat animation.
+TrialEncoder instead encodes a few short segments, spread evenly through the
+file, with exactly the command generate_ffmpeg_command produces (input
+seeking and a duration limit added, output sent to a scratch file), all
+segments in parallel. Output bytes and CPU time (from wait4's rusage) per
+second of source are extrapolated to the whole duration. Files shorter than
+the segments combined are encoded whole once, which is exact. A segment
+that runs past its deadline (a corrupt file, a seek into a broken index) is
+killed and the file counted as failed, as are all running segments when the
+scan is interrupted.
+
+Segment results are stored in an SQLite TrialCache keyed on the file's
+content fingerprint (dedup.fingerprint), the encode settings and the
+segment bounds, so rescans, renames and copies cost nothing.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from video_codec_checker.dedup import fingerprint
+from video_codec_checker.estimator import Estimate
+from video_codec_checker.ffmpeg_generator import generate_ffmpeg_command, limit_threads
+from video_codec_checker.models import FileProbeResult, TrialSettings
+from video_codec_checker.probe_cache import default_cache_path
+
+# A segment encode is killed after this many seconds per second of source,
+# and never sooner than MIN_SEGMENT_TIMEOUT
+SEGMENT_TIMEOUT_FACTOR = 60.0
+MIN_SEGMENT_TIMEOUT = 120.0
+
+
+def default_trial_cache_path() -> Path:
+    """Return the default trial cache location, next to the probe cache."""
+    return default_cache_path().with_name("trial-cache.sqlite3")
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One trial encode: where it starts, how long, and what it cost."""
+
+    start: float
+    seconds: float
+    output_bytes: int = 0
+    cpu_seconds: float = 0.0
+
+
+def segment_bounds(
+    duration: float, count: int, seconds: float
+) -> list[tuple[float, float]]:
+    """(start, length) of `count` segments centred in equal slices of the file."""
+    if duration <= count * seconds:
+        return [(0.0, duration)]
+    slice_len = duration / count
+    return [
+        (round(i * slice_len + (slice_len - seconds) / 2, 3), seconds)
+        for i in range(count)
+    ]
+
+
+def trial_argv(command: str, start: float, seconds: float, output: Path) -> list[str]:
+    """The conversion command limited to one segment, writing to `output`."""
+    argv = shlex.split(command)
+    i = argv.index("-i")
+    argv[i:i] = ["-ss", f"{start:.3f}", "-t", f"{seconds:.3f}"]
+    argv[-1] = str(output)
+    return argv
+
+
+def segment_timeout(seconds: float) -> float:
+    """Seconds a segment of `seconds` may take to encode before it is killed."""
+    return max(MIN_SEGMENT_TIMEOUT, seconds * SEGMENT_TIMEOUT_FACTOR)
+
+
+def settings_key(command: str) -> str:
+    """The encode options of a generated command, without input and output."""
+    argv = shlex.split(command)
+    return shlex.join(argv[argv.index("-i") + 2 : -1])
+
+
+class TrialCache:
+    """SQLite store of segment results, shared between worker threads."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " fingerprint TEXT NOT NULL,"
+            " settings TEXT NOT NULL,"
+            " start REAL NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " output_bytes INTEGER NOT NULL,"
+            " cpu_seconds REAL NOT NULL,"
+            " PRIMARY KEY (fingerprint, settings, start, seconds))"
+        )
+        conn.commit()
+        self._conn = conn
+
+    def get(
+        self, fp: str, settings: str, start: float, seconds: float
+    ) -> Segment | None:
+        with self._lock:
+            conn = self._require_open()
+            row = conn.execute(
+                "SELECT output_bytes, cpu_seconds FROM segments"
+                " WHERE fingerprint = ? AND settings = ?"
+                " AND start = ? AND seconds = ?",
+                (fp, settings, start, seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        return Segment(start, seconds, row[0], row[1])
+
+    def put(self, fp: str, settings: str, segment: Segment) -> None:
+        with self._lock:
+            conn = self._require_open()
+            conn.execute(
+                "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    fp,
+                    settings,
+                    segment.start,
+                    segment.seconds,
+                    segment.output_bytes,
+                    segment.cpu_seconds,
+                ),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _require_open(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("TrialCache is not open")
+        return self._conn
+
+
+class TrialEncoder:
+    """Predict a conversion from sampled segment encodes.
+
+    Segments of one file run concurrently, each limited to an equal share
+    of the CPUs. Counters: files estimated, segments encoded and segments
+    served from the cache.
+    """
+
+    def __init__(
+        self,
+        cache: TrialCache | None = None,
+        segments: int = TrialSettings.segments,
+        seconds: float = TrialSettings.seconds,
+    ) -> None:
+        self.cache = cache
+        self.segments = max(1, segments)
+        self.seconds = max(1.0, seconds)
+        self.threads = max(1, (os.cpu_count() or 1) // self.segments)
+        self.files = 0
+        self.encoded = 0
+        self.cached = 0
+        self.failed = 0
+        self._available = True
+        self._lock = threading.Lock()
+        # Running segment encodes, so an interrupted scan can kill them
+        self._live: set[subprocess.Popen[bytes]] = set()
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings: TrialSettings) -> TrialEncoder:
+        """An encoder with its cache opened (the caller closes it)."""
+        cache = None
+        if settings.cache:
+            cache = TrialCache(settings.cache_path or default_trial_cache_path())
+            cache.open()
+        return cls(cache, settings.segments, settings.seconds)
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+    def estimate(
+        self, result: FileProbeResult, input_bytes: int, command: str | None = None
+    ) -> Estimate | None:
+        """Extrapolated output size and CPU time; None if a segment failed."""
+        if not self._available or result.duration <= 0 or input_bytes <= 0:
+            return None
+        command = command or generate_ffmpeg_command(
+            Path(os.path.abspath(result.path)), result.channels
+        )
+        bounds = segment_bounds(result.duration, self.segments, self.seconds)
+        try:
+            fp = fingerprint(result.path, input_bytes)
+        except OSError:
+            return None
+        settings = settings_key(command)
+        pool = ThreadPoolExecutor(max_workers=len(bounds))
+        try:
+            done = list(
+                pool.map(lambda b: self._segment(command, fp, settings, *b), bounds)
+            )
+        except BaseException:
+            # Ctrl-C: kill the encodes rather than wait for them
+            self._kill_running()
+            pool.shutdown(wait=True)
+            self._cancelled.clear()
+            raise
+        pool.shutdown(wait=True)
+        if any(seg is None for seg in done):
+            self.failed += 1
+            return None
+        segments = [seg for seg in done if seg is not None]
+        sampled = sum(seg.seconds for seg in segments)
+        scale = result.duration / sampled
+        output = int(sum(seg.output_bytes for seg in segments) * scale)
+        self.files += 1
+        return Estimate(
+            output_bytes=output,
+            bytes_saved=max(0, input_bytes - output),
+            cpu_seconds=round(sum(seg.cpu_seconds for seg in segments) * scale, 1),
+        )
+
+    def summary(self) -> str | None:
+        if not (self.files or self.failed):
+            return None
+        return (
+            f"Trial encodes: {self.files} files estimated, {self.encoded} segments "
+            f"encoded, {self.cached} cached, {self.failed} files failed"
+        )
+
+    # Internal
+    def _segment(
+        self, command: str, fp: str, settings: str, start: float, seconds: float
+    ) -> Segment | None:
+        if self.cache is not None:
+            hit = self.cache.get(fp, settings, start, seconds)
+            if hit is not None:
+                with self._lock:
+                    self.cached += 1
+                return hit
+        segment = self._encode(command, start, seconds)
+        if segment is not None:
+            with self._lock:
+                self.encoded += 1
+            if self.cache is not None:
+                self.cache.put(fp, settings, segment)
+        return segment
+
+    def _encode(self, command: str, start: float, seconds: float) -> Segment | None:
+        with tempfile.TemporaryDirectory(prefix="vcc-trial-") as tmp:
+            out = Path(tmp) / "segment.mkv"
+            argv = limit_threads(trial_argv(command, start, seconds, out), self.threads)
+            try:
+                proc = subprocess.Popen(
+                    argv,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            except FileNotFoundError:
+                with self._lock:
+                    warn, self._available = self._available, False
+                if warn:
+                    print(
+                        "Warning: ffmpeg not found; trial encodes disabled",
+                        file=sys.stderr,
+                    )
+                return None
+            with self._lock:
+                self._live.add(proc)
+            # Registered before checking, so _kill_running cannot miss it
+            if self._cancelled.is_set():
+                proc.kill()
+            limit = segment_timeout(seconds)
+            timer = threading.Timer(limit, proc.kill)
+            timer.start()
+            t0 = time.monotonic()
+            try:
+                _, status, usage = os.wait4(proc.pid, 0)
+            finally:
+                timer.cancel()
+                with self._lock:
+                    self._live.discard(proc)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            if proc.returncode != 0 or not out.is_file():
+                if time.monotonic() - t0 >= limit:
+                    source = argv[argv.index("-i") + 1]
+                    print(
+                        f"Warning: trial encode killed after {limit:.0f}s: {source}",
+                        file=sys.stderr,
+                    )
+                return None
+            return Segment(
+                start, seconds, out.stat().st_size, usage.ru_utime + usage.ru_stime
+            )
+
+    def _kill_running(self) -> None:
+        self._cancelled.set()
+        with self._lock:
+            running = list(self._live)
+        for proc in running:
+            try:
+                proc.kill()
+            except OSError:
+                pass
@@ -1,41 +1,92 @@
 """Video processing functionality for codec checking."""
 
+import asyncio
 import json
+import os
 import subprocess
+import threading
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+from video_codec_checker.filters import FileFilter
+from video_codec_checker.models import FileProbeResult
+
+VIDEO_EXTENSIONS = frozenset(
+    {
+        ".mp4",
+        ".avi",
+        ".mkv",
+        ".mov",
+        ".wmv",
+        ".flv",
+        ".webm",
+        ".m4v",
+        ".mpg",
+        ".mpeg",
+        ".3gp",
+        ".ogv",
+    }
+)
 
-def get_video_files(
-    directory: str = ".", video_extensions: set[str] | None = None
-) -> list[Path]:
-    """Find all video files recursively in the given directory.
 
-    Uses a single directory walk and filters by suffix for performance.
+def iter_video_files(
+    directory: str = ".",
+    video_extensions: set[str] | None = None,
+    file_filter: FileFilter | None = None,
+) -> Iterator[Path]:
+    """Yield video files under `directory` as the walk discovers them.
+
+    Walks with os.scandir and relies on the cached DirEntry type, so regular
+    entries cost no extra stat. Symlinked directories are not descended into
+    (matching Path.rglob); unreadable directories are skipped. Order is the
+    filesystem's; use get_video_files for a sorted list. With file_filter,
+    pruned directories are not entered and filtered files are not yielded.
     """
-    if video_extensions is None:
-        video_extensions = {
-            ".mp4",
-            ".avi",
-            ".mkv",
-            ".mov",
-            ".wmv",
-            ".flv",
-            ".webm",
-            ".m4v",
-            ".mpg",
-            ".mpeg",
-            ".3gp",
-            ".ogv",
-        }
+    exts = VIDEO_EXTENSIONS if video_extensions is None else video_extensions
+    allowed = {ext.lower() for ext in exts}
+    rules = file_filter.root_rules() if file_filter is not None else ()
+    stack = [(directory, rules)]
+    while stack:
+        current, rules = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        scope = None
+        if file_filter is not None:
+            scope = file_filter.enter(current, entries, rules)
+            if scope is None:
+                continue
+            rules = scope.rules
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if scope is None or scope.keep_dir(entry):
+                        stack.append((entry.path, rules))
+                elif (
+                    os.path.splitext(entry.name)[1].lower() in allowed
+                    and entry.is_file()
+                    and (scope is None or scope.keep_file(entry))
+                ):
+                    yield Path(entry.path)
+            except OSError:
+                continue
 
-    allowed = {ext.lower() for ext in video_extensions}
-    path = Path(directory)
 
-    files = [p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in allowed]
+def get_video_files(
+    directory: str = ".",
+    video_extensions: set[str] | None = None,
+    file_filter: FileFilter | None = None,
+) -> list[Path]:
+    """Find all video files recursively in the given directory.
 
-    return sorted(set(files))  # Remove duplicates and sort
+    Materialises the whole walk and returns a sorted, de-duplicated list.
+    """
+    return sorted(set(iter_video_files(directory, video_extensions, file_filter)))
 
 
 # ---- ffprobe helpers (kept small to reduce complexity in the main API) ----
@@ -60,8 +111,97 @@ def _ensure_stats(stats: dict | None) -> dict:
     return stats
 
 
+# Seconds before a single ffprobe invocation is abandoned, unless a caller
+# sets its own limit with probe_timeout().
+PROBE_TIMEOUT = 30.0
+
+_timeout: ContextVar[float] = ContextVar("probe_timeout", default=PROBE_TIMEOUT)
+
+# FileProbeResult.error values; transient ones are worth retrying
+ERROR_TIMEOUT = "timeout"
+ERROR_IO = "io_error"
+ERROR_UNREADABLE = "unreadable"
+ERROR_BAD_OUTPUT = "bad_output"
+ERROR_NO_FFPROBE = "ffprobe_missing"
+# Rejected by the content sniffer before ffprobe (see sniff.py); not retried
+ERROR_NOT_A_VIDEO = "not_a_video"
+TRANSIENT_ERRORS = frozenset({ERROR_TIMEOUT, ERROR_IO})
+
+# ffprobe messages (-v error) for failures of the storage, not the file
+_TRANSIENT_MESSAGES = (
+    "Input/output error",
+    "Stale file handle",
+    "Resource temporarily unavailable",
+    "Connection timed out",
+    "Connection reset",
+    "Interrupted system call",
+)
+
+
+@contextmanager
+def probe_timeout(seconds: float) -> Iterator[None]:
+    """Limit each ffprobe call made by this thread or task to `seconds`."""
+    token = _timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _timeout.reset(token)
+
+
+def _failure_kind(result: subprocess.CompletedProcess[str]) -> str:
+    stderr = result.stderr or ""
+    if any(msg in stderr for msg in _TRANSIENT_MESSAGES):
+        return ERROR_IO
+    return ERROR_UNREADABLE if result.returncode != 0 else ERROR_BAD_OUTPUT
+
+
+# Running ffprobe children, so an interrupted scan can kill them at once
+_live: set[subprocess.Popen[str]] = set()
+_live_lock = threading.Lock()
+_cancelled = threading.Event()
+
+
 def _run(cmd: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    with _live_lock:
+        _live.add(proc)
+    try:
+        # Registered before checking, so probes_cancelled cannot miss it
+        if _cancelled.is_set():
+            proc.kill()
+        try:
+            out, err = proc.communicate(timeout=_timeout.get())
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+    finally:
+        with _live_lock:
+            _live.discard(proc)
+    return subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+
+
+@contextmanager
+def probes_cancelled() -> Iterator[None]:
+    """Kill running ffprobe children, and any started, until the block exits.
+
+    Lets a thread pool that is shutting down finish its in-flight probes
+    immediately instead of waiting for each one.
+    """
+    _cancelled.set()
+    with _live_lock:
+        running = list(_live)
+    for proc in running:
+        try:
+            proc.kill()
+        except OSError:
+            pass
+    try:
+        yield
+    finally:
+        _cancelled.clear()
 
 
 def _probe_full(
@@ -96,54 +236,24 @@ def _probe_fast(
     return result
 
 
-def probe_video_metadata(
-    file_path: Path,
-    ffprobe_args: list[str] | None = None,
-    stats: dict | None = None,
-) -> tuple[str | None, int]:
-    """Probe both video codec and audio channels using a single ffprobe call.
+# One ffprobe call yields everything the report needs: stream codec/channels for
+# classification and geometry/frame rate/bitrate/duration for bits-per-pixel.
+_PROBE_ENTRIES = (
+    "stream=index,codec_type,codec_name,channels,width,height,"
+    "avg_frame_rate,r_frame_rate,bit_rate:format=bit_rate,duration"
+)
 
-    Returns a tuple of (video_codec or None, audio_channels as int).
-    """
-    try:
-        base = [
-            "ffprobe",
-            "-v",
-            "quiet",
-            "-show_entries",
-            "stream=index,codec_type,codec_name,channels",
-            "-of",
-            "json",
-        ]
-        s = _ensure_stats(stats) if stats is not None else None
-        result: subprocess.CompletedProcess[str] | None
-        if ffprobe_args:
-            result = _probe_fast(base, file_path, ffprobe_args, s)
-            if result is None:
-                result = _probe_full(base, file_path, s)
-                if result.returncode != 0 or not result.stdout:
-                    return None, 0
-        else:
-            result = _probe_full(base, file_path, s)
-            if result.returncode != 0 or not result.stdout:
-                return None, 0
-
-        data = json.loads(result.stdout)
-        streams = data.get("streams", [])
-        v_codec: str | None = None
-        a_channels: int = 0
-        for s in streams:
-            stype = s.get("codec_type")
-            if stype == "video" and v_codec is None:
-                v_codec = s.get("codec_name")
-            elif stype == "audio" and a_channels == 0:
-                try:
-                    a_channels = int(s.get("channels", 0) or 0)
-                except (TypeError, ValueError):
-                    a_channels = 0
-        return v_codec, a_channels
-    except (json.JSONDecodeError, subprocess.TimeoutExpired, FileNotFoundError):
-        return None, 0
+
+def _probe_base_cmd() -> list[str]:
+    return [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        _PROBE_ENTRIES,
+        "-of",
+        "json",
+    ]
 
 
 def _parse_rate(rate: str | None) -> float:
@@ -161,58 +271,189 @@ def _parse_rate(rate: str | None) -> float:
         return 0.0
 
 
+def _to_int(val: Any) -> int:
+    try:
+        return int(val or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(val: Any) -> float:
+    try:
+        return float(val or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_probe_output(file_path: Path, stdout: str) -> FileProbeResult:
+    """Build a FileProbeResult from ffprobe JSON output.
+
+    Uses the first video stream and the first audio stream with a channel
+    count. Bitrate prefers the video stream's bit_rate over format.bit_rate.
+    Raises json.JSONDecodeError on malformed output.
+    """
+    data: dict[str, Any] = json.loads(stdout)
+    streams = data.get("streams", []) or []
+    fmt = data.get("format", {}) or {}
+    video: dict[str, Any] | None = None
+    a_channels = 0
+    for s in streams:
+        stype = s.get("codec_type")
+        if stype == "video" and video is None:
+            video = s
+        elif stype == "audio" and a_channels == 0:
+            a_channels = _to_int(s.get("channels"))
+    if video is None:
+        return FileProbeResult(path=file_path, codec=None, channels=a_channels)
+    return FileProbeResult(
+        path=file_path,
+        codec=video.get("codec_name"),
+        channels=a_channels,
+        width=_to_int(video.get("width")),
+        height=_to_int(video.get("height")),
+        fps=_parse_rate(video.get("avg_frame_rate"))
+        or _parse_rate(video.get("r_frame_rate")),
+        bit_rate=_to_int(video.get("bit_rate")) or _to_int(fmt.get("bit_rate")),
+        duration=_to_float(fmt.get("duration")),
+    )
+
+
+def probe_video(
+    file_path: Path,
+    ffprobe_args: list[str] | None = None,
+    stats: dict | None = None,
+) -> FileProbeResult:
+    """Probe codec, audio channels and bpp inputs using a single ffprobe call.
+
+    With ffprobe_args (fast probe), a failed fast attempt falls back to one
+    full probe. If probing fails the result has codec None and `error` set to
+    one of the ERROR_* kinds.
+    """
+    try:
+        base = _probe_base_cmd()
+        s = _ensure_stats(stats) if stats is not None else None
+        result: subprocess.CompletedProcess[str] | None
+        if ffprobe_args:
+            result = _probe_fast(base, file_path, ffprobe_args, s)
+            if result is None:
+                result = _probe_full(base, file_path, s)
+        else:
+            result = _probe_full(base, file_path, s)
+        if result.returncode != 0 or not result.stdout:
+            return _failed(file_path, _failure_kind(result))
+        return _parse_probe_output(file_path, result.stdout)
+    except json.JSONDecodeError:
+        return _failed(file_path, ERROR_BAD_OUTPUT)
+    except subprocess.TimeoutExpired:
+        return _failed(file_path, ERROR_TIMEOUT)
+    except FileNotFoundError:
+        return _failed(file_path, ERROR_NO_FFPROBE)
+
+
+def _failed(file_path: Path, error: str) -> FileProbeResult:
+    return FileProbeResult(path=file_path, codec=None, channels=0, error=error)
+
+
+def probe_video_metadata(
+    file_path: Path,
+    ffprobe_args: list[str] | None = None,
+    stats: dict | None = None,
+) -> tuple[str | None, int]:
+    """Return (video_codec or None, audio_channels) for a file.
+
+    Thin wrapper over probe_video kept for callers that only need the codec.
+    """
+    result = probe_video(file_path, ffprobe_args, stats)
+    return result.codec, result.channels
+
+
 def compute_bpp(file_path: Path, ffprobe_args: list[str] | None = None) -> float:
     """Compute bits-per-pixel (bpp) for the primary video stream.
 
     bpp = bitrate_bits_per_sec / (fps * width * height)
 
     Falls back to `format.bit_rate` if stream bit_rate is unavailable.
-    Returns 0.0 if any required component is missing or invalid.
+    Returns 0.0 if any required component is missing or invalid. Prefer
+    `probe_video(...).bpp` when the codec is needed too.
     """
+    return probe_video(file_path, ffprobe_args).bpp
+
+
+# ---- asyncio variants (same fast/full fallback and stats accounting) ----
+
+
+async def _run_async(cmd: list[str]) -> subprocess.CompletedProcess[str]:
+    """Run a command without blocking a thread; kill it on timeout or cancel."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), _timeout.get())
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return subprocess.CompletedProcess(
+        args=cmd,
+        returncode=proc.returncode or 0,
+        stdout=out.decode("utf-8", errors="replace"),
+        stderr=err.decode("utf-8", errors="replace"),
+    )
+
+
+async def _probe_full_async(
+    base: list[str], file_path: Path, stats: dict | None
+) -> subprocess.CompletedProcess[str]:
+    if stats is not None:
+        stats["full_probes"] += 1
+    t0 = time.perf_counter()
+    result = await _run_async(base + [str(file_path)])
+    if stats is not None:
+        stats["full_time"] += time.perf_counter() - t0
+    return result
+
+
+async def _probe_fast_async(
+    base: list[str], file_path: Path, ffprobe_args: list[str], stats: dict | None
+) -> subprocess.CompletedProcess[str] | None:
+    if stats is not None:
+        stats["fast_attempted"] += 1
+    t0 = time.perf_counter()
+    result = await _run_async(base + ffprobe_args + [str(file_path)])
+    if stats is not None:
+        stats["fast_time"] += time.perf_counter() - t0
+    if result.returncode != 0 or not result.stdout:
+        if stats is not None:
+            stats["fast_fallbacks"] += 1
+        return None
+    if stats is not None:
+        stats["fast_succeeded"] += 1
+    return result
+
+
+async def probe_video_async(
+    file_path: Path,
+    ffprobe_args: list[str] | None = None,
+    stats: dict | None = None,
+) -> FileProbeResult:
+    """asyncio counterpart of probe_video with identical semantics."""
     try:
-        base = [
-            "ffprobe",
-            "-v",
-            "quiet",
-            "-select_streams",
-            "v:0",
-            "-show_entries",
-            "stream=width,height,avg_frame_rate,r_frame_rate,bit_rate",
-            "-show_entries",
-            "format=bit_rate",
-            "-of",
-            "json",
-        ]
-        cmd = base + (ffprobe_args or []) + [str(file_path)]
-        result = _run(cmd)
+        base = _probe_base_cmd()
+        s = _ensure_stats(stats) if stats is not None else None
+        result: subprocess.CompletedProcess[str] | None = None
+        if ffprobe_args:
+            result = await _probe_fast_async(base, file_path, ffprobe_args, s)
+        if result is None:
+            result = await _probe_full_async(base, file_path, s)
         if result.returncode != 0 or not result.stdout:
-            return 0.0
-        data: dict[str, Any] = json.loads(result.stdout)
-        streams = data.get("streams", []) or []
-        fmt = data.get("format", {}) or {}
-        width = 0
-        height = 0
-        fps = 0.0
-        v_bitrate = 0
-        if streams:
-            s0 = streams[0]
-            width = int(s0.get("width") or 0)
-            height = int(s0.get("height") or 0)
-            fps = _parse_rate(s0.get("avg_frame_rate")) or _parse_rate(
-                s0.get("r_frame_rate")
-            )
-            try:
-                v_bitrate = int(s0.get("bit_rate") or 0)
-            except (TypeError, ValueError):
-                v_bitrate = 0
-        if v_bitrate <= 0:
-            try:
-                v_bitrate = int(fmt.get("bit_rate") or 0)
-            except (TypeError, ValueError):
-                v_bitrate = 0
-        if width <= 0 or height <= 0 or fps <= 0.0 or v_bitrate <= 0:
-            return 0.0
-        denom = fps * width * height
-        return float(v_bitrate) / float(denom) if denom > 0 else 0.0
-    except (json.JSONDecodeError, subprocess.TimeoutExpired, FileNotFoundError):
-        return 0.0
+            return _failed(file_path, _failure_kind(result))
+        return _parse_probe_output(file_path, result.stdout)
+    except json.JSONDecodeError:
+        return _failed(file_path, ERROR_BAD_OUTPUT)
+    except asyncio.TimeoutError:
+        return _failed(file_path, ERROR_TIMEOUT)
+    except FileNotFoundError:
+        return _failed(file_path, ERROR_NO_FFPROBE)
@@ -0,0 +1,430 @@
+"""Watch a directory tree for new or rewritten video files.
+
+Uses Linux inotify (through ctypes, no extra dependency) with one watch per
+directory. Network filesystems do not deliver inotify events for remote
+writers, so on those, or when inotify is unavailable or out of watches, the
+watcher polls instead: directories whose mtime changed are listed again and
+known files are checked for a new size or mtime. Either way a file is
+reported only after its size and mtime have been stable for a settle period,
+so files still being copied are not probed.
+
+Setting up either source walks the whole tree, which runs on a background
+thread so that it overlaps the initial scan. Files changed after the watcher
+was created but before the walk reached their directory are reported by the
+walk itself, so nothing landing during the scan is missed.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Protocol
+
+from video_codec_checker.models import WatchSettings
+from video_codec_checker.mounts import filesystem_type
+from video_codec_checker.video_processor import VIDEO_EXTENSIONS, iter_video_files
+
+# How often pending files are re-checked for stability.
+_TICK = 1.0
+
+# Files changed this long before the watcher started still count as new, to
+# allow for clock skew between this host and a file server
+_SKEW_NS = 2_000_000_000
+
+NETWORK_FS_TYPES = frozenset(
+    {
+        "nfs",
+        "nfs4",
+        "cifs",
+        "smb3",
+        "smbfs",
+        "9p",
+        "afs",
+        "ceph",
+        "glusterfs",
+        "lustre",
+        "fuse.sshfs",
+        "fuse.rclone",
+        "fuse.s3fs",
+    }
+)
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CREATE | IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+def _is_video(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+
+
+def _changed_since(st: os.stat_result, since_ns: int | None) -> bool:
+    """Modified or moved in (which sets ctime) at or after since_ns."""
+    return since_ns is not None and max(st.st_mtime_ns, st.st_ctime_ns) >= since_ns
+
+
+def _path_changed_since(path: Path, since_ns: int | None) -> bool:
+    if since_ns is None:
+        return False
+    try:
+        return _changed_since(os.stat(path), since_ns)
+    except OSError:
+        return False
+
+
+class _Source(Protocol):
+    def wait(self, timeout: float) -> list[Path]: ...
+
+    def close(self) -> None: ...
+
+
+class InotifySource:
+    """Recursive inotify watch yielding candidate file paths.
+
+    With since_ns, video files changed at or after it that the initial walk
+    finds are returned by the first wait().
+    """
+
+    def __init__(self, root: Path, since_ns: int | None = None) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._root = root
+        self._dirs: dict[int, str] = {}
+        try:
+            found = self._watch_tree(str(root))
+        except OSError:
+            os.close(fd)
+            raise
+        self._backlog = [fp for fp in found if _path_changed_since(fp, since_ns)]
+
+    def _watch(self, directory: str) -> None:
+        wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return  # vanished or unreadable; nothing to watch
+            raise OSError(err, f"inotify_add_watch({directory}): {os.strerror(err)}")
+        self._dirs[wd] = directory
+
+    def _watch_tree(self, top: str) -> list[Path]:
+        """Watch top and its subdirectories; return video files already there."""
+        found: list[Path] = []
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            self._watch(d)
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif _is_video(entry.name):
+                                found.append(Path(entry.path))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def wait(self, timeout: float) -> list[Path]:
+        if self._backlog:
+            backlog, self._backlog = self._backlog, []
+            return backlog
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        return self._parse(buf)
+
+    def _parse(self, buf: bytes) -> list[Path]:
+        out: list[Path] = []
+        pos = 0
+        while pos + _EVENT.size <= len(buf):
+            wd, mask, _, length = _EVENT.unpack_from(buf, pos)
+            raw = buf[pos + _EVENT.size : pos + _EVENT.size + length]
+            name = os.fsdecode(raw.rstrip(b"\0"))
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; re-list the tree once to catch up
+                print("Watch: inotify queue overflowed; rescanning", file=sys.stderr)
+                out.extend(iter_video_files(str(self._root)))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    out.extend(self._watch_tree(path))
+            elif _is_video(name):
+                out.append(Path(path))
+        return out
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _Listing(NamedTuple):
+    mtime_ns: int
+    # video file name -> (size, mtime_ns)
+    files: dict[str, tuple[int, int]]
+    subdirs: set[str]
+
+
+class PollingSource:
+    """Detect new and rewritten files by polling.
+
+    Only directories whose mtime changed are listed again; files already
+    known are stat()ed, since rewriting a file in place leaves its
+    directory's mtime alone. With since_ns, video files changed at or after
+    it that the initial walk finds are returned by the first wait().
+    """
+
+    def __init__(
+        self, root: Path, interval: float, since_ns: int | None = None
+    ) -> None:
+        self._interval = interval
+        self._next = time.monotonic() + interval
+        self._dirs: dict[str, _Listing] = {}
+        self._backlog = self._add_tree(str(root), since_ns)
+
+    @staticmethod
+    def _list(d: str, since_ns: int | None) -> tuple[_Listing, list[Path]] | None:
+        """The listing of d, plus its video files changed since since_ns."""
+        files: dict[str, tuple[int, int]] = {}
+        subdirs: set[str] = set()
+        recent: list[Path] = []
+        try:
+            mtime = os.stat(d).st_mtime_ns
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.add(entry.path)
+                        elif _is_video(entry.name):
+                            st = entry.stat()
+                            files[entry.name] = (st.st_size, st.st_mtime_ns)
+                            if _changed_since(st, since_ns):
+                                recent.append(Path(entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return _Listing(mtime, files, subdirs), recent
+
+    def _add_tree(self, top: str, since_ns: int | None) -> list[Path]:
+        """Track top and its subdirectories; return files changed since since_ns.
+
+        since_ns=0 returns every file (for a directory that appeared while
+        watching).
+        """
+        new: list[Path] = []
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            listed = self._list(d, since_ns)
+            if listed is None:
+                continue
+            self._dirs[d], recent = listed
+            new.extend(sorted(recent))
+            stack.extend(self._dirs[d].subdirs)
+        return new
+
+    def _refresh(self, d: str) -> list[Path]:
+        old = self._dirs[d]
+        listed = self._list(d, None)
+        if listed is None:
+            del self._dirs[d]
+            return []
+        listing = self._dirs[d] = listed[0]
+        new = [
+            Path(d, name)
+            for name, sig in sorted(listing.files.items())
+            if old.files.get(name) != sig
+        ]
+        for sub in sorted(listing.subdirs - old.subdirs):
+            new.extend(self._add_tree(sub, since_ns=0))
+        return new
+
+    def _recheck(self, d: str) -> list[Path]:
+        """Files of an unchanged directory whose size or mtime changed."""
+        listing = self._dirs[d]
+        new: list[Path] = []
+        for name, sig in sorted(listing.files.items()):
+            path = Path(d, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # removed; the directory's mtime shows it next poll
+            current = (st.st_size, st.st_mtime_ns)
+            if current != sig:
+                listing.files[name] = current
+                new.append(path)
+        return new
+
+    def wait(self, timeout: float) -> list[Path]:
+        if self._backlog:
+            backlog, self._backlog = self._backlog, []
+            return backlog
+        delay = self._next - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, delay))
+        self._next = time.monotonic() + self._interval
+        new: list[Path] = []
+        for d in list(self._dirs):
+            if d not in self._dirs:
+                continue  # dropped while refreshing a parent
+            try:
+                changed = os.stat(d).st_mtime_ns != self._dirs[d].mtime_ns
+            except OSError:
+                del self._dirs[d]
+                continue
+            new.extend(self._refresh(d) if changed else self._recheck(d))
+        return new
+
+    def close(self) -> None:
+        self._dirs.clear()
+
+
+class Debouncer:
+    """Hold candidate files until their size and mtime stop changing."""
+
+    def __init__(self, settle: float) -> None:
+        self.settle = settle
+        self._pending: dict[Path, tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, path: Path, now: float) -> None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return
+        self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+
+    def ready(self, now: float) -> list[Path]:
+        """Return (and forget) files unchanged for at least `settle` seconds."""
+        out: list[Path] = []
+        for path, (size, mtime_ns, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self._pending[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.settle:
+                del self._pending[path]
+                out.append(path)
+        out.sort()
+        return out
+
+
+class Watcher:
+    """Yield batches of settled new or rewritten video files under a root.
+
+    Create it before the initial scan so nothing that lands during the scan
+    is missed. Its source is set up on a background thread while the scan
+    runs; files the scan also finds may come up again, so callers skip
+    files they have already reported unchanged.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        settings: WatchSettings | None = None,
+        accept: Callable[[Path], bool] | None = None,
+    ) -> None:
+        self.settings = settings or WatchSettings()
+        self.root = Path(root)
+        self._accept = accept
+        self._stop = threading.Event()
+        self._debouncer = Debouncer(self.settings.settle)
+        self.mode = "poll"
+        self._source: _Source | None = None
+        self._error: Exception | None = None
+        self._setup = threading.Thread(
+            target=self._start,
+            args=(time.time_ns() - _SKEW_NS,),
+            name="watch-setup",
+            daemon=True,
+        )
+        self._setup.start()
+
+    def _start(self, since_ns: int) -> None:
+        try:
+            self._source = self._open(since_ns)
+        except Exception as e:  # re-raised by started()
+            self._error = e
+
+    def _open(self, since_ns: int) -> _Source:
+        fstype = filesystem_type(self.root)
+        if not self.settings.force_poll and fstype not in NETWORK_FS_TYPES:
+            try:
+                source = InotifySource(self.root, since_ns)
+                self.mode = "inotify"
+                return source
+            except (OSError, AttributeError) as e:
+                print(f"Watch: inotify unavailable ({e}); polling", file=sys.stderr)
+        return PollingSource(self.root, self.settings.poll_interval, since_ns)
+
+    def started(self) -> _Source:
+        """Wait for the source's initial walk to finish (this sets `mode`)."""
+        self._setup.join()
+        if self._error is not None:
+            raise self._error
+        assert self._source is not None
+        return self._source
+
+    def stop(self) -> None:
+        """Ask batches() to return; safe to call from a signal handler."""
+        self._stop.set()
+
+    def batches(self) -> Iterator[list[Path]]:
+        """Block until files settle and yield them, until stop() is called."""
+        source = self.started()
+        try:
+            while not self._stop.is_set():
+                for path in source.wait(_TICK):
+                    if self._accept is None or self._accept(path):
+                        self._debouncer.add(path, time.monotonic())
+                ready = self._debouncer.ready(time.monotonic())
+                if ready:
+                    yield ready
+        finally:
+            source.close()